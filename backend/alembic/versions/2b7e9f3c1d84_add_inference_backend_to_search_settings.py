@@ -0,0 +1,45 @@
+"""add inference backend to search_settings
+
+Revision ID: 2b7e9f3c1d84
+Revises: c4e1a7d92f05
+Create Date: 2025-04-26 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from shared_configs.enums import InferenceBackend
+
+
+# revision identifiers, used by Alembic.
+revision = "2b7e9f3c1d84"
+down_revision = "c4e1a7d92f05"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "search_settings",
+        sa.Column(
+            "inference_backend",
+            sa.Enum(InferenceBackend, native_enum=False),
+            nullable=False,
+            server_default=InferenceBackend.TORCH.name,
+        ),
+    )
+    op.add_column(
+        "search_settings",
+        sa.Column(
+            "rerank_inference_backend",
+            sa.Enum(InferenceBackend, native_enum=False),
+            nullable=False,
+            server_default=InferenceBackend.TORCH.name,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("search_settings", "rerank_inference_backend")
+    op.drop_column("search_settings", "inference_backend")
@@ -0,0 +1,34 @@
+"""add object_key to file_store
+
+Revision ID: 41e0db9bd7f1
+Revises: 4cea1b52a89b
+Create Date: 2025-04-22 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "41e0db9bd7f1"
+down_revision = "4cea1b52a89b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("file_store", sa.Column("object_key", sa.String(), nullable=True))
+    op.create_index(
+        op.f("ix_file_store_object_key"), "file_store", ["object_key"], unique=False
+    )
+    op.alter_column("file_store", "lobj_oid", existing_type=sa.Integer(), nullable=True)
+
+
+def downgrade() -> None:
+    # files in the object store can't be represented anymore
+    op.execute("DELETE FROM file_store WHERE lobj_oid IS NULL")
+    op.alter_column(
+        "file_store", "lobj_oid", existing_type=sa.Integer(), nullable=False
+    )
+    op.drop_index(op.f("ix_file_store_object_key"), table_name="file_store")
+    op.drop_column("file_store", "object_key")
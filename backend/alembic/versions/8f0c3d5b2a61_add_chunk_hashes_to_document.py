@@ -0,0 +1,28 @@
+"""add chunk_hashes to document
+
+Revision ID: 8f0c3d5b2a61
+Revises: 41e0db9bd7f1
+Create Date: 2025-04-24 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "8f0c3d5b2a61"
+down_revision = "41e0db9bd7f1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document",
+        sa.Column("chunk_hashes", postgresql.ARRAY(sa.String()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("document", "chunk_hashes")
@@ -9,6 +9,7 @@ from fastapi import HTTPException
 from fastapi import Request
 from fastapi import Response
 from fastapi import status
+from fastapi.concurrency import run_in_threadpool
 from fastapi_users import exceptions
 from onelogin.saml2.auth import OneLogin_Saml2_Auth  # type: ignore
 from pydantic import BaseModel
@@ -194,7 +195,13 @@ async def saml_login_callback(
     session_cookie = secrets.token_hex(16)
     saved_cookie = encrypt_string(session_cookie)
 
-    upsert_saml_account(user_id=user.id, cookie=saved_cookie, db_session=db_session)
+    # blocking db calls are run in the threadpool, not on the event loop
+    await run_in_threadpool(
+        upsert_saml_account,
+        user_id=user.id,
+        cookie=saved_cookie,
+        db_session=db_session,
+    )
 
     # Redirect to main Onyx search page
     response = Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -2,6 +2,7 @@ from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import HTTPException
 from fastapi import Response
+from fastapi.concurrency import run_in_threadpool
 
 from ee.onyx.auth.users import current_cloud_superuser
 from ee.onyx.server.tenants.models import ImpersonateRequest
@@ -18,21 +19,25 @@ logger = setup_logger()
 router = APIRouter(prefix="/tenants")
 
 
+def _get_user_by_email_across_tenants(email: str) -> User | None:
+    tenant_id = get_tenant_id_for_email(email)
+    with get_session_with_tenant(tenant_id=tenant_id) as tenant_session:
+        return get_user_by_email(email, tenant_session)
+
+
 @router.post("/impersonate")
 async def impersonate_user(
     impersonate_request: ImpersonateRequest,
     _: User = Depends(current_cloud_superuser),
 ) -> Response:
     """Allows a cloud superuser to impersonate another user by generating an impersonation JWT token"""
-    tenant_id = get_tenant_id_for_email(impersonate_request.email)
-
-    with get_session_with_tenant(tenant_id=tenant_id) as tenant_session:
-        user_to_impersonate = get_user_by_email(
-            impersonate_request.email, tenant_session
-        )
-        if user_to_impersonate is None:
-            raise HTTPException(status_code=404, detail="User not found")
-        token = await get_redis_strategy().write_token(user_to_impersonate)
+    # blocking db calls are run in the threadpool, not on the event loop
+    user_to_impersonate = await run_in_threadpool(
+        _get_user_by_email_across_tenants, impersonate_request.email
+    )
+    if user_to_impersonate is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    token = await get_redis_strategy().write_token(user_to_impersonate)
 
     response = await auth_backend.transport.get_login_response(token)
     response.set_cookie(
@@ -28,7 +28,7 @@ router = APIRouter(prefix="/tenants")
 
 
 @router.get("/anonymous-user-path")
-async def get_anonymous_user_path_api(
+def get_anonymous_user_path_api(
     _: User | None = Depends(current_admin_user),
 ) -> AnonymousUserPath:
     tenant_id = get_current_tenant_id()
@@ -43,7 +43,7 @@ async def get_anonymous_user_path_api(
 
 
 @router.post("/anonymous-user-path")
-async def set_anonymous_user_path_api(
+def set_anonymous_user_path_api(
     anonymous_user_path: str,
     _: User | None = Depends(current_admin_user),
 ) -> None:
@@ -70,7 +70,7 @@ async def set_anonymous_user_path_api(
 
 
 @router.post("/anonymous-user")
-async def login_as_anonymous_user(
+def login_as_anonymous_user(
     anonymous_user_path: str,
     _: User | None = Depends(optional_user),
 ) -> Response:
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from ee.onyx.server.tenants.provisioning import delete_user_from_control_plane
@@ -34,7 +35,10 @@ async def leave_organization(
             status_code=403, detail="You can only leave the organization as yourself"
         )
 
-    user_to_delete = get_user_by_email(user_email.user_email, db_session)
+    # blocking db calls are run in the threadpool, not on the event loop
+    user_to_delete = await run_in_threadpool(
+        get_user_by_email, user_email.user_email, db_session
+    )
     if user_to_delete is None:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -58,6 +62,21 @@ async def leave_organization(
                 detail=f"Failed to remove user from control plane: {str(e)}",
             )
 
+    await run_in_threadpool(
+        _remove_user_from_organization,
+        user_to_delete=user_to_delete,
+        tenant_id=tenant_id,
+        should_delete_tenant=should_delete_tenant,
+        db_session=db_session,
+    )
+
+
+def _remove_user_from_organization(
+    user_to_delete: User,
+    tenant_id: str,
+    should_delete_tenant: bool,
+    db_session: Session,
+) -> None:
     db_session.expunge(user_to_delete)
     delete_user_from_db(user_to_delete, db_session)
 
@@ -0,0 +1,181 @@
+"""
+Dynamic batching of the requests to the local models.
+
+Search queries mostly embed or rerank a handful of texts, so under concurrent load the
+model server ends up running many tiny forward passes side by side, which is much
+slower than running one larger pass, especially on CPU. Requests for the same model
+(and settings) that arrive within MODEL_SERVER_BATCH_WAIT_MS of each other are merged
+into one batch of at most MODEL_SERVER_MAX_BATCH_SIZE items. Batches for a given model
+run one at a time, requests arriving meanwhile are merged into the next batch.
+
+Requests that are already as large as a batch (e.g. from indexing) skip the queue.
+"""
+
+import asyncio
+import time
+from collections.abc import Callable
+from collections.abc import Hashable
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Generic
+from typing import TypeVar
+
+from prometheus_client import Histogram
+
+from shared_configs.configs import MODEL_SERVER_BATCH_WAIT_MS
+from shared_configs.configs import MODEL_SERVER_MAX_BATCH_SIZE
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+BATCH_QUEUE_DEPTH = Histogram(
+    "onyx_model_server_batch_queue_depth",
+    "Number of items waiting for a forward pass when a request is queued",
+    ["batcher"],
+    buckets=_SIZE_BUCKETS,
+)
+BATCH_SIZE = Histogram(
+    "onyx_model_server_batch_size",
+    "Number of items per forward pass",
+    ["batcher"],
+    buckets=_SIZE_BUCKETS,
+)
+BATCH_REQUESTS = Histogram(
+    "onyx_model_server_batch_requests",
+    "Number of requests merged into a forward pass",
+    ["batcher"],
+    buckets=_SIZE_BUCKETS,
+)
+
+
+@dataclass
+class _PendingRequest(Generic[T, R]):
+    items: list[T]
+    future: "asyncio.Future[Sequence[R]]"
+    queued_at: float
+
+
+class MicroBatcher(Generic[T, R]):
+    def __init__(
+        self,
+        name: str,
+        max_batch_size: int = MODEL_SERVER_MAX_BATCH_SIZE,
+        max_wait_seconds: float = MODEL_SERVER_BATCH_WAIT_MS / 1000,
+    ) -> None:
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+
+        self._pending: dict[Hashable, list[_PendingRequest[T, R]]] = {}
+        self._batch_full: dict[Hashable, asyncio.Event] = {}
+        self._workers: dict[Hashable, asyncio.Task] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_wait_seconds > 0 and self.max_batch_size > 1
+
+    async def run(
+        self,
+        key: Hashable,
+        items: list[T],
+        process_batch: Callable[[list[T]], Sequence[R]],
+    ) -> Sequence[R]:
+        """Returns `process_batch(items)`, computed in the default executor together
+        with the items of the other requests for the same `key`. `process_batch` must
+        return exactly one result per item and must be the same for a given `key`."""
+        loop = asyncio.get_running_loop()
+        if not self.enabled or len(items) >= self.max_batch_size:
+            BATCH_SIZE.labels(self.name).observe(len(items))
+            BATCH_REQUESTS.labels(self.name).observe(1)
+            return await loop.run_in_executor(None, process_batch, items)
+
+        future: asyncio.Future[Sequence[R]] = loop.create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append(_PendingRequest(items, future, time.monotonic()))
+
+        num_pending_items = sum(len(request.items) for request in pending)
+        BATCH_QUEUE_DEPTH.labels(self.name).observe(num_pending_items)
+
+        if key not in self._workers:
+            self._batch_full[key] = asyncio.Event()
+            self._workers[key] = asyncio.create_task(
+                self._process_pending(key, process_batch)
+            )
+        elif num_pending_items >= self.max_batch_size:
+            self._batch_full[key].set()
+
+        return await future
+
+    async def _process_pending(
+        self,
+        key: Hashable,
+        process_batch: Callable[[list[T]], Sequence[R]],
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        batch_full = self._batch_full[key]
+        try:
+            while self._pending.get(key):
+                pending = self._pending[key]
+
+                # wait for more requests, unless the oldest one already waited enough
+                batch_full.clear()
+                wait_seconds = self.max_wait_seconds - (
+                    time.monotonic() - pending[0].queued_at
+                )
+                num_pending_items = sum(len(request.items) for request in pending)
+                if wait_seconds > 0 and num_pending_items < self.max_batch_size:
+                    try:
+                        await asyncio.wait_for(batch_full.wait(), wait_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+
+                batch = self._pop_batch(key)
+                items = [item for request in batch for item in request.items]
+                BATCH_SIZE.labels(self.name).observe(len(items))
+                BATCH_REQUESTS.labels(self.name).observe(len(batch))
+
+                try:
+                    results = await loop.run_in_executor(None, process_batch, items)
+                    if len(results) != len(items):
+                        raise RuntimeError(
+                            f"Got {len(results)} results for a batch of {len(items)} items"
+                        )
+                except Exception as e:
+                    for request in batch:
+                        if not request.future.done():
+                            request.future.set_exception(e)
+                else:
+                    offset = 0
+                    for request in batch:
+                        # the request may have been cancelled, e.g. the client went away
+                        if not request.future.done():
+                            request.future.set_result(
+                                results[offset : offset + len(request.items)]
+                            )
+                        offset += len(request.items)
+        finally:
+            del self._workers[key]
+            del self._batch_full[key]
+            for request in self._pending.pop(key, []):
+                if not request.future.done():
+                    request.future.set_exception(
+                        RuntimeError(f"{self.name} batcher stopped")
+                    )
+
+    def _pop_batch(self, key: Hashable) -> list[_PendingRequest[T, R]]:
+        """Takes the oldest requests that fit in a batch, always at least one."""
+        pending = self._pending[key]
+        num_requests = 1
+        num_items = len(pending[0].items)
+        while (
+            num_requests < len(pending)
+            and num_items + len(pending[num_requests].items) <= self.max_batch_size
+        ):
+            num_items += len(pending[num_requests].items)
+            num_requests += 1
+
+        batch = pending[:num_requests]
+        self._pending[key] = pending[num_requests:]
+        return batch
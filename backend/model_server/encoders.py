@@ -7,6 +7,7 @@ from typing import Optional
 
 import aioboto3  # type: ignore
 import httpx
+import numpy as np
 import openai
 import vertexai  # type: ignore
 import voyageai  # type: ignore
@@ -14,6 +15,7 @@ from cohere import AsyncClient as CohereAsyncClient
 from fastapi import APIRouter
 from fastapi import HTTPException
 from fastapi import Request
+from fastapi import Response
 from google.oauth2 import service_account  # type: ignore
 from litellm import aembedding
 from litellm.exceptions import RateLimitError
@@ -23,12 +25,16 @@ from sentence_transformers import SentenceTransformer  # type: ignore
 from vertexai.language_models import TextEmbeddingInput  # type: ignore
 from vertexai.language_models import TextEmbeddingModel  # type: ignore
 
+from model_server.batching import MicroBatcher
 from model_server.constants import DEFAULT_COHERE_MODEL
 from model_server.constants import DEFAULT_OPENAI_MODEL
 from model_server.constants import DEFAULT_VERTEX_MODEL
 from model_server.constants import DEFAULT_VOYAGE_MODEL
 from model_server.constants import EmbeddingModelTextType
 from model_server.constants import EmbeddingProvider
+from model_server.onnx_models import load_onnx_embedding_model
+from model_server.onnx_models import load_onnx_reranking_model
+from model_server.onnx_models import OnnxCrossEncoder
 from model_server.utils import pass_aws_key
 from model_server.utils import simple_log_function_time
 from onyx.utils.logger import setup_logger
@@ -36,7 +42,10 @@ from shared_configs.configs import API_BASED_EMBEDDING_TIMEOUT
 from shared_configs.configs import INDEXING_ONLY
 from shared_configs.configs import OPENAI_EMBEDDING_TIMEOUT
 from shared_configs.configs import VERTEXAI_EMBEDDING_LOCAL_BATCH_SIZE
+from shared_configs.embedding_transport import encode_embeddings
+from shared_configs.embedding_transport import select_embeddings_media_type
 from shared_configs.enums import EmbedTextType
+from shared_configs.enums import InferenceBackend
 from shared_configs.enums import RerankerProvider
 from shared_configs.model_server_models import Embedding
 from shared_configs.model_server_models import EmbedRequest
@@ -50,8 +59,13 @@ logger = setup_logger()
 
 router = APIRouter(prefix="/encoder")
 
-_GLOBAL_MODELS_DICT: dict[str, "SentenceTransformer"] = {}
-_RERANK_MODEL: Optional["CrossEncoder"] = None
+_GLOBAL_MODELS_DICT: dict[tuple[str, InferenceBackend], "SentenceTransformer"] = {}
+_RERANK_MODEL: Optional["CrossEncoder | OnnxCrossEncoder"] = None
+_RERANK_MODEL_BACKEND: InferenceBackend | None = None
+
+# merges concurrent requests for the same local model into one forward pass
+_EMBEDDING_BATCHER: MicroBatcher[str, Embedding] = MicroBatcher("embedding")
+_RERANK_BATCHER: MicroBatcher[tuple[str, str], float] = MicroBatcher("rerank")
 
 # If we are not only indexing, dont want retry very long
 _RETRY_DELAY = 10 if INDEXING_ONLY else 0.1
@@ -362,37 +376,63 @@ class CloudEmbedding:
 def get_embedding_model(
     model_name: str,
     max_context_length: int,
+    inference_backend: InferenceBackend = InferenceBackend.TORCH,
 ) -> "SentenceTransformer":
     from sentence_transformers import SentenceTransformer  # type: ignore
 
     global _GLOBAL_MODELS_DICT  # A dictionary to store models
 
-    if model_name not in _GLOBAL_MODELS_DICT:
-        logger.notice(f"Loading {model_name}")
-        # Some model architectures that aren't built into the Transformers or Sentence
-        # Transformer need to be downloaded to be loaded locally. This does not mean
-        # data is sent to remote servers for inference, however the remote code can
-        # be fairly arbitrary so only use trusted models
-        model = SentenceTransformer(
-            model_name_or_path=model_name,
-            trust_remote_code=True,
+    model_key = (model_name, inference_backend)
+    if model_key not in _GLOBAL_MODELS_DICT:
+        logger.notice(
+            f"Loading {model_name} with the {inference_backend.value} backend"
         )
+        model: SentenceTransformer | None = None
+        if inference_backend != InferenceBackend.TORCH:
+            try:
+                model = load_onnx_embedding_model(model_name, inference_backend)
+            except Exception:
+                logger.exception(
+                    f"Failed to load {model_name} with the {inference_backend.value} "
+                    "backend, falling back to torch"
+                )
+        if model is None:
+            # Some model architectures that aren't built into the Transformers or Sentence
+            # Transformer need to be downloaded to be loaded locally. This does not mean
+            # data is sent to remote servers for inference, however the remote code can
+            # be fairly arbitrary so only use trusted models
+            model = SentenceTransformer(
+                model_name_or_path=model_name,
+                trust_remote_code=True,
+            )
         model.max_seq_length = max_context_length
-        _GLOBAL_MODELS_DICT[model_name] = model
-    elif max_context_length != _GLOBAL_MODELS_DICT[model_name].max_seq_length:
-        _GLOBAL_MODELS_DICT[model_name].max_seq_length = max_context_length
+        _GLOBAL_MODELS_DICT[model_key] = model
+    elif max_context_length != _GLOBAL_MODELS_DICT[model_key].max_seq_length:
+        _GLOBAL_MODELS_DICT[model_key].max_seq_length = max_context_length
 
-    return _GLOBAL_MODELS_DICT[model_name]
+    return _GLOBAL_MODELS_DICT[model_key]
 
 
 def get_local_reranking_model(
     model_name: str,
-) -> CrossEncoder:
-    global _RERANK_MODEL
-    if _RERANK_MODEL is None:
-        logger.notice(f"Loading {model_name}")
-        model = CrossEncoder(model_name)
-        _RERANK_MODEL = model
+    inference_backend: InferenceBackend = InferenceBackend.TORCH,
+) -> CrossEncoder | OnnxCrossEncoder:
+    global _RERANK_MODEL, _RERANK_MODEL_BACKEND
+    if _RERANK_MODEL is None or _RERANK_MODEL_BACKEND != inference_backend:
+        logger.notice(
+            f"Loading {model_name} with the {inference_backend.value} backend"
+        )
+        model: CrossEncoder | OnnxCrossEncoder | None = None
+        if inference_backend != InferenceBackend.TORCH:
+            try:
+                model = load_onnx_reranking_model(model_name, inference_backend)
+            except Exception:
+                logger.exception(
+                    f"Failed to load {model_name} with the {inference_backend.value} "
+                    "backend, falling back to torch"
+                )
+        _RERANK_MODEL = model or CrossEncoder(model_name)
+        _RERANK_MODEL_BACKEND = inference_backend
     return _RERANK_MODEL
 
 
@@ -411,7 +451,10 @@ async def embed_text(
     api_version: str | None,
     reduced_dimension: int | None,
     gpu_type: str = "UNKNOWN",
-) -> list[Embedding]:
+    inference_backend: InferenceBackend = InferenceBackend.TORCH,
+) -> list[Embedding] | np.ndarray:
+    """Local models return the (num_texts, dim) matrix they produce as is, so it can
+    be sent in a binary format without going through Python floats."""
     if not all(texts):
         logger.error("Empty strings provided for embedding")
         raise ValueError("Empty strings are not allowed for embedding.")
@@ -426,6 +469,7 @@ async def embed_text(
     for text in texts:
         total_chars += len(text)
 
+    embeddings: list[Embedding] | np.ndarray
     if provider_type is not None:
         logger.info(
             f"Embedding {len(texts)} texts with {total_chars} total characters with provider: {provider_type}"
@@ -479,19 +523,27 @@ async def embed_text(
         prefixed_texts = [f"{prefix}{text}" for text in texts] if prefix else texts
 
         local_model = get_embedding_model(
-            model_name=model_name, max_context_length=max_context_length
+            model_name=model_name,
+            max_context_length=max_context_length,
+            inference_backend=inference_backend,
         )
-        # Run CPU-bound embedding in a thread pool
-        embeddings_vectors = await asyncio.get_event_loop().run_in_executor(
-            None,
-            lambda: local_model.encode(
-                prefixed_texts, normalize_embeddings=normalize_embeddings
+        # Run CPU-bound embedding in a thread pool, batched with concurrent requests
+        # for the same model and settings
+        embeddings_vectors = await _EMBEDDING_BATCHER.run(
+            key=(
+                model_name,
+                inference_backend,
+                max_context_length,
+                normalize_embeddings,
+            ),
+            items=prefixed_texts,
+            process_batch=lambda batch_texts: list(
+                local_model.encode(
+                    batch_texts, normalize_embeddings=normalize_embeddings
+                )
             ),
         )
-        embeddings = [
-            embedding if isinstance(embedding, list) else embedding.tolist()
-            for embedding in embeddings_vectors
-        ]
+        embeddings = np.stack(embeddings_vectors)
 
         elapsed = time.monotonic() - start
         logger.info(
@@ -503,6 +555,7 @@ async def embed_text(
             f"texts={len(texts)} "
             f"chars={total_chars} "
             f"model={model_name} "
+            f"backend={inference_backend.value} "
             f"gpu={gpu_type} "
             f"elapsed={elapsed:.2f}"
         )
@@ -516,13 +569,20 @@ async def embed_text(
 
 
 @simple_log_function_time()
-async def local_rerank(query: str, docs: list[str], model_name: str) -> list[float]:
-    cross_encoder = get_local_reranking_model(model_name)
-    # Run CPU-bound reranking in a thread pool
-    return await asyncio.get_event_loop().run_in_executor(
-        None,
-        lambda: cross_encoder.predict([(query, doc) for doc in docs]).tolist(),  # type: ignore
+async def local_rerank(
+    query: str,
+    docs: list[str],
+    model_name: str,
+    inference_backend: InferenceBackend = InferenceBackend.TORCH,
+) -> list[float]:
+    cross_encoder = get_local_reranking_model(model_name, inference_backend)
+    # Run CPU-bound reranking in a thread pool, batched with concurrent requests
+    scores = await _RERANK_BATCHER.run(
+        key=(model_name, inference_backend),
+        items=[(query, doc) for doc in docs],
+        process_batch=lambda pairs: cross_encoder.predict(pairs).tolist(),  # type: ignore
     )
+    return list(scores)
 
 
 async def cohere_rerank_api(
@@ -596,17 +656,37 @@ async def litellm_rerank(
         ]
 
 
-@router.post("/bi-encoder-embed")
+def _to_embedding_lists(embeddings: list[Embedding] | np.ndarray) -> list[Embedding]:
+    if isinstance(embeddings, np.ndarray):
+        return embeddings.tolist()
+    return embeddings
+
+
+@router.post("/bi-encoder-embed", response_model=EmbedResponse)
 async def route_bi_encoder_embed(
     request: Request,
     embed_request: EmbedRequest,
-) -> EmbedResponse:
-    return await process_embed_request(embed_request, request.app.state.gpu_type)
+) -> EmbedResponse | Response:
+    # clients that accept a binary format get the raw vectors instead of JSON
+    media_type = select_embeddings_media_type(request.headers.get("Accept"))
+    embeddings = await embed_request_vectors(embed_request, request.app.state.gpu_type)
+    if media_type is None:
+        return EmbedResponse(embeddings=_to_embedding_lists(embeddings))
+
+    content, headers = encode_embeddings(embeddings, media_type)
+    return Response(content=content, media_type=media_type, headers=headers)
 
 
 async def process_embed_request(
     embed_request: EmbedRequest, gpu_type: str = "UNKNOWN"
 ) -> EmbedResponse:
+    embeddings = await embed_request_vectors(embed_request, gpu_type)
+    return EmbedResponse(embeddings=_to_embedding_lists(embeddings))
+
+
+async def embed_request_vectors(
+    embed_request: EmbedRequest, gpu_type: str = "UNKNOWN"
+) -> list[Embedding] | np.ndarray:
     if not embed_request.texts:
         raise HTTPException(status_code=400, detail="No texts to be embedded")
 
@@ -635,8 +715,9 @@ async def process_embed_request(
             reduced_dimension=embed_request.reduced_dimension,
             prefix=prefix,
             gpu_type=gpu_type,
+            inference_backend=embed_request.inference_backend,
         )
-        return EmbedResponse(embeddings=embeddings)
+        return embeddings
     except AuthenticationError as e:
         # Handle authentication errors consistently
         logger.error(f"Authentication error: {e.provider}")
@@ -677,6 +758,7 @@ async def process_rerank_request(rerank_request: RerankRequest) -> RerankRespons
                 query=rerank_request.query,
                 docs=rerank_request.documents,
                 model_name=rerank_request.model_name,
+                inference_backend=rerank_request.inference_backend,
             )
             return RerankResponse(scores=sim_scores)
         elif rerank_request.provider_type == RerankerProvider.LITELLM:
@@ -0,0 +1,159 @@
+"""
+ONNX Runtime backends for the local embedding and reranking models.
+
+The models are exported to ONNX (and dynamically quantized to int8 for
+InferenceBackend.ONNX_INT8) the first time they are requested and the exports are kept
+next to the huggingface cache, so the export only happens once per model server volume.
+Requires optimum[onnxruntime]; callers fall back to torch if the export fails.
+"""
+
+import os
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from sentence_transformers import SentenceTransformer  # type: ignore
+
+from onyx.utils.logger import setup_logger
+from shared_configs.configs import ONNX_QUANTIZATION_CONFIG
+from shared_configs.enums import InferenceBackend
+
+logger = setup_logger()
+
+ONNX_EXPORT_PATH = Path(os.path.expanduser("~")) / ".cache/huggingface/onyx_onnx"
+
+_OPTIMUM_IMPORT_ERROR = (
+    "The ONNX inference backends require Optimum and ONNX Runtime, install them with "
+    "`pip install optimum[onnxruntime]`"
+)
+
+_RERANK_BATCH_SIZE = 32
+
+
+def _get_export_dir(model_name: str, model_type: str) -> Path:
+    return ONNX_EXPORT_PATH / model_type / model_name.replace("/", "--")
+
+
+def _quantized_file_name() -> str:
+    # the name sentence-transformers gives to dynamically quantized exports
+    return f"model_qint8_{ONNX_QUANTIZATION_CONFIG}.onnx"
+
+
+def load_onnx_embedding_model(
+    model_name: str, inference_backend: InferenceBackend
+) -> SentenceTransformer:
+    from sentence_transformers.backend import export_dynamic_quantized_onnx_model  # type: ignore
+
+    if inference_backend == InferenceBackend.TORCH:
+        raise ValueError("Torch models are not loaded through ONNX Runtime")
+
+    export_dir = _get_export_dir(model_name, "embedding")
+    if not (export_dir / "onnx" / "model.onnx").exists():
+        logger.notice(f"Exporting {model_name} to ONNX")
+        # trust_remote_code, see get_embedding_model
+        model = SentenceTransformer(
+            model_name_or_path=model_name, backend="onnx", trust_remote_code=True
+        )
+        model.save_pretrained(str(export_dir))
+
+    file_name = "model.onnx"
+    if inference_backend == InferenceBackend.ONNX_INT8:
+        file_name = _quantized_file_name()
+        if not (export_dir / "onnx" / file_name).exists():
+            logger.notice(
+                f"Quantizing {model_name} to int8 with the "
+                f"{ONNX_QUANTIZATION_CONFIG} configuration"
+            )
+            export_dynamic_quantized_onnx_model(
+                SentenceTransformer(
+                    model_name_or_path=str(export_dir),
+                    backend="onnx",
+                    trust_remote_code=True,
+                    model_kwargs={"file_name": "onnx/model.onnx"},
+                ),
+                ONNX_QUANTIZATION_CONFIG,
+                str(export_dir),
+            )
+
+    return SentenceTransformer(
+        model_name_or_path=str(export_dir),
+        backend="onnx",
+        trust_remote_code=True,
+        model_kwargs={"file_name": f"onnx/{file_name}"},
+    )
+
+
+class OnnxCrossEncoder:
+    """Runs a sequence classification reranker with ONNX Runtime, scores the same way
+    as the sentence-transformers CrossEncoder (which has no ONNX backend)."""
+
+    def __init__(self, model: Any, tokenizer: Any) -> None:
+        self.model = model
+        self.tokenizer = tokenizer
+
+    def predict(self, pairs: list[tuple[str, str]]) -> np.ndarray:
+        scores: list[np.ndarray] = []
+        for start in range(0, len(pairs), _RERANK_BATCH_SIZE):
+            batch = pairs[start : start + _RERANK_BATCH_SIZE]
+            features = self.tokenizer(
+                [query for query, _ in batch],
+                [doc for _, doc in batch],
+                padding=True,
+                truncation="longest_first",
+                return_tensors="np",
+            )
+            logits = np.asarray(self.model(**features).logits)
+            if logits.shape[1] == 1:
+                # the default CrossEncoder activation for single label models
+                scores.append(1 / (1 + np.exp(-logits[:, 0])))
+            else:
+                scores.append(logits)
+        return np.concatenate(scores)
+
+
+def load_onnx_reranking_model(
+    model_name: str, inference_backend: InferenceBackend
+) -> OnnxCrossEncoder:
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification  # type: ignore
+        from optimum.onnxruntime import ORTQuantizer  # type: ignore
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig  # type: ignore
+    except ImportError as e:
+        raise ImportError(_OPTIMUM_IMPORT_ERROR) from e
+    from transformers import AutoTokenizer  # type: ignore
+
+    if inference_backend == InferenceBackend.TORCH:
+        raise ValueError("Torch models are not loaded through ONNX Runtime")
+
+    export_dir = _get_export_dir(model_name, "reranking")
+    if not (export_dir / "model.onnx").exists():
+        logger.notice(f"Exporting {model_name} to ONNX")
+        model = ORTModelForSequenceClassification.from_pretrained(
+            model_name, export=True
+        )
+        model.save_pretrained(export_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(export_dir)
+
+    file_name = "model.onnx"
+    if inference_backend == InferenceBackend.ONNX_INT8:
+        file_name = _quantized_file_name()
+        if not (export_dir / file_name).exists():
+            logger.notice(
+                f"Quantizing {model_name} to int8 with the "
+                f"{ONNX_QUANTIZATION_CONFIG} configuration"
+            )
+            quantizer = ORTQuantizer.from_pretrained(export_dir, file_name="model.onnx")
+            quantizer.quantize(
+                quantization_config=getattr(
+                    AutoQuantizationConfig, ONNX_QUANTIZATION_CONFIG
+                )(is_static=False),
+                save_dir=export_dir,
+                file_suffix=f"qint8_{ONNX_QUANTIZATION_CONFIG}",
+            )
+
+    return OnnxCrossEncoder(
+        model=ORTModelForSequenceClassification.from_pretrained(
+            export_dir, file_name=file_name
+        ),
+        tokenizer=AutoTokenizer.from_pretrained(export_dir),
+    )
@@ -34,6 +34,7 @@ from onyx.redis.redis_connector_doc_perm_sync import RedisConnectorPermissionSyn
 from onyx.redis.redis_connector_ext_group_sync import RedisConnectorExternalGroupSync
 from onyx.redis.redis_connector_prune import RedisConnectorPrune
 from onyx.redis.redis_document_set import RedisDocumentSet
+from onyx.redis.redis_object_helper import RedisObjectHelper
 from onyx.redis.redis_pool import get_redis_client
 from onyx.redis.redis_usergroup import RedisUserGroup
 from onyx.utils.logger import ColoredFormatter
@@ -143,22 +144,30 @@ def on_task_postrun(
 
     r = get_redis_client(tenant_id=tenant_id)
 
+    # batched vespa sync tasks track one taskset member per document
+    document_ids = kwargs.get("document_ids") if kwargs else None
+    taskset_members = (
+        RedisObjectHelper.get_taskset_members(task_id, len(document_ids))
+        if isinstance(document_ids, list)
+        else [task_id]
+    )
+
     if task_id.startswith(RedisConnectorCredentialPair.PREFIX):
-        r.srem(RedisConnectorCredentialPair.get_taskset_key(), task_id)
+        r.srem(RedisConnectorCredentialPair.get_taskset_key(), *taskset_members)
         return
 
     if task_id.startswith(RedisDocumentSet.PREFIX):
         document_set_id = RedisDocumentSet.get_id_from_task_id(task_id)
         if document_set_id is not None:
             rds = RedisDocumentSet(tenant_id, int(document_set_id))
-            r.srem(rds.taskset_key, task_id)
+            r.srem(rds.taskset_key, *taskset_members)
         return
 
     if task_id.startswith(RedisUserGroup.PREFIX):
         usergroup_id = RedisUserGroup.get_id_from_task_id(task_id)
         if usergroup_id is not None:
             rug = RedisUserGroup(tenant_id, int(usergroup_id))
-            r.srem(rug.taskset_key, task_id)
+            r.srem(rug.taskset_key, *taskset_members)
         return
 
     if task_id.startswith(RedisConnectorDelete.PREFIX):
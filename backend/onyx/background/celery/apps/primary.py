@@ -282,6 +282,7 @@ celery_app.steps["worker"].add(HubPeriodicTask)
 celery_app.autodiscover_tasks(
     [
         "onyx.background.celery.tasks.connector_deletion",
+        "onyx.background.celery.tasks.file_store",
         "onyx.background.celery.tasks.indexing",
         "onyx.background.celery.tasks.periodic",
         "onyx.background.celery.tasks.doc_permission_syncing",
@@ -2,6 +2,7 @@ import copy
 from datetime import timedelta
 from typing import Any
 
+from onyx.configs.app_configs import FILE_STORE_BACKEND
 from onyx.configs.app_configs import LLM_MODEL_UPDATE_API_URL
 from onyx.configs.constants import ONYX_CLOUD_CELERY_TASK_PREFIX
 from onyx.configs.constants import OnyxCeleryPriority
@@ -129,6 +130,20 @@ if LLM_MODEL_UPDATE_API_URL:
         }
     )
 
+# Files saved before switching to an object store backend are moved in the background
+if FILE_STORE_BACKEND != "postgres":
+    beat_task_templates.append(
+        {
+            "name": "check-for-file-store-migration",
+            "task": OnyxCeleryTask.CHECK_FOR_FILE_STORE_MIGRATION,
+            "schedule": timedelta(minutes=5),
+            "options": {
+                "priority": OnyxCeleryPriority.LOW,
+                "expires": BEAT_EXPIRES_DEFAULT,
+            },
+        }
+    )
+
 
 def make_cloud_generator_task(task: dict[str, Any]) -> dict[str, Any]:
     cloud_task: dict[str, Any] = {}
@@ -0,0 +1,86 @@
+import time
+
+from celery import shared_task
+from celery import Task
+from redis.lock import Lock as RedisLock
+
+from onyx.background.celery.apps.app_base import task_logger
+from onyx.configs.app_configs import FILE_STORE_MIGRATION_BATCH_SIZE
+from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
+from onyx.configs.constants import OnyxCeleryTask
+from onyx.configs.constants import OnyxRedisLocks
+from onyx.db.engine import get_session_with_current_tenant
+from onyx.db.pg_file_store import get_pgfilestore_names_with_lobj
+from onyx.file_store.file_store import get_default_file_store
+from onyx.file_store.file_store import ObjectBackedFileStore
+from onyx.redis.redis_pool import get_redis_client
+
+# stop starting new files past this, to stay well within the soft time limit
+FILE_STORE_MIGRATION_TIME_BUDGET = 240
+
+
+# primary
+@shared_task(
+    name=OnyxCeleryTask.CHECK_FOR_FILE_STORE_MIGRATION,
+    soft_time_limit=300,
+    bind=True,
+)
+def check_for_file_store_migration(self: Task, *, tenant_id: str) -> int | None:
+    """Moves a batch of files still stored as postgres large objects to the object
+    store configured with FILE_STORE_BACKEND. Returns the number of files moved."""
+    locked = False
+    redis_client = get_redis_client(tenant_id=tenant_id)
+    lock: RedisLock = redis_client.lock(
+        OnyxRedisLocks.CHECK_FILE_STORE_MIGRATION_BEAT_LOCK,
+        timeout=CELERY_GENERIC_BEAT_LOCK_TIMEOUT,
+    )
+
+    # these tasks should never overlap
+    if not lock.acquire(blocking=False):
+        return None
+
+    num_migrated = 0
+    try:
+        locked = True
+        start = time.monotonic()
+        with get_session_with_current_tenant() as db_session:
+            file_store = get_default_file_store(db_session)
+            if not isinstance(file_store, ObjectBackedFileStore):
+                return None
+
+            file_names = get_pgfilestore_names_with_lobj(
+                db_session, limit=FILE_STORE_MIGRATION_BATCH_SIZE
+            )
+            for file_name in file_names:
+                if time.monotonic() - start > FILE_STORE_MIGRATION_TIME_BUDGET:
+                    break
+
+                try:
+                    if file_store.migrate_large_object(file_name):
+                        num_migrated += 1
+                except Exception:
+                    task_logger.exception(
+                        f"Failed to move file to the object store: file={file_name}"
+                    )
+
+                lock.reacquire()
+
+        if num_migrated:
+            task_logger.info(
+                f"Moved files to the object store: tenant={tenant_id} "
+                f"migrated={num_migrated} batch={len(file_names)}"
+            )
+    except Exception:
+        task_logger.exception("Unexpected exception during file store migration")
+        return None
+    finally:
+        if locked:
+            if lock.owned():
+                lock.release()
+            else:
+                task_logger.error(
+                    "check_for_file_store_migration - Lock not owned on completion: "
+                    f"tenant={tenant_id}"
+                )
+
+    return num_migrated
@@ -1,5 +1,9 @@
 import time
 from collections.abc import Callable
+from concurrent.futures import as_completed
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from datetime import timezone
 from http import HTTPStatus
 from typing import Any
 from typing import cast
@@ -15,12 +19,14 @@ from sqlalchemy.orm import Session
 from tenacity import RetryError
 
 from onyx.access.access import get_access_for_document
+from onyx.access.access import get_access_for_documents
 from onyx.background.celery.apps.app_base import task_logger
 from onyx.background.celery.tasks.shared.RetryDocumentIndex import RetryDocumentIndex
 from onyx.background.celery.tasks.shared.tasks import LIGHT_SOFT_TIME_LIMIT
 from onyx.background.celery.tasks.shared.tasks import LIGHT_TIME_LIMIT
 from onyx.background.celery.tasks.shared.tasks import OnyxCeleryTaskCompletionStatus
 from onyx.configs.app_configs import JOB_TIMEOUT
+from onyx.configs.app_configs import VESPA_SYNC_BATCH_CONCURRENCY
 from onyx.configs.app_configs import VESPA_SYNC_MAX_TASKS
 from onyx.configs.constants import CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import OnyxCeleryTask
@@ -29,10 +35,13 @@ from onyx.configs.constants import OnyxRedisLocks
 from onyx.db.connector_credential_pair import get_connector_credential_pairs
 from onyx.db.document import count_documents_by_needs_sync
 from onyx.db.document import get_document
+from onyx.db.document import get_documents_by_ids
 from onyx.db.document import mark_document_as_synced
+from onyx.db.document import mark_documents_as_synced
 from onyx.db.document_set import delete_document_set
 from onyx.db.document_set import fetch_document_sets
 from onyx.db.document_set import fetch_document_sets_for_document
+from onyx.db.document_set import fetch_document_sets_for_documents
 from onyx.db.document_set import get_document_set_by_id
 from onyx.db.document_set import mark_document_set_as_synced
 from onyx.db.engine import get_session_with_current_tenant
@@ -66,6 +75,11 @@ from onyx.utils.variable_functionality import noop_fallback
 
 logger = setup_logger()
 
+# a batch task updates up to VESPA_SYNC_BATCH_SIZE documents, so it gets more time
+# than the single document task
+VESPA_SYNC_BATCH_SOFT_TIME_LIMIT = LIGHT_SOFT_TIME_LIMIT * 3
+VESPA_SYNC_BATCH_TIME_LIMIT = VESPA_SYNC_BATCH_SOFT_TIME_LIMIT + 15
+
 
 # celery auto associates tasks created inside another task,
 # which bloats the result metadata considerably. trail=False prevents this.
@@ -517,6 +531,39 @@ def monitor_document_set_taskset(
     rds.reset()
 
 
+def _classify_vespa_sync_exception(
+    task: Task, ex: Exception, log_context: str
+) -> tuple[OnyxCeleryTaskCompletionStatus, Exception | None]:
+    """Returns the completion status for a failed vespa sync task, along with the
+    exception to retry with if the task should be retried."""
+    e: Exception = ex
+    if isinstance(ex, RetryError):
+        task_logger.warning(
+            f"Tenacity retry failed: num_attempts={ex.last_attempt.attempt_number}"
+        )
+
+        # only use the inner exception if it is of type Exception
+        e_temp = ex.last_attempt.exception()
+        if isinstance(e_temp, Exception):
+            e = e_temp
+
+    if isinstance(e, httpx.HTTPStatusError):
+        if e.response.status_code == HTTPStatus.BAD_REQUEST:
+            task_logger.exception(
+                f"Non-retryable HTTPStatusError: "
+                f"{log_context} "
+                f"status={e.response.status_code}"
+            )
+        return OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION, None
+
+    task_logger.exception(f"{task.name} exceptioned: {log_context}")
+
+    if task.max_retries is not None and task.request.retries >= task.max_retries:
+        return OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION, e
+
+    return OnyxCeleryTaskCompletionStatus.RETRYABLE_EXCEPTION, e
+
+
 @shared_task(
     name=OnyxCeleryTask.VESPA_METADATA_SYNC_TASK,
     bind=True,
@@ -592,52 +639,175 @@ def vespa_metadata_sync_task(self: Task, document_id: str, *, tenant_id: str) ->
         task_logger.info(f"SoftTimeLimitExceeded exception. doc={document_id}")
         completion_status = OnyxCeleryTaskCompletionStatus.SOFT_TIME_LIMIT
     except Exception as ex:
-        e: Exception | None = None
-        while True:
-            if isinstance(ex, RetryError):
-                task_logger.warning(
-                    f"Tenacity retry failed: num_attempts={ex.last_attempt.attempt_number}"
-                )
+        completion_status, retry_exception = _classify_vespa_sync_exception(
+            self, ex, f"doc={document_id}"
+        )
+        if retry_exception is not None:
+            # Exponential backoff from 2^4 to 2^6 ... i.e. 16, 32, 64
+            countdown = 2 ** (self.request.retries + 4)
+            # this will raise a celery exception
+            self.retry(exc=retry_exception, countdown=countdown)
+    finally:
+        task_logger.info(
+            f"vespa_metadata_sync_task completed: status={completion_status.value} doc={document_id}"
+        )
 
-                # only set the inner exception if it is of type Exception
-                e_temp = ex.last_attempt.exception()
-                if isinstance(e_temp, Exception):
-                    e = e_temp
+    if completion_status != OnyxCeleryTaskCompletionStatus.SUCCEEDED:
+        return False
+
+    return True
+
+
+@shared_task(
+    name=OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK,
+    bind=True,
+    soft_time_limit=VESPA_SYNC_BATCH_SOFT_TIME_LIMIT,
+    time_limit=VESPA_SYNC_BATCH_TIME_LIMIT,
+    max_retries=3,
+)
+def vespa_metadata_sync_batch_task(
+    self: Task, document_ids: list[str], *, tenant_id: str
+) -> bool:
+    """Batched version of vespa_metadata_sync_task.
+
+    Document sets, access and boost are fetched for the whole batch with a few set
+    based queries, the Vespa updates run concurrently over the pooled http client and
+    the updated documents are marked as synced in one statement.
+
+    If some documents fail to update, the ones that succeeded are still marked as
+    synced and the whole batch is retried (Vespa updates are idempotent).
+    """
+    start = time.monotonic()
+
+    completion_status = OnyxCeleryTaskCompletionStatus.UNDEFINED
+
+    try:
+        with get_session_with_current_tenant() as db_session:
+            active_search_settings = get_active_search_settings(db_session)
+            doc_index = get_default_document_index(
+                search_settings=active_search_settings.primary,
+                secondary_search_settings=active_search_settings.secondary,
+                httpx_client=HttpxPool.get("vespa"),
+            )
+
+            retry_index = RetryDocumentIndex(doc_index)
+
+            # taken before anything is read so that documents modified while the
+            # batch is in flight still look out of date afterwards
+            sync_started_at = datetime.now(timezone.utc)
+            docs = get_documents_by_ids(db_session, document_ids)
+            if not docs:
+                elapsed = time.monotonic() - start
+                task_logger.info(
+                    f"docs={len(document_ids)} "
+                    f"action=no_operation "
+                    f"elapsed={elapsed:.2f}"
+                )
+                completion_status = OnyxCeleryTaskCompletionStatus.SKIPPED
             else:
-                e = ex
-
-            if isinstance(e, httpx.HTTPStatusError):
-                if e.response.status_code == HTTPStatus.BAD_REQUEST:
-                    task_logger.exception(
-                        f"Non-retryable HTTPStatusError: "
-                        f"doc={document_id} "
-                        f"status={e.response.status_code}"
+                existing_doc_ids = [doc.id for doc in docs]
+
+                # document set sync
+                doc_id_to_doc_sets = {
+                    doc_id: set(doc_set_names)
+                    for doc_id, doc_set_names in fetch_document_sets_for_documents(
+                        existing_doc_ids, db_session
                     )
-                completion_status = (
-                    OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+                }
+
+                # User group sync
+                doc_id_to_access = get_access_for_documents(
+                    document_ids=existing_doc_ids, db_session=db_session
                 )
-                break
 
-            task_logger.exception(
-                f"vespa_metadata_sync_task exceptioned: doc={document_id}"
-            )
+                # read everything off the ORM objects before handing off to threads
+                doc_id_to_update_args = {
+                    doc.id: (
+                        doc.chunk_count,
+                        VespaDocumentFields(
+                            document_sets=doc_id_to_doc_sets.get(doc.id, set()),
+                            access=doc_id_to_access[doc.id],
+                            boost=doc.boost,
+                            hidden=doc.hidden,
+                        ),
+                    )
+                    for doc in docs
+                }
+
+                # update Vespa. OK if a doc doesn't exist. Collects exceptions otherwise.
+                synced_doc_ids: list[str] = []
+                chunks_affected = 0
+                first_exception: Exception | None = None
+                executor = ThreadPoolExecutor(
+                    max_workers=min(VESPA_SYNC_BATCH_CONCURRENCY, len(docs))
+                )
+                try:
+                    future_to_doc_id = {
+                        executor.submit(
+                            retry_index.update_single,
+                            doc_id,
+                            tenant_id=tenant_id,
+                            chunk_count=chunk_count,
+                            fields=fields,
+                            user_fields=None,
+                        ): doc_id
+                        for doc_id, (
+                            chunk_count,
+                            fields,
+                        ) in doc_id_to_update_args.items()
+                    }
+                    for future in as_completed(future_to_doc_id):
+                        doc_id = future_to_doc_id[future]
+                        try:
+                            chunks_affected += future.result()
+                        except Exception as e:
+                            task_logger.warning(
+                                f"Vespa update failed: doc={doc_id} exception={e!r}"
+                            )
+                            if first_exception is None:
+                                first_exception = e
+                            continue
+
+                        synced_doc_ids.append(doc_id)
+                finally:
+                    # don't keep sending updates if we timed out
+                    executor.shutdown(wait=True, cancel_futures=True)
 
-            completion_status = OnyxCeleryTaskCompletionStatus.RETRYABLE_EXCEPTION
-            if (
-                self.max_retries is not None
-                and self.request.retries >= self.max_retries
-            ):
-                completion_status = (
-                    OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+                # update db last. Worst case = we crash right before this and
+                # the sync might repeat again later
+                mark_documents_as_synced(
+                    synced_doc_ids, sync_started_at, db_session
+                )
+
+                elapsed = time.monotonic() - start
+                task_logger.info(
+                    f"docs={len(document_ids)} "
+                    f"action=sync "
+                    f"synced={len(synced_doc_ids)} "
+                    f"failed={len(docs) - len(synced_doc_ids)} "
+                    f"chunks={chunks_affected} "
+                    f"elapsed={elapsed:.2f}"
                 )
+                if first_exception is not None:
+                    raise first_exception
 
+                completion_status = OnyxCeleryTaskCompletionStatus.SUCCEEDED
+    except SoftTimeLimitExceeded:
+        task_logger.info(f"SoftTimeLimitExceeded exception. docs={len(document_ids)}")
+        completion_status = OnyxCeleryTaskCompletionStatus.SOFT_TIME_LIMIT
+    except Exception as ex:
+        completion_status, retry_exception = _classify_vespa_sync_exception(
+            self, ex, f"docs={len(document_ids)}"
+        )
+        if retry_exception is not None:
             # Exponential backoff from 2^4 to 2^6 ... i.e. 16, 32, 64
             countdown = 2 ** (self.request.retries + 4)
-            self.retry(exc=e, countdown=countdown)  # this will raise a celery exception
-            break  # we won't hit this, but it looks weird not to have it
+            # this will raise a celery exception
+            self.retry(exc=retry_exception, countdown=countdown)
     finally:
         task_logger.info(
-            f"vespa_metadata_sync_task completed: status={completion_status.value} doc={document_id}"
+            f"vespa_metadata_sync_batch_task completed: status={completion_status.value} "
+            f"docs={len(document_ids)}"
         )
 
     if completion_status != OnyxCeleryTaskCompletionStatus.SUCCEEDED:
@@ -1,11 +1,15 @@
 import time
 import traceback
 from collections import defaultdict
+from collections.abc import Callable
+from collections.abc import Generator
+from collections.abc import Iterator
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
 
 from pydantic import BaseModel
+from pydantic import ConfigDict
 from sqlalchemy.orm import Session
 
 from onyx.background.indexing.checkpointing_utils import check_checkpoint_size
@@ -13,6 +17,7 @@ from onyx.background.indexing.checkpointing_utils import get_latest_valid_checkp
 from onyx.background.indexing.checkpointing_utils import save_checkpoint
 from onyx.background.indexing.memory_tracer import MemoryTracer
 from onyx.configs.app_configs import INDEX_BATCH_SIZE
+from onyx.configs.app_configs import INDEXING_PIPELINE_MAX_BUFFERED_BATCHES
 from onyx.configs.app_configs import INDEXING_SIZE_WARNING_THRESHOLD
 from onyx.configs.app_configs import INDEXING_TRACER_INTERVAL
 from onyx.configs.app_configs import INTEGRATION_TESTS_MODE
@@ -24,6 +29,7 @@ from onyx.connectors.connector_runner import ConnectorRunner
 from onyx.connectors.exceptions import ConnectorValidationError
 from onyx.connectors.exceptions import UnexpectedValidationError
 from onyx.connectors.factory import instantiate_connector
+from onyx.connectors.models import ConnectorCheckpoint
 from onyx.connectors.models import ConnectorFailure
 from onyx.connectors.models import Document
 from onyx.connectors.models import IndexAttemptMetadata
@@ -52,7 +58,9 @@ from onyx.document_index.factory import get_default_document_index
 from onyx.httpx.httpx_pool import HttpxPool
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
-from onyx.indexing.indexing_pipeline import build_indexing_pipeline
+from onyx.indexing.indexing_pipeline import build_indexing_pipeline_stages
+from onyx.indexing.indexing_pipeline import EmbeddedDocumentBatch
+from onyx.indexing.indexing_pipeline import IndexingPipelineResult
 from onyx.natural_language_processing.search_nlp_models import (
     InformationContentClassificationModel,
 )
@@ -62,6 +70,7 @@ from onyx.utils.middleware import make_randomized_onyx_request_id
 from onyx.utils.telemetry import create_milestone_and_report
 from onyx.utils.telemetry import optional_telemetry
 from onyx.utils.telemetry import RecordType
+from onyx.utils.threadpool_concurrency import iterate_in_background
 from onyx.utils.variable_functionality import global_version
 from shared_configs.configs import MULTI_TENANT
 
@@ -189,6 +198,49 @@ class RunIndexingContext(BaseModel):
     search_settings_status: IndexModelStatus
 
 
+class _FetchedBatch(BaseModel):
+    """A unit of work flowing through the fetch -> chunk + embed -> write stages
+    of `_run_indexing`. Carries either a document batch, a connector failure,
+    or a checkpoint to persist once everything before it has been written."""
+
+    document_batch: list[Document] | None = None
+    failure: ConnectorFailure | None = None
+    checkpoint_to_save: ConnectorCheckpoint | None = None
+
+    # filled in by the chunk + embed stage
+    cleaned_document_batch: list[Document] | None = None
+    index_attempt_metadata: IndexAttemptMetadata | None = None
+    embedded_batch: EmbeddedDocumentBatch | IndexingPipelineResult | None = None
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+
+def _pipeline_fetched_batches(
+    fetched_batches: Iterator[_FetchedBatch],
+    embed_batch: Callable[[_FetchedBatch], None],
+    max_buffered: int,
+) -> Generator[_FetchedBatch, None, None]:
+    """fetch -> chunk + embed -> write, the fetch and embed stages each run in their
+    own thread, bounded by their own queue of `max_buffered` batches. Batches come
+    out in fetch order, checkpoints included, so as long as the caller writes them in
+    order a checkpoint is only saved after every batch before it has committed."""
+
+    def _embed_stage(
+        batches: Generator[_FetchedBatch, None, None],
+    ) -> Iterator[_FetchedBatch]:
+        try:
+            for fetched_batch in batches:
+                embed_batch(fetched_batch)
+                yield fetched_batch
+        finally:
+            batches.close()
+
+    return iterate_in_background(
+        _embed_stage(iterate_in_background(fetched_batches, max_buffered)),
+        max_buffered,
+    )
+
+
 def _check_connector_and_attempt_status(
     db_session_temp: Session, ctx: RunIndexingContext, index_attempt_id: int
 ) -> None:
@@ -249,6 +301,12 @@ def _check_failure_threshold(
         )
 
 
+def _reuse_ratio(reused_chunk_count: int, chunk_count: int) -> float:
+    """Share of the chunks which were not embedded / written again since they did
+    not change."""
+    return reused_chunk_count / chunk_count if chunk_count else 0.0
+
+
 def _run_indexing(
     db_session: Session,
     index_attempt_id: int,
@@ -361,7 +419,7 @@ def _run_indexing(
         httpx_client=HttpxPool.get("vespa"),
     )
 
-    indexing_pipeline = build_indexing_pipeline(
+    indexing_stages = build_indexing_pipeline_stages(
         embedder=embedding_model,
         information_content_classification_model=information_content_classification_model,
         document_index=document_index,
@@ -372,6 +430,8 @@ def _run_indexing(
         db_session=db_session,
         tenant_id=tenant_id,
         callback=callback,
+        # a re-index from the beginning writes everything again
+        reuse_unchanged_chunks=not ctx.from_beginning,
     )
 
     # Initialize memory tracer. NOTE: won't actually do anything if
@@ -390,6 +450,7 @@ def _run_indexing(
     net_doc_change = 0
     document_count = 0
     chunk_count = 0
+    reused_chunk_count = 0
     index_attempt: IndexAttempt | None = None
     try:
         with get_session_with_current_tenant() as db_session_temp:
@@ -436,13 +497,82 @@ def _run_indexing(
                 error for error in unresolved_errors if error.entity_id
             ]
 
-        while checkpoint.has_more:
-            logger.info(
-                f"Running '{ctx.source.value}' connector with checkpoint: {checkpoint}"
+        def _fetch_stage(
+            fetch_checkpoint: ConnectorCheckpoint,
+        ) -> Iterator[_FetchedBatch]:
+            """Runs the connector. After every full `connector_runner.run`, yields
+            the checkpoint to persist once everything before it has been written."""
+            while fetch_checkpoint.has_more:
+                logger.info(
+                    f"Running '{ctx.source.value}' connector with checkpoint: {fetch_checkpoint}"
+                )
+                for document_batch, failure, next_checkpoint in connector_runner.run(
+                    fetch_checkpoint
+                ):
+                    if next_checkpoint:
+                        fetch_checkpoint = next_checkpoint
+
+                    yield _FetchedBatch(document_batch=document_batch, failure=failure)
+
+                # copy, since the connector keeps working off of `fetch_checkpoint`
+                # while the write stage is catching up
+                yield _FetchedBatch(
+                    checkpoint_to_save=fetch_checkpoint.model_copy(deep=True)
+                )
+
+        embed_batch_num = 0
+
+        def _embed_fetched_batch(fetched_batch: _FetchedBatch) -> None:
+            """Cleans, chunks and embeds a document batch coming out of the connector."""
+            nonlocal embed_batch_num
+            if fetched_batch.document_batch is None:
+                return
+
+            batch_description = []
+
+            doc_batch_cleaned = strip_null_characters(fetched_batch.document_batch)
+            for doc in doc_batch_cleaned:
+                batch_description.append(doc.to_short_descriptor())
+
+                doc_size = 0
+                for section in doc.sections:
+                    if isinstance(section, TextSection) and section.text is not None:
+                        doc_size += len(section.text)
+
+                if doc_size > INDEXING_SIZE_WARNING_THRESHOLD:
+                    logger.warning(
+                        f"Document size: doc='{doc.to_short_descriptor()}' "
+                        f"size={doc_size} "
+                        f"threshold={INDEXING_SIZE_WARNING_THRESHOLD}"
+                    )
+
+            logger.debug(f"Indexing batch of documents: {batch_description}")
+
+            # Generate an ID that can be used to correlate activity between here
+            # and the embedding model server. Each batch gets its own copy of
+            # the metadata since several batches are in flight at once.
+            batch_md = index_attempt_md.model_copy()
+            batch_md.request_id = make_randomized_onyx_request_id("CIX")
+            batch_md.structured_id = (
+                f"{tenant_id}:{ctx.cc_pair_id}:{index_attempt_id}:{embed_batch_num}"
+            )
+            batch_md.batch_num = embed_batch_num + 1  # use 1-index for this
+            embed_batch_num += 1
+
+            fetched_batch.cleaned_document_batch = doc_batch_cleaned
+            fetched_batch.index_attempt_metadata = batch_md
+            fetched_batch.embedded_batch = indexing_stages.embed(
+                document_batch=doc_batch_cleaned,
+                index_attempt_metadata=batch_md,
             )
-            for document_batch, failure, next_checkpoint in connector_runner.run(
-                checkpoint
-            ):
+
+        pipelined_batches = _pipeline_fetched_batches(
+            _fetch_stage(checkpoint),
+            _embed_fetched_batch,
+            INDEXING_PIPELINE_MAX_BUFFERED_BATCHES,
+        )
+        try:
+            for pipelined_batch in pipelined_batches:
                 # Check if connector is disabled mid run and stop if so unless it's the secondary
                 # index being built. We want to populate it even for paused connectors
                 # Often paused connectors are sources that aren't updated frequently but the
@@ -459,6 +589,7 @@ def _run_indexing(
                     )
 
                 # save record of any failures at the connector level
+                failure = pipelined_batch.failure
                 if failure is not None:
                     total_failures += 1
                     with get_session_with_current_tenant() as db_session_temp:
@@ -473,54 +604,46 @@ def _run_indexing(
                         total_failures, document_count, batch_num, failure
                     )
 
-                # save the new checkpoint (if one is provided)
-                if next_checkpoint:
-                    checkpoint = next_checkpoint
+                if pipelined_batch.checkpoint_to_save is not None:
+                    checkpoint = pipelined_batch.checkpoint_to_save
 
-                # below is all document processing logic, so if no batch we can just continue
-                if document_batch is None:
-                    continue
-
-                batch_description = []
-
-                # Generate an ID that can be used to correlate activity between here
-                # and the embedding model server
-                doc_batch_cleaned = strip_null_characters(document_batch)
-                for doc in doc_batch_cleaned:
-                    batch_description.append(doc.to_short_descriptor())
+                    # `make sure the checkpoints aren't getting too large`at some regular interval
+                    CHECKPOINT_SIZE_CHECK_INTERVAL = 100
+                    if batch_num % CHECKPOINT_SIZE_CHECK_INTERVAL == 0:
+                        check_checkpoint_size(checkpoint)
 
-                    doc_size = 0
-                    for section in doc.sections:
-                        if (
-                            isinstance(section, TextSection)
-                            and section.text is not None
-                        ):
-                            doc_size += len(section.text)
-
-                    if doc_size > INDEXING_SIZE_WARNING_THRESHOLD:
-                        logger.warning(
-                            f"Document size: doc='{doc.to_short_descriptor()}' "
-                            f"size={doc_size} "
-                            f"threshold={INDEXING_SIZE_WARNING_THRESHOLD}"
+                    # save latest checkpoint
+                    with get_session_with_current_tenant() as db_session_temp:
+                        save_checkpoint(
+                            db_session=db_session_temp,
+                            index_attempt_id=index_attempt_id,
+                            checkpoint=checkpoint,
                         )
+                    continue
 
-                logger.debug(f"Indexing batch of documents: {batch_description}")
+                # below is all document processing logic, so if no batch we can just continue
+                if (
+                    pipelined_batch.document_batch is None
+                    or pipelined_batch.cleaned_document_batch is None
+                    or pipelined_batch.embedded_batch is None
+                    or pipelined_batch.index_attempt_metadata is None
+                ):
+                    continue
 
-                index_attempt_md.request_id = make_randomized_onyx_request_id("CIX")
-                index_attempt_md.structured_id = (
-                    f"{tenant_id}:{ctx.cc_pair_id}:{index_attempt_id}:{batch_num}"
-                )
-                index_attempt_md.batch_num = batch_num + 1  # use 1-index for this
+                document_batch = pipelined_batch.document_batch
+                doc_batch_cleaned = pipelined_batch.cleaned_document_batch
 
                 # real work happens here!
-                index_pipeline_result = indexing_pipeline(
+                index_pipeline_result = indexing_stages.write(
+                    embedded_batch=pipelined_batch.embedded_batch,
                     document_batch=doc_batch_cleaned,
-                    index_attempt_metadata=index_attempt_md,
+                    index_attempt_metadata=pipelined_batch.index_attempt_metadata,
                 )
 
                 batch_num += 1
                 net_doc_change += index_pipeline_result.new_docs
                 chunk_count += index_pipeline_result.total_chunks
+                reused_chunk_count += index_pipeline_result.reused_chunks
                 document_count += index_pipeline_result.total_docs
 
                 # resolve errors for documents that were successfully indexed
@@ -587,25 +710,16 @@ def _run_indexing(
                         "cc_pair_id": ctx.cc_pair_id,
                         "current_docs_indexed": document_count,
                         "current_chunks_indexed": chunk_count,
+                        "current_chunks_reused": reused_chunk_count,
                         "source": ctx.source.value,
                     },
                     tenant_id=tenant_id,
                 )
 
                 memory_tracer.increment_and_maybe_trace()
-
-            # `make sure the checkpoints aren't getting too large`at some regular interval
-            CHECKPOINT_SIZE_CHECK_INTERVAL = 100
-            if batch_num % CHECKPOINT_SIZE_CHECK_INTERVAL == 0:
-                check_checkpoint_size(checkpoint)
-
-            # save latest checkpoint
-            with get_session_with_current_tenant() as db_session_temp:
-                save_checkpoint(
-                    db_session=db_session_temp,
-                    index_attempt_id=index_attempt_id,
-                    checkpoint=checkpoint,
-                )
+        finally:
+            # stops the fetch / embed stages if we are bailing out early
+            pipelined_batches.close()
 
         optional_telemetry(
             record_type=RecordType.INDEXING_COMPLETE,
@@ -614,12 +728,22 @@ def _run_indexing(
                 "cc_pair_id": ctx.cc_pair_id,
                 "total_docs_indexed": document_count,
                 "total_chunks": chunk_count,
+                "total_chunks_reused": reused_chunk_count,
                 "time_elapsed_seconds": time.monotonic() - start_time,
                 "source": ctx.source.value,
             },
             tenant_id=tenant_id,
         )
 
+        embedding_cache = embedding_model.embedding_cache
+        if embedding_cache.enabled:
+            logger.info(
+                f"Embedding cache: "
+                f"hits={embedding_cache.hits} "
+                f"misses={embedding_cache.misses} "
+                f"hit_rate={embedding_cache.hit_rate:.2f}"
+            )
+
     except Exception as e:
         logger.exception(
             "Connector run exceptioned after elapsed time: "
@@ -742,7 +866,10 @@ def _run_indexing(
 
             logger.info(
                 f"Connector succeeded: "
-                f"docs={document_count} chunks={chunk_count} elapsed={elapsed_time:.2f}s"
+                f"docs={document_count} chunks={chunk_count} "
+                f"reused_chunks={reused_chunk_count} "
+                f"reuse_ratio={_reuse_ratio(reused_chunk_count, chunk_count):.2f} "
+                f"elapsed={elapsed_time:.2f}s"
             )
 
         else:
@@ -753,6 +880,8 @@ def _run_indexing(
                 f"batches={batch_num} "
                 f"docs={document_count} "
                 f"chunks={chunk_count} "
+                f"reused_chunks={reused_chunk_count} "
+                f"reuse_ratio={_reuse_ratio(reused_chunk_count, chunk_count):.2f} "
                 f"elapsed={elapsed_time:.2f}s"
             )
 
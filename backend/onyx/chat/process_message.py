@@ -73,9 +73,8 @@ from onyx.db.chat import create_new_chat_message
 from onyx.db.chat import create_search_doc_from_user_file
 from onyx.db.chat import get_chat_message
 from onyx.db.chat import get_chat_session_by_id
-from onyx.db.chat import get_db_search_doc_by_id
-from onyx.db.chat import get_doc_query_identifiers_from_model
 from onyx.db.chat import get_or_create_root_message
+from onyx.db.chat import get_validated_search_docs
 from onyx.db.chat import reserve_message_id
 from onyx.db.chat import translate_db_message_to_chat_message_detail
 from onyx.db.chat import translate_db_search_doc_to_server_search_doc
@@ -85,6 +84,7 @@ from onyx.db.milestone import check_multi_assistant_milestone
 from onyx.db.milestone import create_milestone_if_not_exists
 from onyx.db.milestone import update_user_assistant_milestone
 from onyx.db.models import ChatMessage
+from onyx.db.models import ChatSession
 from onyx.db.models import Persona
 from onyx.db.models import SearchDoc as DbSearchDoc
 from onyx.db.models import ToolCall
@@ -93,12 +93,13 @@ from onyx.db.models import UserFile
 from onyx.db.persona import get_persona_by_id
 from onyx.db.search_settings import get_current_search_settings
 from onyx.document_index.factory import get_default_document_index
+from onyx.document_index.interfaces import DocumentIndex
 from onyx.file_store.models import ChatFileType
 from onyx.file_store.models import FileDescriptor
 from onyx.file_store.models import InMemoryChatFile
 from onyx.file_store.utils import load_all_chat_files
 from onyx.file_store.utils import load_all_user_file_files
-from onyx.file_store.utils import load_all_user_files
+from onyx.file_store.utils import load_user_files_content
 from onyx.file_store.utils import save_files
 from onyx.llm.exceptions import GenAIDisabledException
 from onyx.llm.factory import get_llms_for_persona
@@ -156,6 +157,9 @@ from onyx.tools.tool_runner import ToolCallFinalResult
 from onyx.utils.logger import setup_logger
 from onyx.utils.long_term_log import LongTermLogger
 from onyx.utils.telemetry import mt_cloud_telemetry
+from onyx.utils.threadpool_concurrency import run_in_background
+from onyx.utils.threadpool_concurrency import TimeoutThread
+from onyx.utils.threadpool_concurrency import wait_on_background
 from onyx.utils.timing import log_function_time
 from onyx.utils.timing import log_generator_function_time
 from shared_configs.contextvars import get_current_tenant_id
@@ -460,6 +464,36 @@ def _get_persona_for_chat_session(
     return persona
 
 
+def _start_fetching_selected_sections(
+    reference_doc_ids: list[int],
+    chat_session: ChatSession,
+    user_id: UUID | None,
+    document_index: DocumentIndex,
+    db_session: Session,
+    enforce_chat_session_id_for_search_docs: bool,
+) -> tuple[list[DbSearchDoc], TimeoutThread[list[InferenceSection]]]:
+    """Validates the search docs selected by the user (in the order they were
+    selected, deleted ones are skipped) and starts fetching their full sections
+    from the document index in the background."""
+    selected_db_search_docs = get_validated_search_docs(
+        search_doc_ids=reference_doc_ids,
+        chat_session=chat_session,
+        user_id=user_id,
+        db_session=db_session,
+        enforce_chat_session_id_for_search_docs=enforce_chat_session_id_for_search_docs,
+    )
+    # Generates full documents currently
+    # May extend to use sections instead in the future
+    selected_sections_task = run_in_background(
+        inference_sections_from_ids,
+        doc_identifiers=[
+            (db_sd.document_id, db_sd.chunk_ind) for db_sd in selected_db_search_docs
+        ],
+        document_index=document_index,
+    )
+    return selected_db_search_docs, selected_sections_task
+
+
 ChatPacket = (
     StreamingError
     | QADocsResponse
@@ -684,6 +718,25 @@ def stream_chat_message_objects(
         retrieval_options = new_msg_req.retrieval_options
         new_msg_req.alternate_assistant_id
 
+        search_settings = get_current_search_settings(db_session)
+        document_index = get_default_document_index(search_settings, None)
+
+        # The selected docs are fetched from the document index in the background,
+        # while the persona, LLM and chat history are set up
+        selected_db_search_docs: list[DbSearchDoc] | None = None
+        selected_sections_task: TimeoutThread[list[InferenceSection]] | None = None
+        if reference_doc_ids:
+            selected_db_search_docs, selected_sections_task = (
+                _start_fetching_selected_sections(
+                    reference_doc_ids=reference_doc_ids,
+                    chat_session=chat_session,
+                    user_id=user_id,
+                    document_index=document_index,
+                    db_session=db_session,
+                    enforce_chat_session_id_for_search_docs=enforce_chat_session_id_for_search_docs,
+                )
+            )
+
         # permanent "log" store, used primarily for debugging
         long_term_logger = LongTermLogger(
             metadata={"user_id": str(user_id), "chat_session_id": str(chat_session_id)}
@@ -753,9 +806,6 @@ def stream_chat_message_objects(
             Callable[[str], list[int]], llm_tokenizer.encode
         )
 
-        search_settings = get_current_search_settings(db_session)
-        document_index = get_default_document_index(search_settings, None)
-
         # Every chat Session begins with an empty root message
         root_message = get_or_create_root_message(
             chat_session_id=chat_session_id, db_session=db_session
@@ -850,30 +900,23 @@ def stream_chat_message_objects(
         user_file_files: list[UserFile] | None = None
         if user_file_ids or user_folder_ids:
             # Load user files
-            user_files = load_all_user_files(
-                user_file_ids or [],
-                user_folder_ids or [],
-                db_session,
-            )
             user_file_files = load_all_user_file_files(
                 user_file_ids or [],
                 user_folder_ids or [],
                 db_session,
             )
+            user_files = load_user_files_content(user_file_files)
             # Store mapping of file_id to file for later reordering
             if user_files:
                 file_id_to_user_file = {file.file_id: file for file in user_files}
 
             # Calculate token count for the files
-            from onyx.db.user_documents import calculate_user_files_token_count
             from onyx.chat.prompt_builder.citations_prompt import (
                 compute_max_document_tokens_for_persona,
             )
 
-            total_tokens = calculate_user_files_token_count(
-                user_file_ids or [],
-                user_folder_ids or [],
-                db_session,
+            total_tokens = sum(
+                user_file.token_count or 0 for user_file in user_file_files
             )
 
             # Calculate available tokens for documents based on prompt, user input, etc.
@@ -907,23 +950,9 @@ def stream_chat_message_objects(
                 commit=False,
             )
 
-        selected_db_search_docs = None
         selected_sections: list[InferenceSection] | None = None
-        if reference_doc_ids:
-            identifier_tuples = get_doc_query_identifiers_from_model(
-                search_doc_ids=reference_doc_ids,
-                chat_session=chat_session,
-                user_id=user_id,
-                db_session=db_session,
-                enforce_chat_session_id_for_search_docs=enforce_chat_session_id_for_search_docs,
-            )
-
-            # Generates full documents currently
-            # May extend to use sections instead in the future
-            selected_sections = inference_sections_from_ids(
-                doc_identifiers=identifier_tuples,
-                document_index=document_index,
-            )
+        if selected_sections_task is not None:
+            selected_sections = wait_on_background(selected_sections_task)
 
             # Add a maximum context size in the case of user-selected docs to prevent
             # slight inaccuracies in context window size pruning from causing
@@ -933,17 +962,6 @@ def stream_chat_message_objects(
                 max_window_percentage=SELECTED_SECTIONS_MAX_WINDOW_PERCENTAGE,
             )
 
-            # In case the search doc is deleted, just don't include it
-            # though this should never happen
-            db_search_docs_or_none = [
-                get_db_search_doc_by_id(doc_id=doc_id, db_session=db_session)
-                for doc_id in reference_doc_ids
-            ]
-
-            selected_db_search_docs = [
-                db_sd for db_sd in db_search_docs_or_none if db_sd
-            ]
-
         else:
             document_pruning_config = DocumentPruningConfig(
                 max_chunks=int(
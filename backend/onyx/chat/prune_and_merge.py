@@ -1,6 +1,7 @@
 import json
+import threading
 from collections import defaultdict
-from copy import deepcopy
+from collections import OrderedDict
 from typing import TypeVar
 
 from pydantic import BaseModel
@@ -16,6 +17,7 @@ from onyx.configs.model_configs import DOC_EMBEDDING_CONTEXT_SIZE
 from onyx.context.search.models import InferenceChunk
 from onyx.context.search.models import InferenceSection
 from onyx.llm.interfaces import LLMConfig
+from onyx.natural_language_processing.utils import BaseTokenizer
 from onyx.natural_language_processing.utils import get_tokenizer
 from onyx.natural_language_processing.utils import tokenizer_trim_content
 from onyx.prompts.prompt_utils import build_doc_context_str
@@ -31,6 +33,9 @@ _METADATA_TOKEN_ESTIMATE = 75
 # Title and additional tokens as part of the tool message json
 # this is only used to log a warning so we can be more forgiving with the buffer
 _OVERCOUNT_ESTIMATE = 256
+# separator used between the chunks of a section, see inference_section_from_chunks
+_CHUNK_SEP = "\n"
+_CHUNK_TOKEN_COUNT_CACHE_SIZE = 65536
 
 
 class PruningError(Exception):
@@ -131,6 +136,98 @@ def _remove_sections_to_ignore(
     ]
 
 
+# (tokenizer, document id, chunk id, content hash, json escaped) -> token count, least
+# recently used first. The content hash is part of the key in case the chunk was
+# re-indexed
+_chunk_token_counts: OrderedDict[tuple[int, str, int, int, bool], int] = OrderedDict()
+_chunk_token_counts_lock = threading.Lock()
+
+
+def _json_escaped(content: str) -> str:
+    """Content as it appears inside a json string in the tool message (json.dumps
+    escapes non-ASCII characters, which usually take more tokens)."""
+    return json.dumps(content)[1:-1]
+
+
+def _chunk_token_count(
+    tokenizer: BaseTokenizer, chunk: InferenceChunk, using_tool_message: bool
+) -> int:
+    """LLM token count of the content of a chunk, memoized per tokenizer and chunk."""
+    # tokenizers are cached instances (see get_tokenizer)
+    key = (
+        id(tokenizer),
+        chunk.document_id,
+        chunk.chunk_id,
+        hash(chunk.content),
+        using_tool_message,
+    )
+    with _chunk_token_counts_lock:
+        token_count = _chunk_token_counts.get(key)
+        if token_count is not None:
+            _chunk_token_counts.move_to_end(key)
+            return token_count
+
+    content = _json_escaped(chunk.content) if using_tool_message else chunk.content
+    token_count = len(tokenizer.encode(content))
+    with _chunk_token_counts_lock:
+        _chunk_token_counts[key] = token_count
+        if len(_chunk_token_counts) > _CHUNK_TOKEN_COUNT_CACHE_SIZE:
+            _chunk_token_counts.popitem(last=False)
+    return token_count
+
+
+def _section_content_token_count(
+    tokenizer: BaseTokenizer, section: InferenceSection, using_tool_message: bool
+) -> int:
+    """LLM token count of the combined content of a section. Sections built from
+    their chunks (the common case) are counted from the memoized chunk counts, other
+    ones (e.g. already truncated) are encoded."""
+    chunks = section.chunks or [section.center_chunk]
+    joined_length = sum(len(chunk.content) for chunk in chunks) + len(_CHUNK_SEP) * (
+        len(chunks) - 1
+    )
+    if len(section.combined_content) == joined_length:
+        # counting a token per separator, tokens can merge across the separators
+        # but it is close enough for pruning
+        chunk_token_count = sum(
+            _chunk_token_count(tokenizer, c, using_tool_message) for c in chunks
+        )
+        return chunk_token_count + len(chunks) - 1
+
+    content = section.combined_content
+    return len(
+        tokenizer.encode(_json_escaped(content) if using_tool_message else content)
+    )
+
+
+def _section_overhead_token_count(
+    tokenizer: BaseTokenizer,
+    section: InferenceSection,
+    ind: int,
+    using_tool_message: bool,
+) -> int:
+    """LLM token count of everything around the content of a section in the prompt
+    (title, source, metadata, ...)."""
+    section_str = (
+        # If using tool message, it will be a bit of an overestimate as the extra json text around the section
+        # will be counted towards the token count. However, once the Sections are merged, the extra json parts
+        # that overlap will not be counted multiple times like it is in the pruning step.
+        json.dumps(
+            section_to_dict(section.model_copy(update={"combined_content": ""}), ind)
+        )
+        if using_tool_message
+        else build_doc_context_str(
+            semantic_identifier=section.center_chunk.semantic_identifier,
+            source_type=section.center_chunk.source_type,
+            content="",
+            metadata_dict=section.center_chunk.metadata,
+            updated_at=section.center_chunk.updated_at,
+            ind=ind,
+        )
+    )
+    return len(tokenizer.encode(section_str))
+
+
 def _apply_pruning(
     sections: list[InferenceSection],
     section_relevance_list: list[bool] | None,
@@ -144,37 +241,27 @@ def _apply_pruning(
         provider_type=llm_config.model_provider,
         model_name=llm_config.model_name,
     )
-    sections = deepcopy(sections)  # don't modify in place
-
     # re-order docs with all the "relevant" docs at the front
     sections = reorder_sections(
         sections=sections, section_relevance_list=section_relevance_list
     )
-    # remove docs that are explicitly marked as not for QA
+    # remove docs that are explicitly marked as not for QA, this also makes a new list
+    # so that the one passed in is not modified. The sections themselves are never
+    # modified, the ones that get truncated are replaced with (shallow) copies
     sections = _remove_sections_to_ignore(sections=sections)
 
     section_idx_token_count: dict[int, int] = {}
+    content_token_count = 0
 
     final_section_ind = None
     total_tokens = 0
     for ind, section in enumerate(sections):
-        section_str = (
-            # If using tool message, it will be a bit of an overestimate as the extra json text around the section
-            # will be counted towards the token count. However, once the Sections are merged, the extra json parts
-            # that overlap will not be counted multiple times like it is in the pruning step.
-            json.dumps(section_to_dict(section, ind))
-            if using_tool_message
-            else build_doc_context_str(
-                semantic_identifier=section.center_chunk.semantic_identifier,
-                source_type=section.center_chunk.source_type,
-                content=section.combined_content,
-                metadata_dict=section.center_chunk.metadata,
-                updated_at=section.center_chunk.updated_at,
-                ind=ind,
-            )
+        content_token_count = _section_content_token_count(
+            llm_tokenizer, section, using_tool_message
+        )
+        section_token_count = content_token_count + _section_overhead_token_count(
+            llm_tokenizer, section, ind, using_tool_message
         )
-
-        section_token_count = len(llm_tokenizer.encode(section_str))
         # if not using sections (specifically, using Sections where each section maps exactly to the one center chunk),
         # truncate chunks that are way too long. This can happen if the embedding model tokenizer is different
         # than the LLM tokenizer
@@ -196,10 +283,14 @@ def _apply_pruning(
                     "Found more tokens in Section than expected, "
                     "likely mismatch between embedding and LLM tokenizers. Trimming content..."
                 )
-            section.combined_content = tokenizer_trim_content(
-                content=section.combined_content,
-                desired_length=DOC_EMBEDDING_CONTEXT_SIZE,
-                tokenizer=llm_tokenizer,
+            sections[ind] = section.model_copy(
+                update={
+                    "combined_content": tokenizer_trim_content(
+                        content=section.combined_content,
+                        desired_length=DOC_EMBEDDING_CONTEXT_SIZE,
+                        tokenizer=llm_tokenizer,
+                    )
+                }
             )
             section_token_count = DOC_EMBEDDING_CONTEXT_SIZE
 
@@ -234,11 +325,9 @@ def _apply_pruning(
                     )
 
             amount_to_truncate = total_tokens - token_limit
-            # NOTE: need to recalculate the length here, since the previous calculation included
+            # NOTE: the content length is used here, since the section token count included
             # overhead from JSON-fying the doc / the metadata
-            final_doc_content_length = len(
-                llm_tokenizer.encode(sections[final_section_ind].combined_content)
-            ) - (amount_to_truncate)
+            final_doc_content_length = content_token_count - amount_to_truncate
             # this could occur if we only have space for the title / metadata
             # not ideal, but it's the most reasonable thing to do
             # NOTE: the frontend prevents documents from being selected if
@@ -251,10 +340,15 @@ def _apply_pruning(
                 )
                 sections.pop()
             else:
-                sections[final_section_ind].combined_content = tokenizer_trim_content(
-                    content=sections[final_section_ind].combined_content,
-                    desired_length=final_doc_content_length,
-                    tokenizer=llm_tokenizer,
+                final_section = sections[final_section_ind]
+                sections[final_section_ind] = final_section.model_copy(
+                    update={
+                        "combined_content": tokenizer_trim_content(
+                            content=final_section.combined_content,
+                            desired_length=final_doc_content_length,
+                            tokenizer=llm_tokenizer,
+                        )
+                    }
                 )
         else:
             # For search on chunk level (Section is just a chunk), don't truncate the final Chunk/Section unless it's the only one
@@ -262,12 +356,17 @@ def _apply_pruning(
             if final_section_ind != 0:
                 sections = sections[:final_section_ind]
             else:
-                sections[0].combined_content = tokenizer_trim_content(
-                    content=sections[0].combined_content,
-                    desired_length=token_limit - _METADATA_TOKEN_ESTIMATE,
-                    tokenizer=llm_tokenizer,
-                )
-                sections = [sections[0]]
+                sections = [
+                    sections[0].model_copy(
+                        update={
+                            "combined_content": tokenizer_trim_content(
+                                content=sections[0].combined_content,
+                                desired_length=token_limit - _METADATA_TOKEN_ESTIMATE,
+                                tokenizer=llm_tokenizer,
+                            )
+                        }
+                    )
+                ]
 
     return sections
 
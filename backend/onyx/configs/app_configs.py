@@ -211,6 +211,26 @@ except ValueError:
 
 USE_IAM_AUTH = os.getenv("USE_IAM_AUTH", "False").lower() == "true"
 
+# Where the contents of the file store (connector files, user uploads, chat images,
+# ...) are kept: "postgres" (large objects), "filesystem" or "s3" (any S3 compatible
+# object storage). The file records stay in postgres regardless.
+FILE_STORE_BACKEND = os.environ.get("FILE_STORE_BACKEND", "postgres").lower()
+# for the filesystem backend, should be a volume shared by all api servers / workers
+FILE_STORE_PATH = os.environ.get("FILE_STORE_PATH") or "/var/lib/onyx/file_store"
+FILE_STORE_S3_BUCKET = os.environ.get("FILE_STORE_S3_BUCKET") or ""
+FILE_STORE_S3_PREFIX = os.environ.get("FILE_STORE_S3_PREFIX") or ""
+# e.g. http://minio:9000, leave empty for AWS S3
+FILE_STORE_S3_ENDPOINT_URL = os.environ.get("FILE_STORE_S3_ENDPOINT_URL") or None
+FILE_STORE_S3_REGION = os.environ.get("FILE_STORE_S3_REGION") or AWS_REGION_NAME
+# leave empty to use the default AWS credential chain (IAM roles, ...)
+FILE_STORE_S3_ACCESS_KEY_ID = os.environ.get("FILE_STORE_S3_ACCESS_KEY_ID") or None
+FILE_STORE_S3_SECRET_ACCESS_KEY = (
+    os.environ.get("FILE_STORE_S3_SECRET_ACCESS_KEY") or None
+)
+# number of postgres large objects moved to the object store per background run
+FILE_STORE_MIGRATION_BATCH_SIZE = int(
+    os.environ.get("FILE_STORE_MIGRATION_BATCH_SIZE", "200")
+)
 
 REDIS_SSL = os.getenv("REDIS_SSL", "").lower() == "true"
 REDIS_HOST = os.environ.get("REDIS_HOST") or "localhost"
@@ -307,9 +327,14 @@ try:
 except ValueError:
     CELERY_WORKER_INDEXING_CONCURRENCY = CELERY_WORKER_INDEXING_CONCURRENCY_DEFAULT
 
-# The maximum number of tasks that can be queued up to sync to Vespa in a single pass
+# The maximum number of documents that can be queued up to sync to Vespa in a single pass
 VESPA_SYNC_MAX_TASKS = 1024
 
+# Number of documents synced to Vespa by a single metadata sync task, and how many of
+# them are updated concurrently within that task
+VESPA_SYNC_BATCH_SIZE = int(os.environ.get("VESPA_SYNC_BATCH_SIZE") or 256)
+VESPA_SYNC_BATCH_CONCURRENCY = int(os.environ.get("VESPA_SYNC_BATCH_CONCURRENCY") or 16)
+
 DB_YIELD_PER_DEFAULT = 64
 
 #####
@@ -340,6 +365,22 @@ WEB_CONNECTOR_OAUTH_CLIENT_ID = os.environ.get("WEB_CONNECTOR_OAUTH_CLIENT_ID")
 WEB_CONNECTOR_OAUTH_CLIENT_SECRET = os.environ.get("WEB_CONNECTOR_OAUTH_CLIENT_SECRET")
 WEB_CONNECTOR_OAUTH_TOKEN_URL = os.environ.get("WEB_CONNECTOR_OAUTH_TOKEN_URL")
 WEB_CONNECTOR_VALIDATE_URLS = os.environ.get("WEB_CONNECTOR_VALIDATE_URLS")
+# Used by web connectors with `http_first` enabled: pages are fetched by this many
+# concurrent workers, with at most WEB_CONNECTOR_MAX_REQUESTS_PER_HOST requests in flight
+# and at least WEB_CONNECTOR_MIN_REQUEST_INTERVAL_SECONDS between requests to a host
+WEB_CONNECTOR_CRAWL_CONCURRENCY = int(
+    os.environ.get("WEB_CONNECTOR_CRAWL_CONCURRENCY") or 8
+)
+WEB_CONNECTOR_MAX_REQUESTS_PER_HOST = int(
+    os.environ.get("WEB_CONNECTOR_MAX_REQUESTS_PER_HOST") or 4
+)
+WEB_CONNECTOR_MIN_REQUEST_INTERVAL_SECONDS = float(
+    os.environ.get("WEB_CONNECTOR_MIN_REQUEST_INTERVAL_SECONDS") or 0.0
+)
+# Number of pages crawled between two checkpoints of the frontier / visited set
+WEB_CONNECTOR_CHECKPOINT_INTERVAL_PAGES = int(
+    os.environ.get("WEB_CONNECTOR_CHECKPOINT_INTERVAL_PAGES") or 500
+)
 
 HTML_BASED_CONNECTOR_TRANSFORM_LINKS_STRATEGY = os.environ.get(
     "HTML_BASED_CONNECTOR_TRANSFORM_LINKS_STRATEGY",
@@ -403,6 +444,15 @@ CONFLUENCE_TIMEZONE_OFFSET = float(
     os.environ.get("CONFLUENCE_TIMEZONE_OFFSET", get_current_tz_offset())
 )
 
+# Opt-in: requests per second shared (through redis) by all workers using the same
+# Confluence credential. Off (0) by default since Atlassian publishes no fixed quota,
+# workers then only share the backoff when Confluence tells them to slow down
+# (429 with Retry-After). Set it for instances that throttle before answering 429s.
+CONFLUENCE_RATE_LIMIT_REQUESTS_PER_SECOND = float(
+    os.environ.get("CONFLUENCE_RATE_LIMIT_REQUESTS_PER_SECOND") or 0
+)
+CONFLUENCE_RATE_LIMIT_BURST = int(os.environ.get("CONFLUENCE_RATE_LIMIT_BURST") or 10)
+
 GOOGLE_DRIVE_CONNECTOR_SIZE_THRESHOLD = int(
     os.environ.get("GOOGLE_DRIVE_CONNECTOR_SIZE_THRESHOLD", 10 * 1024 * 1024)
 )
@@ -523,6 +573,28 @@ INDEXING_EMBEDDING_MODEL_NUM_THREADS = int(
     os.environ.get("INDEXING_EMBEDDING_MODEL_NUM_THREADS") or 1
 )
 
+# During an indexing attempt, the connector fetch, chunk + embed and document index write
+# stages run concurrently. This is the max number of batches buffered between two stages.
+# 0 disables the pipelining and runs every batch through all stages before fetching the next.
+INDEXING_PIPELINE_MAX_BUFFERED_BATCHES = int(
+    os.environ.get("INDEXING_PIPELINE_MAX_BUFFERED_BATCHES") or 2
+)
+
+# When a document is re-indexed, don't embed and write again the chunks that did not
+# change (see onyx.indexing.chunk_reuse). Attempts re-indexing from the beginning
+# always write all the chunks.
+INDEXING_REUSE_UNCHANGED_CHUNKS = (
+    os.environ.get("INDEXING_REUSE_UNCHANGED_CHUNKS", "true").lower() == "true"
+)
+
+# Size of the Postgres backed cache of the embeddings computed during indexing (see
+# onyx.indexing.embedding_cache), 0 disables it. Useful when the same content is indexed
+# several times, e.g. a connector that is deleted and added again, the same files in
+# several connectors or re-indexing from the beginning with a paid embedding provider.
+INDEXING_EMBEDDING_CACHE_MAX_MB = int(
+    os.environ.get("INDEXING_EMBEDDING_CACHE_MAX_MB") or 0
+)
+
 # During an indexing attempt, specifies the number of batches which are allowed to
 # exception without aborting the attempt.
 INDEXING_EXCEPTION_LIMIT = int(os.environ.get("INDEXING_EXCEPTION_LIMIT") or 0)
@@ -533,6 +605,20 @@ MAX_FILE_SIZE_BYTES = int(
     os.environ.get("MAX_FILE_SIZE_BYTES") or 2 * 1024 * 1024 * 1024
 )  # 2GB in bytes
 
+# PDF pages are only OCR'd if their embedded text has fewer than this many
+# alphanumeric characters (e.g. scanned pages) or is mostly garbled
+PDF_OCR_MIN_NATIVE_TEXT_CHARS = int(
+    os.environ.get("PDF_OCR_MIN_NATIVE_TEXT_CHARS") or 100
+)
+PDF_OCR_DPI = int(os.environ.get("PDF_OCR_DPI") or 300)
+# Max number of page ranges of a single PDF being rasterized + OCR'd at the same time
+PDF_OCR_MAX_WORKERS = int(
+    os.environ.get("PDF_OCR_MAX_WORKERS") or min(4, os.cpu_count() or 1)
+)
+# Consecutive pages that need OCR are rasterized together, with one
+# pdftoppm call per this many pages
+PDF_OCR_PAGES_PER_TASK = int(os.environ.get("PDF_OCR_PAGES_PER_TASK") or 4)
+
 # Use document summary for contextual rag
 USE_DOCUMENT_SUMMARY = os.environ.get("USE_DOCUMENT_SUMMARY", "true").lower() == "true"
 # Use chunk summary for contextual rag
@@ -574,6 +660,14 @@ LOG_POSTGRES_LATENCY = os.environ.get("LOG_POSTGRES_LATENCY", "").lower() == "tr
 LOG_POSTGRES_CONN_COUNTS = (
     os.environ.get("LOG_POSTGRES_CONN_COUNTS", "").lower() == "true"
 )
+# How often the api server measures how late its event loop runs (0 to disable), and
+# how late it has to be for the async handlers in flight to be logged as blocking it
+EVENT_LOOP_LAG_MONITOR_INTERVAL = float(
+    os.environ.get("EVENT_LOOP_LAG_MONITOR_INTERVAL") or "0.5"
+)
+EVENT_LOOP_BLOCKED_THRESHOLD = float(
+    os.environ.get("EVENT_LOOP_BLOCKED_THRESHOLD") or "0.1"
+)
 # Anonymous usage telemetry
 DISABLE_TELEMETRY = os.environ.get("DISABLE_TELEMETRY", "").lower() == "true"
 
@@ -589,6 +683,32 @@ CUSTOM_ANSWER_VALIDITY_CONDITIONS = json.loads(
 
 VESPA_REQUEST_TIMEOUT = int(os.environ.get("VESPA_REQUEST_TIMEOUT") or "15")
 
+# Chunks are fed to Vespa through an async client that multiplexes many in-flight
+# requests over a few HTTP/2 connections. The number of in-flight requests starts at
+# the initial value and adapts between the min and max based on how often Vespa
+# pushes back (429 / 503). Set VESPA_DISABLE_ASYNC_FEED to fall back to the threaded feed.
+VESPA_DISABLE_ASYNC_FEED = (
+    os.environ.get("VESPA_DISABLE_ASYNC_FEED", "").lower() == "true"
+)
+VESPA_FEED_INITIAL_CONCURRENCY = int(
+    os.environ.get("VESPA_FEED_INITIAL_CONCURRENCY") or 32
+)
+VESPA_FEED_MIN_CONCURRENCY = int(os.environ.get("VESPA_FEED_MIN_CONCURRENCY") or 4)
+VESPA_FEED_MAX_CONCURRENCY = int(os.environ.get("VESPA_FEED_MAX_CONCURRENCY") or 256)
+VESPA_FEED_MAX_CONNECTIONS = int(os.environ.get("VESPA_FEED_MAX_CONNECTIONS") or 4)
+VESPA_FEED_MAX_RETRIES = int(os.environ.get("VESPA_FEED_MAX_RETRIES") or 10)
+
+# Partial updates (access, document sets, boost, ...) are sent concurrently over a shared
+# client. This bounds the number of update requests in flight across the whole process.
+VESPA_UPDATE_MAX_IN_FLIGHT = int(os.environ.get("VESPA_UPDATE_MAX_IN_FLIGHT") or 32)
+VESPA_UPDATE_MAX_RETRIES = int(os.environ.get("VESPA_UPDATE_MAX_RETRIES") or 5)
+
+# Query time retrieval reuses a process-wide Vespa client, this is the number of
+# connections kept alive between queries
+VESPA_QUERY_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.environ.get("VESPA_QUERY_MAX_KEEPALIVE_CONNECTIONS") or 50
+)
+
 SYSTEM_RECURSION_LIMIT = int(os.environ.get("SYSTEM_RECURSION_LIMIT") or "1000")
 
 PARSE_WITH_TRAFILATURA = os.environ.get("PARSE_WITH_TRAFILATURA", "").lower() == "true"
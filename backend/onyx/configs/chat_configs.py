@@ -102,3 +102,20 @@ USE_SEMANTIC_KEYWORD_EXPANSIONS_BASIC_SEARCH = (
     os.environ.get("USE_SEMANTIC_KEYWORD_EXPANSIONS_BASIC_SEARCH", "false").lower()
     == "true"
 )
+
+# Query embeddings are cached per process (and optionally in Redis, shared by all API
+# servers) so that repeated queries, e.g. from Slack bots or agent loops, don't go back
+# to the embedding model. 0 MB disables the cache
+QUERY_EMBEDDING_CACHE_MAX_MB = int(os.environ.get("QUERY_EMBEDDING_CACHE_MAX_MB") or 64)
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = int(
+    os.environ.get("QUERY_EMBEDDING_CACHE_TTL_SECONDS") or 24 * 60 * 60
+)
+QUERY_EMBEDDING_CACHE_USE_REDIS = (
+    os.environ.get("QUERY_EMBEDDING_CACHE_USE_REDIS", "").lower() == "true"
+)
+
+# The ACL of a user (their email, groups and synced external groups) is cached per process
+# for this long, so that searches don't have to query the groups of the user every time.
+# Group membership changes take up to this long to apply to search. 0 disables the cache
+USER_ACL_CACHE_TTL_SECONDS = int(os.environ.get("USER_ACL_CACHE_TTL_SECONDS", "60"))
+USER_ACL_CACHE_MAX_USERS = int(os.environ.get("USER_ACL_CACHE_MAX_USERS") or 10_000)
@@ -44,8 +44,21 @@ ASYM_PASSAGE_PREFIX = os.environ.get("ASYM_PASSAGE_PREFIX", "search_document: ")
 EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE") or 0) or None
 
 BATCH_SIZE_ENCODE_CHUNKS = EMBEDDING_BATCH_SIZE or 8
+# For local models, sort the texts by length and batch them by tokens rather than by
+# count: a batch holds at most BATCH_SIZE_ENCODE_CHUNKS max length texts worth of tokens
+# once padded to its longest text, so titles and mini chunks are not padded to the length
+# of the full chunks they would otherwise be batched with
+LOCAL_EMBEDDING_LENGTH_BUCKETING = (
+    os.environ.get("LOCAL_EMBEDDING_LENGTH_BUCKETING") or "true"
+).lower() == "true"
 # don't send over too many chunks at once, as sending too many could cause timeouts
 BATCH_SIZE_ENCODE_CHUNKS_FOR_API_EMBEDDING_SERVICES = EMBEDDING_BATCH_SIZE or 512
+# Wire format of the embeddings returned by the model server, one of "float32",
+# "float16" (half the size, at some precision cost) or "json". Model servers that
+# don't support the binary formats fall back to JSON
+MODEL_SERVER_EMBEDDING_TRANSPORT = (
+    os.environ.get("MODEL_SERVER_EMBEDDING_TRANSPORT") or "float32"
+).lower()
 # For score display purposes, only way is to know the expected ranges
 CROSS_ENCODER_RANGE_MAX = 1
 CROSS_ENCODER_RANGE_MIN = 0
@@ -18,6 +18,9 @@ from requests import HTTPError
 
 from ee.onyx.configs.app_configs import OAUTH_CONFLUENCE_CLOUD_CLIENT_ID
 from ee.onyx.configs.app_configs import OAUTH_CONFLUENCE_CLOUD_CLIENT_SECRET
+from onyx.configs.app_configs import CONFLUENCE_RATE_LIMIT_BURST
+from onyx.configs.app_configs import CONFLUENCE_RATE_LIMIT_REQUESTS_PER_SECOND
+from onyx.configs.constants import DocumentSource
 from onyx.connectors.confluence.utils import _handle_http_error
 from onyx.connectors.confluence.utils import confluence_refresh_tokens
 from onyx.connectors.confluence.utils import get_start_param_from_url
@@ -25,6 +28,7 @@ from onyx.connectors.confluence.utils import update_param_in_path
 from onyx.connectors.interfaces import CredentialsProviderInterface
 from onyx.file_processing.html_utils import format_document_soup
 from onyx.redis.redis_pool import get_redis_client
+from onyx.redis.redis_rate_limiter import RedisRateLimiter
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -94,6 +98,9 @@ class OnyxConfluence:
         else:
             self.static_credentials = self._credentials_provider.get_credentials()
 
+        # created on the first call, see _get_rate_limiter
+        self._rate_limiter: RedisRateLimiter | None = None
+
         self._confluence = Confluence(url)
         self.credential_key: str = (
             self.CREDENTIAL_PREFIX
@@ -110,6 +117,22 @@ class OnyxConfluence:
         if timeout:
             self.shared_base_kwargs["timeout"] = timeout
 
+    def _get_rate_limiter(self) -> RedisRateLimiter:
+        """The limiter shared by every worker using this credential (indexing,
+        pruning, perm sync). Created lazily so that static credentials don't need a
+        redis client until a call is actually made."""
+        if self._rate_limiter is None:
+            tenant_id = self._credentials_provider.get_tenant_id()
+            self._rate_limiter = RedisRateLimiter(
+                self.redis_client or get_redis_client(tenant_id=tenant_id),
+                source=DocumentSource.CONFLUENCE.value,
+                key=self._credentials_provider.get_provider_key(),
+                rate=CONFLUENCE_RATE_LIMIT_REQUESTS_PER_SECOND,
+                burst=CONFLUENCE_RATE_LIMIT_BURST,
+                tenant_id=tenant_id,
+            )
+        return self._rate_limiter
+
     def _renew_credentials(self) -> tuple[dict[str, Any], bool]:
         """credential_json - the current json credentials
         Returns a tuple
@@ -316,6 +339,10 @@ class OnyxConfluence:
                         f"Confluence call attempts took longer than {TIMEOUT} seconds."
                     )
 
+                # waits for the shared token bucket and for any backoff another
+                # worker was told to respect
+                self._get_rate_limiter().acquire()
+
                 # we're relying more on the client to rate limit itself
                 # and applying our own retries in a more specific set of circumstances
                 try:
@@ -346,13 +373,16 @@ class OnyxConfluence:
 
                 except HTTPError as e:
                     delay_until = _handle_http_error(e, attempt)
+                    # share the backoff so that the other workers on this
+                    # credential don't keep hitting the limit, the next
+                    # acquire() waits it out
+                    delay = self._get_rate_limiter().backoff(
+                        max(delay_until - time.monotonic(), 0)
+                    )
                     logger.warning(
                         f"HTTPError in confluence call. "
-                        f"Retrying in {delay_until} seconds..."
+                        f"Retrying in {delay:.1f} seconds..."
                     )
-                    while time.monotonic() < delay_until:
-                        # in the future, check a signal here to exit
-                        time.sleep(1)
                 except AttributeError as e:
                     # Some error within the Confluence library, unclear why it fails.
                     # Users reported it to be intermittent, so just retry
@@ -31,12 +31,11 @@ if TYPE_CHECKING:
 
 from onyx.db.engine import get_session_with_current_tenant
 from onyx.db.models import PGFileStore
-from onyx.db.pg_file_store import create_populate_lobj
-from onyx.db.pg_file_store import save_bytes_to_pgfilestore
-from onyx.db.pg_file_store import upsert_pgfilestore
 from onyx.file_processing.extract_file_text import extract_file_text
 from onyx.file_processing.file_validation import is_valid_image_type
 from onyx.file_processing.image_utils import store_image_and_create_section
+from onyx.file_store.file_store import get_default_file_store
+from onyx.file_store.file_store import save_bytes_to_file_store
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -280,7 +279,7 @@ def _process_text_attachment(
     # Save the attachment
     try:
         with get_session_with_current_tenant() as db_session:
-            saved_record = save_bytes_to_pgfilestore(
+            saved_record = save_bytes_to_file_store(
                 db_session=db_session,
                 raw_bytes=raw_bytes,
                 media_type=media_type,
@@ -469,7 +468,7 @@ def _handle_http_error(e: requests.HTTPError, attempt: int) -> int:
                 "403 error. This sometimes happens when we hit "
                 f"Confluence rate limits. Retrying in {FORBIDDEN_RETRY_DELAY} seconds..."
             )
-            return FORBIDDEN_RETRY_DELAY
+            return math.ceil(time.monotonic() + FORBIDDEN_RETRY_DELAY)
 
         raise e
 
@@ -556,16 +555,15 @@ def attachment_to_file_record(
 
     # Save image to file store
     file_name = f"confluence_attachment_{attachment['id']}"
-    lobj_oid = create_populate_lobj(BytesIO(image_data), db_session)
-    pgfilestore = upsert_pgfilestore(
+    file_store = get_default_file_store(db_session)
+    file_store.save_file(
         file_name=file_name,
+        content=BytesIO(image_data),
         display_name=attachment["title"],
         file_origin=FileOrigin.OTHER,
         file_type=file_type,
-        lobj_oid=lobj_oid,
-        db_session=db_session,
-        commit=True,
     )
+    pgfilestore = file_store.read_file_record(file_name)
 
     return pgfilestore, image_data
 
@@ -1,4 +1,6 @@
+import threading
 import time
+from collections import deque
 from collections.abc import Callable
 from functools import wraps
 from typing import Any
@@ -26,63 +28,67 @@ class _RateLimitDecorator:
     Implementation inspired by the `ratelimit` library:
     https://github.com/tomasbasham/ratelimit.
 
-    NOTE: is not thread safe.
+    NOTE: the limit is per process (but thread safe). To share a limit between
+    workers, use onyx.redis.redis_rate_limiter.RedisRateLimiter.
+
+    Still used by (not migrated to the shared limiter yet):
+    - the Document360, Discourse and ClickUp connectors, on their API request methods.
+      The limit is shared by all the connectors of a process, not per credential.
+    - the Axero connector, on its module level request helper.
+    - celery_utils.extract_ids_from_runnable_connector, where it throttles the
+      pruning loop (MAX_PRUNING_DOCUMENT_RETRIEVAL_PER_MINUTE), not calls to an
+      external API, so a per process limit is what is wanted.
     """
 
     def __init__(
         self,
         max_calls: int,
         period: float,  # in seconds
-        sleep_time: float = 2,  # in seconds
-        sleep_backoff: float = 2,  # applies exponential backoff
         max_num_sleep: int = 0,
     ):
         self.max_calls = max_calls
         self.period = period
-        self.sleep_time = sleep_time
-        self.sleep_backoff = sleep_backoff
         self.max_num_sleep = max_num_sleep
 
-        self.call_history: list[float] = []
-        self.curr_calls = 0
+        self.call_history: deque[float] = deque()
+        self._lock = threading.Lock()
 
     def __call__(self, func: F) -> F:
         @wraps(func)
         def wrapped_func(*args: list, **kwargs: dict[str, Any]) -> Any:
-            # cleanup calls which are no longer relevant
-            self._cleanup()
-
-            # check if we've exceeded the rate limit
             sleep_cnt = 0
-            while len(self.call_history) == self.max_calls:
-                sleep_time = self.sleep_time * (self.sleep_backoff**sleep_cnt)
-                logger.notice(
-                    f"Rate limit exceeded for function {func.__name__}. "
-                    f"Waiting {sleep_time} seconds before retrying."
-                )
-                time.sleep(sleep_time)
-                sleep_cnt += 1
+            while True:
+                with self._lock:
+                    curr_time = time.monotonic()
+                    self._cleanup(curr_time)
+                    if len(self.call_history) < self.max_calls:
+                        # add the current call to the call history
+                        self.call_history.append(curr_time)
+                        break
+
+                    # wait until the oldest call falls out of the period
+                    sleep_time = self.call_history[0] + self.period - curr_time
+
                 if self.max_num_sleep != 0 and sleep_cnt >= self.max_num_sleep:
                     raise RateLimitTriedTooManyTimesError(
                         f"Exceeded '{self.max_num_sleep}' retries for function '{func.__name__}'"
                     )
 
-                self._cleanup()
+                logger.notice(
+                    f"Rate limit exceeded for function {func.__name__}. "
+                    f"Waiting {sleep_time:.2f} seconds before retrying."
+                )
+                time.sleep(sleep_time)
+                sleep_cnt += 1
 
-            # add the current call to the call history
-            self.call_history.append(time.monotonic())
             return func(*args, **kwargs)
 
         return cast(F, wrapped_func)
 
-    def _cleanup(self) -> None:
-        curr_time = time.monotonic()
+    def _cleanup(self, curr_time: float) -> None:
         time_to_expire_before = curr_time - self.period
-        self.call_history = [
-            call_time
-            for call_time in self.call_history
-            if call_time > time_to_expire_before
-        ]
+        while self.call_history and self.call_history[0] <= time_to_expire_before:
+            self.call_history.popleft()
 
 
 rate_limit_builder = _RateLimitDecorator
@@ -1,10 +1,14 @@
 import csv
 import json
+import multiprocessing
 import os
+import queue
 import sqlite3
+import threading
 import time
 from collections.abc import Iterator
 from pathlib import Path
+from typing import Any
 
 from onyx.connectors.salesforce.utils import SalesforceObject
 from onyx.connectors.salesforce.utils import validate_salesforce_id
@@ -13,6 +17,9 @@ from shared_configs.utils import batch_list
 
 logger = setup_logger()
 
+# (id, JSON serialized data, parent ids)
+_ParsedRecord = tuple[str, str, list[str]]
+
 
 class OnyxSalesforceSQLite:
     """Notes on context management using 'with self.conn':
@@ -25,6 +32,16 @@ class OnyxSalesforceSQLite:
     # might be appropriate here.
     NULL_ID_STRING = "N/A"
 
+    # number of csv rows parsed and written (and committed) at once
+    CSV_BATCH_SIZE = 10_000
+
+    # files this large are parsed in the background by default (see update_from_csv)
+    BACKGROUND_PARSE_MIN_BYTES = 64 * 1024 * 1024
+    # parsed batches waiting to be written
+    BACKGROUND_PARSE_QUEUE_SIZE = 2
+    # how often to check that the background parser is still alive while waiting
+    BACKGROUND_PARSE_POLL_SECONDS = 1.0
+
     def __init__(self, filename: str, isolation_level: str | None = None):
         self.filename = filename
         self.isolation_level = isolation_level
@@ -346,73 +363,45 @@ class OnyxSalesforceSQLite:
         self,
         object_type: str,
         csv_download_path: str,
+        parse_in_background: bool | None = None,
     ) -> list[str]:
-        """Update the SF DB with a CSV file using SQLite storage."""
+        """Update the SF DB with a CSV file using SQLite storage.
+
+        Rows are parsed in batches and each batch is written with executemany, with
+        the relationships of the whole batch updated through set based SQL.
+
+        parse_in_background: parse the next batch in another process (or thread, if
+        this process isn't allowed to have children) while the current one is
+        written. Defaults to doing so for files of at least
+        BACKGROUND_PARSE_MIN_BYTES when there is more than one CPU.
+        """
         if self._conn is None:
             raise RuntimeError("Database connection is closed")
 
-        updated_ids = []
+        if parse_in_background is None:
+            # only pays off if parsing and writing can actually run side by side
+            parse_in_background = (os.cpu_count() or 1) > 1 and os.path.getsize(
+                csv_download_path
+            ) >= OnyxSalesforceSQLite.BACKGROUND_PARSE_MIN_BYTES
+
+        batches = (
+            _parse_csv_batches_in_background(csv_download_path, self.CSV_BATCH_SIZE)
+            if parse_in_background
+            else _parse_csv_batches(csv_download_path, self.CSV_BATCH_SIZE)
+        )
+
+        updated_ids: list[str] = []
 
         with self._conn:
             cursor = self._conn.cursor()
+            OnyxSalesforceSQLite._create_staging_tables(cursor)
 
-            with open(csv_download_path, "r", newline="", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                uncommitted_rows = 0
-                for row in reader:
-                    parent_ids = set()
-                    field_to_remove: set[str] = set()
-
-                    if "Id" not in row:
-                        logger.warning(
-                            f"Row {row} does not have an Id field in {csv_download_path}"
-                        )
-                        continue
-
-                    id = row["Id"]
-
-                    # Process relationships and clean data
-                    # NOTE(rkuo): it looks like we just assume any field that
-                    # is a valid salesforce id references a parent
-                    for field, value in row.items():
-                        # remove empty fields
-                        if not value:
-                            field_to_remove.add(field)
-                            continue
-
-                        # remove salesforce id's (and add to parent id set)
-                        if validate_salesforce_id(value) and field != "Id":
-                            parent_ids.add(value)
-                            field_to_remove.add(field)
-                            continue
-
-                        # this field is real data, leave it alone
-
-                    # Remove unwanted fields
-                    for field in field_to_remove:
-                        if field != "LastModifiedById":
-                            del row[field]
-
-                    # Update main object data
-                    cursor.execute(
-                        """
-                        INSERT OR REPLACE INTO salesforce_objects (id, object_type, data)
-                        VALUES (?, ?, ?)
-                        """,
-                        (id, object_type, json.dumps(row)),
-                    )
-
-                    # Update relationships using the same connection
-                    OnyxSalesforceSQLite._update_relationship_tables(
-                        cursor, id, parent_ids
-                    )
-                    updated_ids.append(id)
+            for batch in batches:
+                OnyxSalesforceSQLite._write_batch(cursor, object_type, batch)
+                updated_ids.extend(record[0] for record in batch)
 
-                    # periodically commit or else memory will balloon
-                    uncommitted_rows += 1
-                    if uncommitted_rows >= 1024:
-                        self._conn.commit()
-                        uncommitted_rows = 0
+                # commit every batch or else memory will balloon
+                self._conn.commit()
 
             # If we're updating User objects, update the email map
             if object_type == "User":
@@ -491,69 +480,97 @@ class OnyxSalesforceSQLite:
             return [row[0] for row in cursor.fetchall()]
 
     @staticmethod
-    def _update_relationship_tables(
-        cursor: sqlite3.Cursor, child_id: str, parent_ids: set[str]
+    def _create_staging_tables(cursor: sqlite3.Cursor) -> None:
+        """Temp tables (private to the connection) holding the batch being written."""
+        cursor.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS staged_children (
+                child_id TEXT PRIMARY KEY
+            ) WITHOUT ROWID
+            """
+        )
+        cursor.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS staged_relationships (
+                child_id TEXT NOT NULL,
+                parent_id TEXT NOT NULL,
+                PRIMARY KEY (child_id, parent_id)
+            ) WITHOUT ROWID
+            """
+        )
+
+    @staticmethod
+    def _write_batch(
+        cursor: sqlite3.Cursor, object_type: str, batch: list[_ParsedRecord]
     ) -> None:
-        """Given a child id and a set of parent id's, updates the
-        relationships of the child to the parents in the db and removes old relationships.
+        """Upserts a batch of parsed records and replaces the relationships of the
+        records with the parents they reference now.
 
         Args:
-            conn: The database connection to use (must be in a transaction)
-            child_id: The ID of the child record
-            parent_ids: Set of parent IDs to link to
+            cursor: The cursor to use (must be in a transaction)
+            object_type: The Salesforce object type of the records
+            batch: (id, JSON serialized data, parent ids) of each record
         """
 
+        # if an id appears more than once, the last row wins
+        records = {id: (data, parent_ids) for id, data, parent_ids in batch}
+
         try:
-            # Get existing parent IDs
-            cursor.execute(
-                "SELECT parent_id FROM relationships WHERE child_id = ?", (child_id,)
+            cursor.executemany(
+                """
+                INSERT OR REPLACE INTO salesforce_objects (id, object_type, data)
+                VALUES (?, ?, ?)
+                """,
+                [(id, object_type, data) for id, (data, _) in records.items()],
             )
-            old_parent_ids = {row[0] for row in cursor.fetchall()}
 
-            # Calculate differences
-            parent_ids_to_remove = old_parent_ids - parent_ids
-            parent_ids_to_add = parent_ids - old_parent_ids
+            cursor.execute("DELETE FROM staged_children")
+            cursor.execute("DELETE FROM staged_relationships")
+            cursor.executemany(
+                "INSERT INTO staged_children (child_id) VALUES (?)",
+                [(id,) for id in records],
+            )
+            cursor.executemany(
+                "INSERT INTO staged_relationships (child_id, parent_id) VALUES (?, ?)",
+                [
+                    (id, parent_id)
+                    for id, (_, parent_ids) in records.items()
+                    for parent_id in parent_ids
+                ],
+            )
 
-            # Remove old relationships
-            if parent_ids_to_remove:
-                cursor.executemany(
-                    "DELETE FROM relationships WHERE child_id = ? AND parent_id = ?",
-                    [(child_id, parent_id) for parent_id in parent_ids_to_remove],
-                )
-                # Also remove from relationship_types
-                cursor.executemany(
-                    "DELETE FROM relationship_types WHERE child_id = ? AND parent_id = ?",
-                    [(child_id, parent_id) for parent_id in parent_ids_to_remove],
+            # Remove relationships to parents the children no longer reference
+            for table in ("relationships", "relationship_types"):
+                cursor.execute(
+                    f"""
+                    DELETE FROM {table}
+                    WHERE child_id IN (SELECT child_id FROM staged_children)
+                    AND (child_id, parent_id) NOT IN (
+                        SELECT child_id, parent_id FROM staged_relationships
+                    )
+                    """
                 )
 
             # Add new relationships
-            if parent_ids_to_add:
-                # First add to relationships table
-                cursor.executemany(
-                    "INSERT INTO relationships (child_id, parent_id) VALUES (?, ?)",
-                    [(child_id, parent_id) for parent_id in parent_ids_to_add],
-                )
-
-                # Then get the types of the parent objects and add to relationship_types
-                for parent_id in parent_ids_to_add:
-                    cursor.execute(
-                        "SELECT object_type FROM salesforce_objects WHERE id = ?",
-                        (parent_id,),
-                    )
-                    result = cursor.fetchone()
-                    if result:
-                        parent_type = result[0]
-                        cursor.execute(
-                            """
-                            INSERT INTO relationship_types (child_id, parent_id, parent_type)
-                            VALUES (?, ?, ?)
-                            """,
-                            (child_id, parent_id, parent_type),
-                        )
+            cursor.execute(
+                """
+                INSERT OR IGNORE INTO relationships (child_id, parent_id)
+                SELECT child_id, parent_id FROM staged_relationships
+                """
+            )
 
+            # Then add the types of the parents that are known
+            cursor.execute(
+                """
+                INSERT OR IGNORE INTO relationship_types (child_id, parent_id, parent_type)
+                SELECT staged.child_id, staged.parent_id, parents.object_type
+                FROM staged_relationships AS staged
+                JOIN salesforce_objects AS parents ON parents.id = staged.parent_id
+                """
+            )
         except Exception:
             logger.exception(
-                f"Error updating relationship tables: child_id={child_id} parent_ids={parent_ids}"
+                f"Error writing batch: object_type={object_type} len={len(records)}"
             )
             raise
 
@@ -574,6 +591,170 @@ class OnyxSalesforceSQLite:
         )
 
 
+def _parse_csv_row(row: dict[str, str]) -> _ParsedRecord:
+    parent_ids = set()
+    field_to_remove: set[str] = set()
+
+    id = row["Id"]
+
+    # Process relationships and clean data
+    # NOTE(rkuo): it looks like we just assume any field that
+    # is a valid salesforce id references a parent
+    for field, value in row.items():
+        # remove empty fields
+        if not value:
+            field_to_remove.add(field)
+            continue
+
+        # remove salesforce id's (and add to parent id set)
+        if validate_salesforce_id(value) and field != "Id":
+            parent_ids.add(value)
+            field_to_remove.add(field)
+            continue
+
+        # this field is real data, leave it alone
+
+    # Remove unwanted fields
+    for field in field_to_remove:
+        if field != "LastModifiedById":
+            del row[field]
+
+    return id, json.dumps(row), list(parent_ids)
+
+
+def _parse_csv_batches(
+    csv_download_path: str, batch_size: int
+) -> Iterator[list[_ParsedRecord]]:
+    with open(csv_download_path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        batch: list[_ParsedRecord] = []
+        for row in reader:
+            if "Id" not in row:
+                logger.warning(
+                    f"Row {row} does not have an Id field in {csv_download_path}"
+                )
+                continue
+
+            batch.append(_parse_csv_row(row))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+
+def _put_until_stopped(q: Any, item: Any, stop: Any) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=1.0)
+            return True
+        except queue.Full:
+            continue
+
+    return False
+
+
+def _parse_csv_batches_into_queue(
+    csv_download_path: str, batch_size: int, q: Any, stop: Any
+) -> None:
+    """Runs in the background parser. Puts batches on the queue, followed by None
+    when done (or the exception that stopped the parsing)."""
+    try:
+        for batch in _parse_csv_batches(csv_download_path, batch_size):
+            if not _put_until_stopped(q, batch, stop):
+                return
+    except Exception as e:
+        _put_until_stopped(q, e, stop)
+        return
+
+    _put_until_stopped(q, None, stop)
+
+
+def _get_from_background_parser(
+    q: Any,
+    worker: multiprocessing.process.BaseProcess | threading.Thread,
+    csv_download_path: str,
+) -> Any:
+    """Waits for the next item of the background parser, raises if the parser is
+    gone (e.g. killed for using too much memory) since nothing would ever come."""
+    poll_seconds = OnyxSalesforceSQLite.BACKGROUND_PARSE_POLL_SECONDS
+    while True:
+        try:
+            return q.get(timeout=poll_seconds)
+        except queue.Empty:
+            if worker.is_alive():
+                continue
+
+        # the worker may have put its last items right before exiting
+        try:
+            return q.get(timeout=poll_seconds)
+        except queue.Empty:
+            exitcode = getattr(worker, "exitcode", None)
+            raise RuntimeError(
+                f"Background CSV parser of {csv_download_path} exited without "
+                f"finishing (exitcode={exitcode})"
+            ) from None
+
+
+def _parse_csv_batches_in_background(
+    csv_download_path: str, batch_size: int
+) -> Iterator[list[_ParsedRecord]]:
+    """Same as _parse_csv_batches, but the parsing happens in a separate process so
+    that it overlaps with writing the previous batch to sqlite.
+
+    Daemonic processes (e.g. the spawned indexing processes) can't have children,
+    a thread is used there instead. Parsing still overlaps with sqlite, which
+    releases the GIL while it writes."""
+    worker: multiprocessing.process.BaseProcess | threading.Thread
+    q: Any
+    stop: Any
+    if multiprocessing.current_process().daemon:
+        q = queue.Queue(maxsize=OnyxSalesforceSQLite.BACKGROUND_PARSE_QUEUE_SIZE)
+        stop = threading.Event()
+        worker = threading.Thread(
+            target=_parse_csv_batches_into_queue,
+            args=(csv_download_path, batch_size, q, stop),
+            daemon=True,
+        )
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        q = ctx.Queue(maxsize=OnyxSalesforceSQLite.BACKGROUND_PARSE_QUEUE_SIZE)
+        stop = ctx.Event()
+        worker = ctx.Process(
+            target=_parse_csv_batches_into_queue,
+            args=(csv_download_path, batch_size, q, stop),
+            daemon=True,
+        )
+
+    worker.start()
+    try:
+        while True:
+            item = _get_from_background_parser(q, worker, csv_download_path)
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        # drain whatever is left so that the worker isn't stuck flushing the queue
+        while worker.is_alive():
+            try:
+                q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        worker.join()
+
+    # all the batches arrived, but the process may still have failed on its way out
+    exitcode = getattr(worker, "exitcode", None)
+    if exitcode:
+        raise RuntimeError(
+            f"Background CSV parser of {csv_download_path} failed with "
+            f"exitcode={exitcode}"
+        )
+
+
 # @contextmanager
 # def get_db_connection(
 #     directory: str,
@@ -50,6 +50,7 @@ from onyx.connectors.slack.utils import make_slack_api_call_w_retries
 from onyx.connectors.slack.utils import SlackTextCleaner
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from onyx.redis.redis_pool import get_redis_client
+from onyx.redis.redis_rate_limiter import RedisRateLimiter
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -526,9 +527,7 @@ class SlackConnector(
         self.text_cleaner: SlackTextCleaner | None = None
         self.user_cache: dict[str, BasicExpertInfo | None] = {}
         self.credentials_provider: CredentialsProviderInterface | None = None
-        self.credential_prefix: str | None = None
-        self.delay_lock: str | None = None  # the redis key for the shared lock
-        self.delay_key: str | None = None  # the redis key for the shared delay
+        self.rate_limiter: RedisRateLimiter | None = None
 
     def load_credentials(self, credentials: dict[str, Any]) -> dict[str, Any] | None:
         raise NotImplementedError("Use set_credentials_provider with this connector.")
@@ -540,20 +539,20 @@ class SlackConnector(
         tenant_id = credentials_provider.get_tenant_id()
         self.redis = get_redis_client(tenant_id=tenant_id)
 
-        self.credential_prefix = (
-            f"connector:slack:credential_{credentials_provider.get_provider_key()}"
+        # shares the rate limit backoff with every worker using this credential
+        self.rate_limiter = RedisRateLimiter(
+            self.redis,
+            source=DocumentSource.SLACK.value,
+            key=credentials_provider.get_provider_key(),
+            tenant_id=tenant_id,
         )
-        self.delay_lock = f"{self.credential_prefix}:delay_lock"
-        self.delay_key = f"{self.credential_prefix}:delay"
 
         # NOTE: slack has a built in RateLimitErrorRetryHandler, but it isn't designed
         # for concurrent workers. We've extended it with OnyxRedisSlackRetryHandler.
         connection_error_retry_handler = ConnectionErrorRetryHandler()
         onyx_rate_limit_error_retry_handler = OnyxRedisSlackRetryHandler(
             max_retry_count=self.MAX_RETRIES,
-            delay_lock=self.delay_lock,
-            delay_key=self.delay_key,
-            r=self.redis,
+            rate_limiter=self.rate_limiter,
         )
         custom_retry_handlers: list[RetryHandler] = [
             connection_error_retry_handler,
@@ -1,16 +1,13 @@
 import math
 import random
-import time
-from typing import cast
 from typing import Optional
 
-from redis import Redis
-from redis.lock import Lock as RedisLock
 from slack_sdk.http_retry.handler import RetryHandler
 from slack_sdk.http_retry.request import HttpRequest
 from slack_sdk.http_retry.response import HttpResponse
 from slack_sdk.http_retry.state import RetryState
 
+from onyx.redis.redis_rate_limiter import RedisRateLimiter
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -18,10 +15,11 @@ logger = setup_logger()
 
 class OnyxRedisSlackRetryHandler(RetryHandler):
     """
-    This class uses Redis to share a rate limit among multiple threads.
+    This class uses Redis to share a rate limit among multiple threads and workers.
 
-    Threads that encounter a rate limit will observe the shared delay, increment the
-    shared delay with the retry value, and use the new shared value as a wait interval.
+    Threads that encounter a rate limit will add the retry value on top of the shared
+    delay (see RedisRateLimiter.backoff with cumulative=True) and wait for the new
+    shared delay to pass.
 
     This has the effect of serializing calls when a rate limit is hit, which is what
     needs to happens if the server punishes us with additional limiting when we make
@@ -33,26 +31,18 @@ class OnyxRedisSlackRetryHandler(RetryHandler):
     Adapted from slack's RateLimitErrorRetryHandler.
     """
 
-    LOCK_TTL = 60  # used to serialize access to the retry TTL
-    LOCK_BLOCKING_TIMEOUT = 60  # how long to wait for the lock
-
     """RetryHandler that does retries for rate limited errors."""
 
     def __init__(
         self,
         max_retry_count: int,
-        delay_lock: str,
-        delay_key: str,
-        r: Redis,
+        rate_limiter: RedisRateLimiter,
     ):
         """
-        delay_lock: the redis key to use with RedisLock (to synchronize access to delay_key)
-        delay_key: the redis key containing a shared TTL
+        rate_limiter: the limiter shared by all workers using the same credential
         """
         super().__init__(max_retry_count=max_retry_count)
-        self._redis: Redis = r
-        self._delay_lock = delay_lock
-        self._delay_key = delay_key
+        self._rate_limiter = rate_limiter
 
     def _can_retry(
         self,
@@ -116,44 +106,15 @@ class OnyxRedisSlackRetryHandler(RetryHandler):
         except ValueError:
             duration_s += random.random()
 
-        # lock and extend the ttl
-        lock: RedisLock = self._redis.lock(
-            self._delay_lock,
-            timeout=OnyxRedisSlackRetryHandler.LOCK_TTL,
-            thread_local=False,
-        )
-
-        acquired = lock.acquire(
-            blocking_timeout=OnyxRedisSlackRetryHandler.LOCK_BLOCKING_TIMEOUT / 2
-        )
-
-        ttl_ms: int | None = None
-
-        try:
-            if acquired:
-                # if we can get the lock, then read and extend the ttl
-                ttl_ms = cast(int, self._redis.pttl(self._delay_key))
-                if ttl_ms < 0:  # negative values are error status codes ... see docs
-                    ttl_ms = 0
-                ttl_ms_new = ttl_ms + int(duration_s * 1000.0)
-                self._redis.set(self._delay_key, "1", px=ttl_ms_new)
-            else:
-                # if we can't get the lock, just go ahead.
-                # TODO: if we know our actual parallelism, multiplying by that
-                # would be a pretty good idea
-                ttl_ms_new = int(duration_s * 1000.0)
-        finally:
-            if acquired:
-                lock.release()
+        # extend the shared delay and wait it out
+        shared_delay_s = self._rate_limiter.backoff(duration_s, cumulative=True)
 
         logger.warning(
             f"OnyxRedisSlackRetryHandler.prepare_for_next_attempt wait: "
             f"retry-after={retry_after_value} "
-            f"shared_delay_ms={ttl_ms} new_shared_delay_ms={ttl_ms_new}"
+            f"new_shared_delay_s={shared_delay_s}"
         )
 
-        # TODO: would be good to take an event var and sleep in short increments to
-        # allow for a clean exit / exception
-        time.sleep(ttl_ms_new / 1000.0)
+        self._rate_limiter.acquire()
 
         state.increment_current_attempt()
@@ -9,6 +9,7 @@ from enum import Enum
 from typing import Any
 from typing import cast
 from typing import Tuple
+from typing import TYPE_CHECKING
 from urllib.parse import urljoin
 from urllib.parse import urlparse
 
@@ -16,12 +17,14 @@ import requests
 from bs4 import BeautifulSoup
 from oauthlib.oauth2 import BackendApplicationClient
 from playwright.sync_api import BrowserContext
+from playwright.sync_api import Page
 from playwright.sync_api import Playwright
 from playwright.sync_api import sync_playwright
 from requests_oauthlib import OAuth2Session  # type:ignore
 from urllib3.exceptions import MaxRetryError
 
 from onyx.configs.app_configs import INDEX_BATCH_SIZE
+from onyx.configs.app_configs import WEB_CONNECTOR_CHECKPOINT_INTERVAL_PAGES
 from onyx.configs.app_configs import WEB_CONNECTOR_OAUTH_CLIENT_ID
 from onyx.configs.app_configs import WEB_CONNECTOR_OAUTH_CLIENT_SECRET
 from onyx.configs.app_configs import WEB_CONNECTOR_OAUTH_TOKEN_URL
@@ -31,16 +34,24 @@ from onyx.connectors.exceptions import ConnectorValidationError
 from onyx.connectors.exceptions import CredentialExpiredError
 from onyx.connectors.exceptions import InsufficientPermissionsError
 from onyx.connectors.exceptions import UnexpectedValidationError
+from onyx.connectors.interfaces import CheckpointedConnector
+from onyx.connectors.interfaces import CheckpointOutput
 from onyx.connectors.interfaces import GenerateDocumentsOutput
 from onyx.connectors.interfaces import LoadConnector
+from onyx.connectors.interfaces import SecondsSinceUnixEpoch
+from onyx.connectors.models import ConnectorCheckpoint
 from onyx.connectors.models import Document
 from onyx.connectors.models import TextSection
 from onyx.file_processing.extract_file_text import read_pdf_file
+from onyx.file_processing.html_utils import ParsedHTML
 from onyx.file_processing.html_utils import web_html_cleanup
 from onyx.utils.logger import setup_logger
 from onyx.utils.sitemap import list_pages_for_site
 from shared_configs.configs import MULTI_TENANT
 
+if TYPE_CHECKING:
+    from onyx.connectors.web.crawler import WebCrawler
+
 logger = setup_logger()
 
 WEB_CONNECTOR_MAX_SCROLL_ATTEMPTS = 20
@@ -215,6 +226,26 @@ def is_pdf_content(response: requests.Response) -> bool:
     return any(pdf_type in content_type for pdf_type in PDF_MIME_TYPES)
 
 
+def get_oauth_headers() -> dict[str, str]:
+    """The Authorization header to send if the web connector is configured with OAuth
+    client credentials, empty otherwise."""
+    if not (
+        WEB_CONNECTOR_OAUTH_CLIENT_ID
+        and WEB_CONNECTOR_OAUTH_CLIENT_SECRET
+        and WEB_CONNECTOR_OAUTH_TOKEN_URL
+    ):
+        return {}
+
+    client = BackendApplicationClient(client_id=WEB_CONNECTOR_OAUTH_CLIENT_ID)
+    oauth = OAuth2Session(client=client)
+    token = oauth.fetch_token(
+        token_url=WEB_CONNECTOR_OAUTH_TOKEN_URL,
+        client_id=WEB_CONNECTOR_OAUTH_CLIENT_ID,
+        client_secret=WEB_CONNECTOR_OAUTH_CLIENT_SECRET,
+    )
+    return {"Authorization": "Bearer {}".format(token["access_token"])}
+
+
 def start_playwright() -> Tuple[Playwright, BrowserContext]:
     playwright = sync_playwright().start()
 
@@ -275,25 +306,40 @@ def start_playwright() -> Tuple[Playwright, BrowserContext]:
     """
     )
 
-    if (
-        WEB_CONNECTOR_OAUTH_CLIENT_ID
-        and WEB_CONNECTOR_OAUTH_CLIENT_SECRET
-        and WEB_CONNECTOR_OAUTH_TOKEN_URL
-    ):
-        client = BackendApplicationClient(client_id=WEB_CONNECTOR_OAUTH_CLIENT_ID)
-        oauth = OAuth2Session(client=client)
-        token = oauth.fetch_token(
-            token_url=WEB_CONNECTOR_OAUTH_TOKEN_URL,
-            client_id=WEB_CONNECTOR_OAUTH_CLIENT_ID,
-            client_secret=WEB_CONNECTOR_OAUTH_CLIENT_SECRET,
-        )
-        context.set_extra_http_headers(
-            {"Authorization": "Bearer {}".format(token["access_token"])}
-        )
+    oauth_headers = get_oauth_headers()
+    if oauth_headers:
+        context.set_extra_http_headers(oauth_headers)
 
     return playwright, context
 
 
+def scroll_to_bottom(page: Page) -> None:
+    """Scrolls until no more content is loaded, for pages that load content lazily"""
+    scroll_attempts = 0
+    previous_height = page.evaluate("document.body.scrollHeight")
+    while scroll_attempts < WEB_CONNECTOR_MAX_SCROLL_ATTEMPTS:
+        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        page.wait_for_load_state("networkidle", timeout=30000)
+        new_height = page.evaluate("document.body.scrollHeight")
+        if new_height == previous_height:
+            break  # Stop scrolling when no more content is loaded
+        previous_height = new_height
+        scroll_attempts += 1
+
+
+def add_iframe_text(page: Page, parsed_html: ParsedHTML) -> None:
+    iframe_count = page.frame_locator("iframe").locator("html").count()
+    if iframe_count > 0:
+        iframe_texts = page.frame_locator("iframe").locator("html").all_inner_texts()
+        document_text = "\n".join(iframe_texts)
+        """ 700 is the threshold value for the length of the text extracted
+        from the iframe based on the issue faced """
+        if len(parsed_html.cleaned_text) < IFRAME_TEXT_LENGTH_THRESHOLD:
+            parsed_html.cleaned_text = document_text
+        else:
+            parsed_html.cleaned_text += "\n" + document_text
+
+
 def extract_urls_from_sitemap(sitemap_url: str) -> list[str]:
     try:
         response = requests.get(sitemap_url, headers=DEFAULT_HEADERS)
@@ -343,7 +389,7 @@ def _read_urls_file(location: str) -> list[str]:
     return urls
 
 
-def _get_datetime_from_last_modified_header(last_modified: str) -> datetime | None:
+def get_datetime_from_last_modified_header(last_modified: str) -> datetime | None:
     try:
         return datetime.strptime(last_modified, "%a, %d %b %Y %H:%M:%S %Z").replace(
             tzinfo=timezone.utc
@@ -352,7 +398,7 @@ def _get_datetime_from_last_modified_header(last_modified: str) -> datetime | No
         return None
 
 
-def _handle_cookies(context: BrowserContext, url: str) -> None:
+def handle_cookies(context: BrowserContext, url: str) -> None:
     """Handle cookies for the given URL to help with bot detection"""
     try:
         # Parse the URL to get the domain
@@ -393,7 +439,19 @@ def _handle_cookies(context: BrowserContext, url: str) -> None:
         )
 
 
-class WebConnector(LoadConnector):
+class WebConnectorCheckpoint(ConnectorCheckpoint):
+    """State of an `http_first` crawl. `to_visit` is None until the crawl has started."""
+
+    to_visit: list[str] | None = None
+    visited: list[str] = []
+    # hashes of the title + content of the indexed pages, to skip duplicates
+    content_hashes: list[str] = []
+    # pages found (indexed or not modified), a crawl that finds none fails
+    num_pages_crawled: int = 0
+    last_error: str | None = None
+
+
+class WebConnector(LoadConnector, CheckpointedConnector[WebConnectorCheckpoint]):
     def __init__(
         self,
         base_url: str,  # Can't change this without disrupting existing users
@@ -402,6 +460,9 @@ class WebConnector(LoadConnector):
         batch_size: int = INDEX_BATCH_SIZE,
         scroll_before_scraping: bool = False,
         add_randomness: bool = True,
+        # Fetch pages concurrently over HTTP and only load the ones that need JavaScript
+        # in the browser, see `onyx.connectors.web.crawler`
+        http_first: bool = False,
         **kwargs: Any,
     ) -> None:
         self.mintlify_cleanup = mintlify_cleanup
@@ -410,6 +471,7 @@ class WebConnector(LoadConnector):
         self.scroll_before_scraping = scroll_before_scraping
         self.web_connector_type = web_connector_type
         self.add_randomness = add_randomness
+        self.http_first = http_first
         if web_connector_type == WEB_CONNECTOR_VALID_SETTINGS.RECURSIVE.value:
             self.recursive = True
             self.to_visit_list = [_ensure_valid_url(base_url)]
@@ -444,9 +506,87 @@ class WebConnector(LoadConnector):
             logger.warning("Unexpected credentials provided for Web Connector")
         return None
 
+    def _build_crawler(self) -> "WebCrawler":
+        from onyx.connectors.web.crawler import WebCrawler
+
+        if not self.to_visit_list:
+            raise ValueError("No URLs to visit")
+
+        return WebCrawler(
+            base_url=self.to_visit_list[0],  # For the recursive case
+            start_urls=self.to_visit_list,
+            recursive=self.recursive,
+            mintlify_cleanup=self.mintlify_cleanup,
+            scroll_before_scraping=self.scroll_before_scraping,
+        )
+
+    def load_from_checkpoint(
+        self,
+        start: SecondsSinceUnixEpoch,
+        end: SecondsSinceUnixEpoch,
+        checkpoint: WebConnectorCheckpoint,
+    ) -> CheckpointOutput[WebConnectorCheckpoint]:
+        if not self.http_first:
+            for doc_batch in self.load_from_state():
+                yield from doc_batch
+            return WebConnectorCheckpoint(has_more=False)
+
+        if checkpoint.to_visit is None:
+            # make sure we can connect to the base url
+            check_internet_connection(self.to_visit_list[0])
+
+        # unchanged pages were indexed by a previous run, unless this is a run
+        # from the beginning (e.g. re-indexing with new search settings)
+        modified_since = (
+            datetime.fromtimestamp(start, tz=timezone.utc) if start > 0 else None
+        )
+        return (
+            yield from self._build_crawler().crawl(
+                checkpoint,
+                modified_since=modified_since,
+                max_pages=WEB_CONNECTOR_CHECKPOINT_INTERVAL_PAGES,
+            )
+        )
+
+    def _load_all_with_crawler(self) -> GenerateDocumentsOutput:
+        check_internet_connection(self.to_visit_list[0])
+
+        crawler = self._build_crawler()
+        checkpoint = self.build_dummy_checkpoint()
+        doc_batch: list[Document] = []
+        while checkpoint.has_more:
+            crawl_generator = crawler.crawl(
+                checkpoint, max_pages=WEB_CONNECTOR_CHECKPOINT_INTERVAL_PAGES
+            )
+            while True:
+                try:
+                    document_or_failure = next(crawl_generator)
+                except StopIteration as e:
+                    checkpoint = e.value
+                    break
+
+                if isinstance(document_or_failure, Document):
+                    doc_batch.append(document_or_failure)
+                    if len(doc_batch) >= self.batch_size:
+                        yield doc_batch
+                        doc_batch = []
+
+        if doc_batch:
+            yield doc_batch
+
+    def build_dummy_checkpoint(self) -> WebConnectorCheckpoint:
+        return WebConnectorCheckpoint(has_more=True)
+
+    def validate_checkpoint_json(self, checkpoint_json: str) -> WebConnectorCheckpoint:
+        return WebConnectorCheckpoint.model_validate_json(checkpoint_json)
+
     def load_from_state(self) -> GenerateDocumentsOutput:
         """Traverses through all pages found on the website
         and converts them into documents"""
+        if self.http_first:
+            yield from self._load_all_with_crawler()
+            return
+
         visited_links: set[str] = set()
         to_visit: list[str] = self.to_visit_list
         content_hashes = set()
@@ -502,7 +642,7 @@ class WebConnector(LoadConnector):
                         restart_playwright = False
 
                     # Handle cookies for the URL
-                    _handle_cookies(context, initial_url)
+                    handle_cookies(context, initial_url)
 
                     # First do a HEAD request to check content type without downloading the entire content
                     head_response = requests.head(
@@ -528,7 +668,7 @@ class WebConnector(LoadConnector):
                                 semantic_identifier=initial_url.split("/")[-1],
                                 metadata=metadata,
                                 doc_updated_at=(
-                                    _get_datetime_from_last_modified_header(
+                                    get_datetime_from_last_modified_header(
                                         last_modified
                                     )
                                     if last_modified
@@ -589,18 +729,7 @@ class WebConnector(LoadConnector):
                     retry_success = True
 
                     if self.scroll_before_scraping:
-                        scroll_attempts = 0
-                        previous_height = page.evaluate("document.body.scrollHeight")
-                        while scroll_attempts < WEB_CONNECTOR_MAX_SCROLL_ATTEMPTS:
-                            page.evaluate(
-                                "window.scrollTo(0, document.body.scrollHeight)"
-                            )
-                            page.wait_for_load_state("networkidle", timeout=30000)
-                            new_height = page.evaluate("document.body.scrollHeight")
-                            if new_height == previous_height:
-                                break  # Stop scrolling when no more content is loaded
-                            previous_height = new_height
-                            scroll_attempts += 1
+                        scroll_to_bottom(page)
 
                     content = page.content()
                     soup = BeautifulSoup(content, "html.parser")
@@ -625,25 +754,7 @@ class WebConnector(LoadConnector):
                         f"{index}: Length of cleaned text {len(parsed_html.cleaned_text)}"
                     )
                     if JAVASCRIPT_DISABLED_MESSAGE in parsed_html.cleaned_text:
-                        iframe_count = (
-                            page.frame_locator("iframe").locator("html").count()
-                        )
-                        if iframe_count > 0:
-                            iframe_texts = (
-                                page.frame_locator("iframe")
-                                .locator("html")
-                                .all_inner_texts()
-                            )
-                            document_text = "\n".join(iframe_texts)
-                            """ 700 is the threshold value for the length of the text extracted
-                            from the iframe based on the issue faced """
-                            if (
-                                len(parsed_html.cleaned_text)
-                                < IFRAME_TEXT_LENGTH_THRESHOLD
-                            ):
-                                parsed_html.cleaned_text = document_text
-                            else:
-                                parsed_html.cleaned_text += "\n" + document_text
+                        add_iframe_text(page, parsed_html)
 
                     # Sometimes pages with #! will serve duplicate content
                     # There are also just other ways this can happen
@@ -667,7 +778,7 @@ class WebConnector(LoadConnector):
                             semantic_identifier=parsed_html.title or initial_url,
                             metadata={},
                             doc_updated_at=(
-                                _get_datetime_from_last_modified_header(last_modified)
+                                get_datetime_from_last_modified_header(last_modified)
                                 if last_modified
                                 else None
                             ),
@@ -0,0 +1,583 @@
+"""
+HTTP-first crawl engine of the web connector, used when `http_first` is enabled.
+
+Pages are fetched with a pooled HTTP client by a pool of workers, with a limit on the
+requests in flight and on the request rate per host. Only the pages that need
+JavaScript to render (or that block plain HTTP clients) are loaded with Playwright. This
+happens on the crawl thread, since the sync Playwright API can't be shared across
+threads.
+
+The frontier and the visited set are part of the connector checkpoint, so a long crawl
+resumes where it stopped after a worker restart. Re-crawls send `If-Modified-Since` with
+the start of the indexing window and skip the pages that haven't changed since. The
+links of unchanged pages aren't known without fetching them, so the URLs found by
+previous recursive crawls are kept in Redis and seed the frontier of the next one.
+"""
+
+import hashlib
+import io
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from email.utils import format_datetime
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+from typing import Any
+from typing import cast
+from urllib.parse import urlparse
+
+import httpx
+from bs4 import BeautifulSoup
+from playwright.sync_api import BrowserContext
+from playwright.sync_api import Playwright
+
+from onyx.configs.app_configs import WEB_CONNECTOR_CRAWL_CONCURRENCY
+from onyx.configs.app_configs import WEB_CONNECTOR_MAX_REQUESTS_PER_HOST
+from onyx.configs.app_configs import WEB_CONNECTOR_MIN_REQUEST_INTERVAL_SECONDS
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.interfaces import BaseConnector
+from onyx.connectors.interfaces import CheckpointOutput
+from onyx.connectors.models import ConnectorFailure
+from onyx.connectors.models import Document
+from onyx.connectors.models import DocumentFailure
+from onyx.connectors.models import TextSection
+from onyx.connectors.web.connector import add_iframe_text
+from onyx.connectors.web.connector import DEFAULT_HEADERS
+from onyx.connectors.web.connector import get_datetime_from_last_modified_header
+from onyx.connectors.web.connector import get_internal_links
+from onyx.connectors.web.connector import get_oauth_headers
+from onyx.connectors.web.connector import handle_cookies
+from onyx.connectors.web.connector import JAVASCRIPT_DISABLED_MESSAGE
+from onyx.connectors.web.connector import PDF_MIME_TYPES
+from onyx.connectors.web.connector import protected_url_check
+from onyx.connectors.web.connector import scroll_to_bottom
+from onyx.connectors.web.connector import start_playwright
+from onyx.connectors.web.connector import WebConnectorCheckpoint
+from onyx.file_processing.extract_file_text import read_pdf_file
+from onyx.file_processing.html_utils import ParsedHTML
+from onyx.file_processing.html_utils import web_html_cleanup
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
+
+# Pages with scripts and less text than this after cleanup are assumed to be rendered
+# client side, and are loaded in the browser
+MIN_HTTP_TEXT_LENGTH = 200
+HTML_CONTENT_TYPES = ["text/html", "application/xhtml+xml", "text/plain"]
+
+_MAX_FETCH_ATTEMPTS = 3
+_RETRYABLE_STATUS_CODES = {
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+}
+_GONE_STATUS_CODES = {HTTPStatus.NOT_FOUND, HTTPStatus.GONE}
+
+# URLs found by recursive crawls, kept for a month after they were last seen
+_KNOWN_URLS_TTL_SECONDS = 30 * 24 * 60 * 60
+
+
+class HostPoliteness:
+    """Bounds the requests in flight to each host, and optionally spaces them out."""
+
+    def __init__(
+        self,
+        max_requests_per_host: int = WEB_CONNECTOR_MAX_REQUESTS_PER_HOST,
+        min_request_interval: float = WEB_CONNECTOR_MIN_REQUEST_INTERVAL_SECONDS,
+    ) -> None:
+        self.max_requests_per_host = max_requests_per_host
+        self.min_request_interval = min_request_interval
+
+        self._lock = threading.Lock()
+        self._semaphores: dict[str, threading.BoundedSemaphore] = {}
+        self._next_request_times: dict[str, float] = {}
+
+    @contextmanager
+    def request_slot(self, url: str) -> Iterator[None]:
+        host = urlparse(url).netloc
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.max_requests_per_host)
+                self._semaphores[host] = semaphore
+
+        with semaphore:
+            if self.min_request_interval > 0:
+                with self._lock:
+                    now = time.monotonic()
+                    request_time = max(now, self._next_request_times.get(host, now))
+                    self._next_request_times[host] = (
+                        request_time + self.min_request_interval
+                    )
+                time.sleep(request_time - now)
+            yield
+
+
+class KnownUrls:
+    """The URLs found by previous recursive crawls of a site. Redis errors are logged
+    and ignored, they only cost a slower re-crawl."""
+
+    def __init__(self, base_url: str) -> None:
+        digest = hashlib.sha256(base_url.encode()).hexdigest()
+        self.key = f"{BaseConnector.REDIS_KEY_PREFIX}web_known_urls:{digest}"
+
+    def get(self) -> set[str]:
+        try:
+            redis_client = get_redis_client(tenant_id=get_current_tenant_id())
+            return {
+                url.decode() if isinstance(url, bytes) else url
+                for url in cast(set[Any], redis_client.smembers(self.key))
+            }
+        except Exception:
+            logger.exception("Failed to get the known URLs of the web connector")
+            return set()
+
+    def update(self, added: set[str], removed: set[str]) -> None:
+        if not added and not removed:
+            return
+        try:
+            redis_client = get_redis_client(tenant_id=get_current_tenant_id())
+            pipe = redis_client.pipeline()
+            if added:
+                pipe.sadd(self.key, *added)
+            if removed:
+                pipe.srem(self.key, *removed)
+            pipe.expire(self.key, _KNOWN_URLS_TTL_SECONDS)
+            pipe.execute()
+        except Exception:
+            logger.exception("Failed to update the known URLs of the web connector")
+
+
+@dataclass
+class PageResult:
+    url: str
+    # after redirects
+    final_url: str | None = None
+    document: Document | None = None
+    links: set[str] = field(default_factory=set)
+    # not modified since the start of the indexing window
+    not_modified: bool = False
+    # 404 / 410, the page doesn't exist (anymore)
+    gone: bool = False
+    # can't be read without rendering it in a browser
+    needs_browser: bool = False
+    # the page can't be indexed, e.g. a 4xx response, nothing to retry
+    skipped_reason: str | None = None
+    exception: Exception | None = None
+
+
+def _is_pdf(url: str, content_type: str) -> bool:
+    return url.lower().endswith(".pdf") or any(
+        pdf_type in content_type for pdf_type in PDF_MIME_TYPES
+    )
+
+
+def _build_html_document(
+    url: str, parsed_html: ParsedHTML, last_modified: str | None
+) -> Document:
+    return Document(
+        id=url,
+        sections=[TextSection(link=url, text=parsed_html.cleaned_text)],
+        source=DocumentSource.WEB,
+        semantic_identifier=parsed_html.title or url,
+        metadata={},
+        doc_updated_at=(
+            get_datetime_from_last_modified_header(last_modified)
+            if last_modified
+            else None
+        ),
+    )
+
+
+def _get_retry_delay(attempt: int, response: httpx.Response | None) -> float:
+    retry_after = response.headers.get("Retry-After") if response else None
+    if retry_after:
+        try:
+            return min(float(retry_after), 60.0)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                return min(max(retry_at.timestamp() - time.time(), 0.0), 60.0)
+            except (TypeError, ValueError):
+                pass
+    return min(2**attempt + random.uniform(0, 1), 10)
+
+
+class WebCrawler:
+    def __init__(
+        self,
+        base_url: str,
+        start_urls: list[str],
+        recursive: bool,
+        mintlify_cleanup: bool,
+        scroll_before_scraping: bool,
+        concurrency: int = WEB_CONNECTOR_CRAWL_CONCURRENCY,
+        politeness: HostPoliteness | None = None,
+    ) -> None:
+        self.base_url = base_url
+        self.start_urls = start_urls
+        self.recursive = recursive
+        self.mintlify_cleanup = mintlify_cleanup
+        self.scroll_before_scraping = scroll_before_scraping
+        self.concurrency = max(concurrency, 1)
+        self.politeness = politeness or HostPoliteness()
+        self.known_urls = KnownUrls(base_url)
+
+        self._http_client: httpx.Client | None = None
+        self._playwright: Playwright | None = None
+        self._browser_context: BrowserContext | None = None
+
+    def _build_http_client(self) -> httpx.Client:
+        headers = {
+            key: value
+            for key, value in DEFAULT_HEADERS.items()
+            # let httpx negotiate the encodings it can decode and manage connections
+            if key not in ("Accept-Encoding", "Connection")
+        }
+        headers.update(get_oauth_headers())
+        return httpx.Client(
+            headers=headers,
+            follow_redirects=True,
+            timeout=30.0,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+        )
+
+    def _get(
+        self, http_client: httpx.Client, url: str, headers: dict[str, str]
+    ) -> httpx.Response:
+        attempt = 0
+        while True:
+            response: httpx.Response | None = None
+            try:
+                with self.politeness.request_slot(url):
+                    response = http_client.get(url, headers=headers)
+            except httpx.TransportError:
+                if attempt + 1 >= _MAX_FETCH_ATTEMPTS:
+                    raise
+
+            if response is not None and (
+                response.status_code not in _RETRYABLE_STATUS_CODES
+                or attempt + 1 >= _MAX_FETCH_ATTEMPTS
+            ):
+                return response
+
+            delay = _get_retry_delay(attempt, response)
+            logger.info(
+                f"Retry {attempt + 1}/{_MAX_FETCH_ATTEMPTS} for {url} after {delay:.2f}s delay"
+            )
+            time.sleep(delay)
+            attempt += 1
+
+    def fetch_with_http(
+        self, http_client: httpx.Client, url: str, modified_since: datetime | None
+    ) -> PageResult:
+        """Runs in the worker threads"""
+        try:
+            protected_url_check(url)
+        except Exception as e:
+            return PageResult(url=url, skipped_reason=f"Invalid URL {url} due to {e}")
+
+        try:
+            headers = (
+                {"If-Modified-Since": format_datetime(modified_since, usegmt=True)}
+                if modified_since
+                else {}
+            )
+            response = self._get(http_client, url, headers)
+
+            final_url = str(response.url)
+            if final_url != url:
+                protected_url_check(final_url)
+            result = PageResult(url=url, final_url=final_url)
+
+            if response.status_code == HTTPStatus.NOT_MODIFIED:
+                result.not_modified = True
+                return result
+            if response.status_code == HTTPStatus.FORBIDDEN:
+                # usually bot detection, which the browser gets around
+                result.needs_browser = True
+                return result
+            if response.status_code in _GONE_STATUS_CODES:
+                result.gone = True
+                result.skipped_reason = f"Skipped indexing {url} due to HTTP {response.status_code} response"
+                return result
+            if response.status_code >= 400:
+                raise RuntimeError(f"HTTP {response.status_code} response")
+
+            last_modified = response.headers.get("Last-Modified")
+            content_type = response.headers.get("content-type", "").lower()
+            if _is_pdf(final_url, content_type):
+                # PDF files are not checked for links
+                page_text, metadata, _ = read_pdf_file(
+                    file=io.BytesIO(response.content)
+                )
+                result.document = Document(
+                    id=final_url,
+                    sections=[TextSection(link=final_url, text=page_text)],
+                    source=DocumentSource.WEB,
+                    semantic_identifier=final_url.split("/")[-1],
+                    metadata=metadata,
+                    doc_updated_at=(
+                        get_datetime_from_last_modified_header(last_modified)
+                        if last_modified
+                        else None
+                    ),
+                )
+                return result
+
+            if content_type and not any(
+                html_type in content_type for html_type in HTML_CONTENT_TYPES
+            ):
+                result.skipped_reason = (
+                    f"Skipped indexing {url} due to unsupported content type "
+                    f"{content_type}"
+                )
+                return result
+
+            soup = BeautifulSoup(response.text, "html.parser")
+            if self.recursive:
+                result.links = get_internal_links(self.base_url, final_url, soup)
+
+            if self.scroll_before_scraping:
+                result.needs_browser = True
+                return result
+
+            has_scripts = soup.find("script") is not None
+            parsed_html = web_html_cleanup(soup, self.mintlify_cleanup)
+            if JAVASCRIPT_DISABLED_MESSAGE in parsed_html.cleaned_text or (
+                has_scripts and len(parsed_html.cleaned_text) < MIN_HTTP_TEXT_LENGTH
+            ):
+                result.needs_browser = True
+                return result
+
+            result.document = _build_html_document(
+                final_url, parsed_html, last_modified
+            )
+            return result
+        except Exception as e:
+            return PageResult(url=url, exception=e)
+
+    def fetch_with_browser(self, url: str) -> PageResult:
+        """Runs in the crawl thread, the only one using Playwright"""
+        try:
+            if self._browser_context is None:
+                self._playwright, self._browser_context = start_playwright()
+
+            handle_cookies(self._browser_context, url)
+            page = self._browser_context.new_page()
+            try:
+                # Can't use wait_until="networkidle" because it interferes with the scrolling behavior
+                page_response = page.goto(
+                    url, timeout=30000, wait_until="domcontentloaded"
+                )
+                final_url = page.url
+                if final_url != url:
+                    protected_url_check(final_url)
+                result = PageResult(url=url, final_url=final_url)
+
+                if page_response and page_response.status == HTTPStatus.FORBIDDEN:
+                    raise RuntimeError("HTTP 403 response")
+
+                if self.scroll_before_scraping:
+                    scroll_to_bottom(page)
+
+                soup = BeautifulSoup(page.content(), "html.parser")
+                if self.recursive:
+                    result.links = get_internal_links(self.base_url, final_url, soup)
+
+                if page_response and page_response.status >= 400:
+                    result.gone = page_response.status in _GONE_STATUS_CODES
+                    result.skipped_reason = f"Skipped indexing {url} due to HTTP {page_response.status} response"
+                    return result
+
+                parsed_html = web_html_cleanup(soup, self.mintlify_cleanup)
+                if JAVASCRIPT_DISABLED_MESSAGE in parsed_html.cleaned_text:
+                    add_iframe_text(page, parsed_html)
+
+                last_modified = (
+                    page_response.header_value("Last-Modified")
+                    if page_response
+                    else None
+                )
+                result.document = _build_html_document(
+                    final_url, parsed_html, last_modified
+                )
+                return result
+            finally:
+                page.close()
+        except Exception as e:
+            # the browser may be in a bad state, start a new one for the next page
+            self._stop_browser()
+            return PageResult(url=url, exception=e)
+
+    def _stop_browser(self) -> None:
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception:
+                logger.exception("Failed to stop Playwright")
+        self._playwright = None
+        self._browser_context = None
+
+    def crawl(
+        self,
+        checkpoint: WebConnectorCheckpoint,
+        modified_since: datetime | None = None,
+        max_pages: int | None = None,
+    ) -> CheckpointOutput[WebConnectorCheckpoint]:
+        """Crawls up to `max_pages` pages from the checkpoint. Pages not modified since
+        `modified_since` are not indexed again."""
+        checkpoint = checkpoint.model_copy(deep=True)
+
+        if checkpoint.to_visit is None:
+            # first call of the crawl
+            checkpoint.to_visit = list(self.start_urls)
+            if self.recursive and modified_since is not None:
+                checkpoint.to_visit.extend(
+                    url
+                    for url in sorted(self.known_urls.get())
+                    if url not in self.start_urls
+                )
+
+        to_visit = deque(checkpoint.to_visit)
+        visited = set(checkpoint.visited)
+        content_hashes = set(checkpoint.content_hashes)
+        found_urls: set[str] = set()
+        gone_urls: set[str] = set()
+
+        num_started = 0
+        http_client = self._build_http_client()
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                pending: dict[Future[PageResult], str] = {}
+                while True:
+                    while (
+                        to_visit
+                        and len(pending) < self.concurrency
+                        and (max_pages is None or num_started < max_pages)
+                    ):
+                        url = to_visit.popleft()
+                        if url in visited:
+                            continue
+                        visited.add(url)
+                        num_started += 1
+                        logger.info(f"{len(visited)}: Visiting {url}")
+                        future = executor.submit(
+                            self.fetch_with_http, http_client, url, modified_since
+                        )
+                        pending[future] = url
+
+                    if not pending:
+                        break
+
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        del pending[future]
+                        result = future.result()
+                        if result.needs_browser:
+                            logger.info(f"Loading {result.url} in the browser")
+                            result = self.fetch_with_browser(result.url)
+
+                        for link in result.links:
+                            if link not in visited:
+                                to_visit.append(link)
+
+                        if result.gone:
+                            gone_urls.add(result.url)
+                        elif result.not_modified or result.document is not None:
+                            found_urls.add(result.final_url or result.url)
+                            checkpoint.num_pages_crawled += 1
+
+                        failure = self._process_result(
+                            result, checkpoint, visited, content_hashes
+                        )
+                        if failure is not None:
+                            yield failure
+                        if result.document is not None:
+                            yield result.document
+        finally:
+            http_client.close()
+            self._stop_browser()
+
+        if self.recursive:
+            self.known_urls.update(found_urls, gone_urls)
+
+        checkpoint.to_visit = list(to_visit)
+        checkpoint.visited = list(visited)
+        checkpoint.content_hashes = list(content_hashes)
+        checkpoint.has_more = bool(to_visit)
+
+        if not checkpoint.has_more and checkpoint.num_pages_crawled == 0:
+            raise RuntimeError(checkpoint.last_error or "No valid pages found.")
+
+        return checkpoint
+
+    def _process_result(
+        self,
+        result: PageResult,
+        checkpoint: WebConnectorCheckpoint,
+        visited: set[str],
+        content_hashes: set[str],
+    ) -> ConnectorFailure | None:
+        """Updates the crawl state with the result, drops its document if it was
+        already indexed. Returns the failure to report, if any."""
+        if result.exception is not None:
+            checkpoint.last_error = (
+                f"Failed to fetch '{result.url}': {result.exception}"
+            )
+            logger.warning(checkpoint.last_error)
+            return ConnectorFailure(
+                failed_document=DocumentFailure(
+                    document_id=result.url, document_link=result.url
+                ),
+                failure_message=checkpoint.last_error,
+                exception=result.exception,
+            )
+
+        if result.skipped_reason is not None:
+            checkpoint.last_error = result.skipped_reason
+            logger.info(result.skipped_reason)
+            return None
+
+        if result.final_url and result.final_url != result.url:
+            if result.final_url in visited:
+                logger.info(
+                    f"{result.url} redirected to {result.final_url} - already indexed"
+                )
+                result.document = None
+                return None
+            logger.info(f"{result.url} redirected to {result.final_url}")
+            visited.add(result.final_url)
+
+        if result.document is not None:
+            # Sometimes pages with #! will serve duplicate content
+            # There are also just other ways this can happen
+            content_hash = hashlib.sha256(
+                f"{result.document.semantic_identifier}\x00"
+                f"{result.document.get_text_content()}".encode()
+            ).hexdigest()
+            if content_hash in content_hashes:
+                logger.info(
+                    f"Skipping duplicate title + content for {result.final_url}"
+                )
+                result.document = None
+                return None
+            content_hashes.add(content_hash)
+
+        return None
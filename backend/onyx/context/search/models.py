@@ -15,6 +15,7 @@ from onyx.db.models import Persona
 from onyx.db.models import SearchSettings
 from onyx.indexing.models import BaseChunk
 from onyx.indexing.models import IndexingSetting
+from shared_configs.enums import InferenceBackend
 from shared_configs.enums import RerankerProvider
 from shared_configs.model_server_models import Embedding
 
@@ -35,6 +36,8 @@ class RerankingDetails(BaseModel):
     rerank_api_url: str | None
     rerank_provider_type: RerankerProvider | None
     rerank_api_key: str | None = None
+    # only used for local reranking models
+    rerank_inference_backend: InferenceBackend = InferenceBackend.TORCH
 
     num_rerank: int
 
@@ -50,6 +53,7 @@ class RerankingDetails(BaseModel):
             rerank_api_key=search_settings.rerank_api_key,
             num_rerank=search_settings.num_rerank,
             rerank_api_url=search_settings.rerank_api_url,
+            rerank_inference_backend=search_settings.rerank_inference_backend,
         )
 
 
@@ -84,6 +88,7 @@ class SavedSearchSettings(InferenceSettings, IndexingSetting):
             multipass_indexing=search_settings.multipass_indexing,
             embedding_precision=search_settings.embedding_precision,
             reduced_dimension=search_settings.reduced_dimension,
+            inference_backend=search_settings.inference_backend,
             # Whether switching to this model requires re-indexing
             background_reindex_enabled=search_settings.background_reindex_enabled,
             enable_contextual_rag=search_settings.enable_contextual_rag,
@@ -97,6 +102,7 @@ class SavedSearchSettings(InferenceSettings, IndexingSetting):
             # Multilingual Expansion
             multilingual_expansion=search_settings.multilingual_expansion,
             rerank_api_url=search_settings.rerank_api_url,
+            rerank_inference_backend=search_settings.rerank_inference_backend,
             disable_rerank_for_streaming=search_settings.disable_rerank_for_streaming,
         )
 
@@ -167,7 +173,7 @@ class SearchRequest(ChunkContext):
     precomputed_query_embedding: Embedding | None = None
     precomputed_is_keyword: bool | None = None
     precomputed_keywords: list[str] | None = None
-    
+
     # The maximum number of sub-questions to generate in agent search
     max_sub_questions: int | None = None
 
@@ -243,6 +243,7 @@ def semantic_reranking(
         provider_type=rerank_settings.rerank_provider_type,
         api_key=rerank_settings.rerank_api_key,
         api_url=rerank_settings.rerank_api_url,
+        inference_backend=rerank_settings.rerank_inference_backend,
     )
 
     passages = [
@@ -1,12 +1,77 @@
+import threading
+import time
+from collections import OrderedDict
+
 from sqlalchemy.orm import Session
 
 from onyx.access.access import get_acl_for_user
+from onyx.configs.chat_configs import USER_ACL_CACHE_MAX_USERS
+from onyx.configs.chat_configs import USER_ACL_CACHE_TTL_SECONDS
 from onyx.context.search.models import IndexFilters
 from onyx.db.models import User
+from shared_configs.contextvars import get_current_tenant_id
+
+
+class _UserACLCache:
+    """Per process cache of user ACLs. In EE, the ACL of a user includes all their
+    (external) groups, which can be thousands of entries fetched from the db on every
+    search otherwise."""
+
+    def __init__(
+        self,
+        ttl_seconds: int = USER_ACL_CACHE_TTL_SECONDS,
+        max_users: int = USER_ACL_CACHE_MAX_USERS,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+
+        # (tenant id, user id) -> (expiration time, sorted ACL), least recently used
+        # first
+        self._entries: OrderedDict[tuple[str, str], tuple[float, list[str]]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[str, str]) -> list[str] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, acl = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return acl
+
+    def set(self, key: tuple[str, str], acl: list[str]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, acl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_user_acl_cache = _UserACLCache()
 
 
 def build_access_filters_for_user(user: User | None, session: Session) -> list[str]:
-    user_acl = get_acl_for_user(user, session)
+    # anonymous users only ever get the public ACL, no need to cache it
+    if user is None or _user_acl_cache.ttl_seconds <= 0:
+        return sorted(get_acl_for_user(user, session))
+
+    key = (get_current_tenant_id(), str(user.id))
+    user_acl = _user_acl_cache.get(key)
+    if user_acl is None:
+        # sorted so that the same ACL always gives the same Vespa query
+        user_acl = sorted(get_acl_for_user(user, session))
+        _user_acl_cache.set(key, user_acl)
+
+    # copied, callers are free to modify the filters
     return list(user_acl)
 
 
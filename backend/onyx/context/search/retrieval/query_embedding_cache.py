@@ -0,0 +1,172 @@
+"""
+Cache of query embeddings, so that repeated queries (Slack bots answering the same
+questions, agent loops re-running a search, ...) don't pay for a model server / embedding
+provider round trip every time.
+
+Embeddings are stored as float32 bytes in a per-process LRU bounded by size and with a
+TTL, and optionally in Redis so that all API servers share them. Entries are keyed by
+tenant, embedding model and the whitespace-normalized query, so a model swap never
+serves embeddings from the previous model.
+"""
+
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import cast
+
+import numpy as np
+from prometheus_client import Counter
+
+from onyx.configs.chat_configs import QUERY_EMBEDDING_CACHE_MAX_MB
+from onyx.configs.chat_configs import QUERY_EMBEDDING_CACHE_TTL_SECONDS
+from onyx.configs.chat_configs import QUERY_EMBEDDING_CACHE_USE_REDIS
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+_REDIS_KEY_PREFIX = "query_embedding"
+
+QUERY_EMBEDDING_CACHE_LOOKUPS = Counter(
+    "onyx_query_embedding_cache_lookups",
+    "Query embedding cache lookups, by cache layer and result",
+    ["layer", "result"],
+)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", query).split())
+
+
+def _to_bytes(embedding: Embedding) -> bytes:
+    return np.asarray(embedding, dtype="<f4").tobytes()
+
+
+def _from_bytes(value: bytes) -> Embedding:
+    return np.frombuffer(value, dtype="<f4").tolist()
+
+
+class QueryEmbeddingCache:
+    def __init__(
+        self,
+        max_bytes: int = QUERY_EMBEDDING_CACHE_MAX_MB * 1024 * 1024,
+        ttl_seconds: int = QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+        use_redis: bool = QUERY_EMBEDDING_CACHE_USE_REDIS,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.use_redis = use_redis
+
+        # key -> (expiration time, float32 embedding), least recently used first
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def get_key(model_key: str, query: str) -> str:
+        """`model_key` must identify everything that changes the embedding of a query
+        (model, provider, prefix, normalization, dimension)."""
+        digest = hashlib.sha256(
+            f"{model_key}\x00{normalize_query(query)}".encode()
+        ).hexdigest()
+        # multi-key Redis commands aren't tenant prefixed by the client, so do it here
+        return f"{get_current_tenant_id()}:{_REDIS_KEY_PREFIX}:{digest}"
+
+    def get_many(self, keys: list[str]) -> list[Embedding | None]:
+        if not self.enabled:
+            return [None] * len(keys)
+
+        values = [self._get_local(key) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is None]
+        QUERY_EMBEDDING_CACHE_LOOKUPS.labels(layer="memory", result="hit").inc(
+            len(keys) - len(missing)
+        )
+        QUERY_EMBEDDING_CACHE_LOOKUPS.labels(layer="memory", result="miss").inc(
+            len(missing)
+        )
+
+        if missing and self.use_redis:
+            redis_values = self._get_redis([keys[i] for i in missing])
+            for i, value in zip(missing, redis_values):
+                if value is not None:
+                    self._set_local(keys[i], value)
+                    values[i] = value
+            num_redis_hits = sum(value is not None for value in redis_values)
+            QUERY_EMBEDDING_CACHE_LOOKUPS.labels(layer="redis", result="hit").inc(
+                num_redis_hits
+            )
+            QUERY_EMBEDDING_CACHE_LOOKUPS.labels(layer="redis", result="miss").inc(
+                len(missing) - num_redis_hits
+            )
+
+        return [_from_bytes(value) if value is not None else None for value in values]
+
+    def set_many(self, embeddings: dict[str, Embedding]) -> None:
+        if not self.enabled or not embeddings:
+            return
+
+        values = {key: _to_bytes(embedding) for key, embedding in embeddings.items()}
+        for key, value in values.items():
+            self._set_local(key, value)
+        if self.use_redis:
+            self._set_redis(values)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def _get_local(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._pop_local(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: bytes) -> None:
+        entry_size = len(key) + len(value)
+        if entry_size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._pop_local(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._size_bytes += entry_size
+            while self._size_bytes > self.max_bytes:
+                self._pop_local(next(iter(self._entries)))
+
+    def _pop_local(self, key: str) -> None:
+        # must be called with the lock held
+        _, value = self._entries.pop(key)
+        self._size_bytes -= len(key) + len(value)
+
+    def _get_redis(self, keys: list[str]) -> list[bytes | None]:
+        try:
+            return cast(list[bytes | None], get_redis_client().mget(keys))
+        except Exception:
+            # the cache is only an optimization, never fail the search because of it
+            logger.exception("Failed to read query embeddings from Redis")
+            return [None] * len(keys)
+
+    def _set_redis(self, values: dict[str, bytes]) -> None:
+        try:
+            pipe = get_redis_client().pipeline(transaction=False)
+            for key, value in values.items():
+                pipe.set(key, value, ex=self.ttl_seconds)
+            pipe.execute()
+        except Exception:
+            logger.exception("Failed to write query embeddings to Redis")
@@ -1,5 +1,8 @@
 import string
 from collections.abc import Callable
+from functools import lru_cache
+from typing import cast
+from typing import NamedTuple
 
 import nltk  # type:ignore
 from sqlalchemy.orm import Session
@@ -17,7 +20,9 @@ from onyx.context.search.models import SearchQuery
 from onyx.context.search.postprocessing.postprocessing import cleanup_chunks
 from onyx.context.search.preprocessing.preprocessing import HYBRID_ALPHA
 from onyx.context.search.preprocessing.preprocessing import HYBRID_ALPHA_KEYWORD
+from onyx.context.search.retrieval.query_embedding_cache import QueryEmbeddingCache
 from onyx.context.search.utils import inference_section_from_chunks
+from onyx.db.models import SearchSettings
 from onyx.db.search_settings import get_current_search_settings
 from onyx.db.search_settings import get_multilingual_expansion
 from onyx.document_index.interfaces import DocumentIndex
@@ -35,7 +40,9 @@ from onyx.utils.threadpool_concurrency import wait_on_background
 from onyx.utils.timing import log_function_time
 from shared_configs.configs import MODEL_SERVER_HOST
 from shared_configs.configs import MODEL_SERVER_PORT
+from shared_configs.enums import EmbeddingProvider
 from shared_configs.enums import EmbedTextType
+from shared_configs.enums import InferenceBackend
 from shared_configs.model_server_models import Embedding
 
 logger = setup_logger()
@@ -115,32 +122,108 @@ def combine_retrieval_results(
     return sorted_chunks
 
 
-def get_query_embedding(query: str, db_session: Session) -> Embedding:
-    search_settings = get_current_search_settings(db_session)
+class _QueryEmbeddingModelKey(NamedTuple):
+    model_name: str
+    normalize: bool
+    query_prefix: str | None
+    passage_prefix: str | None
+    api_key: str | None
+    provider_type: EmbeddingProvider | None
+    api_url: str | None
+    api_version: str | None
+    deployment_name: str | None
+    reduced_dimension: int | None
+    inference_backend: InferenceBackend
+
+    @classmethod
+    def from_search_settings(
+        cls, search_settings: SearchSettings
+    ) -> "_QueryEmbeddingModelKey":
+        return cls(
+            model_name=search_settings.model_name,
+            normalize=search_settings.normalize,
+            query_prefix=search_settings.query_prefix,
+            passage_prefix=search_settings.passage_prefix,
+            api_key=search_settings.api_key,
+            provider_type=search_settings.provider_type,
+            api_url=search_settings.api_url,
+            api_version=search_settings.api_version,
+            deployment_name=search_settings.deployment_name,
+            reduced_dimension=search_settings.reduced_dimension,
+            inference_backend=search_settings.inference_backend,
+        )
 
-    model = EmbeddingModel.from_db_model(
-        search_settings=search_settings,
+    @property
+    def cache_key(self) -> str:
+        """Everything that changes the embedding of a query, the API key and the
+        passage prefix don't."""
+        return ":".join(
+            str(value)
+            for value in (
+                self.provider_type,
+                self.api_url,
+                self.api_version,
+                self.deployment_name,
+                self.model_name,
+                self.reduced_dimension,
+                self.normalize,
+                self.query_prefix,
+                self.inference_backend.value,
+            )
+        )
+
+
+@lru_cache(maxsize=8)
+def _get_query_embedding_model(model_key: _QueryEmbeddingModelKey) -> EmbeddingModel:
+    """The model only changes when the search settings do, no need to look up the
+    tokenizer etc. again for every query."""
+    return EmbeddingModel(
+        **model_key._asdict(),
         # The below are globally set, this flow always uses the indexing one
         server_host=MODEL_SERVER_HOST,
         server_port=MODEL_SERVER_PORT,
     )
 
-    query_embedding = model.encode([query], text_type=EmbedTextType.QUERY)[0]
-    return query_embedding
+
+_query_embedding_cache = QueryEmbeddingCache()
+
+
+def get_query_embedding(query: str, db_session: Session) -> Embedding:
+    return get_query_embeddings([query], db_session)[0]
 
 
 def get_query_embeddings(queries: list[str], db_session: Session) -> list[Embedding]:
     search_settings = get_current_search_settings(db_session)
+    model_key = _QueryEmbeddingModelKey.from_search_settings(search_settings)
 
-    model = EmbeddingModel.from_db_model(
-        search_settings=search_settings,
-        # The below are globally set, this flow always uses the indexing one
-        server_host=MODEL_SERVER_HOST,
-        server_port=MODEL_SERVER_PORT,
+    cache_keys = [
+        QueryEmbeddingCache.get_key(model_key.cache_key, query) for query in queries
+    ]
+    query_embeddings = _query_embedding_cache.get_many(cache_keys)
+
+    # also dedupes queries that only differ by whitespace
+    queries_to_embed: dict[str, str] = {}
+    for cache_key, query, query_embedding in zip(cache_keys, queries, query_embeddings):
+        if query_embedding is None:
+            queries_to_embed.setdefault(cache_key, query)
+    if not queries_to_embed:
+        return cast(list[Embedding], query_embeddings)
+
+    model = _get_query_embedding_model(model_key)
+    new_embeddings = dict(
+        zip(
+            queries_to_embed.keys(),
+            model.encode(
+                list(queries_to_embed.values()), text_type=EmbedTextType.QUERY
+            ),
+        )
     )
+    _query_embedding_cache.set_many(new_embeddings)
 
-    query_embedding = model.encode(queries, text_type=EmbedTextType.QUERY)
-    return query_embedding
+    return [
+        query_embedding if query_embedding is not None else new_embeddings[cache_key]
+        for cache_key, query_embedding in zip(cache_keys, query_embeddings)
+    ]
 
 
 @log_function_time(print_only=True)
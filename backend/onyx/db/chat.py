@@ -17,6 +17,7 @@ from sqlalchemy import select
 from sqlalchemy import update
 from sqlalchemy.exc import MultipleResultsFound
 from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import selectinload
 from sqlalchemy.orm import Session
 
 from onyx.agents.agent_search.shared_graph_utils.models import CombinedAgentMetrics
@@ -47,7 +48,7 @@ from onyx.db.models import ToolCall
 from onyx.db.models import User
 from onyx.db.models import UserFile
 from onyx.db.persona import get_best_persona_id_for_user
-from onyx.db.pg_file_store import delete_lobj_by_name
+from onyx.file_store.file_store import get_default_file_store
 from onyx.file_store.models import FileDescriptor
 from onyx.file_store.models import InMemoryChatFile
 from onyx.llm.override_models import LLMOverride
@@ -225,14 +226,23 @@ def delete_messages_and_files_from_chat_session(
         )
     ).fetchall()
 
+    file_store = get_default_file_store(db_session)
     for id, files in messages_with_files:
         delete_tool_call_for_message_id(message_id=id, db_session=db_session)
         delete_search_doc_message_relationship(message_id=id, db_session=db_session)
         for file_info in files or {}:
-            lobj_name = file_info.get("id")
-            if lobj_name:
-                logger.info(f"Deleting file with name: {lobj_name}")
-                delete_lobj_by_name(lobj_name, db_session)
+            file_name = file_info.get("id")
+            if not file_name:
+                continue
+
+            try:
+                file_store.read_file_record(file_name)
+            except RuntimeError:
+                logger.info(f"no file with name {file_name} found")
+                continue
+
+            logger.info(f"Deleting file with name: {file_name}")
+            file_store.delete_file(file_name)
 
     db_session.execute(
         delete(ChatMessage).where(ChatMessage.chat_session_id == chat_session_id)
@@ -762,17 +772,16 @@ def get_prompt_by_id(
     return prompt
 
 
-def get_doc_query_identifiers_from_model(
+def get_validated_search_docs(
     search_doc_ids: list[int],
     chat_session: ChatSession,
     user_id: UUID | None,
     db_session: Session,
     enforce_chat_session_id_for_search_docs: bool,
-) -> list[tuple[str, int]]:
-    """Given a list of search_doc_ids"""
-    search_docs = (
-        db_session.query(SearchDoc).filter(SearchDoc.id.in_(search_doc_ids)).all()
-    )
+) -> list[DBSearchDoc]:
+    """Loads the search docs referenced by a chat message in a single query (in the
+    order of search_doc_ids) and checks that they belong to the chat session."""
+    search_docs = get_db_search_docs_by_ids(search_doc_ids, db_session)
 
     if user_id != chat_session.user_id:
         logger.error(
@@ -795,6 +804,25 @@ def get_doc_query_identifiers_from_model(
         # This usually happens when the LLM fails either immediately or partially through.
         raise RuntimeError("Chat session failed, please start a new session.")
 
+    return search_docs
+
+
+def get_doc_query_identifiers_from_model(
+    search_doc_ids: list[int],
+    chat_session: ChatSession,
+    user_id: UUID | None,
+    db_session: Session,
+    enforce_chat_session_id_for_search_docs: bool,
+) -> list[tuple[str, int]]:
+    """Given a list of search_doc_ids"""
+    search_docs = get_validated_search_docs(
+        search_doc_ids=search_doc_ids,
+        chat_session=chat_session,
+        user_id=user_id,
+        db_session=db_session,
+        enforce_chat_session_id_for_search_docs=enforce_chat_session_id_for_search_docs,
+    )
+
     doc_query_identifiers = [(doc.document_id, doc.chunk_ind) for doc in search_docs]
 
     return doc_query_identifiers
@@ -857,6 +885,29 @@ def get_db_search_doc_by_id(doc_id: int, db_session: Session) -> DBSearchDoc | N
     return search_doc
 
 
+def get_db_search_docs_by_ids(
+    doc_ids: list[int], db_session: Session
+) -> list[DBSearchDoc]:
+    """There are no safety checks here like user permission etc., use with caution.
+    Docs are returned in the order of doc_ids, ids that don't exist are skipped. The
+    chat messages of the docs are loaded along with them."""
+    if not doc_ids:
+        return []
+
+    search_docs = (
+        db_session.query(SearchDoc)
+        .options(selectinload(SearchDoc.chat_messages))
+        .filter(SearchDoc.id.in_(doc_ids))
+        .all()
+    )
+    search_docs_by_id = {search_doc.id: search_doc for search_doc in search_docs}
+    return [
+        search_docs_by_id[doc_id]
+        for doc_id in dict.fromkeys(doc_ids)
+        if doc_id in search_docs_by_id
+    ]
+
+
 def create_search_doc_from_user_file(
     db_user_file: UserFile, associated_chat_file: InMemoryChatFile, db_session: Session
 ) -> SearchDoc:
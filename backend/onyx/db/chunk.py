@@ -2,6 +2,8 @@ from datetime import datetime
 from datetime import timezone
 
 from sqlalchemy import delete
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from onyx.db.models import ChunkStats
@@ -14,6 +16,9 @@ def update_chunk_boost_components__no_commit(
 ) -> None:
     """Updates the chunk_boost_components for chunks in the database.
 
+    NOTE: this function is Postgres specific, it relies on the ON CONFLICT clause.
+    The whole batch is written with one UPDATE and one (paged) INSERT.
+
     Args:
         chunk_data: List of dicts containing chunk_id, document_id, and boost_score
         db_session: SQLAlchemy database session
@@ -21,37 +26,63 @@ def update_chunk_boost_components__no_commit(
     if not chunk_data:
         return
 
+    # if a chunk shows up more than once, the last score wins
+    id_to_chunk_data: dict[str, UpdatableChunkData] = {}
+    # chunks that had a non neutral score at any point of the batch, these are saved
+    # even if a later neutral score wins
+    boosted_ids: set[str] = set()
     for data in chunk_data:
         chunk_in_doc_id = int(data.chunk_id)
         if chunk_in_doc_id < 0:
             raise ValueError(f"Chunk ID is empty for chunk {data}")
 
-        chunk_document_id = f"{data.document_id}" f"__{chunk_in_doc_id}"
-        chunk_stats = (
-            db_session.query(ChunkStats)
-            .filter(
-                ChunkStats.id == chunk_document_id,
-            )
-            .first()
+        chunk_stats_id = f"{data.document_id}__{chunk_in_doc_id}"
+        id_to_chunk_data[chunk_stats_id] = data
+        if data.boost_score != 1.0:
+            boosted_ids.add(chunk_stats_id)
+
+    now = datetime.now(timezone.utc)
+    # sorted so that concurrent batches lock the rows in the same order
+    sorted_ids = sorted(id_to_chunk_data)
+
+    # do not save new chunks with a neutral boost score, only update existing ones
+    neutral_ids = [
+        chunk_stats_id
+        for chunk_stats_id in sorted_ids
+        if chunk_stats_id not in boosted_ids
+    ]
+    if neutral_ids:
+        db_session.execute(
+            update(ChunkStats)
+            .where(ChunkStats.id.in_(neutral_ids))
+            .values(information_content_boost=1.0, last_modified=now)
+            .execution_options(synchronize_session=False)
         )
 
-        score = data.boost_score
-
-        if chunk_stats:
-            chunk_stats.information_content_boost = score
-            chunk_stats.last_modified = datetime.now(timezone.utc)
-            db_session.add(chunk_stats)
-        else:
-            # do not save new chunks with a neutral boost score
-            if score == 1.0:
-                continue
-            # Create new record
-            chunk_stats = ChunkStats(
-                document_id=data.document_id,
-                chunk_in_doc_id=chunk_in_doc_id,
-                information_content_boost=score,
-            )
-            db_session.add(chunk_stats)
+    rows = [
+        {
+            "id": chunk_stats_id,
+            "document_id": id_to_chunk_data[chunk_stats_id].document_id,
+            "chunk_in_doc_id": int(id_to_chunk_data[chunk_stats_id].chunk_id),
+            "information_content_boost": id_to_chunk_data[chunk_stats_id].boost_score,
+            "last_modified": now,
+        }
+        for chunk_stats_id in sorted_ids
+        if chunk_stats_id in boosted_ids
+    ]
+    if rows:
+        # executemany, sent as multi-row INSERT ... VALUES pages by sqlalchemy
+        insert_stmt = insert(ChunkStats)
+        db_session.execute(
+            insert_stmt.on_conflict_do_update(
+                index_elements=[ChunkStats.id],
+                set_={
+                    "information_content_boost": insert_stmt.excluded.information_content_boost,
+                    "last_modified": insert_stmt.excluded.last_modified,
+                },
+            ),
+            rows,
+        )
 
 
 def delete_chunk_stats_by_connector_credential_pair__no_commit(
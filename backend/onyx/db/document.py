@@ -7,14 +7,20 @@ from datetime import datetime
 from datetime import timezone
 
 from sqlalchemy import and_
+from sqlalchemy import cast
+from sqlalchemy import column
+from sqlalchemy import DateTime
 from sqlalchemy import delete
 from sqlalchemy import exists
 from sqlalchemy import func
+from sqlalchemy import Integer
 from sqlalchemy import or_
 from sqlalchemy import Select
 from sqlalchemy import select
+from sqlalchemy import String
 from sqlalchemy import tuple_
 from sqlalchemy import update
+from sqlalchemy import values
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.engine.util import TransactionalContext
 from sqlalchemy.exc import OperationalError
@@ -450,42 +456,52 @@ def mark_document_as_indexed_for_cc_pair__no_commit(
     )
 
 
-def update_docs_updated_at__no_commit(
+def update_docs_after_indexing__no_commit(
+    document_ids: list[str],
     ids_to_new_updated_at: dict[str, datetime],
+    doc_id_to_chunk_count: dict[str, int],
     db_session: Session,
 ) -> None:
-    doc_ids = list(ids_to_new_updated_at.keys())
-    documents_to_update = (
-        db_session.query(DbDocument).filter(DbDocument.id.in_(doc_ids)).all()
-    )
-
-    for document in documents_to_update:
-        document.doc_updated_at = ids_to_new_updated_at[document.id]
-
+    """Marks the documents as modified and sets their new chunk count, and their
+    doc_updated_at if the source reported one, all with a single
+    UPDATE ... FROM (VALUES ...) statement since this runs while the document locks
+    are held."""
+    if not document_ids:
+        return
 
-def update_docs_last_modified__no_commit(
-    document_ids: list[str],
-    db_session: Session,
-) -> None:
-    documents_to_update = (
-        db_session.query(DbDocument).filter(DbDocument.id.in_(document_ids)).all()
+    new_values = values(
+        column("id", String),
+        column("doc_updated_at", DateTime(timezone=True)),
+        column("chunk_count", Integer),
+        name="new_values",
+    ).data(
+        [
+            (
+                document_id,
+                ids_to_new_updated_at.get(document_id),
+                doc_id_to_chunk_count.get(document_id),
+            )
+            # sorted so that concurrent batches lock the rows in the same order
+            for document_id in sorted(set(document_ids))
+        ]
     )
-
-    now = datetime.now(timezone.utc)
-    for doc in documents_to_update:
-        doc.last_modified = now
-
-
-def update_docs_chunk_count__no_commit(
-    document_ids: list[str],
-    doc_id_to_chunk_count: dict[str, int],
-    db_session: Session,
-) -> None:
-    documents_to_update = (
-        db_session.query(DbDocument).filter(DbDocument.id.in_(document_ids)).all()
+    # the casts are needed since an all NULL column in VALUES is typed as text
+    stmt = (
+        update(DbDocument)
+        .where(DbDocument.id == new_values.c.id)
+        .values(
+            doc_updated_at=func.coalesce(
+                cast(new_values.c.doc_updated_at, DateTime(timezone=True)),
+                DbDocument.doc_updated_at,
+            ),
+            chunk_count=func.coalesce(
+                cast(new_values.c.chunk_count, Integer), DbDocument.chunk_count
+            ),
+            last_modified=datetime.now(timezone.utc),
+        )
+        .execution_options(synchronize_session=False)
     )
-    for doc in documents_to_update:
-        doc.chunk_count = doc_id_to_chunk_count[doc.id]
+    db_session.execute(stmt)
 
 
 def mark_document_as_modified(
@@ -513,6 +529,29 @@ def mark_document_as_synced(document_id: str, db_session: Session) -> None:
     db_session.commit()
 
 
+def mark_documents_as_synced(
+    document_ids: list[str], synced_at: datetime, db_session: Session
+) -> None:
+    """Sets last_synced for all the given documents in a single statement. Ids that
+    don't exist (anymore) are ignored.
+
+    synced_at must be taken before the document state that was synced was read.
+    Otherwise a last_modified bump that lands while the batch is being synced is
+    hidden behind the newer last_synced and the document is never picked up again.
+    """
+    if not document_ids:
+        return
+
+    stmt = (
+        update(DbDocument)
+        .where(DbDocument.id.in_(document_ids))
+        .values(last_synced=synced_at)
+        .execution_options(synchronize_session=False)
+    )
+    db_session.execute(stmt)
+    db_session.commit()
+
+
 def delete_document_by_connector_credential_pair__no_commit(
     db_session: Session,
     document_id: str,
@@ -837,6 +876,43 @@ def fetch_chunk_counts_for_documents(
     return [(doc_id, chunk_counts.get(doc_id, 0)) for doc_id in document_ids]
 
 
+def fetch_chunk_hashes_for_documents(
+    document_ids: list[str],
+    db_session: Session,
+) -> dict[str, list[str] | None]:
+    """
+    Return a dict of document_id to the hashes of the chunks of the document that are
+    in the document index (None if unknown, e.g. for documents not in the database).
+    """
+    stmt = select(DbDocument.id, DbDocument.chunk_hashes).where(
+        DbDocument.id.in_(document_ids)
+    )
+    chunk_hashes = {
+        str(row.id): row.chunk_hashes for row in db_session.execute(stmt).all()
+    }
+    return {doc_id: chunk_hashes.get(doc_id) for doc_id in document_ids}
+
+
+def update_chunk_hashes_for_documents__no_commit(
+    doc_id_to_chunk_hashes: dict[str, list[str] | None],
+    db_session: Session,
+) -> None:
+    """Sets the chunk hashes of the documents, with a single executemany UPDATE.
+    None clears the hashes, so that all the chunks are written the next time the
+    document is indexed."""
+    if not doc_id_to_chunk_hashes:
+        return
+
+    db_session.execute(
+        update(DbDocument),
+        [
+            {"id": document_id, "chunk_hashes": doc_id_to_chunk_hashes[document_id]}
+            # sorted so that concurrent batches lock the rows in the same order
+            for document_id in sorted(doc_id_to_chunk_hashes)
+        ],
+    )
+
+
 def fetch_chunk_count_for_document(
     document_id: str,
     db_session: Session,
@@ -0,0 +1,105 @@
+import datetime
+
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from onyx.db.models import EmbeddingCacheEntry
+
+
+def fetch_embedding_cache_entries(
+    cache_keys: list[str],
+    db_session: Session,
+    touch_older_than: datetime.datetime,
+) -> dict[str, bytes]:
+    """Returns the embedding of each of `cache_keys` that is in the cache. Entries that
+    were last used before `touch_older_than` are marked as used now, the others are
+    left alone so that frequently used entries are not rewritten on every lookup."""
+    if not cache_keys:
+        return {}
+
+    unique_keys = sorted(set(cache_keys))
+    rows = db_session.execute(
+        select(
+            EmbeddingCacheEntry.cache_key,
+            EmbeddingCacheEntry.embedding,
+            EmbeddingCacheEntry.last_used_at,
+        ).where(EmbeddingCacheEntry.cache_key.in_(unique_keys))
+    ).all()
+
+    keys_to_touch = [
+        row.cache_key for row in rows if row.last_used_at < touch_older_than
+    ]
+    if keys_to_touch:
+        db_session.execute(
+            update(EmbeddingCacheEntry)
+            .where(EmbeddingCacheEntry.cache_key.in_(keys_to_touch))
+            .values(last_used_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+
+    return {row.cache_key: row.embedding for row in rows}
+
+
+def insert_embedding_cache_entries__no_commit(
+    cache_key_to_embedding: dict[str, bytes],
+    db_session: Session,
+) -> None:
+    """NOTE: this function is Postgres specific, it relies on the ON CONFLICT clause.
+    Entries that are already cached (e.g. written by a concurrent batch) are kept."""
+    if not cache_key_to_embedding:
+        return
+
+    db_session.execute(
+        insert(EmbeddingCacheEntry).on_conflict_do_nothing(
+            index_elements=[EmbeddingCacheEntry.cache_key]
+        ),
+        [
+            {"cache_key": cache_key, "embedding": cache_key_to_embedding[cache_key]}
+            for cache_key in sorted(cache_key_to_embedding)
+        ],
+    )
+
+
+def evict_embedding_cache_entries__no_commit(
+    max_bytes: int,
+    target_bytes: int,
+    db_session: Session,
+) -> int:
+    """If the cache holds more than `max_bytes`, deletes the least recently used
+    entries until it holds at most `target_bytes`. Returns the number of deleted
+    entries."""
+    entry_size = func.octet_length(EmbeddingCacheEntry.cache_key) + func.octet_length(
+        EmbeddingCacheEntry.embedding
+    )
+    total_bytes = db_session.scalar(select(func.coalesce(func.sum(entry_size), 0)))
+    if not total_bytes or total_bytes <= max_bytes:
+        return 0
+
+    # size of each entry plus the size of all the entries used more recently
+    ranked_entries = select(
+        EmbeddingCacheEntry.cache_key,
+        func.sum(entry_size)
+        .over(
+            order_by=(
+                EmbeddingCacheEntry.last_used_at.desc(),
+                EmbeddingCacheEntry.cache_key,
+            )
+        )
+        .label("cumulative_bytes"),
+    ).subquery()
+    result = db_session.execute(
+        delete(EmbeddingCacheEntry)
+        .where(
+            EmbeddingCacheEntry.cache_key.in_(
+                select(ranked_entries.c.cache_key).where(
+                    ranked_entries.c.cumulative_bytes > target_bytes
+                )
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount  # type: ignore
@@ -73,6 +73,7 @@ from onyx.utils.encryption import decrypt_bytes_to_string
 from onyx.utils.encryption import encrypt_string_to_bytes
 from onyx.utils.headers import HeaderItemDict
 from shared_configs.enums import EmbeddingProvider
+from shared_configs.enums import InferenceBackend
 from shared_configs.enums import RerankerProvider
 
 logger = setup_logger()
@@ -554,6 +555,14 @@ class Document(Base):
     # Only null for documents indexed prior to this change
     chunk_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
+    # Content hashes of the chunks of the document currently in the document index
+    # (see onyx.indexing.chunk_reuse), used to skip re-embedding / re-writing the
+    # chunks that did not change when the document is re-indexed.
+    # Null if unknown, in which case all the chunks are written again
+    chunk_hashes: Mapped[list[str] | None] = mapped_column(
+        postgresql.ARRAY(String), nullable=True, deferred=True
+    )
+
     # last time any vespa relevant row metadata or the doc changed.
     # does not include last_synced
     last_modified: Mapped[datetime.datetime | None] = mapped_column(
@@ -653,6 +662,20 @@ class ChunkStats(Base):
     )
 
 
+class EmbeddingCacheEntry(Base):
+    """Embeddings computed during indexing, see onyx.indexing.embedding_cache"""
+
+    __tablename__ = "embedding_cache"
+
+    # hash of the embedding model settings and of the embedded text
+    cache_key: Mapped[str] = mapped_column(String, primary_key=True)
+    # little endian float32 vector
+    embedding: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    last_used_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True, server_default=func.now()
+    )
+
+
 class Tag(Base):
     __tablename__ = "tag"
 
@@ -809,6 +832,11 @@ class SearchSettings(Base):
     # NOTE: this is only currently available for OpenAI models
     reduced_dimension: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
+    # how the model server runs the embedding model, only used for local models
+    inference_backend: Mapped[InferenceBackend] = mapped_column(
+        Enum(InferenceBackend, native_enum=False), default=InferenceBackend.TORCH
+    )
+
     # Mini and Large Chunks (large chunk also checks for model max context)
     multipass_indexing: Mapped[bool] = mapped_column(Boolean, default=True)
 
@@ -833,6 +861,10 @@ class SearchSettings(Base):
     )
     rerank_api_key: Mapped[str | None] = mapped_column(String, nullable=True)
     rerank_api_url: Mapped[str | None] = mapped_column(String, nullable=True)
+    # how the model server runs the reranking model, only used for local models
+    rerank_inference_backend: Mapped[InferenceBackend] = mapped_column(
+        Enum(InferenceBackend, native_enum=False), default=InferenceBackend.TORCH
+    )
 
     num_rerank: Mapped[int] = mapped_column(Integer, default=NUM_POSTPROCESSED_RESULTS)
 
@@ -2036,7 +2068,10 @@ class PGFileStore(Base):
     file_origin: Mapped[FileOrigin] = mapped_column(Enum(FileOrigin, native_enum=False))
     file_type: Mapped[str] = mapped_column(String, default="text/plain")
     file_metadata: Mapped[JSON_ro] = mapped_column(postgresql.JSONB(), nullable=True)
-    lobj_oid: Mapped[int] = mapped_column(Integer, nullable=False)
+    # exactly one of lobj_oid (contents stored as a postgres large object) and
+    # object_key (contents in the object store, see ObjectBackedFileStore) is set
+    lobj_oid: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    object_key: Mapped[str | None] = mapped_column(String, nullable=True, index=True)
 
 
 class AgentSearchMetrics(Base):
@@ -1,8 +1,12 @@
+import io
 import tempfile
 from io import BytesIO
+from typing import Any
 from typing import IO
 
 from psycopg2.extensions import connection
+from psycopg2.extensions import lobject
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from onyx.configs.constants import FileOrigin
@@ -88,29 +92,59 @@ def read_lobj(
         return BytesIO(large_object.read())
 
 
-def delete_lobj_by_id(
-    lobj_oid: int,
-    db_session: Session,
-) -> None:
+class LargeObjectReader(io.RawIOBase):
+    """Seekable reader that reads a large object lazily, as the caller asks for it.
+
+    NOTE: the large object is only open until the transaction of the session that
+    opened it ends, so the session must be kept around (and not committed) while
+    reading."""
+
+    def __init__(self, large_object: lobject) -> None:
+        super().__init__()
+        self._large_object = large_object
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        data = self._large_object.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def readall(self) -> bytes:
+        return self._large_object.read()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._large_object.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._large_object.tell()
+
+    def close(self) -> None:
+        if not self.closed:
+            self._large_object.close()
+        super().close()
+
+
+def open_lobj_reader(lobj_oid: int, db_session: Session) -> IO[bytes]:
+    """Opens a buffered, seekable reader over the large object that reads it
+    STANDARD_CHUNK_SIZE bytes at a time instead of loading it in memory."""
     pg_conn = get_pg_conn_from_session(db_session)
-    pg_conn.lobject(lobj_oid).unlink()
+    return io.BufferedReader(
+        LargeObjectReader(pg_conn.lobject(lobj_oid, mode="rb")),
+        buffer_size=STANDARD_CHUNK_SIZE,
+    )
 
 
-def delete_lobj_by_name(
-    lobj_name: str,
+def delete_lobj_by_id(
+    lobj_oid: int,
     db_session: Session,
 ) -> None:
-    try:
-        pgfilestore = get_pgfilestore_by_file_name(lobj_name, db_session)
-    except RuntimeError:
-        logger.info(f"no file with name {lobj_name} found")
-        return
-
     pg_conn = get_pg_conn_from_session(db_session)
-    pg_conn.lobject(pgfilestore.lobj_oid).unlink()
-
-    delete_pgfilestore_by_file_name(lobj_name, db_session)
-    db_session.commit()
+    pg_conn.lobject(lobj_oid).unlink()
 
 
 def upsert_pgfilestore(
@@ -118,25 +152,31 @@ def upsert_pgfilestore(
     display_name: str | None,
     file_origin: FileOrigin,
     file_type: str,
-    lobj_oid: int,
+    lobj_oid: int | None,
     db_session: Session,
     commit: bool = False,
     file_metadata: dict | None = None,
+    object_key: str | None = None,
 ) -> PGFileStore:
+    """Exactly one of lobj_oid and object_key should be given. If the file record
+    already exists, its large object is deleted, its object (in the object store) is
+    left to the caller."""
     pgfilestore = db_session.query(PGFileStore).filter_by(file_name=file_name).first()
 
     if pgfilestore:
-        try:
-            # This should not happen in normal execution
-            delete_lobj_by_id(lobj_oid=pgfilestore.lobj_oid, db_session=db_session)
-        except Exception:
-            # If the delete fails as well, the large object doesn't exist anyway and even if it
-            # fails to delete, it's not too terrible as most files sizes are insignificant
-            logger.error(
-                f"Failed to delete large object with oid {pgfilestore.lobj_oid}"
-            )
+        if pgfilestore.lobj_oid is not None:
+            try:
+                # This should not happen in normal execution
+                delete_lobj_by_id(lobj_oid=pgfilestore.lobj_oid, db_session=db_session)
+            except Exception:
+                # If the delete fails as well, the large object doesn't exist anyway and even if it
+                # fails to delete, it's not too terrible as most files sizes are insignificant
+                logger.error(
+                    f"Failed to delete large object with oid {pgfilestore.lobj_oid}"
+                )
 
         pgfilestore.lobj_oid = lobj_oid
+        pgfilestore.object_key = object_key
     else:
         pgfilestore = PGFileStore(
             file_name=file_name,
@@ -145,6 +185,7 @@ def upsert_pgfilestore(
             file_type=file_type,
             file_metadata=file_metadata,
             lobj_oid=lobj_oid,
+            object_key=object_key,
         )
         db_session.add(pgfilestore)
 
@@ -154,26 +195,26 @@ def upsert_pgfilestore(
     return pgfilestore
 
 
-def save_bytes_to_pgfilestore(
-    db_session: Session,
-    raw_bytes: bytes,
-    media_type: str,
-    identifier: str,
-    display_name: str,
-    file_origin: FileOrigin = FileOrigin.OTHER,
-) -> PGFileStore:
-    """
-    Saves raw bytes to PGFileStore and returns the resulting record.
-    """
-    file_name = f"{file_origin.name.lower()}_{identifier}"
-    lobj_oid = create_populate_lobj(BytesIO(raw_bytes), db_session)
-    pgfilestore = upsert_pgfilestore(
-        file_name=file_name,
-        display_name=display_name,
-        file_origin=file_origin,
-        file_type=media_type,
-        lobj_oid=lobj_oid,
-        db_session=db_session,
-        commit=True,
+def count_pgfilestores_by_object_key(object_key: str, db_session: Session) -> int:
+    return db_session.query(PGFileStore).filter_by(object_key=object_key).count()
+
+
+def lock_object_key__no_commit(object_key: str, db_session: Session) -> None:
+    """Takes a transaction level advisory lock on the object key, held until the
+    transaction ends. Serializes storing / referencing an object with deleting it
+    once it looks unreferenced."""
+    db_session.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext(:object_key))"),
+        {"object_key": object_key},
     )
-    return pgfilestore
+
+
+def get_pgfilestore_names_with_lobj(db_session: Session, limit: int) -> list[str]:
+    """Names of files whose contents are still stored as a large object."""
+    return [
+        file_name
+        for (file_name,) in db_session.query(PGFileStore.file_name)
+        .filter(PGFileStore.lobj_oid.isnot(None))
+        .order_by(PGFileStore.file_name)
+        .limit(limit)
+    ]
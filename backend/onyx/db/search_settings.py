@@ -62,6 +62,7 @@ def create_search_settings(
         multipass_indexing=search_settings.multipass_indexing,
         embedding_precision=search_settings.embedding_precision,
         reduced_dimension=search_settings.reduced_dimension,
+        inference_backend=search_settings.inference_backend,
         enable_contextual_rag=search_settings.enable_contextual_rag,
         contextual_rag_llm_name=search_settings.contextual_rag_llm_name,
         contextual_rag_llm_provider=search_settings.contextual_rag_llm_provider,
@@ -70,6 +71,7 @@ def create_search_settings(
         rerank_model_name=search_settings.rerank_model_name,
         rerank_provider_type=search_settings.rerank_provider_type,
         rerank_api_key=search_settings.rerank_api_key,
+        rerank_inference_backend=search_settings.rerank_inference_backend,
         num_rerank=search_settings.num_rerank,
         background_reindex_enabled=search_settings.background_reindex_enabled,
     )
@@ -229,9 +231,16 @@ def update_current_search_settings(
     if (
         search_settings.rerank_provider_type is None
         and search_settings.rerank_model_name is not None
-        and current_settings.rerank_model_name != search_settings.rerank_model_name
+        and (
+            current_settings.rerank_model_name != search_settings.rerank_model_name
+            or current_settings.rerank_inference_backend
+            != search_settings.rerank_inference_backend
+        )
     ):
-        warm_up_cross_encoder(search_settings.rerank_model_name)
+        warm_up_cross_encoder(
+            search_settings.rerank_model_name,
+            inference_backend=search_settings.rerank_inference_backend,
+        )
 
     update_search_settings(current_settings, search_settings, preserved_fields)
     db_session.commit()
@@ -213,6 +213,10 @@ class Indexable(abc.ABC):
         no worry of receiving the first 0 through n chunks in one index call and the next n through
         m chunks of a docu in the next index call.
 
+        NOTE: Chunks with `content_unchanged` set are already in the index with the same content
+        and have no embeddings. Only their document level fields (access, document sets, boost,
+        doc_updated_at, ...) need to be written, they must not be cleared.
+
         NOTE: Due to some asymmetry between the primary and secondary indexing logic, this function
         only needs to index chunks into the PRIMARY index. Do not update the secondary index here,
         it is done automatically outside of this code.
@@ -0,0 +1,334 @@
+"""
+Async /document/v1 feed client for Vespa.
+
+Vespa has no batch insert API, every chunk is its own HTTP request. Instead of one
+blocking request per thread, the feed keeps many requests in flight on a few HTTP/2
+connections from a single event loop. The number of in-flight requests is adapted
+(AIMD) based on how often Vespa pushes back with 429 / 503, and throttled or failed
+requests are retried with exponential backoff (honoring Retry-After).
+"""
+
+import asyncio
+import concurrent.futures
+import random
+import time
+from collections.abc import Callable
+from collections.abc import Iterator
+from http import HTTPStatus
+
+import httpx
+from pydantic import BaseModel
+
+from onyx.configs.app_configs import VESPA_FEED_INITIAL_CONCURRENCY
+from onyx.configs.app_configs import VESPA_FEED_MAX_CONCURRENCY
+from onyx.configs.app_configs import VESPA_FEED_MAX_CONNECTIONS
+from onyx.configs.app_configs import VESPA_FEED_MAX_RETRIES
+from onyx.configs.app_configs import VESPA_FEED_MIN_CONCURRENCY
+from onyx.document_index.vespa.indexing_utils import build_vespa_chunk_fields
+from onyx.document_index.vespa.indexing_utils import get_vespa_chunk_url
+from onyx.document_index.vespa.indexing_utils import raise_for_vespa_index_status
+from onyx.document_index.vespa.shared_utils.utils import get_vespa_async_http_client
+from onyx.indexing.models import DocMetadataAwareIndexChunk
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Vespa is overloaded (or the feed is too fast), back off and lower the concurrency
+THROTTLED_STATUS_CODES = {
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+}
+RETRYABLE_STATUS_CODES = THROTTLED_STATUS_CODES | {
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.GATEWAY_TIMEOUT,
+}
+# a 500 may be transient, but is more likely to repeat than the statuses above, so
+# it only gets a couple of retries (like the feed did before it was pipelined)
+INTERNAL_SERVER_ERROR_MAX_RETRIES = 2
+
+_BACKOFF_BASE_SECONDS = 0.5
+_BACKOFF_MAX_SECONDS = 30.0
+
+
+class VespaFeedMetrics(BaseModel):
+    num_chunks: int
+    elapsed_seconds: float
+    chunks_per_second: float
+    p50_latency_ms: float
+    p99_latency_ms: float
+    # retried requests, including the throttled ones
+    num_retries: int
+    num_throttled: int
+    # in-flight request limit at the end of the feed
+    concurrency: int
+
+    def __str__(self) -> str:
+        return (
+            f"chunks={self.num_chunks} "
+            f"elapsed={self.elapsed_seconds:.2f}s "
+            f"chunks_per_sec={self.chunks_per_second:.1f} "
+            f"p50={self.p50_latency_ms:.1f}ms "
+            f"p99={self.p99_latency_ms:.1f}ms "
+            f"retries={self.num_retries} "
+            f"throttled={self.num_throttled} "
+            f"concurrency={self.concurrency}"
+        )
+
+
+class AdaptiveConcurrencyLimiter:
+    """Limits the number of in-flight requests. The limit grows by one after a full
+    limit's worth of successful requests and is halved when a request is throttled
+    (additive increase / multiplicative decrease). Requests that were already in
+    flight when the limit was lowered do not lower it again, so a burst of 429s
+    caused by a single overload only halves the limit once."""
+
+    def __init__(self, initial_limit: int, min_limit: int, max_limit: int) -> None:
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(max(initial_limit, self.min_limit), self.max_limit)
+
+        self._in_flight = 0
+        self._successes_since_increase = 0
+        self._last_decrease_time = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> float:
+        """Waits for a free slot, returns the time the slot was acquired at (to be
+        passed back to `release`)."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        return time.monotonic()
+
+    async def release(self, acquired_at: float, throttled: bool) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+
+            if throttled:
+                if acquired_at >= self._last_decrease_time:
+                    self.limit = max(self.min_limit, self.limit // 2)
+                    self._last_decrease_time = time.monotonic()
+                self._successes_since_increase = 0
+            else:
+                self._successes_since_increase += 1
+                if self._successes_since_increase >= self.limit:
+                    self.limit = min(self.max_limit, self.limit + 1)
+                    self._successes_since_increase = 0
+
+            self._condition.notify_all()
+
+
+def get_backoff_seconds(attempt: int, response: httpx.Response | None) -> float:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), _BACKOFF_MAX_SECONDS)
+            except ValueError:
+                # HTTP-date form, not sent by Vespa. Fall back to the exponential backoff
+                pass
+
+    # "full jitter" so that throttled requests do not all come back at the same time
+    return random.uniform(
+        0, min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2**attempt)
+    )
+
+
+def _percentile(sorted_values: list[float], percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * percentile / 100))
+    return sorted_values[index]
+
+
+class _FeedStats:
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.num_retries = 0
+        self.num_throttled = 0
+
+
+class VespaFeedClient:
+    """Feeds chunks to Vespa through an `httpx.AsyncClient`. `feed` is synchronous
+    (it runs its own event loop), so it can be used as a drop-in replacement for
+    `batch_index_vespa_chunks`. The adapted concurrency limit carries over between
+    calls to `feed`."""
+
+    def __init__(
+        self,
+        initial_concurrency: int = VESPA_FEED_INITIAL_CONCURRENCY,
+        min_concurrency: int = VESPA_FEED_MIN_CONCURRENCY,
+        max_concurrency: int = VESPA_FEED_MAX_CONCURRENCY,
+        max_connections: int = VESPA_FEED_MAX_CONNECTIONS,
+        max_retries: int = VESPA_FEED_MAX_RETRIES,
+        client_factory: Callable[[], httpx.AsyncClient] | None = None,
+    ) -> None:
+        self.concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self._client_factory = client_factory or (
+            lambda: get_vespa_async_http_client(max_connections=max_connections)
+        )
+
+    def feed(
+        self,
+        chunks: list[DocMetadataAwareIndexChunk],
+        index_name: str,
+        multitenant: bool,
+    ) -> VespaFeedMetrics:
+        """Indexes the chunks into Vespa, raises if any of them could not be indexed."""
+        if not chunks:
+            return VespaFeedMetrics(
+                num_chunks=0,
+                elapsed_seconds=0.0,
+                chunks_per_second=0.0,
+                p50_latency_ms=0.0,
+                p99_latency_ms=0.0,
+                num_retries=0,
+                num_throttled=0,
+                concurrency=self.concurrency,
+            )
+
+        def _run() -> VespaFeedMetrics:
+            return asyncio.run(self._feed(chunks, index_name, multitenant))
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            metrics = _run()
+        else:
+            # already inside an event loop (e.g. called from async code), asyncio.run
+            # can't be nested so run the feed's loop in its own thread
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+                metrics = executor.submit(_run).result()
+
+        logger.info(f"Vespa feed finished: index={index_name} {metrics}")
+        return metrics
+
+    async def _feed(
+        self,
+        chunks: list[DocMetadataAwareIndexChunk],
+        index_name: str,
+        multitenant: bool,
+    ) -> VespaFeedMetrics:
+        limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=self.concurrency,
+            min_limit=self.min_concurrency,
+            max_limit=self.max_concurrency,
+        )
+        stats = _FeedStats()
+        # shared by all the workers, so chunks are picked up (and their request
+        # bodies built) as slots free up rather than all at once
+        chunk_iter = iter(chunks)
+
+        start_time = time.monotonic()
+        async with self._client_factory() as client:
+            workers = [
+                asyncio.create_task(
+                    self._feed_worker(
+                        chunk_iter=chunk_iter,
+                        index_name=index_name,
+                        multitenant=multitenant,
+                        client=client,
+                        limiter=limiter,
+                        stats=stats,
+                    )
+                )
+                for _ in range(min(limiter.max_limit, len(chunks)))
+            ]
+            try:
+                done, _ = await asyncio.wait(
+                    workers, return_when=asyncio.FIRST_EXCEPTION
+                )
+                for worker in done:
+                    # raises the first failure, if any
+                    worker.result()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+        elapsed = time.monotonic() - start_time
+
+        self.concurrency = limiter.limit
+
+        latencies = sorted(stats.latencies)
+        return VespaFeedMetrics(
+            num_chunks=len(chunks),
+            elapsed_seconds=elapsed,
+            chunks_per_second=len(chunks) / elapsed if elapsed > 0 else 0.0,
+            p50_latency_ms=_percentile(latencies, 50) * 1000,
+            p99_latency_ms=_percentile(latencies, 99) * 1000,
+            num_retries=stats.num_retries,
+            num_throttled=stats.num_throttled,
+            concurrency=limiter.limit,
+        )
+
+    async def _feed_worker(
+        self,
+        chunk_iter: Iterator[DocMetadataAwareIndexChunk],
+        index_name: str,
+        multitenant: bool,
+        client: httpx.AsyncClient,
+        limiter: AdaptiveConcurrencyLimiter,
+        stats: _FeedStats,
+    ) -> None:
+        for chunk in chunk_iter:
+            await self._feed_chunk(
+                chunk=chunk,
+                index_name=index_name,
+                multitenant=multitenant,
+                client=client,
+                limiter=limiter,
+                stats=stats,
+            )
+
+    async def _feed_chunk(
+        self,
+        chunk: DocMetadataAwareIndexChunk,
+        index_name: str,
+        multitenant: bool,
+        client: httpx.AsyncClient,
+        limiter: AdaptiveConcurrencyLimiter,
+        stats: _FeedStats,
+    ) -> None:
+        vespa_url = get_vespa_chunk_url(chunk, index_name)
+        body = {"fields": build_vespa_chunk_fields(chunk, multitenant)}
+
+        attempt = 0
+        while True:
+            acquired_at = await limiter.acquire()
+            response: httpx.Response | None = None
+            try:
+                response = await client.post(vespa_url, json=body)
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    raise
+                logger.debug(f"Transport error while indexing to {vespa_url}: {e}")
+            finally:
+                throttled = (
+                    response is not None
+                    and response.status_code in THROTTLED_STATUS_CODES
+                )
+                await limiter.release(acquired_at, throttled=throttled)
+
+            if response is not None:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    raise_for_vespa_index_status(response, chunk.source_document.id)
+                    stats.latencies.append(time.monotonic() - acquired_at)
+                    return
+
+                if throttled:
+                    stats.num_throttled += 1
+                max_retries = (
+                    min(self.max_retries, INTERNAL_SERVER_ERROR_MAX_RETRIES)
+                    if response.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
+                    else self.max_retries
+                )
+                if attempt >= max_retries:
+                    raise_for_vespa_index_status(response, chunk.source_document.id)
+
+            stats.num_retries += 1
+            await asyncio.sleep(get_backoff_seconds(attempt, response))
+            attempt += 1
@@ -7,19 +7,17 @@ import re
 import time
 import urllib
 import zipfile
-from dataclasses import dataclass
 from datetime import datetime
 from datetime import timedelta
 from typing import BinaryIO
 from typing import cast
 from typing import List
-from uuid import UUID
 
 import httpx  # type: ignore
 import requests  # type: ignore
-from retry import retry
 
 from onyx.agents.agent_search.shared_graph_utils.models import QueryExpansionType
+from onyx.configs.app_configs import VESPA_DISABLE_ASYNC_FEED
 from onyx.configs.chat_configs import DOC_TIME_DECAY
 from onyx.configs.chat_configs import NUM_RETURNED_HITS
 from onyx.configs.chat_configs import TITLE_CONTENT_RATIO
@@ -44,12 +42,20 @@ from onyx.document_index.vespa.chunk_retrieval import (
 )
 from onyx.document_index.vespa.chunk_retrieval import query_vespa
 from onyx.document_index.vespa.deletion import delete_vespa_chunks
+from onyx.document_index.vespa.feed_client import VespaFeedClient
 from onyx.document_index.vespa.indexing_utils import BaseHTTPXClientContext
 from onyx.document_index.vespa.indexing_utils import batch_index_vespa_chunks
+from onyx.document_index.vespa.indexing_utils import (
+    build_vespa_chunk_document_level_update,
+)
 from onyx.document_index.vespa.indexing_utils import check_for_final_chunk_existence
 from onyx.document_index.vespa.indexing_utils import clean_chunk_id_copy
+from onyx.document_index.vespa.indexing_utils import get_vespa_chunk_url
 from onyx.document_index.vespa.indexing_utils import GlobalHTTPXClientContext
 from onyx.document_index.vespa.indexing_utils import TemporaryHTTPXClientContext
+from onyx.document_index.vespa.partial_update import apply_partial_updates
+from onyx.document_index.vespa.partial_update import build_partial_update_fields
+from onyx.document_index.vespa.partial_update import VespaPartialUpdate
 from onyx.document_index.vespa.shared_utils.utils import get_vespa_http_client
 from onyx.document_index.vespa.shared_utils.utils import (
     replace_invalid_doc_id_characters,
@@ -57,23 +63,17 @@ from onyx.document_index.vespa.shared_utils.utils import (
 from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
     build_vespa_filters,
 )
-from onyx.document_index.vespa_constants import ACCESS_CONTROL_LIST
 from onyx.document_index.vespa_constants import BATCH_SIZE
-from onyx.document_index.vespa_constants import BOOST
 from onyx.document_index.vespa_constants import CONTENT_SUMMARY
 from onyx.document_index.vespa_constants import DANSWER_CHUNK_REPLACEMENT_PAT
 from onyx.document_index.vespa_constants import DATE_REPLACEMENT
 from onyx.document_index.vespa_constants import DOCUMENT_ID_ENDPOINT
 from onyx.document_index.vespa_constants import DOCUMENT_REPLACEMENT_PAT
-from onyx.document_index.vespa_constants import DOCUMENT_SETS
 from onyx.document_index.vespa_constants import EMBEDDING_PRECISION_REPLACEMENT_PAT
-from onyx.document_index.vespa_constants import HIDDEN
 from onyx.document_index.vespa_constants import NUM_THREADS
 from onyx.document_index.vespa_constants import SEARCH_THREAD_NUMBER_PAT
 from onyx.document_index.vespa_constants import TENANT_ID_PAT
 from onyx.document_index.vespa_constants import TENANT_ID_REPLACEMENT
-from onyx.document_index.vespa_constants import USER_FILE
-from onyx.document_index.vespa_constants import USER_FOLDER
 from onyx.document_index.vespa_constants import VESPA_APPLICATION_ENDPOINT
 from onyx.document_index.vespa_constants import VESPA_DIM_REPLACEMENT_PAT
 from onyx.document_index.vespa_constants import VESPA_TIMEOUT
@@ -93,13 +93,6 @@ httpx_logger = logging.getLogger("httpx")
 httpx_logger.setLevel(logging.WARNING)
 
 
-@dataclass
-class _VespaUpdateRequest:
-    document_id: str
-    url: str
-    update_request: dict[str, dict]
-
-
 def in_memory_zip_from_file_bytes(file_contents: dict[str, bytes]) -> BinaryIO:
     zip_buffer = io.BytesIO()
     with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
@@ -175,6 +168,9 @@ class VespaIndex(DocumentIndex):
                 get_vespa_http_client
             )
 
+        # used for indexing only, keeps the adapted feed concurrency across batches
+        self.feed_client = VespaFeedClient()
+
         self.index_to_large_chunks_enabled: dict[str, bool] = {}
         self.index_to_large_chunks_enabled[index_name] = large_chunks_enabled
         if secondary_index_name and secondary_large_chunks_enabled:
@@ -440,15 +436,41 @@ class VespaIndex(DocumentIndex):
                     executor=executor,
                 )
 
-            for chunk_batch in batch_generator(cleaned_chunks, BATCH_SIZE):
-                batch_index_vespa_chunks(
-                    chunks=chunk_batch,
+            # the chunks which are already in the index with the same content are not
+            # fed again, only their document level fields are updated
+            chunks_to_feed = [
+                chunk for chunk in cleaned_chunks if not chunk.content_unchanged
+            ]
+            unchanged_chunk_updates = [
+                VespaPartialUpdate(
+                    document_id=chunk.source_document.id,
+                    url=get_vespa_chunk_url(chunk, self.index_name),
+                    fields=build_vespa_chunk_document_level_update(chunk),
+                )
+                for chunk in cleaned_chunks
+                if chunk.content_unchanged
+            ]
+
+            if VESPA_DISABLE_ASYNC_FEED:
+                for chunk_batch in batch_generator(chunks_to_feed, BATCH_SIZE):
+                    batch_index_vespa_chunks(
+                        chunks=chunk_batch,
+                        index_name=self.index_name,
+                        http_client=http_client,
+                        multitenant=self.multitenant,
+                        executor=executor,
+                    )
+            else:
+                # streams all the chunks through the async feed client, there is no
+                # need to wait for a batch to finish before starting on the next one
+                self.feed_client.feed(
+                    chunks=chunks_to_feed,
                     index_name=self.index_name,
-                    http_client=http_client,
                     multitenant=self.multitenant,
-                    executor=executor,
                 )
 
+            apply_partial_updates(unchanged_chunk_updates, http_client)
+
         all_cleaned_doc_ids = {chunk.source_document.id for chunk in cleaned_chunks}
 
         return {
@@ -459,204 +481,93 @@ class VespaIndex(DocumentIndex):
             for cleaned_doc_id in all_cleaned_doc_ids
         }
 
-    @classmethod
-    def _apply_updates_batched(
-        cls,
-        updates: list[_VespaUpdateRequest],
-        httpx_client: httpx.Client,
-        batch_size: int = BATCH_SIZE,
-    ) -> None:
-        """Runs a batch of updates in parallel via the ThreadPoolExecutor."""
-
-        def _update_chunk(
-            update: _VespaUpdateRequest, http_client: httpx.Client
-        ) -> httpx.Response:
-            logger.debug(
-                f"Updating with request to {update.url} with body {update.update_request}"
-            )
-            return http_client.put(
-                update.url,
-                headers={"Content-Type": "application/json"},
-                json=update.update_request,
-            )
-
-        # NOTE: using `httpx` here since `requests` doesn't support HTTP2. This is beneficient for
-        # indexing / updates / deletes since we have to make a large volume of requests.
-
-        with (
-            concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor,
-            httpx_client as http_client,
-        ):
-            for update_batch in batch_generator(updates, batch_size):
-                future_to_document_id = {
-                    executor.submit(
-                        _update_chunk,
-                        update,
-                        http_client,
-                    ): update.document_id
-                    for update in update_batch
-                }
-                for future in concurrent.futures.as_completed(future_to_document_id):
-                    res = future.result()
-                    try:
-                        res.raise_for_status()
-                    except requests.HTTPError as e:
-                        failure_msg = f"Failed to update document: {future_to_document_id[future]}"
-                        raise requests.HTTPError(failure_msg) from e
-
     def update(self, update_requests: list[UpdateRequest], *, tenant_id: str) -> None:
         logger.debug(f"Updating {len(update_requests)} documents in Vespa")
 
-        # Handle Vespa character limitations
-        # Mutating update_requests but it's not used later anyway
-        for update_request in update_requests:
-            for doc_info in update_request.minimal_document_indexing_info:
-                doc_info.doc_id = replace_invalid_doc_id_characters(doc_info.doc_id)
-
         update_start = time.monotonic()
 
-        processed_updates_requests: list[_VespaUpdateRequest] = []
-        all_doc_chunk_ids: dict[str, list[UUID]] = {}
-
-        # Fetch all chunks for each document ahead of time
-        index_names = [self.index_name]
-        if self.secondary_index_name:
-            index_names.append(self.secondary_index_name)
-
-        chunk_id_start_time = time.monotonic()
+        updates: list[VespaPartialUpdate] = []
         with self.httpx_client_context as http_client:
+            chunk_id_start_time = time.monotonic()
             for update_request in update_requests:
+                update_fields = build_partial_update_fields(
+                    VespaDocumentFields(
+                        access=update_request.access,
+                        document_sets=update_request.document_sets,
+                        boost=update_request.boost,
+                        hidden=update_request.hidden,
+                    ),
+                    None,
+                )
+                if not update_fields:
+                    logger.error("Update request received but nothing to update")
+                    continue
+
                 for doc_info in update_request.minimal_document_indexing_info:
-                    for index_name in index_names:
-                        doc_chunk_info = VespaIndex.enrich_basic_chunk_info(
-                            index_name=index_name,
-                            http_client=http_client,
-                            document_id=doc_info.doc_id,
-                            previous_chunk_count=doc_info.chunk_start_index,
-                            new_chunk_count=0,
-                        )
-                        doc_chunk_ids = get_document_chunk_ids(
-                            enriched_document_info_list=[doc_chunk_info],
+                    # Handle Vespa character limitations
+                    doc_id = replace_invalid_doc_id_characters(doc_info.doc_id)
+                    updates.extend(
+                        self._get_partial_updates(
+                            doc_id=doc_id,
+                            chunk_count=doc_info.chunk_start_index,
                             tenant_id=tenant_id,
-                            large_chunks_enabled=False,
-                        )
-                        all_doc_chunk_ids[doc_info.doc_id] = doc_chunk_ids
-
-        logger.debug(
-            f"Took {time.monotonic() - chunk_id_start_time:.2f} seconds to fetch all Vespa chunk IDs"
-        )
-
-        # Build the _VespaUpdateRequest objects
-        for update_request in update_requests:
-            update_dict: dict[str, dict] = {"fields": {}}
-            if update_request.boost is not None:
-                update_dict["fields"][BOOST] = {"assign": update_request.boost}
-            if update_request.document_sets is not None:
-                update_dict["fields"][DOCUMENT_SETS] = {
-                    "assign": {
-                        document_set: 1 for document_set in update_request.document_sets
-                    }
-                }
-            if update_request.access is not None:
-                update_dict["fields"][ACCESS_CONTROL_LIST] = {
-                    "assign": {
-                        acl_entry: 1 for acl_entry in update_request.access.to_acl()
-                    }
-                }
-            if update_request.hidden is not None:
-                update_dict["fields"][HIDDEN] = {"assign": update_request.hidden}
-
-            if not update_dict["fields"]:
-                logger.error("Update request received but nothing to update")
-                continue
-
-            for doc_info in update_request.minimal_document_indexing_info:
-                for doc_chunk_id in all_doc_chunk_ids[doc_info.doc_id]:
-                    processed_updates_requests.append(
-                        _VespaUpdateRequest(
-                            document_id=doc_info.doc_id,
-                            url=f"{DOCUMENT_ID_ENDPOINT.format(index_name=self.index_name)}/{doc_chunk_id}",
-                            update_request=update_dict,
+                            update_fields=update_fields,
+                            http_client=http_client,
+                            create_if_missing=False,
                         )
                     )
+            logger.debug(
+                f"Took {time.monotonic() - chunk_id_start_time:.2f} seconds to fetch all Vespa chunk IDs"
+            )
+
+            apply_partial_updates(updates, http_client)
 
-        with self.httpx_client_context as httpx_client:
-            self._apply_updates_batched(processed_updates_requests, httpx_client)
         logger.debug(
-            "Finished updating Vespa documents in %.2f seconds",
+            "Finished updating %d Vespa chunks in %.2f seconds",
+            len(updates),
             time.monotonic() - update_start,
         )
 
-    @retry(
-        tries=3,
-        delay=1,
-        backoff=2,
-    )
-    def _update_single_chunk(
+    def _get_partial_updates(
         self,
-        doc_chunk_id: UUID,
-        index_name: str,
-        fields: VespaDocumentFields | None,
-        user_fields: VespaDocumentUserFields | None,
         doc_id: str,
+        chunk_count: int | None,
+        tenant_id: str,
+        update_fields: dict[str, dict],
         http_client: httpx.Client,
-    ) -> None:
-        """
-        Update a single "chunk" (document) in Vespa using its chunk ID.
-        Retries if we encounter transient HTTPStatusError (e.g., overload).
-        """
-
-        update_dict: dict[str, dict] = {"fields": {}}
-
-        if fields is not None:
-            if fields.boost is not None:
-                update_dict["fields"][BOOST] = {"assign": fields.boost}
-
-            if fields.document_sets is not None:
-                update_dict["fields"][DOCUMENT_SETS] = {
-                    "assign": {document_set: 1 for document_set in fields.document_sets}
-                }
-
-            if fields.access is not None:
-                update_dict["fields"][ACCESS_CONTROL_LIST] = {
-                    "assign": {acl_entry: 1 for acl_entry in fields.access.to_acl()}
-                }
-
-            if fields.hidden is not None:
-                update_dict["fields"][HIDDEN] = {"assign": fields.hidden}
-
-        if user_fields is not None:
-            if user_fields.user_file_id is not None:
-                update_dict["fields"][USER_FILE] = {"assign": user_fields.user_file_id}
-
-            if user_fields.user_folder_id is not None:
-                update_dict["fields"][USER_FOLDER] = {
-                    "assign": user_fields.user_folder_id
-                }
-
-        if not update_dict["fields"]:
-            logger.error("Update request received but nothing to update.")
-            return
-
-        vespa_url = (
-            f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{doc_chunk_id}"
-            "?create=true"
-        )
+        create_if_missing: bool,
+    ) -> list[VespaPartialUpdate]:
+        """The partial updates for all the chunks of a document, across all indices."""
+        updates: list[VespaPartialUpdate] = []
+        for (
+            index_name,
+            large_chunks_enabled,
+        ) in self.index_to_large_chunks_enabled.items():
+            enriched_doc_infos = VespaIndex.enrich_basic_chunk_info(
+                index_name=index_name,
+                http_client=http_client,
+                document_id=doc_id,
+                previous_chunk_count=chunk_count,
+                new_chunk_count=0,
+            )
 
-        try:
-            resp = http_client.put(
-                vespa_url,
-                headers={"Content-Type": "application/json"},
-                json=update_dict,
+            doc_chunk_ids = get_document_chunk_ids(
+                enriched_document_info_list=[enriched_doc_infos],
+                tenant_id=tenant_id,
+                large_chunks_enabled=large_chunks_enabled,
             )
-            resp.raise_for_status()
-        except httpx.HTTPStatusError as e:
-            logger.error(
-                f"Failed to update doc chunk {doc_chunk_id} (doc_id={doc_id}). "
-                f"Details: {e.response.text}"
+
+            url_suffix = "?create=true" if create_if_missing else ""
+            updates.extend(
+                VespaPartialUpdate(
+                    document_id=doc_id,
+                    url=f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{doc_chunk_id}{url_suffix}",
+                    fields=update_fields,
+                )
+                for doc_chunk_id in doc_chunk_ids
             )
-            # Re-raise so the @retry decorator will catch and retry
-            raise
+
+        return updates
 
     def update_single(
         self,
@@ -671,42 +582,25 @@ class VespaIndex(DocumentIndex):
         function will complete with no errors or exceptions.
         Handle other exceptions if you wish to implement retry behavior
         """
-        doc_chunk_count = 0
+        update_fields = build_partial_update_fields(fields, user_fields)
+        if not update_fields:
+            logger.error("Update request received but nothing to update.")
+            return 0
 
         doc_id = replace_invalid_doc_id_characters(doc_id)
 
         with self.httpx_client_context as httpx_client:
-            for (
-                index_name,
-                large_chunks_enabled,
-            ) in self.index_to_large_chunks_enabled.items():
-                enriched_doc_infos = VespaIndex.enrich_basic_chunk_info(
-                    index_name=index_name,
-                    http_client=httpx_client,
-                    document_id=doc_id,
-                    previous_chunk_count=chunk_count,
-                    new_chunk_count=0,
-                )
-
-                doc_chunk_ids = get_document_chunk_ids(
-                    enriched_document_info_list=[enriched_doc_infos],
-                    tenant_id=tenant_id,
-                    large_chunks_enabled=large_chunks_enabled,
-                )
-
-                doc_chunk_count += len(doc_chunk_ids)
-
-                for doc_chunk_id in doc_chunk_ids:
-                    self._update_single_chunk(
-                        doc_chunk_id,
-                        index_name,
-                        fields,
-                        user_fields,
-                        doc_id,
-                        httpx_client,
-                    )
+            updates = self._get_partial_updates(
+                doc_id=doc_id,
+                chunk_count=chunk_count,
+                tenant_id=tenant_id,
+                update_fields=update_fields,
+                http_client=httpx_client,
+                create_if_missing=True,
+            )
+            apply_partial_updates(updates, httpx_client)
 
-        return doc_chunk_count
+        return len(updates)
 
     def delete_single(
         self,
@@ -805,7 +699,8 @@ class VespaIndex(DocumentIndex):
         offset: int = 0,
         title_content_ratio: float | None = TITLE_CONTENT_RATIO,
     ) -> list[InferenceChunkUncleaned]:
-        vespa_where_clauses = build_vespa_filters(filters)
+        filter_params: dict[str, str | int | float] = {}
+        vespa_where_clauses = build_vespa_filters(filters, params=filter_params)
         # Needs to be at least as much as the value set in Vespa schema config
         target_hits = max(10 * num_to_retrieve, 1000)
 
@@ -842,6 +737,7 @@ class VespaIndex(DocumentIndex):
             "offset": offset,
             "ranking.profile": ranking_profile,
             "timeout": VESPA_TIMEOUT,
+            **filter_params,
         }
 
         return query_vespa(params)
@@ -853,7 +749,10 @@ class VespaIndex(DocumentIndex):
         num_to_retrieve: int = NUM_RETURNED_HITS,
         offset: int = 0,
     ) -> list[InferenceChunkUncleaned]:
-        vespa_where_clauses = build_vespa_filters(filters, include_hidden=True)
+        filter_params: dict[str, str | int | float] = {}
+        vespa_where_clauses = build_vespa_filters(
+            filters, include_hidden=True, params=filter_params
+        )
         yql = (
             YQL_BASE.format(index_name=self.index_name)
             + vespa_where_clauses
@@ -864,13 +763,14 @@ class VespaIndex(DocumentIndex):
             + f'or ({{defaultIndex: "{CONTENT_SUMMARY}"}}userInput(@query)))'
         )
 
-        params: dict[str, str | int] = {
+        params: dict[str, str | int | float] = {
             "yql": yql,
             "query": query,
             "hits": num_to_retrieve,
             "offset": 0,
             "ranking.profile": "admin_search",
             "timeout": VESPA_TIMEOUT,
+            **filter_params,
         }
 
         return query_vespa(params)
@@ -1083,7 +983,10 @@ class VespaIndex(DocumentIndex):
         This method is currently used for random chunk retrieval in the context of
         assistant starter message creation (passed as sample context for usage by the assistant).
         """
-        vespa_where_clauses = build_vespa_filters(filters, remove_trailing_and=True)
+        filter_params: dict[str, str | int | float] = {}
+        vespa_where_clauses = build_vespa_filters(
+            filters, remove_trailing_and=True, params=filter_params
+        )
 
         yql = YQL_BASE.format(index_name=self.index_name) + vespa_where_clauses
 
@@ -1095,6 +998,7 @@ class VespaIndex(DocumentIndex):
             "timeout": VESPA_TIMEOUT,
             "ranking.profile": "random_",
             "ranking.properties.random.seed": random_seed,
+            **filter_params,
         }
 
         return query_vespa(params)
@@ -7,6 +7,7 @@ from collections.abc import Callable
 from datetime import datetime
 from datetime import timezone
 from http import HTTPStatus
+from typing import Any
 
 import httpx
 from retry import retry
@@ -15,7 +16,6 @@ from onyx.connectors.cross_connector_utils.miscellaneous_utils import (
     get_experts_stores_representations,
 )
 from onyx.document_index.document_index_utils import get_uuid_from_chunk
-from onyx.document_index.document_index_utils import get_uuid_from_chunk_info_old
 from onyx.document_index.interfaces import MinimalDocumentIndexingInfo
 from onyx.document_index.vespa.shared_utils.utils import remove_invalid_unicode_chars
 from onyx.document_index.vespa.shared_utils.utils import (
@@ -126,22 +126,15 @@ def get_existing_documents_from_chunks(
     return document_ids
 
 
-@retry(tries=5, delay=1, backoff=2)
-def _index_vespa_chunk(
-    chunk: DocMetadataAwareIndexChunk,
-    index_name: str,
-    http_client: httpx.Client,
-    multitenant: bool,
-) -> None:
-    json_header = {
-        "Content-Type": "application/json",
-    }
+def build_vespa_chunk_fields(
+    chunk: DocMetadataAwareIndexChunk, multitenant: bool
+) -> dict[str, Any]:
+    """Builds the Vespa document fields (the `fields` of a /document/v1 feed
+    request) for a chunk."""
     document = chunk.source_document
 
     # No minichunk documents in vespa, minichunk vectors are stored in the chunk itself
 
-    vespa_chunk_id = str(get_uuid_from_chunk(chunk))
-
     embeddings = chunk.embeddings
 
     embeddings_name_vector_map = {"full_chunk": embeddings.full_embedding}
@@ -216,16 +209,51 @@ def _index_vespa_chunk(
     if multitenant:
         if chunk.tenant_id:
             vespa_document_fields[TENANT_ID] = chunk.tenant_id
-    vespa_url = f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{vespa_chunk_id}"
-    logger.debug(f'Indexing to URL "{vespa_url}"')
-    res = http_client.post(
-        vespa_url, headers=json_header, json={"fields": vespa_document_fields}
+
+    return vespa_document_fields
+
+
+def build_vespa_chunk_document_level_update(
+    chunk: DocMetadataAwareIndexChunk,
+) -> dict[str, dict]:
+    """Builds the Vespa partial update (the `fields` of a /document/v1 update request)
+    of the document level fields of a chunk which is already in the index with the
+    same content (see IndexChunk.content_unchanged). Every other field is covered by
+    the content hash of the chunk."""
+    update_fields: dict[str, dict] = {
+        ACCESS_CONTROL_LIST: {
+            "assign": {acl_entry: 1 for acl_entry in chunk.access.to_acl()}
+        },
+        DOCUMENT_SETS: {
+            "assign": {document_set: 1 for document_set in chunk.document_sets}
+        },
+        BOOST: {"assign": chunk.boost},
+        # assigning None clears the field, e.g. when the file was unlinked
+        USER_FILE: {"assign": chunk.user_file},
+        USER_FOLDER: {"assign": chunk.user_folder},
+    }
+
+    doc_updated_at = _vespa_get_updated_at_attribute(
+        chunk.source_document.doc_updated_at
     )
+    if doc_updated_at is not None:
+        update_fields[DOC_UPDATED_AT] = {"assign": doc_updated_at}
+
+    return update_fields
+
+
+def get_vespa_chunk_url(chunk: DocMetadataAwareIndexChunk, index_name: str) -> str:
+    vespa_chunk_id = str(get_uuid_from_chunk(chunk))
+    return f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{vespa_chunk_id}"
+
+
+def raise_for_vespa_index_status(res: httpx.Response, document_id: str) -> None:
+    """Raises (and logs) if a feed request for a chunk of `document_id` failed."""
     try:
         res.raise_for_status()
     except Exception as e:
         logger.exception(
-            f"Failed to index document: '{document.id}'. Got response: '{res.text}'"
+            f"Failed to index document: '{document_id}'. Got response: '{res.text}'"
         )
         if isinstance(e, httpx.HTTPStatusError):
             if e.response.status_code == HTTPStatus.INSUFFICIENT_STORAGE:
@@ -238,6 +266,26 @@ def _index_vespa_chunk(
         raise e
 
 
+@retry(tries=5, delay=1, backoff=2)
+def _index_vespa_chunk(
+    chunk: DocMetadataAwareIndexChunk,
+    index_name: str,
+    http_client: httpx.Client,
+    multitenant: bool,
+) -> None:
+    json_header = {
+        "Content-Type": "application/json",
+    }
+    vespa_document_fields = build_vespa_chunk_fields(chunk, multitenant)
+
+    vespa_url = get_vespa_chunk_url(chunk, index_name)
+    logger.debug(f'Indexing to URL "{vespa_url}"')
+    res = http_client.post(
+        vespa_url, headers=json_header, json={"fields": vespa_document_fields}
+    )
+    raise_for_vespa_index_status(res, chunk.source_document.id)
+
+
 def batch_index_vespa_chunks(
     chunks: list[DocMetadataAwareIndexChunk],
     index_name: str,
@@ -282,22 +330,70 @@ def clean_chunk_id_copy(
     return clean_chunk
 
 
+@retry(tries=3, delay=1, backoff=2)
+def _visit_regular_chunk_ids(
+    document_id: str,
+    start_index: int,
+    index_name: str,
+    http_client: httpx.Client,
+) -> set[int]:
+    """The chunk ids (from `start_index` on) of the regular (not large) chunks of a
+    document, listed by visiting the document selection instead of fetching chunks by
+    id."""
+    # the document id is sanitized of single quotes, but may still contain backslashes
+    escaped_document_id = document_id.replace("\\", "\\\\")
+    params: dict[str, str | int] = {
+        "selection": (
+            f"{index_name}.document_id=='{escaped_document_id}'"
+            f" and {index_name}.{CHUNK_ID}>={start_index}"
+            f" and {index_name}.{LARGE_CHUNK_REFERENCE_IDS} == null"
+        ),
+        "fieldSet": f"{index_name}:{CHUNK_ID}",
+        "wantedDocumentCount": 1_000,
+    }
+
+    chunk_ids: set[int] = set()
+    while True:
+        response = http_client.get(
+            DOCUMENT_ID_ENDPOINT.format(index_name=index_name), params=params
+        )
+        response.raise_for_status()
+        response_data = response.json()
+
+        for document in response_data.get("documents", []):
+            chunk_id = document.get("fields", {}).get(CHUNK_ID)
+            if chunk_id is not None:
+                chunk_ids.add(int(chunk_id))
+
+        continuation = response_data.get("continuation")
+        if not continuation:
+            break
+        params["continuation"] = continuation
+
+    return chunk_ids
+
+
 def check_for_final_chunk_existence(
     minimal_doc_info: MinimalDocumentIndexingInfo,
     start_index: int,
     index_name: str,
     http_client: httpx.Client,
 ) -> int:
+    """Returns the index of the first chunk at or after `start_index` that is not in
+    the index, i.e. the chunk count of a document indexed with the old chunk ID system
+    (which has no `chunk_count` in the db). All the chunks are listed with one visit
+    rather than probed one GET at a time."""
+    existing_chunk_ids = _visit_regular_chunk_ids(
+        document_id=minimal_doc_info.doc_id,
+        start_index=start_index,
+        index_name=index_name,
+        http_client=http_client,
+    )
+
     index = start_index
-    while True:
-        doc_chunk_id = get_uuid_from_chunk_info_old(
-            document_id=minimal_doc_info.doc_id,
-            chunk_id=index,
-            large_chunk_reference_ids=[],
-        )
-        if not _does_doc_chunk_exist(doc_chunk_id, index_name, http_client):
-            return index
+    while index in existing_chunk_ids:
         index += 1
+    return index
 
 
 class BaseHTTPXClientContext(ABC):
@@ -0,0 +1,160 @@
+"""
+Partial updates (access, document sets, boost, ...) of Vespa chunks.
+
+Vespa has no bulk partial update API, every chunk is its own PUT. Instead of sending
+them one after the other, the updates of one or many documents are pipelined from a
+thread pool over a shared (HTTP/2) client. The pool is shared by the whole process and
+bounded by VESPA_UPDATE_MAX_IN_FLIGHT, so that concurrent callers (e.g. the batched
+metadata sync task) don't add up to more load than Vespa can take. Throttled (429 /
+503) and failed requests are retried with backoff.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from dataclasses import dataclass
+
+import httpx
+
+from onyx.configs.app_configs import VESPA_UPDATE_MAX_IN_FLIGHT
+from onyx.configs.app_configs import VESPA_UPDATE_MAX_RETRIES
+from onyx.document_index.interfaces import VespaDocumentFields
+from onyx.document_index.interfaces import VespaDocumentUserFields
+from onyx.document_index.vespa.feed_client import get_backoff_seconds
+from onyx.document_index.vespa.feed_client import RETRYABLE_STATUS_CODES
+from onyx.document_index.vespa_constants import ACCESS_CONTROL_LIST
+from onyx.document_index.vespa_constants import BOOST
+from onyx.document_index.vespa_constants import DOCUMENT_SETS
+from onyx.document_index.vespa_constants import HIDDEN
+from onyx.document_index.vespa_constants import USER_FILE
+from onyx.document_index.vespa_constants import USER_FOLDER
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# shared by all the callers in the process, a worker sends one request at a time so
+# this bounds the number of updates in flight
+_update_executor = ThreadPoolExecutor(
+    max_workers=VESPA_UPDATE_MAX_IN_FLIGHT, thread_name_prefix="vespa_partial_update"
+)
+
+
+@dataclass
+class VespaPartialUpdate:
+    document_id: str
+    url: str
+    # the "fields" of the Vespa partial update, e.g. {"boost": {"assign": 1.0}}
+    fields: dict[str, dict]
+
+
+def build_partial_update_fields(
+    fields: VespaDocumentFields | None,
+    user_fields: VespaDocumentUserFields | None,
+) -> dict[str, dict]:
+    """Vespa update operations for all the fields that are set. Empty if there is
+    nothing to update."""
+    update_fields: dict[str, dict] = {}
+
+    if fields is not None:
+        if fields.boost is not None:
+            update_fields[BOOST] = {"assign": fields.boost}
+
+        if fields.document_sets is not None:
+            update_fields[DOCUMENT_SETS] = {
+                "assign": {document_set: 1 for document_set in fields.document_sets}
+            }
+
+        if fields.access is not None:
+            update_fields[ACCESS_CONTROL_LIST] = {
+                "assign": {acl_entry: 1 for acl_entry in fields.access.to_acl()}
+            }
+
+        if fields.hidden is not None:
+            update_fields[HIDDEN] = {"assign": fields.hidden}
+
+    if user_fields is not None:
+        if user_fields.user_file_id is not None:
+            update_fields[USER_FILE] = {"assign": user_fields.user_file_id}
+
+        if user_fields.user_folder_id is not None:
+            update_fields[USER_FOLDER] = {"assign": user_fields.user_folder_id}
+
+    return update_fields
+
+
+def _send_partial_update(
+    update: VespaPartialUpdate, http_client: httpx.Client, max_retries: int
+) -> None:
+    attempt = 0
+    while True:
+        response: httpx.Response | None = None
+        try:
+            response = http_client.put(
+                update.url,
+                headers={"Content-Type": "application/json"},
+                json={"fields": update.fields},
+            )
+        except httpx.TransportError as e:
+            if attempt >= max_retries:
+                raise
+            logger.debug(f"Transport error while updating {update.url}: {e}")
+
+        if response is not None and (
+            response.status_code not in RETRYABLE_STATUS_CODES or attempt >= max_retries
+        ):
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                logger.error(
+                    f"Failed to update {update.url} (doc_id={update.document_id}). "
+                    f"Details: {e.response.text}"
+                )
+                raise
+            return
+
+        time.sleep(get_backoff_seconds(attempt, response))
+        attempt += 1
+
+
+def apply_partial_updates(
+    updates: list[VespaPartialUpdate],
+    http_client: httpx.Client,
+    max_in_flight: int = VESPA_UPDATE_MAX_IN_FLIGHT,
+    max_retries: int = VESPA_UPDATE_MAX_RETRIES,
+) -> None:
+    """Sends all the updates from the shared pool, using at most max_in_flight of its
+    workers. Raises the first failure, once an update has failed the ones that were
+    not sent yet are dropped."""
+    if not updates:
+        return
+
+    # shared by all the workers, each one sends its next update as soon as the
+    # previous one is done (no waiting for the slowest request of a batch)
+    lock = threading.Lock()
+    update_iter = iter(updates)
+    failed = threading.Event()
+
+    def _worker() -> None:
+        while not failed.is_set():
+            with lock:
+                update = next(update_iter, None)
+            if update is None:
+                return
+
+            try:
+                _send_partial_update(update, http_client, max_retries)
+            except Exception:
+                failed.set()
+                raise
+
+    num_workers = min(max_in_flight, len(updates))
+    futures = [_update_executor.submit(_worker) for _ in range(num_workers)]
+    try:
+        for future in futures:
+            future.result()
+    finally:
+        # on failure, wait for the other workers so that no request of this call is
+        # still being sent once it has returned
+        failed.set()
+        wait(futures)
@@ -7,8 +7,10 @@ import httpx
 from onyx.configs.app_configs import MANAGED_VESPA
 from onyx.configs.app_configs import VESPA_CLOUD_CERT_PATH
 from onyx.configs.app_configs import VESPA_CLOUD_KEY_PATH
+from onyx.configs.app_configs import VESPA_QUERY_MAX_KEEPALIVE_CONNECTIONS
 from onyx.configs.app_configs import VESPA_REQUEST_TIMEOUT
 from onyx.document_index.vespa_constants import VESPA_APP_CONTAINER_URL
+from onyx.httpx.httpx_pool import HttpxPool
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -80,6 +82,52 @@ def get_vespa_http_client(no_timeout: bool = False, http2: bool = True) -> httpx
     )
 
 
+def get_vespa_pooled_http_client() -> httpx.Client:
+    """
+    Process-wide Vespa client with keep-alive connections, so queries don't pay for a
+    new TCP + TLS (mTLS for managed Vespa) handshake every time. Must not be closed by
+    the caller. Celery workers init this pool themselves (see `httpx_init_vespa_pool`),
+    everywhere else it is initialized on first use.
+    """
+
+    HttpxPool.init_client(
+        name="vespa",
+        cert=(
+            cast(tuple[str, str], (VESPA_CLOUD_CERT_PATH, VESPA_CLOUD_KEY_PATH))
+            if MANAGED_VESPA
+            else None
+        ),
+        verify=False if not MANAGED_VESPA else True,
+        timeout=VESPA_REQUEST_TIMEOUT,
+        http2=True,
+        limits=httpx.Limits(
+            max_keepalive_connections=VESPA_QUERY_MAX_KEEPALIVE_CONNECTIONS
+        ),
+    )
+    return HttpxPool.get("vespa")
+
+
+def get_vespa_async_http_client(
+    max_connections: int | None = None, http2: bool = True
+) -> httpx.AsyncClient:
+    """
+    Async counterpart of `get_vespa_http_client`. With HTTP/2, each connection
+    multiplexes many concurrent requests, so only a few connections are needed.
+    """
+
+    return httpx.AsyncClient(
+        cert=(
+            cast(tuple[str, str], (VESPA_CLOUD_CERT_PATH, VESPA_CLOUD_KEY_PATH))
+            if MANAGED_VESPA
+            else None
+        ),
+        verify=False if not MANAGED_VESPA else True,
+        timeout=VESPA_REQUEST_TIMEOUT,
+        http2=http2,
+        limits=httpx.Limits(max_connections=max_connections),
+    )
+
+
 def wait_for_vespa_with_timeout(wait_interval: int = 5, wait_limit: int = 60) -> bool:
     """Waits for Vespa to become ready subject to a timeout.
     Returns True if Vespa is ready, False otherwise."""
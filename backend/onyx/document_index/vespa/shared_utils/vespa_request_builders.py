@@ -22,12 +22,31 @@ from shared_configs.configs import MULTI_TENANT
 logger = setup_logger()
 
 
+# Names of the query parameters that hold the values of set filters (see
+# `build_vespa_filters`), referenced as e.g. `access_control_list in (@acl)` in the YQL
+ACL_FILTER_PARAM = "acl"
+DOCUMENT_SETS_FILTER_PARAM = "document_sets"
+USER_FILE_FILTER_PARAM = "user_files"
+USER_FOLDER_FILTER_PARAM = "user_folders"
+
+
+def _quote_yql_string(val: str) -> str:
+    escaped = val.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
 def build_vespa_filters(
     filters: IndexFilters,
     *,
     include_hidden: bool = False,
     remove_trailing_and: bool = False,  # Set to True when using as a complete Vespa query
+    params: dict[str, str | int | float] | None = None,
 ) -> str:
+    """If `params` is given, the values of the set filters (ACL, document sets, user
+    files / folders) are added to it and only referenced from the returned YQL. Users in
+    many groups can have thousands of ACL entries, passing them as a parameter of a
+    single `in` operator keeps the YQL small and cheap for Vespa to parse."""
+
     def _build_or_filters(key: str, vals: list[str] | None) -> str:
         """For string-based 'contains' filters, e.g. WSET fields or array<string> fields."""
         if not key or not vals:
@@ -38,21 +57,27 @@ def build_vespa_filters(
         or_clause = " or ".join(eq_elems)
         return f"({or_clause}) and "
 
-    def _build_int_or_filters(key: str, vals: list[int] | None) -> str:
-        """
-        For an integer field filter.
-        If vals is not None, we want *only* docs whose key matches one of vals.
-        """
-        # If `vals` is None => skip the filter entirely
-        if vals is None or not vals:
+    def _build_in_filter(
+        key: str, vals: list[str] | list[int] | None, param_name: str
+    ) -> str:
+        """For set membership filters, matches if any value of `key` is in `vals`."""
+        if not vals:
             return ""
-
-        # Otherwise build the OR filter
-        eq_elems = [f"{key} = {val}" for val in vals]
-        or_clause = " or ".join(eq_elems)
-        result = f"({or_clause}) and "
-
-        return result
+        # de-duplicated and sorted, so that the same set always gives the same query
+        yql_vals = sorted(
+            {
+                _quote_yql_string(val) if isinstance(val, str) else str(val)
+                for val in vals
+                if val != ""
+            }
+        )
+        if not yql_vals:
+            return ""
+        vals_str = ",".join(yql_vals)
+        if params is None:
+            return f"({key} in ({vals_str})) and "
+        params[param_name] = vals_str
+        return f"({key} in (@{param_name})) and "
 
     def _build_time_filter(
         cutoff: datetime | None,
@@ -76,8 +101,8 @@ def build_vespa_filters(
 
     # ACL filters
     if filters.access_control_list is not None:
-        filter_str += _build_or_filters(
-            ACCESS_CONTROL_LIST, filters.access_control_list
+        filter_str += _build_in_filter(
+            ACCESS_CONTROL_LIST, filters.access_control_list, ACL_FILTER_PARAM
         )
 
     # Source type filters
@@ -96,12 +121,18 @@ def build_vespa_filters(
     filter_str += _build_or_filters(METADATA_LIST, tag_attributes)
 
     # Document sets
-    filter_str += _build_or_filters(DOCUMENT_SETS, filters.document_set)
+    filter_str += _build_in_filter(
+        DOCUMENT_SETS, filters.document_set, DOCUMENT_SETS_FILTER_PARAM
+    )
 
-    # New: user_file_ids as integer filters
-    filter_str += _build_int_or_filters(USER_FILE, filters.user_file_ids)
+    # User files / folders, integer fields
+    filter_str += _build_in_filter(
+        USER_FILE, filters.user_file_ids, USER_FILE_FILTER_PARAM
+    )
 
-    filter_str += _build_int_or_filters(USER_FOLDER, filters.user_folder_ids)
+    filter_str += _build_in_filter(
+        USER_FOLDER, filters.user_folder_ids, USER_FOLDER_FILTER_PARAM
+    )
 
     # Time filter
     filter_str += _build_time_filter(filters.time_cutoff)
@@ -22,13 +22,12 @@ import openpyxl  # type: ignore
 import pptx  # type: ignore
 from docx import Document as DocxDocument
 from fastapi import UploadFile
-from pypdf import PdfReader
 from pypdf.errors import PdfStreamError
-from .pdf.advanced_pdf_reader import AdvancedPDFReader
 
 from onyx.configs.constants import DANSWER_METADATA_FILENAME
 from onyx.configs.constants import FileOrigin
 from onyx.file_processing.html_utils import parse_html_page_basic
+from onyx.file_processing.pdf.advanced_pdf_reader import AdvancedPDFReader
 from onyx.file_processing.unstructured import get_unstructured_api_key
 from onyx.file_processing.unstructured import unstructured_to_text
 from onyx.file_store.file_store import FileStore
@@ -264,43 +263,32 @@ def read_pdf_file(
     """
     metadata: dict[str, Any] = {}
     extracted_images: list[tuple[bytes, str]] = []
-    
+
     try:
         # Create a temporary file to handle IO object
-        if not hasattr(file, 'name'):
+        if not hasattr(file, "name"):
             temp_file = io.BytesIO(file.read())
-            temp_file.name = 'temp.pdf'
+            temp_file.name = "temp.pdf"
             file = temp_file
-            
+
         pdf_reader = AdvancedPDFReader(file, pdf_pass=pdf_pass)
-        
+
         # Get metadata using AdvancedPDFReader's method
         metadata = pdf_reader.get_metadata()
-        
-        # Process all pages
-        results = pdf_reader.process_pdf()
+
+        # Process all pages, OCR'ing the ones without usable embedded text
         pages = []
-        
-        for result in results:
-            # Use merged text if available (from both native and OCR)
-            if result.get("merged_text"):
-                pages.append(result["merged_text"])
-            # Fallback to native text
-            elif result["native_text"]:
-                pages.append(result["native_text"])
-            # Last resort: OCR text
-            elif result["ocr_text"]:
-                pages.append(result["ocr_text"])
+        for page in pdf_reader.iter_pages():
             # If no text was extracted, append empty string to maintain page count
-            else:
-                pages.append("")
-                logger.warning(f"No text extracted from page {result['page_number'] + 1}")
-        
+            if not page.merged_text:
+                logger.warning(f"No text extracted from page {page.page_number + 1}")
+            pages.append(page.merged_text)
+
         text = TEXT_SECTION_SEPARATOR.join(pages)
-        
+
         if extract_images:
             extracted_images = pdf_reader.extract_images()
-    
+
         logger.info(f"Extracted file text for {file.name}: {text}")
 
         return text, metadata, extracted_images
@@ -309,7 +297,7 @@ def read_pdf_file(
         logger.exception("Invalid PDF file")
     except Exception:
         logger.exception("Failed to read PDF")
-    
+
     return "", metadata, extracted_images
 
 
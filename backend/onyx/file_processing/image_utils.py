@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 
 from onyx.configs.constants import FileOrigin
 from onyx.connectors.models import ImageSection
-from onyx.db.pg_file_store import save_bytes_to_pgfilestore
+from onyx.file_store.file_store import save_bytes_to_file_store
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -20,7 +20,7 @@ def store_image_and_create_section(
     file_origin: FileOrigin = FileOrigin.OTHER,
 ) -> Tuple[ImageSection, str | None]:
     """
-    Stores an image in PGFileStore and creates an ImageSection object without summarization.
+    Stores an image in the file store and creates an ImageSection object without summarization.
 
     Args:
         db_session: Database session
@@ -38,7 +38,7 @@ def store_image_and_create_section(
     # Storage logic
     stored_file_name = None
     try:
-        pgfilestore = save_bytes_to_pgfilestore(
+        pgfilestore = save_bytes_to_file_store(
             db_session=db_session,
             raw_bytes=image_data,
             media_type=media_type,
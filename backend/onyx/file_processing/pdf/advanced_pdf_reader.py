@@ -1,23 +1,77 @@
-import os
-from typing import List, Dict, Any, Tuple
-from pypdf import PdfReader, PdfWriter
-import pytesseract
-from pdf2image import convert_from_bytes
-from PIL import Image
 import io
+import os
+import tempfile
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import cast
 from typing import IO
-from onyx.utils.logger import setup_logger 
+
+import pytesseract  # type: ignore
+from pdf2image import convert_from_path  # type: ignore
+from PIL import Image
+from pydantic import BaseModel
+from pypdf import PdfReader
+
+from onyx.configs.app_configs import PDF_OCR_DPI
+from onyx.configs.app_configs import PDF_OCR_MAX_WORKERS
+from onyx.configs.app_configs import PDF_OCR_MIN_NATIVE_TEXT_CHARS
+from onyx.configs.app_configs import PDF_OCR_PAGES_PER_TASK
+from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
 
+# Below this share of alphanumeric characters (among the non-whitespace ones), the
+# embedded text is most likely garbage, e.g. from fonts without a unicode mapping
+_MIN_NATIVE_TEXT_ALNUM_RATIO = 0.5
+
+
+class PDFPageText(BaseModel):
+    page_number: int
+    native_text: str = ""
+    ocr_text: str = ""
+    merged_text: str = ""
+
+
+def needs_ocr(native_text: str, min_chars: int = PDF_OCR_MIN_NATIVE_TEXT_CHARS) -> bool:
+    """Whether the embedded text of a page is too sparse (e.g. a scanned page with
+    at most a header) or too garbled to be used on its own."""
+    num_alnum = sum(c.isalnum() for c in native_text)
+    if num_alnum < min_chars:
+        return True
+    num_visible = sum(not c.isspace() for c in native_text)
+    if num_visible == 0:
+        return True
+    return num_alnum / num_visible < _MIN_NATIVE_TEXT_ALNUM_RATIO
+
+
 class AdvancedPDFReader:
-    def __init__(self, pdf_file: IO[Any], pdf_pass: str = None):
-        """Initialize the PDF reader with a file path."""
+    """
+    Extracts the embedded text of every page and OCRs the pages where it is missing or
+    unusable. Consecutive pages that need OCR are rasterized straight from the original
+    file, a few pages per pdftoppm call, and OCR'd in the background by up to
+    `max_workers` threads (the rasterization and OCR run in pdftoppm / tesseract
+    subprocesses, so the threads only wait on them) while the next pages are read.
+    """
+
+    def __init__(
+        self,
+        pdf_file: IO[Any],
+        pdf_pass: str | None = None,
+        max_workers: int = PDF_OCR_MAX_WORKERS,
+        pages_per_task: int = PDF_OCR_PAGES_PER_TASK,
+    ):
         if not pdf_file:
             raise ValueError("AdvancedPDFReader requires a valid PDF file")
-        self.pdf_file = pdf_file
-        self.reader = PdfReader(pdf_file)
-        
+        pdf_file.seek(0)
+        self.pdf_bytes = pdf_file.read()
+        self.pdf_pass = pdf_pass
+        self.max_workers = max(1, max_workers)
+        self.pages_per_task = max(1, pages_per_task)
+        self.reader = PdfReader(io.BytesIO(self.pdf_bytes))
+
         # Handle encrypted PDFs
         if self.reader.is_encrypted:
             if pdf_pass is not None:
@@ -29,8 +83,8 @@ class AdvancedPDFReader:
                     raise ValueError(f"Error decrypting PDF: {str(e)}")
             else:
                 raise ValueError("PDF is encrypted but no password was provided")
-        
-    def get_metadata(self) -> Dict[str, str]:
+
+    def get_metadata(self) -> dict[str, str]:
         """Extract metadata from the PDF."""
         metadata = {}
         if self.reader.metadata is not None:
@@ -51,14 +105,16 @@ class AdvancedPDFReader:
             text = page.extract_text()
             return text.strip()
         except Exception as e:
-            logger.error(f"Error extracting native text from page {page_number}: {str(e)}")
+            logger.error(
+                f"Error extracting native text from page {page_number}: {str(e)}"
+            )
             return ""
 
     def extract_text_from_image(self, image: Image.Image) -> str:
         """Extract text from an image using OCR."""
         try:
             # Configure tesseract to focus on detecting text in tables
-            custom_config = r'--oem 3 --psm 6'
+            custom_config = r"--oem 3 --psm 6"
             text = pytesseract.image_to_string(image, config=custom_config)
             return text.strip()
         except Exception as e:
@@ -71,70 +127,154 @@ class AdvancedPDFReader:
             return text2
         if not text2:
             return text1
-            
+
         # Split into words/segments for comparison
         segments1 = set(text1.split())
         segments2 = set(text2.split())
-        
+
         # Combine unique segments
         all_segments = segments1.union(segments2)
-        return ' '.join(sorted(all_segments))
+        return " ".join(sorted(all_segments))
 
-    def process_page(self, page_number: int) -> Dict[str, Any]:
-        """Process a single page using all available methods."""
-        result = {
-            "native_text": "",
-            "ocr_text": "",
-            "merged_text": "",
-            "page_number": page_number
-        }
+    def _ocr_page_range(
+        self, pdf_path: str, first_page_number: int, last_page_number: int
+    ) -> list[str]:
+        """Rasterizes the (0-indexed, inclusive) page range with a single pdftoppm
+        call and OCRs the pages one at a time, so at most one page image is held in
+        memory."""
+        with tempfile.TemporaryDirectory() as output_folder:
+            # with paths_only, pdf2image returns the paths of the rendered images
+            image_paths = cast(
+                list[str],
+                convert_from_path(
+                    pdf_path,
+                    first_page=first_page_number + 1,
+                    last_page=last_page_number + 1,
+                    dpi=PDF_OCR_DPI,
+                    grayscale=True,
+                    userpw=self.pdf_pass,  # type: ignore[arg-type]
+                    output_folder=output_folder,
+                    paths_only=True,
+                ),
+            )
+            ocr_texts = []
+            for image_path in image_paths:
+                with Image.open(image_path) as image:
+                    ocr_texts.append(self.extract_text_from_image(image))
+            return ocr_texts
 
-        # Always extract native text
-        result["native_text"] = self.extract_native_text(page_number)
+    def _submit_ocr(
+        self,
+        executor: ThreadPoolExecutor,
+        pdf_path: str,
+        pages: list[PDFPageText],
+    ) -> Future[list[str]]:
+        # the renderer needs a file, only write it out once some page needs OCR
+        if not os.path.exists(pdf_path):
+            with open(pdf_path, "wb") as f:
+                f.write(self.pdf_bytes)
+        return executor.submit(
+            self._ocr_page_range,
+            pdf_path,
+            pages[0].page_number,
+            pages[-1].page_number,
+        )
 
-        # Always perform OCR
-        try:
-            pdf_bytes = io.BytesIO()
-            pdf_writer = PdfWriter()
-            
-            # Add all pages from the reader to the writer
-            for page in self.reader.pages:
-                pdf_writer.add_page(page)
-            
-            # Write to BytesIO object
-            pdf_writer.write(pdf_bytes)
-            pdf_bytes.seek(0)
-
-            # Convert PDF page to image with higher DPI for better OCR
-            images = convert_from_bytes(
-                pdf_bytes.getvalue(),
-                first_page=page_number + 1,
-                last_page=page_number + 1,
-                dpi=300,  # Higher DPI for better OCR accuracy
-                grayscale=True
-            )
-            if images:
-                result["ocr_text"] = "".join(self.extract_text_from_image(image) for image in images)
-        except Exception as e:
-            logger.error(f"Error converting page {page_number} to image: {str(e)}")
-        
-        # Merge the texts intelligently
-        result["merged_text"] = self.merge_texts(result["native_text"], result["ocr_text"])
-        
-        return result
-
-    def process_pdf(self) -> List[Dict[str, Any]]:
+    def _finish_pages(
+        self, pages: list[PDFPageText], ocr_future: Future[list[str]] | None
+    ) -> list[PDFPageText]:
+        if ocr_future is not None:
+            try:
+                ocr_texts = ocr_future.result()
+            except Exception as e:
+                logger.error(
+                    f"Error converting pages {pages[0].page_number}-"
+                    f"{pages[-1].page_number} to images: {str(e)}"
+                )
+                ocr_texts = []
+            for page, ocr_text in zip(pages, ocr_texts):
+                page.ocr_text = ocr_text
+
+        for page in pages:
+            page.merged_text = self.merge_texts(page.native_text, page.ocr_text)
+        return pages
+
+    def iter_pages(self) -> Iterator[PDFPageText]:
+        """Yields the processed pages in order, each one as soon as it (and all the
+        pages before it) are done."""
+        # batches of consecutive pages in page order, with the pending OCR of the
+        # batch if it needs one
+        batches: deque[tuple[list[PDFPageText], Future[list[str]] | None]] = deque()
+        ocr_batch: list[PDFPageText] = []
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "document.pdf")
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            try:
+                for page_number in range(len(self.reader.pages)):
+                    page = PDFPageText(
+                        page_number=page_number,
+                        native_text=self.extract_native_text(page_number),
+                    )
+                    if needs_ocr(page.native_text):
+                        ocr_batch.append(page)
+                        if len(ocr_batch) >= self.pages_per_task:
+                            batches.append(
+                                (
+                                    ocr_batch,
+                                    self._submit_ocr(executor, pdf_path, ocr_batch),
+                                )
+                            )
+                            ocr_batch = []
+                    else:
+                        if ocr_batch:
+                            batches.append(
+                                (
+                                    ocr_batch,
+                                    self._submit_ocr(executor, pdf_path, ocr_batch),
+                                )
+                            )
+                            ocr_batch = []
+                        batches.append(([page], None))
+
+                    while batches and (batches[0][1] is None or batches[0][1].done()):
+                        yield from self._finish_pages(*batches.popleft())
+
+                if ocr_batch:
+                    batches.append(
+                        (ocr_batch, self._submit_ocr(executor, pdf_path, ocr_batch))
+                    )
+                while batches:
+                    yield from self._finish_pages(*batches.popleft())
+            finally:
+                # don't keep OCR'ing if the caller stopped early
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def process_page(self, page_number: int) -> PDFPageText:
+        """Process a single page, OCR'ing it only if its native text is not enough."""
+        page = PDFPageText(
+            page_number=page_number,
+            native_text=self.extract_native_text(page_number),
+        )
+        if not needs_ocr(page.native_text):
+            return self._finish_pages([page], None)[0]
+
+        with (
+            tempfile.TemporaryDirectory() as tmp_dir,
+            ThreadPoolExecutor(max_workers=1) as executor,
+        ):
+            pdf_path = os.path.join(tmp_dir, "document.pdf")
+            ocr_future = self._submit_ocr(executor, pdf_path, [page])
+            return self._finish_pages([page], ocr_future)[0]
+
+    def process_pdf(self) -> list[PDFPageText]:
         """Process all pages in the PDF."""
-        results = []
-        for page_number in range(len(self.reader.pages)):
-            result = self.process_page(page_number)
-            results.append(result)
-        return results
+        return list(self.iter_pages())
 
     def get_complete_text(self) -> str:
         """Get all text from the PDF combining all methods."""
         all_text = []
-        
+
         # Add metadata section at the start
         metadata = self.get_metadata()
         if metadata:
@@ -142,36 +282,33 @@ class AdvancedPDFReader:
             for key, value in metadata.items():
                 all_text.append(f"{key}: {value}")
             all_text.append("=" * 30 + "\n")
-        
-        # Process all pages
-        results = self.process_pdf()
 
-        for result in results:
+        for page in self.iter_pages():
             page_text = []
-            
+
             # Add native text if available
-            if result["native_text"]:
-                page_text.append(result["native_text"])
-            
+            if page.native_text:
+                page_text.append(page.native_text)
+
             # Add OCR text if available and different from native text
-            if result["ocr_text"] and result["ocr_text"] != result["native_text"]:
-                page_text.append(result["ocr_text"])
-            
+            if page.ocr_text and page.ocr_text != page.native_text:
+                page_text.append(page.ocr_text)
+
             # Combine all text from this page
             if page_text:
-                all_text.append(f"\n--- Page {result['page_number'] + 1} ---\n")
+                all_text.append(f"\n--- Page {page.page_number + 1} ---\n")
                 all_text.extend(page_text)
-        
+
         return "\n".join(all_text)
 
-    def extract_images(self) -> List[Tuple[bytes, str]]:
+    def extract_images(self) -> list[tuple[bytes, str]]:
         """Extract all images from the PDF file.
-        
+
         Returns:
             List of tuples containing (image_bytes, image_name)
         """
-        extracted_images: List[Tuple[bytes, str]] = []
-        
+        extracted_images: list[tuple[bytes, str]] = []
+
         try:
             for page_num, page in enumerate(self.reader.pages):
                 for image_file_object in page.images:
@@ -187,14 +324,12 @@ class AdvancedPDFReader:
                         )
                         extracted_images.append((img_bytes, image_name))
                     except Exception as e:
-                        logger.error(f"Failed to extract image from page {page_num + 1}: {str(e)}")
+                        logger.error(
+                            f"Failed to extract image from page {page_num + 1}: {str(e)}"
+                        )
                         continue
-                        
+
         except Exception as e:
             logger.error(f"Failed to extract images from PDF: {str(e)}")
-            
-        return extracted_images
 
-if __name__ == "__main__":
-    reader = AdvancedPDFReader(open("image_financial_statement.pdf", "rb"))
-    print(reader.get_complete_text())
\ No newline at end of file
+        return extracted_images
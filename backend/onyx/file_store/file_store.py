@@ -1,20 +1,37 @@
+import hashlib
+import tempfile
 from abc import ABC
 from abc import abstractmethod
+from io import BytesIO
 from typing import cast
 from typing import IO
 
 import puremagic
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
+from onyx.configs.app_configs import FILE_STORE_BACKEND
 from onyx.configs.constants import FileOrigin
+from onyx.db.engine import get_session_with_tenant
 from onyx.db.models import PGFileStore
+from onyx.db.pg_file_store import count_pgfilestores_by_object_key
 from onyx.db.pg_file_store import create_populate_lobj
 from onyx.db.pg_file_store import delete_lobj_by_id
 from onyx.db.pg_file_store import delete_pgfilestore_by_file_name
 from onyx.db.pg_file_store import get_pgfilestore_by_file_name
+from onyx.db.pg_file_store import lock_object_key__no_commit
+from onyx.db.pg_file_store import open_lobj_reader
 from onyx.db.pg_file_store import read_lobj
 from onyx.db.pg_file_store import upsert_pgfilestore
+from onyx.file_store.constants import MAX_IN_MEMORY_SIZE
+from onyx.file_store.constants import STANDARD_CHUNK_SIZE
+from onyx.file_store.object_store import get_object_store
+from onyx.file_store.object_store import ObjectStore
 from onyx.utils.file import FileWithMimeType
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
 
 
 class FileStore(ABC):
@@ -65,12 +82,32 @@ class FileStore(ABC):
             Contents of the file and metadata dict
         """
 
+    @abstractmethod
+    def open_file_reader(self, file_name: str) -> IO[bytes]:
+        """
+        Open a seekable binary reader over the file that reads it lazily, in chunks,
+        rather than loading it in memory.
+
+        The reader is only usable while the db session of the store is open (and
+        no commit happened), it should be closed after use.
+
+        Parameters:
+        - file_name: Name of file to read
+        """
+
     @abstractmethod
     def read_file_record(self, file_name: str) -> PGFileStore:
         """
         Read the file record by the name
         """
 
+    def get_file_path(self, file_name: str) -> str | None:
+        """
+        Path of the file on the local filesystem, if the store keeps it there, so that
+        it can be served from disk without reading it in python (e.g. with sendfile).
+        """
+        return None
+
     @abstractmethod
     def delete_file(self, file_name: str) -> None:
         """
@@ -85,6 +122,15 @@ class PostgresBackedFileStore(FileStore):
     def __init__(self, db_session: Session):
         self.db_session = db_session
 
+    @staticmethod
+    def _get_lobj_oid(file_record: PGFileStore) -> int:
+        if file_record.lobj_oid is None:
+            raise RuntimeError(
+                f"File {file_record.file_name} is not stored in postgres, "
+                "it was saved with another FILE_STORE_BACKEND"
+            )
+        return file_record.lobj_oid
+
     def save_file(
         self,
         file_name: str,
@@ -121,12 +167,20 @@ class PostgresBackedFileStore(FileStore):
             file_name=file_name, db_session=self.db_session
         )
         return read_lobj(
-            lobj_oid=file_record.lobj_oid,
+            lobj_oid=self._get_lobj_oid(file_record),
             db_session=self.db_session,
             mode=mode,
             use_tempfile=use_tempfile,
         )
 
+    def open_file_reader(self, file_name: str) -> IO[bytes]:
+        file_record = get_pgfilestore_by_file_name(
+            file_name=file_name, db_session=self.db_session
+        )
+        return open_lobj_reader(
+            self._get_lobj_oid(file_record), db_session=self.db_session
+        )
+
     def read_file_record(self, file_name: str) -> PGFileStore:
         file_record = get_pgfilestore_by_file_name(
             file_name=file_name, db_session=self.db_session
@@ -139,7 +193,9 @@ class PostgresBackedFileStore(FileStore):
             file_record = get_pgfilestore_by_file_name(
                 file_name=file_name, db_session=self.db_session
             )
-            delete_lobj_by_id(file_record.lobj_oid, db_session=self.db_session)
+            delete_lobj_by_id(
+                self._get_lobj_oid(file_record), db_session=self.db_session
+            )
             delete_pgfilestore_by_file_name(
                 file_name=file_name, db_session=self.db_session
             )
@@ -161,6 +217,231 @@ class PostgresBackedFileStore(FileStore):
             return None
 
 
+class ObjectBackedFileStore(PostgresBackedFileStore):
+    """
+    Keeps the contents of files in an object store (filesystem or S3 compatible) rather
+    than as postgres large objects. The file records stay in postgres.
+
+    Objects are addressed by the sha256 of their content (per tenant), so a file saved
+    several times or under several names is only stored once. An object is deleted
+    once the last file record referencing it is gone. Storing / referencing an object
+    and deleting it are serialized with a postgres advisory lock on its key.
+
+    Files saved before switching FILE_STORE_BACKEND keep being read from their large
+    object until they are moved by migrate_large_object (see the
+    check_for_file_store_migration task).
+    """
+
+    def __init__(self, db_session: Session, object_store: ObjectStore):
+        super().__init__(db_session)
+        self.object_store = object_store
+
+    @staticmethod
+    def get_object_key(sha256_hex: str) -> str:
+        return f"{get_current_tenant_id()}/sha256/{sha256_hex[:2]}/{sha256_hex}"
+
+    def _put_content(self, content: IO) -> str:
+        """Stores the content if no identical object exists yet, returns its key.
+
+        Locks the object key until the transaction ends, so that the object can't be
+        released (deleted) before the record referencing it is committed."""
+        hasher = hashlib.sha256()
+        # the key is only known once the whole content is read, so it is spooled
+        # (to disk past MAX_IN_MEMORY_SIZE) rather than read twice
+        with tempfile.SpooledTemporaryFile(max_size=MAX_IN_MEMORY_SIZE) as spooled:
+            while True:
+                chunk = content.read(STANDARD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                spooled.write(chunk)
+
+            object_key = self.get_object_key(hasher.hexdigest())
+            lock_object_key__no_commit(object_key, self.db_session)
+            if not self.object_store.exists(object_key):
+                spooled.seek(0)
+                self.object_store.put(object_key, cast(IO[bytes], spooled))
+
+        return object_key
+
+    def _release_object(self, object_key: str) -> None:
+        """Deletes the object if no file record references it anymore. Must be called
+        after the change that dropped the reference is committed."""
+        try:
+            # a concurrent save of the same content waits until the object is gone,
+            # then stores it again
+            lock_object_key__no_commit(object_key, self.db_session)
+            if count_pgfilestores_by_object_key(object_key, self.db_session) == 0:
+                self.object_store.delete(object_key)
+            # releases the lock
+            self.db_session.commit()
+        except Exception:
+            self.db_session.rollback()
+            raise
+
+    def _release_object_after_commit(self, object_key: str) -> None:
+        """For changes committed by the caller: releases the object once the session
+        commits. The session can't be used from its after_commit hook, so this
+        happens in a session of its own. If the change is rolled back instead, the
+        object is still referenced and the release does nothing."""
+        tenant_id = get_current_tenant_id()
+        object_store = self.object_store
+
+        def _release(_: Session) -> None:
+            try:
+                with get_session_with_tenant(tenant_id=tenant_id) as db_session:
+                    ObjectBackedFileStore(db_session, object_store)._release_object(
+                        object_key
+                    )
+            except Exception:
+                # the commit itself went through, don't fail it
+                logger.exception(f"Failed to release object {object_key}")
+
+        event.listen(self.db_session, "after_commit", _release, once=True)
+
+    def save_file(
+        self,
+        file_name: str,
+        content: IO,
+        display_name: str | None,
+        file_origin: FileOrigin,
+        file_type: str,
+        file_metadata: dict | None = None,
+        commit: bool = True,
+    ) -> None:
+        try:
+            object_key = self._put_content(content)
+
+            existing_record = (
+                self.db_session.query(PGFileStore)
+                .filter_by(file_name=file_name)
+                .first()
+            )
+            previous_object_key = (
+                existing_record.object_key if existing_record else None
+            )
+
+            upsert_pgfilestore(
+                file_name=file_name,
+                display_name=display_name or file_name,
+                file_origin=file_origin,
+                file_type=file_type,
+                lobj_oid=None,
+                object_key=object_key,
+                db_session=self.db_session,
+                file_metadata=file_metadata,
+            )
+            if commit:
+                self.db_session.commit()
+
+            if previous_object_key and previous_object_key != object_key:
+                if commit:
+                    self._release_object(previous_object_key)
+                else:
+                    self._release_object_after_commit(previous_object_key)
+        except Exception:
+            self.db_session.rollback()
+            raise
+
+    def read_file(
+        self, file_name: str, mode: str | None = None, use_tempfile: bool = False
+    ) -> IO:
+        file_record = get_pgfilestore_by_file_name(
+            file_name=file_name, db_session=self.db_session
+        )
+        if file_record.object_key is None:
+            return super().read_file(file_name, mode=mode, use_tempfile=use_tempfile)
+
+        # object store readers are lazy and don't depend on the db session
+        return self.object_store.open(file_record.object_key)
+
+    def open_file_reader(self, file_name: str) -> IO[bytes]:
+        file_record = get_pgfilestore_by_file_name(
+            file_name=file_name, db_session=self.db_session
+        )
+        if file_record.object_key is None:
+            return super().open_file_reader(file_name)
+
+        return self.object_store.open(file_record.object_key)
+
+    def get_file_path(self, file_name: str) -> str | None:
+        file_record = get_pgfilestore_by_file_name(
+            file_name=file_name, db_session=self.db_session
+        )
+        if file_record.object_key is None:
+            return None
+
+        return self.object_store.get_local_path(file_record.object_key)
+
+    def delete_file(self, file_name: str) -> None:
+        try:
+            file_record = get_pgfilestore_by_file_name(
+                file_name=file_name, db_session=self.db_session
+            )
+            object_key = file_record.object_key
+            if file_record.lobj_oid is not None:
+                delete_lobj_by_id(file_record.lobj_oid, db_session=self.db_session)
+            delete_pgfilestore_by_file_name(
+                file_name=file_name, db_session=self.db_session
+            )
+            self.db_session.commit()
+        except Exception:
+            self.db_session.rollback()
+            raise
+
+        if object_key:
+            self._release_object(object_key)
+
+    def migrate_large_object(self, file_name: str) -> bool:
+        """Moves the contents of a file from its postgres large object to the object
+        store. Returns False if there was nothing to move."""
+        try:
+            file_record = get_pgfilestore_by_file_name(
+                file_name=file_name, db_session=self.db_session
+            )
+            lobj_oid = file_record.lobj_oid
+            if lobj_oid is None:
+                return False
+
+            with open_lobj_reader(lobj_oid, db_session=self.db_session) as reader:
+                object_key = self._put_content(reader)
+
+            file_record.object_key = object_key
+            file_record.lobj_oid = None
+            delete_lobj_by_id(lobj_oid, db_session=self.db_session)
+            self.db_session.commit()
+        except Exception:
+            self.db_session.rollback()
+            raise
+
+        return True
+
+
 def get_default_file_store(db_session: Session) -> FileStore:
-    # The only supported file store now is the Postgres File Store
-    return PostgresBackedFileStore(db_session=db_session)
+    if FILE_STORE_BACKEND == "postgres":
+        return PostgresBackedFileStore(db_session=db_session)
+
+    return ObjectBackedFileStore(db_session=db_session, object_store=get_object_store())
+
+
+def save_bytes_to_file_store(
+    db_session: Session,
+    raw_bytes: bytes,
+    media_type: str,
+    identifier: str,
+    display_name: str,
+    file_origin: FileOrigin = FileOrigin.OTHER,
+) -> PGFileStore:
+    """
+    Saves raw bytes to the default file store and returns the resulting record.
+    """
+    file_name = f"{file_origin.name.lower()}_{identifier}"
+    file_store = get_default_file_store(db_session)
+    file_store.save_file(
+        file_name=file_name,
+        content=BytesIO(raw_bytes),
+        display_name=display_name,
+        file_origin=file_origin,
+        file_type=media_type,
+    )
+    return file_store.read_file_record(file_name)
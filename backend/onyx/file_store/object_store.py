@@ -0,0 +1,228 @@
+"""
+Object stores keep the contents of the file store when FILE_STORE_BACKEND isn't
+"postgres" (see ObjectBackedFileStore). Objects are written once and never modified,
+they are addressed by the sha256 of their content.
+"""
+
+import io
+import os
+import shutil
+import tempfile
+from abc import ABC
+from abc import abstractmethod
+from functools import lru_cache
+from typing import Any
+from typing import IO
+
+import boto3  # type: ignore
+from boto3.s3.transfer import TransferConfig  # type: ignore
+from botocore.client import Config  # type: ignore
+from botocore.exceptions import ClientError
+
+from onyx.configs.app_configs import FILE_STORE_BACKEND
+from onyx.configs.app_configs import FILE_STORE_PATH
+from onyx.configs.app_configs import FILE_STORE_S3_ACCESS_KEY_ID
+from onyx.configs.app_configs import FILE_STORE_S3_BUCKET
+from onyx.configs.app_configs import FILE_STORE_S3_ENDPOINT_URL
+from onyx.configs.app_configs import FILE_STORE_S3_PREFIX
+from onyx.configs.app_configs import FILE_STORE_S3_REGION
+from onyx.configs.app_configs import FILE_STORE_S3_SECRET_ACCESS_KEY
+from onyx.file_store.constants import STANDARD_CHUNK_SIZE
+
+
+class ObjectStore(ABC):
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def put(self, key: str, content: IO[bytes]) -> None:
+        """Streams `content`, from its current position, into the object `key`.
+        Readers never see a partially written object."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def open(self, key: str) -> IO[bytes]:
+        """Opens a seekable reader over the object that reads it lazily.
+        Raises FileNotFoundError if the object doesn't exist."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Deletes the object, if it exists."""
+        raise NotImplementedError
+
+    def get_local_path(self, key: str) -> str | None:
+        """Path of the object on the local filesystem if it is stored there, so that
+        it can be served straight from disk (e.g. with sendfile)."""
+        return None
+
+
+class FilesystemObjectStore(ObjectStore):
+    """Objects as files under `root`, which should be a volume shared by all api
+    servers and background workers."""
+
+    def __init__(self, root: str) -> None:
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid object key: {key}")
+        return path
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put(self, key: str, content: IO[bytes]) -> None:
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # written next to the final path, then renamed into place atomically
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as temp_file:
+            try:
+                shutil.copyfileobj(content, temp_file, STANDARD_CHUNK_SIZE)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            except Exception:
+                os.remove(temp_file.name)
+                raise
+
+        os.replace(temp_file.name, path)
+
+    def open(self, key: str) -> IO[bytes]:
+        return open(self._path(key), "rb")
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def get_local_path(self, key: str) -> str | None:
+        return self._path(key)
+
+
+class _S3ObjectReader(io.RawIOBase):
+    """Reads an S3 object with ranged GETs as the caller asks for data."""
+
+    def __init__(self, client: Any, bucket: str, key: str, size: int) -> None:
+        super().__init__()
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._size = size
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def _get_range(self, end: int) -> bytes:
+        # end is exclusive, the Range header inclusive
+        response = self._client.get_object(
+            Bucket=self._bucket,
+            Key=self._key,
+            Range=f"bytes={self._position}-{end - 1}",
+        )
+        data = response["Body"].read()
+        self._position += len(data)
+        return data
+
+    def readinto(self, buffer: Any) -> int:
+        if self._position >= self._size:
+            return 0
+
+        data = self._get_range(min(self._position + len(buffer), self._size))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def readall(self) -> bytes:
+        if self._position >= self._size:
+            return b""
+        return self._get_range(self._size)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._position = offset
+        elif whence == io.SEEK_CUR:
+            self._position += offset
+        elif whence == io.SEEK_END:
+            self._position = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+
+class S3ObjectStore(ObjectStore):
+    """Objects in an S3 compatible bucket (AWS S3, MinIO, R2, ...)."""
+
+    def __init__(self, bucket: str, prefix: str = "", client: Any = None) -> None:
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = client or boto3.client(
+            "s3",
+            endpoint_url=FILE_STORE_S3_ENDPOINT_URL,
+            region_name=FILE_STORE_S3_REGION,
+            aws_access_key_id=FILE_STORE_S3_ACCESS_KEY_ID,
+            aws_secret_access_key=FILE_STORE_S3_SECRET_ACCESS_KEY,
+            config=Config(signature_version="s3v4"),
+        )
+        # files larger than a chunk are uploaded in parts, a chunk at a time
+        self.transfer_config = TransferConfig(
+            multipart_threshold=STANDARD_CHUNK_SIZE,
+            multipart_chunksize=STANDARD_CHUNK_SIZE,
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _head(self, key: str) -> Any:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                return None
+            raise
+
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def put(self, key: str, content: IO[bytes]) -> None:
+        self.client.upload_fileobj(
+            content, self.bucket, self._key(key), Config=self.transfer_config
+        )
+
+    def open(self, key: str) -> IO[bytes]:
+        head = self._head(key)
+        if head is None:
+            raise FileNotFoundError(f"Object {self._key(key)} not found")
+
+        return io.BufferedReader(
+            _S3ObjectReader(
+                self.client, self.bucket, self._key(key), head["ContentLength"]
+            ),
+            buffer_size=STANDARD_CHUNK_SIZE,
+        )
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+
+@lru_cache(maxsize=1)
+def get_object_store() -> ObjectStore:
+    if FILE_STORE_BACKEND == "filesystem":
+        return FilesystemObjectStore(FILE_STORE_PATH)
+
+    if FILE_STORE_BACKEND == "s3":
+        if not FILE_STORE_S3_BUCKET:
+            raise ValueError("FILE_STORE_S3_BUCKET must be set for the s3 file store")
+        return S3ObjectStore(FILE_STORE_S3_BUCKET, prefix=FILE_STORE_S3_PREFIX)
+
+    raise ValueError(f"No object store for FILE_STORE_BACKEND={FILE_STORE_BACKEND}")
@@ -5,6 +5,7 @@ from typing import cast
 from uuid import uuid4
 
 import requests
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from onyx.configs.constants import FileOrigin
@@ -115,47 +116,73 @@ def load_user_file(file_id: int, db_session: Session) -> InMemoryChatFile:
     if not user_file:
         raise ValueError(f"User file with id {file_id} not found")
 
+    return _load_user_file_content(
+        user_file.id, user_file.file_id, user_file.name, db_session
+    )
+
+
+def _load_user_file_content(
+    user_file_id: int, file_id: str, file_name: str, db_session: Session
+) -> InMemoryChatFile:
     # Try to load plaintext version first
     file_store = get_default_file_store(db_session)
-    plaintext_file_name = user_file_id_to_plaintext_file_name(file_id)
+    plaintext_file_name = user_file_id_to_plaintext_file_name(user_file_id)
 
     try:
         file_io = file_store.read_file(plaintext_file_name, mode="b")
         return InMemoryChatFile(
-            file_id=str(user_file.file_id),
+            file_id=str(file_id),
             content=file_io.read(),
             file_type=ChatFileType.USER_KNOWLEDGE,
-            filename=user_file.name,
+            filename=file_name,
         )
     except Exception as e:
         logger.warning(
             f"Failed to load plaintext file {plaintext_file_name}, defaulting to original file: {e}"
         )
         # Fall back to original file if plaintext not available
-        file_io = file_store.read_file(user_file.file_id, mode="b")
+        file_io = file_store.read_file(file_id, mode="b")
         return InMemoryChatFile(
-            file_id=str(user_file.file_id),
+            file_id=str(file_id),
             content=file_io.read(),
             file_type=ChatFileType.USER_KNOWLEDGE,
-            filename=user_file.name,
+            filename=file_name,
         )
 
 
+def _load_user_file_content_in_new_session(
+    user_file_id: int, file_id: str, file_name: str
+) -> InMemoryChatFile:
+    """NOTE: using a session per call, since this is called using multithreading
+    (see save_file_from_url)."""
+    with get_session_with_current_tenant() as db_session:
+        return _load_user_file_content(user_file_id, file_id, file_name, db_session)
+
+
+def load_user_files_content(user_files: list[UserFile]) -> list[InMemoryChatFile]:
+    """Reads the contents of already loaded user files in parallel. The rows are
+    not touched from the worker threads, each read uses a session of its own."""
+    return cast(
+        list[InMemoryChatFile],
+        run_functions_tuples_in_parallel(
+            [
+                (
+                    _load_user_file_content_in_new_session,
+                    (user_file.id, user_file.file_id, user_file.name),
+                )
+                for user_file in user_files
+            ]
+        ),
+    )
+
+
 def load_all_user_files(
     user_file_ids: list[int],
     user_folder_ids: list[int],
     db_session: Session,
 ) -> list[InMemoryChatFile]:
-    return cast(
-        list[InMemoryChatFile],
-        run_functions_tuples_in_parallel(
-            [(load_user_file, (file_id, db_session)) for file_id in user_file_ids]
-        )
-        + [
-            file
-            for folder_id in user_folder_ids
-            for file in load_user_folder(folder_id, db_session)
-        ],
+    return load_user_files_content(
+        load_all_user_file_files(user_file_ids, user_folder_ids, db_session)
     )
 
 
@@ -164,19 +191,28 @@ def load_all_user_file_files(
     user_folder_ids: list[int],
     db_session: Session,
 ) -> list[UserFile]:
-    user_files: list[UserFile] = []
-    for user_file_id in user_file_ids:
-        user_file = (
-            db_session.query(UserFile).filter(UserFile.id == user_file_id).first()
-        )
-        if user_file is not None:
-            user_files.append(user_file)
-    for user_folder_id in user_folder_ids:
-        user_files.extend(
-            db_session.query(UserFile)
-            .filter(UserFile.folder_id == user_folder_id)
-            .all()
+    """The user files selected directly or through their folder, in a single query.
+    Files selected both ways are only returned once. Raises a ValueError if one of
+    user_file_ids doesn't exist."""
+    if not user_file_ids and not user_folder_ids:
+        return []
+
+    user_files = (
+        db_session.query(UserFile)
+        .filter(
+            or_(
+                UserFile.id.in_(user_file_ids),
+                UserFile.folder_id.in_(user_folder_ids),
+            )
         )
+        .order_by(UserFile.id)
+        .all()
+    )
+
+    missing_ids = set(user_file_ids) - {user_file.id for user_file in user_files}
+    if missing_ids:
+        raise ValueError(f"User files with ids {sorted(missing_ids)} not found")
+
     return user_files
 
 
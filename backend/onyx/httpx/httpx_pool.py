@@ -1,7 +1,34 @@
 import threading
+from collections.abc import Iterator
 from typing import Any
 
 import httpx
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from prometheus_client.registry import REGISTRY
+from pydantic import BaseModel
+
+
+class HttpxPoolStats(BaseModel):
+    name: str
+    num_connections: int
+    num_idle_connections: int
+    # requests waiting for a connection to free up
+    num_waiters: int
+
+
+def _get_pool_stats(name: str, client: httpx.Client) -> HttpxPoolStats:
+    # httpx does not expose its connection pool, reach into httpcore's. Best effort,
+    # anything unexpected (e.g. a mocked transport) reports an empty pool
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    requests = list(getattr(pool, "_requests", []))
+    return HttpxPoolStats(
+        name=name,
+        num_connections=len(connections),
+        num_idle_connections=sum(1 for conn in connections if conn.is_idle()),
+        num_waiters=sum(1 for request in requests if request.is_queued()),
+    )
 
 
 class HttpxPool:
@@ -23,6 +50,9 @@ class HttpxPool:
     def _init_client(cls, **kwargs: Any) -> httpx.Client:
         """Private helper method to create and return an httpx.Client."""
         merged_kwargs = {**cls.DEFAULT_KWARGS, **kwargs}
+        # the default limits are a factory, so that clients don't share an instance
+        if callable(merged_kwargs["limits"]):
+            merged_kwargs["limits"] = merged_kwargs["limits"]()
         return httpx.Client(**merged_kwargs)
 
     @classmethod
@@ -55,3 +85,50 @@ class HttpxPool:
             if name not in cls._clients:
                 cls._clients[name] = cls._init_client()
             return cls._clients[name]
+
+    @classmethod
+    def get_stats(cls) -> list[HttpxPoolStats]:
+        """Connection pool stats of all the registered clients."""
+        with cls._lock:
+            clients = list(cls._clients.items())
+        return [_get_pool_stats(name, client) for name, client in clients]
+
+
+class HttpxPoolCollector(Collector):
+    """Exposes the HttpxPool connection pool stats as prometheus gauges, computed
+    at scrape time."""
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        connections = GaugeMetricFamily(
+            "onyx_httpx_pool_connections",
+            "Open connections in the httpx client pool",
+            labels=["client", "state"],
+        )
+        waiters = GaugeMetricFamily(
+            "onyx_httpx_pool_waiters",
+            "Requests waiting for a connection in the httpx client pool",
+            labels=["client"],
+        )
+        for stats in HttpxPool.get_stats():
+            connections.add_metric(
+                [stats.name, "active"],
+                stats.num_connections - stats.num_idle_connections,
+            )
+            connections.add_metric([stats.name, "idle"], stats.num_idle_connections)
+            waiters.add_metric([stats.name], stats.num_waiters)
+
+        yield connections
+        yield waiters
+
+
+_collector_lock = threading.Lock()
+_collector_registered = False
+
+
+def register_httpx_pool_metrics() -> None:
+    """Registers the HttpxPool gauges with the default prometheus registry (once)."""
+    global _collector_registered
+    with _collector_lock:
+        if not _collector_registered:
+            REGISTRY.register(HttpxPoolCollector())
+            _collector_registered = True
@@ -0,0 +1,117 @@
+"""
+Reuse of the chunks of re-indexed documents which did not change.
+
+When a document is updated, usually only a small part of it changes, but all of its
+chunks used to be embedded and written to the document index again. Instead, every
+chunk written to the document index gets a content hash, covering everything that is
+embedded / written for it except for the document level fields which can be updated
+in place (access, document sets, boost, doc_updated_at, ...). The hashes of the
+chunks of a document are saved with the document (Document.chunk_hashes).
+
+The next time the document is indexed, the chunks with a known hash are not embedded
+again and only their document level fields are written (see
+IndexChunk.content_unchanged). The hash includes the position of the chunk in the
+document, since that is what identifies it in the document index, and the name of
+the index.
+"""
+
+import hashlib
+import json
+
+from onyx.indexing.models import ChunkEmbedding
+from onyx.indexing.models import DocAwareChunk
+from onyx.indexing.models import IndexChunk
+
+# bump when the hashed fields change, or when what is written to the document index
+# for a chunk changes, so that all the chunks are written again
+CHUNK_HASH_VERSION = 1
+
+
+def _chunk_key(chunk: DocAwareChunk) -> tuple[str, int, int | None]:
+    return chunk.source_document.id, chunk.chunk_id, chunk.large_chunk_id
+
+
+def get_chunk_hash(chunk: DocAwareChunk, index_name: str) -> str:
+    document = chunk.source_document
+    hashed_fields = [
+        CHUNK_HASH_VERSION,
+        index_name,
+        chunk.chunk_id,
+        chunk.large_chunk_id,
+        chunk.large_chunk_reference_ids,
+        chunk.blurb,
+        chunk.title_prefix,
+        chunk.doc_summary,
+        chunk.content,
+        chunk.chunk_context,
+        chunk.metadata_suffix_semantic,
+        chunk.metadata_suffix_keyword,
+        chunk.mini_chunk_texts,
+        chunk.source_links,
+        chunk.image_file_name,
+        chunk.section_continuation,
+        document.source,
+        document.semantic_identifier,
+        document.get_title_for_document_index(),
+        document.metadata,
+        [owner.model_dump() for owner in document.primary_owners or []],
+        [owner.model_dump() for owner in document.secondary_owners or []],
+        # a missing doc_updated_at can't be written in place
+        document.doc_updated_at is None,
+    ]
+    return hashlib.sha256(
+        json.dumps(hashed_fields, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def to_unchanged_index_chunk(chunk: DocAwareChunk) -> IndexChunk:
+    return IndexChunk(
+        **chunk.model_dump(),
+        embeddings=ChunkEmbedding(full_embedding=[], mini_chunk_embeddings=[]),
+        title_embedding=None,
+        content_unchanged=True,
+    )
+
+
+def split_unchanged_chunks(
+    chunks: list[DocAwareChunk],
+    doc_id_to_chunk_hashes: dict[str, list[str] | None],
+    index_name: str,
+) -> tuple[list[DocAwareChunk], list[IndexChunk]]:
+    """Splits the chunks into the ones that need to be embedded and the ones which are
+    already in the index with the same content."""
+    doc_id_to_known_hashes = {
+        doc_id: set(chunk_hashes)
+        for doc_id, chunk_hashes in doc_id_to_chunk_hashes.items()
+        if chunk_hashes
+    }
+
+    chunks_to_embed: list[DocAwareChunk] = []
+    unchanged_chunks: list[IndexChunk] = []
+    for chunk in chunks:
+        known_hashes = doc_id_to_known_hashes.get(chunk.source_document.id)
+        if known_hashes and get_chunk_hash(chunk, index_name) in known_hashes:
+            unchanged_chunks.append(to_unchanged_index_chunk(chunk))
+        else:
+            chunks_to_embed.append(chunk)
+
+    return chunks_to_embed, unchanged_chunks
+
+
+def merge_unchanged_chunks(
+    chunks: list[DocAwareChunk],
+    embedded_chunks: list[IndexChunk],
+    unchanged_chunks: list[IndexChunk],
+    failed_document_ids: set[str],
+) -> list[IndexChunk]:
+    """Puts the embedded and unchanged chunks back in the order of `chunks`. Documents
+    which failed to embed are dropped entirely, including their unchanged chunks."""
+    key_to_index_chunk = {
+        _chunk_key(chunk): chunk for chunk in embedded_chunks + unchanged_chunks
+    }
+    return [
+        key_to_index_chunk[_chunk_key(chunk)]
+        for chunk in chunks
+        if chunk.source_document.id not in failed_document_ids
+        and _chunk_key(chunk) in key_to_index_chunk
+    ]
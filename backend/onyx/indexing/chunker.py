@@ -16,6 +16,8 @@ from onyx.connectors.models import IndexingDocument
 from onyx.connectors.models import Section
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from onyx.indexing.models import DocAwareChunk
+from onyx.indexing.sentence_splitter import SentenceAwareSplitter
+from onyx.indexing.sentence_splitter import TokenCounter
 from onyx.llm.utils import MAX_CONTEXT_TOKENS
 from onyx.natural_language_processing.utils import BaseTokenizer
 from onyx.utils.logger import setup_logger
@@ -135,9 +137,6 @@ class Chunker:
         mini_chunk_size: int = MINI_CHUNK_SIZE,
         callback: IndexingHeartbeatInterface | None = None,
     ) -> None:
-        # importing llama_index uses a lot of RAM, so we only import it when needed.
-        from llama_index.core.node_parser import SentenceSplitter
-
         self.include_metadata = include_metadata
         self.chunk_token_limit = chunk_token_limit
         self.enable_multipass = enable_multipass
@@ -152,25 +151,33 @@ class Chunker:
         )
         self.tokenizer = tokenizer
         self.callback = callback
+        self.blurb_size = blurb_size
+        self.mini_chunk_size = mini_chunk_size
+
+        # constant for the lifetime of the chunker, no need to re-encode per section
+        self.section_separator_token_count = len(tokenizer.encode(SECTION_SEPARATOR))
 
         self.max_context = 0
         self.prompt_tokens = 0
 
-        self.blurb_splitter = SentenceSplitter(
-            tokenizer=tokenizer.tokenize,
+        # shared by all the splitters so that each piece of text is only tokenized once
+        self.token_counter = TokenCounter(tokenizer)
+
+        self.blurb_splitter = SentenceAwareSplitter(
+            token_counter=self.token_counter,
             chunk_size=blurb_size,
             chunk_overlap=0,
         )
 
-        self.chunk_splitter = SentenceSplitter(
-            tokenizer=tokenizer.tokenize,
+        self.chunk_splitter = SentenceAwareSplitter(
+            token_counter=self.token_counter,
             chunk_size=chunk_token_limit,
             chunk_overlap=chunk_overlap,
         )
 
         self.mini_chunk_splitter = (
-            SentenceSplitter(
-                tokenizer=tokenizer.tokenize,
+            SentenceAwareSplitter(
+                token_counter=self.token_counter,
                 chunk_size=mini_chunk_size,
                 chunk_overlap=0,
             )
@@ -195,20 +202,26 @@ class Chunker:
             start = end
         return chunks
 
-    def _extract_blurb(self, text: str) -> str:
+    def _extract_blurb(self, text: str, token_count: int | None = None) -> str:
         """
         Extract a short blurb from the text (first chunk of size `blurb_size`).
+        If the token count of the text is already known and fits in the blurb,
+        the splitter (which would re-tokenize the whole text) is skipped.
         """
-        texts = self.blurb_splitter.split_text(text)
-        if not texts:
-            return ""
-        return texts[0]
+        if token_count is not None and token_count <= self.blurb_size:
+            return text.strip()
+
+        return self.blurb_splitter.first_chunk(text)
 
-    def _get_mini_chunk_texts(self, chunk_text: str) -> list[str] | None:
+    def _get_mini_chunk_texts(
+        self, chunk_text: str, token_count: int | None = None
+    ) -> list[str] | None:
         """
         For "multipass" mode: additional sub-chunks (mini-chunks) for use in certain embeddings.
         """
         if self.mini_chunk_splitter and chunk_text.strip():
+            if token_count is not None and token_count <= self.mini_chunk_size:
+                return [chunk_text.strip()]
             return self.mini_chunk_splitter.split_text(chunk_text)
         return None
 
@@ -224,14 +237,16 @@ class Chunker:
         metadata_suffix_semantic: str = "",
         metadata_suffix_keyword: str = "",
         image_file_name: str | None = None,
+        token_count: int | None = None,
     ) -> None:
         """
         Helper to create a new DocAwareChunk, append it to chunks_list.
+        `token_count` is the number of tokens in `text`, if already known.
         """
         new_chunk = DocAwareChunk(
             source_document=document,
             chunk_id=len(chunks_list),
-            blurb=self._extract_blurb(text),
+            blurb=self._extract_blurb(text, token_count),
             content=text,
             source_links=links or {0: ""},
             image_file_name=image_file_name,
@@ -239,7 +254,7 @@ class Chunker:
             title_prefix=title_prefix,
             metadata_suffix_semantic=metadata_suffix_semantic,
             metadata_suffix_keyword=metadata_suffix_keyword,
-            mini_chunk_texts=self._get_mini_chunk_texts(text),
+            mini_chunk_texts=self._get_mini_chunk_texts(text, token_count),
             large_chunk_id=None,
             doc_summary="",
             chunk_context="",
@@ -263,6 +278,15 @@ class Chunker:
         chunks: list[DocAwareChunk] = []
         link_offsets: dict[int, str] = {}
         chunk_text = ""
+        # Running totals for `chunk_text`, so that it does not need to be re-tokenized
+        # (and re-cleaned) every time a section is added. The token count is the sum of
+        # the per-section counts plus the separators, which is at least the count of
+        # the concatenated text for the tokenizers we use (the separator is whitespace,
+        # so no tokens merge across it).
+        current_token_count = 0
+        # length of `shared_precompare_cleanup(chunk_text)`, which is additive since the
+        # cleanup only lowercases and drops characters and the separator is dropped entirely
+        current_offset = 0
 
         for section_idx, section in enumerate(sections):
             # Get section text and other attributes
@@ -291,9 +315,12 @@ class Chunker:
                         title_prefix=title_prefix,
                         metadata_suffix_semantic=metadata_suffix_semantic,
                         metadata_suffix_keyword=metadata_suffix_keyword,
+                        token_count=current_token_count,
                     )
                     chunk_text = ""
                     link_offsets = {}
+                    current_token_count = 0
+                    current_offset = 0
 
                 # Create a chunk specifically for this image section
                 # (Using the text summary that was generated during processing)
@@ -311,7 +338,8 @@ class Chunker:
                 continue
 
             # CASE 2: Normal text section
-            section_token_count = len(self.tokenizer.encode(section_text))
+            # NOTE: each section is tokenized exactly once, the splitters reuse the count
+            section_token_count = self.token_counter.count(section_text)
 
             # If the section is large on its own, split it separately
             if section_token_count > content_token_limit:
@@ -325,16 +353,26 @@ class Chunker:
                         title_prefix,
                         metadata_suffix_semantic,
                         metadata_suffix_keyword,
+                        token_count=current_token_count,
                     )
                     chunk_text = ""
                     link_offsets = {}
+                    current_token_count = 0
+                    current_offset = 0
 
-                split_texts = self.chunk_splitter.split_text(section_text)
+                split_texts = self.chunk_splitter.split_text(
+                    section_text, section_token_count
+                )
                 for i, split_text in enumerate(split_texts):
+                    split_token_count = (
+                        self.token_counter.count(split_text)
+                        if STRICT_CHUNK_TOKEN_LIMIT
+                        else None
+                    )
                     # If even the split_text is bigger than strict limit, further split
                     if (
-                        STRICT_CHUNK_TOKEN_LIMIT
-                        and len(self.tokenizer.encode(split_text)) > content_token_limit
+                        split_token_count is not None
+                        and split_token_count > content_token_limit
                     ):
                         smaller_chunks = self._split_oversized_chunk(
                             split_text, content_token_limit
@@ -360,21 +398,24 @@ class Chunker:
                             title_prefix=title_prefix,
                             metadata_suffix_semantic=metadata_suffix_semantic,
                             metadata_suffix_keyword=metadata_suffix_keyword,
+                            token_count=split_token_count,
                         )
                 continue
 
             # If we can still fit this section into the current chunk, do so
-            current_token_count = len(self.tokenizer.encode(chunk_text))
-            current_offset = len(shared_precompare_cleanup(chunk_text))
             next_section_tokens = (
-                len(self.tokenizer.encode(SECTION_SEPARATOR)) + section_token_count
+                self.section_separator_token_count + section_token_count
             )
+            section_offset = len(shared_precompare_cleanup(section_text))
 
             if next_section_tokens + current_token_count <= content_token_limit:
                 if chunk_text:
                     chunk_text += SECTION_SEPARATOR
+                    current_token_count += self.section_separator_token_count
                 chunk_text += section_text
                 link_offsets[current_offset] = section_link_text
+                current_token_count += section_token_count
+                current_offset += section_offset
             else:
                 # finalize the existing chunk
                 self._create_chunk(
@@ -386,10 +427,13 @@ class Chunker:
                     title_prefix,
                     metadata_suffix_semantic,
                     metadata_suffix_keyword,
+                    token_count=current_token_count,
                 )
                 # start a new chunk
                 link_offsets = {0: section_link_text}
                 chunk_text = section_text
+                current_token_count = section_token_count
+                current_offset = section_offset
 
         # finalize any leftover text chunk
         if chunk_text.strip() or not chunks:
@@ -402,6 +446,7 @@ class Chunker:
                 title_prefix,
                 metadata_suffix_semantic,
                 metadata_suffix_keyword,
+                token_count=current_token_count,
             )
         return chunks
 
@@ -412,6 +457,9 @@ class Chunker:
         if document.source == DocumentSource.GMAIL:
             logger.debug(f"Chunking {document.semantic_identifier}")
 
+        # token counts are only reused within a document
+        self.token_counter.reset()
+
         # Title prep
         title = self._extract_blurb(document.get_title_for_document_index() or "")
         title_prefix = title + RETURN_SEPARATOR if title else ""
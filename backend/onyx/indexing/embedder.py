@@ -6,6 +6,8 @@ from collections import defaultdict
 from onyx.connectors.models import ConnectorFailure
 from onyx.connectors.models import DocumentFailure
 from onyx.db.models import SearchSettings
+from onyx.indexing.embedding_cache import build_embedding_model_key
+from onyx.indexing.embedding_cache import IndexingEmbeddingCache
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from onyx.indexing.models import ChunkEmbedding
 from onyx.indexing.models import DocAwareChunk
@@ -17,6 +19,7 @@ from shared_configs.configs import INDEXING_MODEL_SERVER_HOST
 from shared_configs.configs import INDEXING_MODEL_SERVER_PORT
 from shared_configs.enums import EmbeddingProvider
 from shared_configs.enums import EmbedTextType
+from shared_configs.enums import InferenceBackend
 from shared_configs.model_server_models import Embedding
 
 
@@ -40,6 +43,7 @@ class IndexingEmbedder(ABC):
         deployment_name: str | None,
         reduced_dimension: int | None,
         callback: IndexingHeartbeatInterface | None,
+        inference_backend: InferenceBackend = InferenceBackend.TORCH,
     ):
         self.model_name = model_name
         self.normalize = normalize
@@ -62,12 +66,25 @@ class IndexingEmbedder(ABC):
             api_version=api_version,
             deployment_name=deployment_name,
             reduced_dimension=reduced_dimension,
+            inference_backend=inference_backend,
             # The below are globally set, this flow always uses the indexing one
             server_host=INDEXING_MODEL_SERVER_HOST,
             server_port=INDEXING_MODEL_SERVER_PORT,
             retrim_content=True,
             callback=callback,
         )
+        self.embedding_cache = IndexingEmbeddingCache(
+            model_key=build_embedding_model_key(
+                model_name=model_name,
+                normalize=normalize,
+                passage_prefix=passage_prefix,
+                provider_type=provider_type,
+                api_url=api_url,
+                deployment_name=deployment_name,
+                reduced_dimension=reduced_dimension,
+                inference_backend=inference_backend,
+            )
+        )
 
     @abstractmethod
     def embed_chunks(
@@ -93,6 +110,7 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
         deployment_name: str | None = None,
         reduced_dimension: int | None = None,
         callback: IndexingHeartbeatInterface | None = None,
+        inference_backend: InferenceBackend = InferenceBackend.TORCH,
     ):
         super().__init__(
             model_name,
@@ -106,6 +124,7 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
             deployment_name,
             reduced_dimension,
             callback,
+            inference_backend,
         )
 
     @log_function_time()
@@ -143,12 +162,18 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
                     raise RuntimeError("Large chunk contains mini chunks")
                 flat_chunk_texts.extend(chunk.mini_chunk_texts)
 
-        embeddings = self.embedding_model.encode(
-            texts=flat_chunk_texts,
-            text_type=EmbedTextType.PASSAGE,
-            large_chunks_present=large_chunks_present,
-            tenant_id=tenant_id,
-            request_id=request_id,
+        embeddings = self.embedding_cache.embed(
+            flat_chunk_texts,
+            lambda texts: self.embedding_model.encode(
+                texts=texts,
+                text_type=EmbedTextType.PASSAGE,
+                large_chunks_present=large_chunks_present,
+                tenant_id=tenant_id,
+                request_id=request_id,
+            ),
+            # texts are trimmed to a longer max sequence length when large chunks
+            # are present
+            context="large_chunks" if large_chunks_present else "",
         )
 
         chunk_titles = {
@@ -163,11 +188,14 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
         # Cache the Title embeddings to only have to do it once
         title_embed_dict: dict[str, Embedding] = {}
         if chunk_titles_list:
-            title_embeddings = self.embedding_model.encode(
+            title_embeddings = self.embedding_cache.embed(
                 chunk_titles_list,
-                text_type=EmbedTextType.PASSAGE,
-                tenant_id=tenant_id,
-                request_id=request_id,
+                lambda titles: self.embedding_model.encode(
+                    titles,
+                    text_type=EmbedTextType.PASSAGE,
+                    tenant_id=tenant_id,
+                    request_id=request_id,
+                ),
             )
             title_embed_dict.update(
                 {
@@ -236,6 +264,7 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
             api_version=search_settings.api_version,
             deployment_name=search_settings.deployment_name,
             reduced_dimension=search_settings.reduced_dimension,
+            inference_backend=search_settings.inference_backend,
             callback=callback,
         )
 
@@ -0,0 +1,218 @@
+"""
+Persistent cache of the embeddings computed during indexing, so that content which is
+indexed again (a connector deleted and added back, the same file in several connectors,
+an attempt re-indexing from the beginning, ...) is not sent to the model server or to
+the embedding provider a second time.
+
+Embeddings are stored as float32 bytes in the `embedding_cache` table of the tenant,
+keyed by a hash of the embedding model settings and of the exact embedded text. The
+table is bounded by INDEXING_EMBEDDING_CACHE_MAX_MB, the least recently used entries
+are evicted first. The cache is only an optimization: any error reading or writing it
+is logged and the texts are embedded as usual.
+"""
+
+import datetime
+import hashlib
+import json
+import threading
+import time
+from collections.abc import Callable
+
+import numpy as np
+from prometheus_client import Counter
+
+from onyx.configs.app_configs import INDEXING_EMBEDDING_CACHE_MAX_MB
+from onyx.db.embedding_cache import evict_embedding_cache_entries__no_commit
+from onyx.db.embedding_cache import fetch_embedding_cache_entries
+from onyx.db.embedding_cache import insert_embedding_cache_entries__no_commit
+from onyx.db.engine import get_session_with_current_tenant
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+from shared_configs.enums import EmbeddingProvider
+from shared_configs.enums import InferenceBackend
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+# how often a process checks whether the cache has grown over its size limit
+_EVICTION_INTERVAL_SECONDS = 10 * 60
+# evicting a bit more than needed, so that the next batches don't have to evict again
+_EVICTION_TARGET_RATIO = 0.9
+# last_used_at is only kept up to date to this granularity, which is plenty for LRU
+_TOUCH_INTERVAL = datetime.timedelta(hours=1)
+
+INDEXING_EMBEDDING_CACHE_LOOKUPS = Counter(
+    "onyx_indexing_embedding_cache_lookups",
+    "Indexing embedding cache lookups, by result",
+    ["result"],
+)
+
+# tenant id -> last time this process checked the size of the tenant's cache
+_last_eviction_times: dict[str, float] = {}
+_eviction_lock = threading.Lock()
+
+
+def _to_bytes(embedding: Embedding) -> bytes:
+    return np.asarray(embedding, dtype="<f4").tobytes()
+
+
+def _from_bytes(value: bytes) -> Embedding:
+    return np.frombuffer(value, dtype="<f4").tolist()
+
+
+def build_embedding_model_key(
+    model_name: str,
+    normalize: bool,
+    passage_prefix: str | None,
+    provider_type: EmbeddingProvider | None,
+    api_url: str | None,
+    deployment_name: str | None,
+    reduced_dimension: int | None,
+    inference_backend: InferenceBackend = InferenceBackend.TORCH,
+) -> str:
+    """Identifies everything, besides the text, that changes the embedding of a
+    passage."""
+    return json.dumps(
+        [
+            model_name,
+            normalize,
+            passage_prefix,
+            provider_type.value if provider_type else None,
+            api_url,
+            deployment_name,
+            reduced_dimension,
+            inference_backend.value,
+        ]
+    )
+
+
+class IndexingEmbeddingCache:
+    def __init__(
+        self,
+        model_key: str,
+        max_bytes: int = INDEXING_EMBEDDING_CACHE_MAX_MB * 1024 * 1024,
+    ) -> None:
+        self.model_key = model_key
+        self.max_bytes = max_bytes
+
+        # for the logs of the indexing attempt
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get_key(self, text: str, context: str = "") -> str:
+        return hashlib.sha256(
+            f"{self.model_key}\x00{context}\x00{text}".encode()
+        ).hexdigest()
+
+    def embed(
+        self,
+        texts: list[str],
+        embed_fn: Callable[[list[str]], list[Embedding]],
+        context: str = "",
+    ) -> list[Embedding]:
+        """Returns the embeddings of `texts`, only calling `embed_fn` for the texts that
+        are not cached (once per distinct text). `context` must identify anything that
+        changes the embeddings besides the model settings, e.g. the max sequence
+        length the texts are trimmed to."""
+        if not self.enabled:
+            return embed_fn(texts)
+
+        cache_keys = [self.get_key(text, context) for text in texts]
+        cached_embeddings = self._get_many(cache_keys)
+
+        texts_to_embed: dict[str, str] = {}
+        for cache_key, text in zip(cache_keys, texts):
+            if cache_key not in cached_embeddings:
+                texts_to_embed.setdefault(cache_key, text)
+
+        num_hits = sum(cache_key in cached_embeddings for cache_key in cache_keys)
+        self.hits += num_hits
+        self.misses += len(texts) - num_hits
+        INDEXING_EMBEDDING_CACHE_LOOKUPS.labels(result="hit").inc(num_hits)
+        INDEXING_EMBEDDING_CACHE_LOOKUPS.labels(result="miss").inc(
+            len(texts) - num_hits
+        )
+
+        new_embeddings: dict[str, Embedding] = {}
+        if texts_to_embed:
+            new_embeddings = dict(
+                zip(texts_to_embed.keys(), embed_fn(list(texts_to_embed.values())))
+            )
+            self._set_many(new_embeddings)
+
+        return [
+            (
+                _from_bytes(cached_embeddings[cache_key])
+                if cache_key in cached_embeddings
+                else new_embeddings[cache_key]
+            )
+            for cache_key in cache_keys
+        ]
+
+    def _get_many(self, cache_keys: list[str]) -> dict[str, bytes]:
+        try:
+            with get_session_with_current_tenant() as db_session:
+                cached_embeddings = fetch_embedding_cache_entries(
+                    cache_keys,
+                    db_session,
+                    touch_older_than=datetime.datetime.now(datetime.timezone.utc)
+                    - _TOUCH_INTERVAL,
+                )
+                db_session.commit()
+                return cached_embeddings
+        except Exception:
+            logger.exception("Failed to read embeddings from the embedding cache")
+            return {}
+
+    def _set_many(self, embeddings: dict[str, Embedding]) -> None:
+        try:
+            with get_session_with_current_tenant() as db_session:
+                insert_embedding_cache_entries__no_commit(
+                    {
+                        cache_key: _to_bytes(embedding)
+                        for cache_key, embedding in embeddings.items()
+                    },
+                    db_session,
+                )
+                db_session.commit()
+        except Exception:
+            logger.exception("Failed to write embeddings to the embedding cache")
+            return
+
+        self._maybe_evict()
+
+    def _maybe_evict(self) -> None:
+        tenant_id = get_current_tenant_id()
+        with _eviction_lock:
+            now = time.monotonic()
+            last_eviction_time = _last_eviction_times.get(tenant_id)
+            if (
+                last_eviction_time is not None
+                and now - last_eviction_time < _EVICTION_INTERVAL_SECONDS
+            ):
+                return
+            _last_eviction_times[tenant_id] = now
+
+        try:
+            with get_session_with_current_tenant() as db_session:
+                num_evicted = evict_embedding_cache_entries__no_commit(
+                    max_bytes=self.max_bytes,
+                    target_bytes=int(self.max_bytes * _EVICTION_TARGET_RATIO),
+                    db_session=db_session,
+                )
+                db_session.commit()
+        except Exception:
+            logger.exception("Failed to evict entries from the embedding cache")
+            return
+
+        if num_evicted:
+            logger.info(f"Evicted {num_evicted} entries from the embedding cache")
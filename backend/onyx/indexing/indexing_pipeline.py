@@ -1,5 +1,6 @@
 from collections import defaultdict
 from collections.abc import Callable
+from dataclasses import dataclass
 from functools import partial
 from typing import Protocol
 
@@ -12,6 +13,7 @@ from onyx.access.models import DocumentAccess
 from onyx.configs.app_configs import DEFAULT_CONTEXTUAL_RAG_LLM_NAME
 from onyx.configs.app_configs import DEFAULT_CONTEXTUAL_RAG_LLM_PROVIDER
 from onyx.configs.app_configs import ENABLE_CONTEXTUAL_RAG
+from onyx.configs.app_configs import INDEXING_REUSE_UNCHANGED_CHUNKS
 from onyx.configs.app_configs import MAX_DOCUMENT_CHARS
 from onyx.configs.app_configs import MAX_TOKENS_FOR_FULL_INCLUSION
 from onyx.configs.app_configs import USE_CHUNK_SUMMARY
@@ -32,12 +34,12 @@ from onyx.connectors.models import Section
 from onyx.connectors.models import TextSection
 from onyx.db.chunk import update_chunk_boost_components__no_commit
 from onyx.db.document import fetch_chunk_counts_for_documents
+from onyx.db.document import fetch_chunk_hashes_for_documents
 from onyx.db.document import get_documents_by_ids
 from onyx.db.document import mark_document_as_indexed_for_cc_pair__no_commit
 from onyx.db.document import prepare_to_modify_documents
-from onyx.db.document import update_docs_chunk_count__no_commit
-from onyx.db.document import update_docs_last_modified__no_commit
-from onyx.db.document import update_docs_updated_at__no_commit
+from onyx.db.document import update_chunk_hashes_for_documents__no_commit
+from onyx.db.document import update_docs_after_indexing__no_commit
 from onyx.db.document import upsert_document_by_connector_credential_pair
 from onyx.db.document import upsert_documents
 from onyx.db.document_set import fetch_document_sets_for_documents
@@ -45,7 +47,6 @@ from onyx.db.engine import get_session_with_current_tenant
 from onyx.db.models import Document as DBDocument
 from onyx.db.models import IndexModelStatus
 from onyx.db.pg_file_store import get_pgfilestore_by_file_name
-from onyx.db.pg_file_store import read_lobj
 from onyx.db.search_settings import get_active_search_settings
 from onyx.db.tag import create_or_add_document_tag
 from onyx.db.tag import create_or_add_document_tag_list
@@ -59,7 +60,11 @@ from onyx.document_index.interfaces import DocumentIndex
 from onyx.document_index.interfaces import DocumentMetadata
 from onyx.document_index.interfaces import IndexBatchParams
 from onyx.file_processing.image_summarization import summarize_image_with_error_handling
+from onyx.file_store.file_store import get_default_file_store
 from onyx.file_store.utils import store_user_file_plaintext
+from onyx.indexing.chunk_reuse import get_chunk_hash
+from onyx.indexing.chunk_reuse import merge_unchanged_chunks
+from onyx.indexing.chunk_reuse import split_unchanged_chunks
 from onyx.indexing.chunker import Chunker
 from onyx.indexing.embedder import embed_chunks_with_failure_handling
 from onyx.indexing.embedder import IndexingEmbedder
@@ -116,6 +121,23 @@ class IndexingPipelineResult(BaseModel):
 
     failures: list[ConnectorFailure]
 
+    # number of chunks (part of total_chunks) that were already in Vespa with the same
+    # content, so they were not embedded / written again
+    reused_chunks: int = 0
+
+
+class EmbeddedDocumentBatch(BaseModel):
+    """Output of the chunk + embed half of the indexing pipeline. Consumed by
+    the write half, which does the Vespa writes and the Postgres commit."""
+
+    # documents in the batch that survived `filter_fnc`
+    filtered_documents: list[Document]
+    # None if there was nothing to (re)index in this batch
+    prepare_context: DocumentBatchPrepareContext | None
+    chunks_with_embeddings: list[IndexChunk] = []
+    chunk_content_scores: list[float] = []
+    embedding_failures: list[ConnectorFailure] = []
+
 
 class IndexingPipelineProtocol(Protocol):
     def __call__(
@@ -125,6 +147,34 @@ class IndexingPipelineProtocol(Protocol):
     ) -> IndexingPipelineResult: ...
 
 
+class IndexingEmbedStageProtocol(Protocol):
+    def __call__(
+        self,
+        document_batch: list[Document],
+        index_attempt_metadata: IndexAttemptMetadata,
+    ) -> EmbeddedDocumentBatch | IndexingPipelineResult: ...
+
+
+class IndexingWriteStageProtocol(Protocol):
+    def __call__(
+        self,
+        embedded_batch: EmbeddedDocumentBatch | IndexingPipelineResult,
+        document_batch: list[Document],
+        index_attempt_metadata: IndexAttemptMetadata,
+    ) -> IndexingPipelineResult: ...
+
+
+@dataclass
+class IndexingPipelineStages:
+    """The indexing pipeline split into a chunk + embed stage and a
+    document index / Postgres write stage, so that the two can be overlapped.
+    Batches must be passed through `write` in the same order they went
+    through `embed`."""
+
+    embed: IndexingEmbedStageProtocol
+    write: IndexingWriteStageProtocol
+
+
 def _upsert_documents_in_db(
     documents: list[Document],
     index_attempt_metadata: IndexAttemptMetadata,
@@ -276,6 +326,7 @@ def index_doc_batch_with_handler(
     ignore_time_skip: bool = False,
     enable_contextual_rag: bool = False,
     llm: LLM | None = None,
+    reuse_unchanged_chunks: bool = False,
 ) -> IndexingPipelineResult:
     try:
         index_pipeline_result = index_doc_batch(
@@ -290,32 +341,103 @@ def index_doc_batch_with_handler(
             tenant_id=tenant_id,
             enable_contextual_rag=enable_contextual_rag,
             llm=llm,
+            reuse_unchanged_chunks=reuse_unchanged_chunks,
         )
     except Exception as e:
-        # don't log the batch directly, it's too much text
-        document_ids = [doc.id for doc in document_batch]
-        logger.exception(f"Failed to index document batch: {document_ids}")
+        index_pipeline_result = _build_failed_batch_result(document_batch, e)
 
-        index_pipeline_result = IndexingPipelineResult(
-            new_docs=0,
-            total_docs=len(document_batch),
-            total_chunks=0,
-            failures=[
-                ConnectorFailure(
-                    failed_document=DocumentFailure(
-                        document_id=document.id,
-                        document_link=(
-                            document.sections[0].link if document.sections else None
-                        ),
+    return index_pipeline_result
+
+
+def _build_failed_batch_result(
+    document_batch: list[Document], e: Exception
+) -> IndexingPipelineResult:
+    # don't log the batch directly, it's too much text
+    document_ids = [doc.id for doc in document_batch]
+    logger.exception(f"Failed to index document batch: {document_ids}")
+
+    return IndexingPipelineResult(
+        new_docs=0,
+        total_docs=len(document_batch),
+        total_chunks=0,
+        failures=[
+            ConnectorFailure(
+                failed_document=DocumentFailure(
+                    document_id=document.id,
+                    document_link=(
+                        document.sections[0].link if document.sections else None
                     ),
-                    failure_message=str(e),
-                    exception=e,
-                )
-                for document in document_batch
-            ],
-        )
+                ),
+                failure_message=str(e),
+                exception=e,
+            )
+            for document in document_batch
+        ],
+    )
 
-    return index_pipeline_result
+
+def embed_doc_batch_with_handler(
+    *,
+    chunker: Chunker,
+    embedder: IndexingEmbedder,
+    information_content_classification_model: InformationContentClassificationModel,
+    document_batch: list[Document],
+    index_attempt_metadata: IndexAttemptMetadata,
+    tenant_id: str,
+    ignore_time_skip: bool = False,
+    enable_contextual_rag: bool = False,
+    llm: LLM | None = None,
+    reuse_chunks_from_index: str | None = None,
+) -> EmbeddedDocumentBatch | IndexingPipelineResult:
+    """Runs the chunk + embed half of the pipeline. Uses its own db session since it
+    is expected to run on a different thread than the write half. If anything goes
+    wrong, the whole batch is returned as a failed `IndexingPipelineResult`."""
+    try:
+        with get_session_with_current_tenant() as db_session:
+            return index_doc_batch_embed(
+                chunker=chunker,
+                embedder=embedder,
+                information_content_classification_model=information_content_classification_model,
+                document_batch=document_batch,
+                index_attempt_metadata=index_attempt_metadata,
+                db_session=db_session,
+                tenant_id=tenant_id,
+                ignore_time_skip=ignore_time_skip,
+                enable_contextual_rag=enable_contextual_rag,
+                llm=llm,
+                reuse_chunks_from_index=reuse_chunks_from_index,
+            )
+    except Exception as e:
+        return _build_failed_batch_result(document_batch, e)
+
+
+def write_doc_batch_with_handler(
+    *,
+    document_index: DocumentIndex,
+    embedded_batch: EmbeddedDocumentBatch | IndexingPipelineResult,
+    document_batch: list[Document],
+    index_attempt_metadata: IndexAttemptMetadata,
+    db_session: Session,
+    tenant_id: str,
+    enable_large_chunks: bool = False,
+) -> IndexingPipelineResult:
+    """Runs the write half of the pipeline. Batches which already failed during
+    the embed half are passed through untouched."""
+    if isinstance(embedded_batch, IndexingPipelineResult):
+        return embedded_batch
+
+    try:
+        return index_doc_batch_write(
+            embedded_batch=embedded_batch,
+            document_index=document_index,
+            index_attempt_metadata=index_attempt_metadata,
+            db_session=db_session,
+            tenant_id=tenant_id,
+            enable_large_chunks=enable_large_chunks,
+        )
+    except Exception as e:
+        db_session.rollback()
+        return _build_failed_batch_result(document_batch, e)
 
 
 def index_doc_batch_prepare(
@@ -510,9 +632,9 @@ def process_image_sections(documents: list[Document]) -> list[IndexingDocument]:
                             processed_section.text = "[Image could not be processed]"
                         else:
                             # Get the image data
-                            image_data_io = read_lobj(
-                                pgfilestore.lobj_oid, db_session, mode="rb"
-                            )
+                            image_data_io = get_default_file_store(
+                                db_session
+                            ).read_file(section.image_file_name, mode="b")
                             pgfilestore_data = image_data_io.read()
                             summary = summarize_image_with_error_handling(
                                 llm=llm,
@@ -700,13 +822,12 @@ def add_contextual_summaries(
 
 
 @log_function_time(debug_only=True)
-def index_doc_batch(
+def index_doc_batch_embed(
     *,
     document_batch: list[Document],
     chunker: Chunker,
     embedder: IndexingEmbedder,
     information_content_classification_model: InformationContentClassificationModel,
-    document_index: DocumentIndex,
     index_attempt_metadata: IndexAttemptMetadata,
     db_session: Session,
     tenant_id: str,
@@ -714,22 +835,15 @@ def index_doc_batch(
     llm: LLM | None = None,
     ignore_time_skip: bool = False,
     filter_fnc: Callable[[list[Document]], list[Document]] = filter_documents,
-) -> IndexingPipelineResult:
-    """Takes different pieces of the indexing pipeline and applies it to a batch of documents
-    Note that the documents should already be batched at this point so that it does not inflate the
-    memory requirements
-
-    Returns a tuple where the first element is the number of new docs and the
-    second element is the number of chunks."""
-
-    no_access = DocumentAccess.build(
-        user_emails=[],
-        user_groups=[],
-        external_user_emails=[],
-        external_user_group_ids=[],
-        is_public=False,
-    )
-
+    reuse_chunks_from_index: str | None = None,
+) -> EmbeddedDocumentBatch:
+    """First half of `index_doc_batch`. Upserts the basic document info into
+    Postgres, then chunks and embeds the documents. Does not touch the document index
+    and does not take any row locks, so it can safely run ahead of the write half
+    for the next batch.
+
+    If `reuse_chunks_from_index` is set, the chunks which are already in that index
+    with the same content are not embedded again (see onyx.indexing.chunk_reuse)."""
     filtered_documents = filter_fnc(document_batch)
 
     ctx = index_doc_batch_prepare(
@@ -749,11 +863,8 @@ def index_doc_batch(
             db_session=db_session,
         )
         db_session.commit()
-        return IndexingPipelineResult(
-            new_docs=0,
-            total_docs=len(filtered_documents),
-            total_chunks=0,
-            failures=[],
+        return EmbeddedDocumentBatch(
+            filtered_documents=filtered_documents, prepare_context=None
         )
 
     # Convert documents to IndexingDocument objects with processed section
@@ -789,35 +900,104 @@ def index_doc_batch(
             chunks, llm, llm_tokenizer, chunker.chunk_token_limit * 2
         )
 
+    chunks_to_embed = chunks
+    unchanged_chunks: list[IndexChunk] = []
+    if reuse_chunks_from_index:
+        chunks_to_embed, unchanged_chunks = split_unchanged_chunks(
+            chunks=chunks,
+            doc_id_to_chunk_hashes=fetch_chunk_hashes_for_documents(
+                document_ids=[doc.id for doc in ctx.updatable_docs],
+                db_session=db_session,
+            ),
+            index_name=reuse_chunks_from_index,
+        )
+        logger.debug(
+            f"Reusing {len(unchanged_chunks)} unchanged chunks out of {len(chunks)}"
+        )
+
     logger.debug("Starting embedding")
     chunks_with_embeddings, embedding_failures = (
         embed_chunks_with_failure_handling(
-            chunks=chunks,
+            chunks=chunks_to_embed,
             embedder=embedder,
             tenant_id=tenant_id,
             request_id=index_attempt_metadata.request_id,
         )
-        if chunks
+        if chunks_to_embed
         else ([], [])
     )
+    if unchanged_chunks:
+        chunks_with_embeddings = merge_unchanged_chunks(
+            chunks=chunks,
+            embedded_chunks=chunks_with_embeddings,
+            unchanged_chunks=unchanged_chunks,
+            failed_document_ids={
+                failure.failed_document.document_id
+                for failure in embedding_failures
+                if failure.failed_document
+            },
+        )
 
-    chunk_content_scores = (
-        _get_aggregated_chunk_boost_factor(
-            chunks_with_embeddings, information_content_classification_model
+    # the content score of the unchanged chunks is already saved, it is not
+    # computed (nor written) again
+    chunk_content_scores = [1.0] * len(chunks_with_embeddings)
+    changed_chunk_nums = [
+        chunk_num
+        for chunk_num, chunk in enumerate(chunks_with_embeddings)
+        if not chunk.content_unchanged
+    ]
+    if USE_INFORMATION_CONTENT_CLASSIFICATION and changed_chunk_nums:
+        changed_chunk_scores = _get_aggregated_chunk_boost_factor(
+            [chunks_with_embeddings[chunk_num] for chunk_num in changed_chunk_nums],
+            information_content_classification_model,
         )
-        if USE_INFORMATION_CONTENT_CLASSIFICATION
-        else [1.0] * len(chunks_with_embeddings)
+        for chunk_num, score in zip(changed_chunk_nums, changed_chunk_scores):
+            chunk_content_scores[chunk_num] = score
+
+    return EmbeddedDocumentBatch(
+        filtered_documents=filtered_documents,
+        prepare_context=ctx,
+        chunks_with_embeddings=chunks_with_embeddings,
+        chunk_content_scores=chunk_content_scores,
+        embedding_failures=embedding_failures,
     )
 
-    updatable_ids = [doc.id for doc in ctx.updatable_docs]
-    updatable_chunk_data = [
-        UpdatableChunkData(
-            chunk_id=chunk.chunk_id,
-            document_id=chunk.source_document.id,
-            boost_score=score,
+
+@log_function_time(debug_only=True)
+def index_doc_batch_write(
+    *,
+    embedded_batch: EmbeddedDocumentBatch,
+    document_index: DocumentIndex,
+    index_attempt_metadata: IndexAttemptMetadata,
+    db_session: Session,
+    tenant_id: str,
+    enable_large_chunks: bool = False,
+) -> IndexingPipelineResult:
+    """Second half of `index_doc_batch`. Locks the documents, writes the embedded
+    chunks to the document index and commits the final document state to Postgres."""
+    no_access = DocumentAccess.build(
+        user_emails=[],
+        user_groups=[],
+        external_user_emails=[],
+        external_user_group_ids=[],
+        is_public=False,
+    )
+
+    if embedded_batch.prepare_context is None:
+        return IndexingPipelineResult(
+            new_docs=0,
+            total_docs=len(embedded_batch.filtered_documents),
+            total_chunks=0,
+            failures=[],
         )
-        for chunk, score in zip(chunks_with_embeddings, chunk_content_scores)
-    ]
+
+    ctx = embedded_batch.prepare_context
+    filtered_documents = embedded_batch.filtered_documents
+    chunks_with_embeddings = embedded_batch.chunks_with_embeddings
+    chunk_content_scores = embedded_batch.chunk_content_scores
+    embedding_failures = embedded_batch.embedding_failures
+
+    updatable_ids = [doc.id for doc in ctx.updatable_docs]
 
     # Acquires a lock on the documents so that no other process can modify them
     # NOTE: don't need to acquire till here, since this is when the actual race condition
@@ -850,6 +1030,61 @@ def index_doc_batch(
             )
         }
 
+        # The unchanged chunks were matched before the documents were locked. If a
+        # document was written in the meantime (e.g. by another connector), they may
+        # not be in the document index anymore, and there are no embeddings to write
+        # them with. These documents are left as they are and reported as failed.
+        chunk_hashes = [
+            get_chunk_hash(chunk, document_index.index_name)
+            for chunk in chunks_with_embeddings
+        ]
+        doc_id_to_known_chunk_hashes = {
+            document_id: set(known_hashes or [])
+            for document_id, known_hashes in fetch_chunk_hashes_for_documents(
+                document_ids=updatable_ids, db_session=db_session
+            ).items()
+        }
+        reuse_failures: list[ConnectorFailure] = []
+        stale_doc_ids: set[str] = set()
+        for chunk, chunk_hash in zip(chunks_with_embeddings, chunk_hashes):
+            document_id = chunk.source_document.id
+            if (
+                chunk.content_unchanged
+                and document_id not in stale_doc_ids
+                and chunk_hash not in doc_id_to_known_chunk_hashes[document_id]
+            ):
+                stale_doc_ids.add(document_id)
+                reuse_failures.append(
+                    ConnectorFailure(
+                        failed_document=DocumentFailure(
+                            document_id=document_id,
+                            document_link=chunk.get_link(),
+                        ),
+                        failure_message=(
+                            "Document was modified in the document index while "
+                            "it was being indexed"
+                        ),
+                    )
+                )
+        if stale_doc_ids:
+            kept_chunk_nums = [
+                chunk_num
+                for chunk_num, chunk in enumerate(chunks_with_embeddings)
+                if chunk.source_document.id not in stale_doc_ids
+            ]
+            chunks_with_embeddings = [
+                chunks_with_embeddings[chunk_num] for chunk_num in kept_chunk_nums
+            ]
+            chunk_content_scores = [
+                chunk_content_scores[chunk_num] for chunk_num in kept_chunk_nums
+            ]
+            chunk_hashes = [chunk_hashes[chunk_num] for chunk_num in kept_chunk_nums]
+            updatable_ids = [
+                document_id
+                for document_id in updatable_ids
+                if document_id not in stale_doc_ids
+            ]
+
         doc_id_to_new_chunk_cnt: dict[str, int] = {
             document_id: len(
                 [
@@ -949,7 +1184,7 @@ def index_doc_batch(
                 doc_id_to_previous_chunk_cnt=doc_id_to_previous_chunk_cnt,
                 doc_id_to_new_chunk_cnt=doc_id_to_new_chunk_cnt,
                 tenant_id=tenant_id,
-                large_chunks_enabled=chunker.enable_large_chunks,
+                large_chunks_enabled=enable_large_chunks,
             ),
         )
 
@@ -978,26 +1213,17 @@ def index_doc_batch(
                 "This should never happen."
             )
 
-        last_modified_ids = []
         ids_to_new_updated_at = {}
         for doc in ctx.updatable_docs:
-            last_modified_ids.append(doc.id)
             # doc_updated_at is the source's idea (on the other end of the connector)
             # of when the doc was last modified
-            if doc.doc_updated_at is None:
+            if doc.doc_updated_at is None or doc.id in stale_doc_ids:
                 continue
             ids_to_new_updated_at[doc.id] = doc.doc_updated_at
 
-        update_docs_updated_at__no_commit(
-            ids_to_new_updated_at=ids_to_new_updated_at, db_session=db_session
-        )
-
-        update_docs_last_modified__no_commit(
-            document_ids=last_modified_ids, db_session=db_session
-        )
-
-        update_docs_chunk_count__no_commit(
+        update_docs_after_indexing__no_commit(
             document_ids=updatable_ids,
+            ids_to_new_updated_at=ids_to_new_updated_at,
             doc_id_to_chunk_count=doc_id_to_new_chunk_cnt,
             db_session=db_session,
         )
@@ -1007,6 +1233,27 @@ def index_doc_batch(
             db_session=db_session,
         )
 
+        # the chunks of failed documents may have been partially written, so the
+        # hashes are cleared and all their chunks are written on the next attempt
+        failures = vector_db_write_failures + embedding_failures
+        failed_doc_ids = {
+            failure.failed_document.document_id
+            for failure in failures
+            if failure.failed_document
+        }
+        doc_id_to_new_chunk_hashes: dict[str, list[str] | None] = {
+            document_id: None if document_id in failed_doc_ids else []
+            for document_id in updatable_ids
+        }
+        for chunk, chunk_hash in zip(chunks_with_embeddings, chunk_hashes):
+            new_chunk_hashes = doc_id_to_new_chunk_hashes[chunk.source_document.id]
+            if new_chunk_hashes is not None:
+                new_chunk_hashes.append(chunk_hash)
+        update_chunk_hashes_for_documents__no_commit(
+            doc_id_to_chunk_hashes=doc_id_to_new_chunk_hashes,
+            db_session=db_session,
+        )
+
         # these documents can now be counted as part of the CC Pairs
         # document count, so we need to mark them as indexed
         # NOTE: even documents we skipped since they were already up
@@ -1028,6 +1275,15 @@ def index_doc_batch(
             )
 
         # save the chunk boost components to postgres
+        updatable_chunk_data = [
+            UpdatableChunkData(
+                chunk_id=chunk.chunk_id,
+                document_id=chunk.source_document.id,
+                boost_score=score,
+            )
+            for chunk, score in zip(chunks_with_embeddings, chunk_content_scores)
+            if not chunk.content_unchanged
+        ]
         update_chunk_boost_components__no_commit(
             chunk_data=updatable_chunk_data, db_session=db_session
         )
@@ -1040,24 +1296,84 @@ def index_doc_batch(
         new_docs=len([r for r in insertion_records if r.already_existed is False]),
         total_docs=len(filtered_documents),
         total_chunks=len(access_aware_chunks),
-        failures=vector_db_write_failures + embedding_failures,
+        failures=failures + reuse_failures,
+        reused_chunks=len(
+            [
+                chunk
+                for chunk in access_aware_chunks
+                if chunk.content_unchanged
+                and chunk.source_document.id not in failed_doc_ids
+            ]
+        ),
     )
 
     return result
 
 
-def build_indexing_pipeline(
+@log_function_time(debug_only=True)
+def index_doc_batch(
     *,
+    document_batch: list[Document],
+    chunker: Chunker,
     embedder: IndexingEmbedder,
     information_content_classification_model: InformationContentClassificationModel,
     document_index: DocumentIndex,
+    index_attempt_metadata: IndexAttemptMetadata,
     db_session: Session,
     tenant_id: str,
-    chunker: Chunker | None = None,
+    enable_contextual_rag: bool = False,
+    llm: LLM | None = None,
     ignore_time_skip: bool = False,
-    callback: IndexingHeartbeatInterface | None = None,
-) -> IndexingPipelineProtocol:
-    """Builds a pipeline which takes in a list (batch) of docs and indexes them."""
+    filter_fnc: Callable[[list[Document]], list[Document]] = filter_documents,
+    reuse_unchanged_chunks: bool = False,
+) -> IndexingPipelineResult:
+    """Takes different pieces of the indexing pipeline and applies it to a batch of documents
+    Note that the documents should already be batched at this point so that it does not inflate the
+    memory requirements
+
+    Returns a tuple where the first element is the number of new docs and the
+    second element is the number of chunks."""
+    embedded_batch = index_doc_batch_embed(
+        document_batch=document_batch,
+        chunker=chunker,
+        embedder=embedder,
+        information_content_classification_model=information_content_classification_model,
+        index_attempt_metadata=index_attempt_metadata,
+        db_session=db_session,
+        tenant_id=tenant_id,
+        enable_contextual_rag=enable_contextual_rag,
+        llm=llm,
+        ignore_time_skip=ignore_time_skip,
+        filter_fnc=filter_fnc,
+        reuse_chunks_from_index=_get_reuse_index_name(
+            document_index, reuse_unchanged_chunks
+        ),
+    )
+    return index_doc_batch_write(
+        embedded_batch=embedded_batch,
+        document_index=document_index,
+        index_attempt_metadata=index_attempt_metadata,
+        db_session=db_session,
+        tenant_id=tenant_id,
+        enable_large_chunks=chunker.enable_large_chunks,
+    )
+
+
+def _get_reuse_index_name(
+    document_index: DocumentIndex, reuse_unchanged_chunks: bool
+) -> str | None:
+    if not reuse_unchanged_chunks or not INDEXING_REUSE_UNCHANGED_CHUNKS:
+        return None
+    return document_index.index_name
+
+
+def _build_chunker_and_llm(
+    *,
+    embedder: IndexingEmbedder,
+    db_session: Session,
+    chunker: Chunker | None,
+    callback: IndexingHeartbeatInterface | None,
+) -> tuple[Chunker, bool, LLM | None]:
     all_search_settings = get_active_search_settings(db_session)
     if (
         all_search_settings.secondary
@@ -1089,6 +1405,29 @@ def build_indexing_pipeline(
         callback=callback,
     )
 
+    return chunker, enable_contextual_rag, llm
+
+
+def build_indexing_pipeline(
+    *,
+    embedder: IndexingEmbedder,
+    information_content_classification_model: InformationContentClassificationModel,
+    document_index: DocumentIndex,
+    db_session: Session,
+    tenant_id: str,
+    chunker: Chunker | None = None,
+    ignore_time_skip: bool = False,
+    callback: IndexingHeartbeatInterface | None = None,
+    reuse_unchanged_chunks: bool = True,
+) -> IndexingPipelineProtocol:
+    """Builds a pipeline which takes in a list (batch) of docs and indexes them."""
+    chunker, enable_contextual_rag, llm = _build_chunker_and_llm(
+        embedder=embedder,
+        db_session=db_session,
+        chunker=chunker,
+        callback=callback,
+    )
+
     return partial(
         index_doc_batch_with_handler,
         chunker=chunker,
@@ -1100,4 +1439,51 @@ def build_indexing_pipeline(
         tenant_id=tenant_id,
         enable_contextual_rag=enable_contextual_rag,
         llm=llm,
+        reuse_unchanged_chunks=reuse_unchanged_chunks,
+    )
+
+
+def build_indexing_pipeline_stages(
+    *,
+    embedder: IndexingEmbedder,
+    information_content_classification_model: InformationContentClassificationModel,
+    document_index: DocumentIndex,
+    db_session: Session,
+    tenant_id: str,
+    chunker: Chunker | None = None,
+    ignore_time_skip: bool = False,
+    callback: IndexingHeartbeatInterface | None = None,
+    reuse_unchanged_chunks: bool = True,
+) -> IndexingPipelineStages:
+    """Same as `build_indexing_pipeline`, but returns the embed and write halves
+    separately so the caller can run them concurrently on consecutive batches.
+    `db_session` is only used by the write stage."""
+    chunker, enable_contextual_rag, llm = _build_chunker_and_llm(
+        embedder=embedder,
+        db_session=db_session,
+        chunker=chunker,
+        callback=callback,
+    )
+
+    return IndexingPipelineStages(
+        embed=partial(
+            embed_doc_batch_with_handler,
+            chunker=chunker,
+            embedder=embedder,
+            information_content_classification_model=information_content_classification_model,
+            ignore_time_skip=ignore_time_skip,
+            tenant_id=tenant_id,
+            enable_contextual_rag=enable_contextual_rag,
+            llm=llm,
+            reuse_chunks_from_index=_get_reuse_index_name(
+                document_index, reuse_unchanged_chunks
+            ),
+        ),
+        write=partial(
+            write_doc_batch_with_handler,
+            document_index=document_index,
+            db_session=db_session,
+            tenant_id=tenant_id,
+            enable_large_chunks=chunker.enable_large_chunks,
+        ),
     )
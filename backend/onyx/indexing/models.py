@@ -8,6 +8,7 @@ from onyx.connectors.models import Document
 from onyx.db.enums import EmbeddingPrecision
 from onyx.utils.logger import setup_logger
 from shared_configs.enums import EmbeddingProvider
+from shared_configs.enums import InferenceBackend
 from shared_configs.model_server_models import Embedding
 
 if TYPE_CHECKING:
@@ -79,6 +80,10 @@ class DocAwareChunk(BaseChunk):
 class IndexChunk(DocAwareChunk):
     embeddings: ChunkEmbedding
     title_embedding: Embedding | None
+    # True if the chunk is already in the document index with the same content
+    # (see onyx.indexing.chunk_reuse). It is not embedded again (the embeddings are
+    # left empty) and only its document level fields are written.
+    content_unchanged: bool = False
 
 
 # TODO(rkuo): currently, this extra metadata sent during indexing is just for speed,
@@ -139,6 +144,7 @@ class EmbeddingModelDetail(BaseModel):
     api_url: str | None = None
     provider_type: EmbeddingProvider | None = None
     api_key: str | None = None
+    inference_backend: InferenceBackend = InferenceBackend.TORCH
 
     # This disables the "model_" protected namespace for pydantic
     model_config = {"protected_namespaces": ()}
@@ -157,6 +163,7 @@ class EmbeddingModelDetail(BaseModel):
             provider_type=search_settings.provider_type,
             api_key=search_settings.api_key,
             api_url=search_settings.api_url,
+            inference_backend=search_settings.inference_backend,
         )
 
 
@@ -195,6 +202,7 @@ class IndexingSetting(EmbeddingModelDetail):
             multipass_indexing=search_settings.multipass_indexing,
             embedding_precision=search_settings.embedding_precision,
             reduced_dimension=search_settings.reduced_dimension,
+            inference_backend=search_settings.inference_backend,
             background_reindex_enabled=search_settings.background_reindex_enabled,
             enable_contextual_rag=search_settings.enable_contextual_rag,
         )
@@ -0,0 +1,229 @@
+"""
+Sentence aware, token limited text splitting for the Chunker.
+
+This follows the same algorithm (and produces the same output) as the llama_index
+SentenceSplitter the Chunker used to rely on, without the (very large) llama_index import:
+1. split by paragraph separator
+2. split by sentence (nltk punkt, untrained)
+3. split by the sub-sentence regex
+4. split by words, then by characters
+then greedily merge the pieces back together into chunks of at most `chunk_size` tokens.
+
+The main differences are that token counts are shared between all the splitters of a
+Chunker through a `TokenCounter` (so the blurb, chunk and mini-chunk splitters never
+tokenize the same text twice), and that splitting is lazy, so asking for only the first
+chunk (e.g. for blurbs) does not split / tokenize the rest of the text.
+"""
+
+import re
+from collections.abc import Callable
+from collections.abc import Iterator
+from typing import NamedTuple
+
+from nltk.tokenize import PunktSentenceTokenizer  # type: ignore
+
+from onyx.natural_language_processing.utils import BaseTokenizer
+
+PARAGRAPH_SEPARATOR = "\n\n\n"
+WORD_SEPARATOR = " "
+SUB_SENTENCE_REGEX = "[^,.;。？！]+[,.;。？！]?|[,.;。？！]"
+
+# Guards against unbounded growth if a TokenCounter is never reset
+_MAX_CACHED_TOKEN_COUNTS = 100_000
+
+_SENTENCE_TOKENIZER: PunktSentenceTokenizer | None = None
+
+
+def _get_sentence_tokenizer() -> PunktSentenceTokenizer:
+    # an untrained punkt tokenizer, no nltk data needs to be downloaded for this
+    global _SENTENCE_TOKENIZER
+    if _SENTENCE_TOKENIZER is None:
+        _SENTENCE_TOKENIZER = PunktSentenceTokenizer()
+    return _SENTENCE_TOKENIZER
+
+
+def _split_keep_separator(text: str, separator: str) -> list[str]:
+    parts = text.split(separator)
+    result = [separator + part if i > 0 else part for i, part in enumerate(parts)]
+    return [part for part in result if part]
+
+
+def _split_by_paragraph(text: str) -> list[str]:
+    return _split_keep_separator(text, PARAGRAPH_SEPARATOR)
+
+
+def _split_by_sentence(text: str) -> list[str]:
+    # each sentence runs until the start of the next one, so no characters are dropped
+    spans = list(_get_sentence_tokenizer().span_tokenize(text))
+    sentences = []
+    for i, (start, _) in enumerate(spans):
+        end = spans[i + 1][0] if i < len(spans) - 1 else len(text)
+        sentences.append(text[start:end])
+    return sentences
+
+
+def _split_by_sub_sentence(text: str) -> list[str]:
+    return re.findall(SUB_SENTENCE_REGEX, text)
+
+
+def _split_by_word(text: str) -> list[str]:
+    return _split_keep_separator(text, WORD_SEPARATOR)
+
+
+def _split_by_char(text: str) -> list[str]:
+    return list(text)
+
+
+_SENTENCE_SPLIT_FNS: list[Callable[[str], list[str]]] = [
+    _split_by_paragraph,
+    _split_by_sentence,
+]
+_SUB_SENTENCE_SPLIT_FNS: list[Callable[[str], list[str]]] = [
+    _split_by_sub_sentence,
+    _split_by_word,
+    _split_by_char,
+]
+
+
+class TokenCounter:
+    """Memoized token counts, shared by all the splitters of a Chunker. The same
+    paragraphs / sentences are seen by the chunk, blurb and mini-chunk splitters, so
+    each distinct piece of text only gets tokenized once. Should be `reset` between
+    documents to keep memory bounded."""
+
+    def __init__(self, tokenizer: BaseTokenizer) -> None:
+        self.tokenizer = tokenizer
+        self._token_counts: dict[str, int] = {}
+
+    def count(self, text: str) -> int:
+        token_count = self._token_counts.get(text)
+        if token_count is None:
+            if len(self._token_counts) >= _MAX_CACHED_TOKEN_COUNTS:
+                self._token_counts.clear()
+            token_count = len(self.tokenizer.encode(text))
+            self._token_counts[text] = token_count
+        return token_count
+
+    def reset(self) -> None:
+        self._token_counts.clear()
+
+
+class _Split(NamedTuple):
+    text: str
+    # whether this is a full sentence (or paragraph), as opposed to a fragment
+    is_sentence: bool
+    token_count: int
+
+
+class SentenceAwareSplitter:
+    def __init__(
+        self,
+        token_counter: TokenCounter,
+        chunk_size: int,
+        chunk_overlap: int = 0,
+    ) -> None:
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"Got a larger chunk overlap ({chunk_overlap}) than chunk size "
+                f"({chunk_size}), should be smaller."
+            )
+        self.token_counter = token_counter
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def split_text(self, text: str, token_count: int | None = None) -> list[str]:
+        """Splits `text` into chunks of at most `chunk_size` tokens (leading and
+        trailing whitespace stripped, empty chunks dropped). `token_count` may be
+        passed if the exact token count of `text` is already known."""
+        if text == "":
+            return [text]
+
+        stripped_chunks = (chunk.strip() for chunk in self._merge(text, token_count))
+        return [chunk for chunk in stripped_chunks if chunk]
+
+    def first_chunk(self, text: str, token_count: int | None = None) -> str:
+        """Same as `split_text(text)[0]` (or "" if there are no chunks), but only
+        splits as much of the text as needed to build the first chunk."""
+        if text == "":
+            return text
+
+        for chunk in self._merge(text, token_count):
+            stripped_chunk = chunk.strip()
+            if stripped_chunk:
+                return stripped_chunk
+        return ""
+
+    def _get_splits_by_fns(self, text: str) -> tuple[list[str], bool]:
+        splits: list[str] = []
+        for split_fn in _SENTENCE_SPLIT_FNS:
+            splits = split_fn(text)
+            if len(splits) > 1:
+                return splits, True
+
+        for split_fn in _SUB_SENTENCE_SPLIT_FNS:
+            splits = split_fn(text)
+            if len(splits) > 1:
+                break
+
+        return splits, False
+
+    def _split(self, text: str, token_count: int | None = None) -> Iterator[_Split]:
+        """Lazily breaks the text into pieces that each fit in `chunk_size`, trying
+        the coarsest split functions first."""
+        if token_count is None:
+            token_count = self.token_counter.count(text)
+        if token_count <= self.chunk_size:
+            yield _Split(text, is_sentence=True, token_count=token_count)
+            return
+
+        text_splits, is_sentence = self._get_splits_by_fns(text)
+        for text_split in text_splits:
+            split_token_count = self.token_counter.count(text_split)
+            if split_token_count <= self.chunk_size:
+                yield _Split(
+                    text_split, is_sentence=is_sentence, token_count=split_token_count
+                )
+            else:
+                yield from self._split(text_split, split_token_count)
+
+    def _merge(self, text: str, token_count: int | None) -> Iterator[str]:
+        """Greedily packs the splits into chunks, yielding each (unstripped) chunk
+        as soon as it is closed."""
+        splits = self._split(text, token_count)
+
+        cur_chunk: list[_Split] = []
+        cur_chunk_len = 0
+        new_chunk = True
+
+        cur_split = next(splits, None)
+        while cur_split is not None:
+            if cur_split.token_count > self.chunk_size:
+                raise ValueError("Single token exceeded chunk size")
+
+            if (
+                cur_chunk_len + cur_split.token_count > self.chunk_size
+                and not new_chunk
+            ):
+                # adding the split would exceed the chunk size: close out the chunk
+                yield "".join(split.text for split in cur_chunk)
+                last_chunk = cur_chunk
+
+                # carry over the tail of the closed chunk as overlap for the next one
+                cur_chunk = []
+                cur_chunk_len = 0
+                new_chunk = True
+                for split in reversed(last_chunk):
+                    if cur_chunk_len + split.token_count > self.chunk_overlap:
+                        break
+                    cur_chunk_len += split.token_count
+                    cur_chunk.insert(0, split)
+                continue
+
+            # a new chunk always takes at least one split
+            cur_chunk_len += cur_split.token_count
+            cur_chunk.append(cur_split)
+            new_chunk = False
+            cur_split = next(splits, None)
+
+        if not new_chunk:
+            yield "".join(split.text for split in cur_chunk)
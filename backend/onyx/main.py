@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import sys
 import traceback
@@ -36,6 +37,7 @@ from onyx.configs.app_configs import APP_PORT
 from onyx.configs.app_configs import AUTH_RATE_LIMITING_ENABLED
 from onyx.configs.app_configs import AUTH_TYPE
 from onyx.configs.app_configs import DISABLE_GENERATIVE_AI
+from onyx.configs.app_configs import EVENT_LOOP_LAG_MONITOR_INTERVAL
 from onyx.configs.app_configs import LOG_ENDPOINT_LATENCY
 from onyx.configs.app_configs import OAUTH_CLIENT_ID
 from onyx.configs.app_configs import OAUTH_CLIENT_SECRET
@@ -48,6 +50,8 @@ from onyx.configs.constants import AuthType
 from onyx.configs.constants import POSTGRES_WEB_APP_NAME
 from onyx.db.engine import SqlEngine
 from onyx.db.engine import warm_up_connections
+from onyx.httpx.httpx_pool import HttpxPool
+from onyx.httpx.httpx_pool import register_httpx_pool_metrics
 from onyx.server.api_key.api import router as api_key_router
 from onyx.server.auth_check import check_router_auth
 from onyx.server.documents.cc_pair import router as cc_pair_router
@@ -82,6 +86,10 @@ from onyx.server.manage.llm.api import basic_router as llm_router
 from onyx.server.manage.search_settings import router as search_settings_router
 from onyx.server.manage.slack_bot import router as slack_bot_management_router
 from onyx.server.manage.users import router as user_router
+from onyx.server.middleware.event_loop_monitoring import (
+    add_event_loop_blocking_middleware,
+)
+from onyx.server.middleware.event_loop_monitoring import monitor_event_loop_lag
 from onyx.server.middleware.latency_logging import add_latency_logging_middleware
 from onyx.server.middleware.rate_limiting import close_auth_limiter
 from onyx.server.middleware.rate_limiting import get_auth_rate_limiters
@@ -244,9 +252,19 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     if AUTH_RATE_LIMITING_ENABLED:
         await setup_auth_limiter()
 
+    event_loop_monitor = (
+        asyncio.create_task(monitor_event_loop_lag(logger))
+        if EVENT_LOOP_LAG_MONITOR_INTERVAL > 0
+        else None
+    )
+
     yield
 
+    if event_loop_monitor is not None:
+        event_loop_monitor.cancel()
+
     SqlEngine.reset_engine()
+    HttpxPool.close_all()
 
     if AUTH_RATE_LIMITING_ENABLED:
         await close_auth_limiter()
@@ -438,11 +456,15 @@ def get_application(lifespan_override: Lifespan | None = None) -> FastAPI:
 
     add_onyx_request_id_middleware(application, "API", logger)
 
+    if EVENT_LOOP_LAG_MONITOR_INTERVAL > 0:
+        add_event_loop_blocking_middleware(application)
+
     # Ensure all routes have auth enabled or are explicitly marked as public
     check_router_auth(application)
 
     # Initialize and instrument the app
     Instrumentator().instrument(application).expose(application)
+    register_httpx_pool_metrics()
 
     return application
 
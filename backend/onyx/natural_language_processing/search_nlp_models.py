@@ -1,3 +1,4 @@
+import os
 import threading
 import time
 from collections.abc import Callable
@@ -12,6 +13,7 @@ from httpx import HTTPError
 from requests import JSONDecodeError
 from requests import RequestException
 from requests import Response
+from requests.adapters import HTTPAdapter
 from retry import retry
 
 from onyx.configs.app_configs import INDEXING_EMBEDDING_MODEL_NUM_THREADS
@@ -22,6 +24,8 @@ from onyx.configs.model_configs import (
     BATCH_SIZE_ENCODE_CHUNKS_FOR_API_EMBEDDING_SERVICES,
 )
 from onyx.configs.model_configs import DOC_EMBEDDING_CONTEXT_SIZE
+from onyx.configs.model_configs import LOCAL_EMBEDDING_LENGTH_BUCKETING
+from onyx.configs.model_configs import MODEL_SERVER_EMBEDDING_TRANSPORT
 from onyx.db.models import SearchSettings
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from onyx.natural_language_processing.exceptions import (
@@ -34,8 +38,16 @@ from shared_configs.configs import INDEXING_MODEL_SERVER_HOST
 from shared_configs.configs import INDEXING_MODEL_SERVER_PORT
 from shared_configs.configs import MODEL_SERVER_HOST
 from shared_configs.configs import MODEL_SERVER_PORT
+from shared_configs.embedding_transport import decode_embeddings
+from shared_configs.embedding_transport import EMBEDDING_COUNT_HEADER
+from shared_configs.embedding_transport import EMBEDDING_DIM_HEADER
+from shared_configs.embedding_transport import EMBEDDINGS_FLOAT16_MEDIA_TYPE
+from shared_configs.embedding_transport import EMBEDDINGS_FLOAT32_MEDIA_TYPE
+from shared_configs.embedding_transport import get_media_type
+from shared_configs.embedding_transport import is_binary_embeddings_media_type
 from shared_configs.enums import EmbeddingProvider
 from shared_configs.enums import EmbedTextType
+from shared_configs.enums import InferenceBackend
 from shared_configs.enums import RerankerProvider
 from shared_configs.model_server_models import ConnectorClassificationRequest
 from shared_configs.model_server_models import ConnectorClassificationResponse
@@ -48,6 +60,7 @@ from shared_configs.model_server_models import IntentRequest
 from shared_configs.model_server_models import IntentResponse
 from shared_configs.model_server_models import RerankRequest
 from shared_configs.model_server_models import RerankResponse
+from shared_configs.utils import batch_by_token_budget
 from shared_configs.utils import batch_list
 
 logger = setup_logger()
@@ -60,6 +73,57 @@ WARM_UP_STRINGS = [
 ]
 
 
+_MODEL_SERVER_SESSION_POOL_SIZE = 32
+
+_model_server_session: requests.Session | None = None
+_model_server_session_pid: int | None = None
+_model_server_session_lock = threading.Lock()
+
+
+def get_model_server_session() -> requests.Session:
+    """Process-wide session for model server requests, so connections are kept alive
+    across batches instead of being set up for every request. Recreated after a fork
+    since the pooled connections can't be shared between processes."""
+    global _model_server_session, _model_server_session_pid
+
+    with _model_server_session_lock:
+        if _model_server_session is None or _model_server_session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=_MODEL_SERVER_SESSION_POOL_SIZE,
+                pool_maxsize=_MODEL_SERVER_SESSION_POOL_SIZE,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _model_server_session = session
+            _model_server_session_pid = os.getpid()
+        return _model_server_session
+
+
+def _get_embed_accept_header() -> str:
+    if MODEL_SERVER_EMBEDDING_TRANSPORT == "float16":
+        return f"{EMBEDDINGS_FLOAT16_MEDIA_TYPE}, application/json;q=0.5"
+    if MODEL_SERVER_EMBEDDING_TRANSPORT == "float32":
+        return f"{EMBEDDINGS_FLOAT32_MEDIA_TYPE}, application/json;q=0.5"
+    return "application/json"
+
+
+def _parse_embed_response(response: Response) -> EmbedResponse:
+    media_type = get_media_type(response.headers.get("Content-Type"))
+    if is_binary_embeddings_media_type(media_type):
+        embeddings = decode_embeddings(
+            content=response.content,
+            media_type=media_type,
+            num_embeddings=int(response.headers[EMBEDDING_COUNT_HEADER]),
+            dim=int(response.headers[EMBEDDING_DIM_HEADER]),
+        )
+        # already well typed, skip validating every float
+        return EmbedResponse.model_construct(embeddings=embeddings)
+
+    # older model servers (or explicitly requested) JSON
+    return EmbedResponse(**response.json())
+
+
 def clean_model_name(model_str: str) -> str:
     return model_str.replace("/", "_").replace("-", "_").replace(".", "_")
 
@@ -95,6 +159,7 @@ class EmbeddingModel:
         api_version: str | None = None,
         deployment_name: str | None = None,
         reduced_dimension: int | None = None,
+        inference_backend: InferenceBackend = InferenceBackend.TORCH,
     ) -> None:
         self.api_key = api_key
         self.provider_type = provider_type
@@ -107,6 +172,7 @@ class EmbeddingModel:
         self.api_version = api_version
         self.deployment_name = deployment_name
         self.reduced_dimension = reduced_dimension
+        self.inference_backend = inference_backend
         self.tokenizer = get_tokenizer(
             model_name=model_name, provider_type=provider_type
         )
@@ -122,14 +188,14 @@ class EmbeddingModel:
         request_id: str | None = None,
     ) -> EmbedResponse:
         def _make_request() -> Response:
-            headers = {}
+            headers = {"Accept": _get_embed_accept_header()}
             if tenant_id:
                 headers["X-Onyx-Tenant-ID"] = tenant_id
 
             if request_id:
                 headers["X-Onyx-Request-ID"] = request_id
 
-            response = requests.post(
+            response = get_model_server_session().post(
                 self.embed_server_endpoint,
                 headers=headers,
                 json=embed_request.model_dump(),
@@ -160,7 +226,7 @@ class EmbeddingModel:
 
         try:
             response = final_make_request_func()
-            return EmbedResponse(**response.json())
+            return _parse_embed_response(response)
         except requests.HTTPError as e:
             if not response:
                 raise HTTPError("HTTP error occurred - response is None.") from e
@@ -182,8 +248,23 @@ class EmbeddingModel:
         num_threads: int = INDEXING_EMBEDDING_MODEL_NUM_THREADS,
         tenant_id: str | None = None,
         request_id: str | None = None,
+        length_bucketing: bool = LOCAL_EMBEDDING_LENGTH_BUCKETING,
     ) -> list[Embedding]:
-        text_batches = batch_list(texts, batch_size)
+        # indices of the texts in the order they are sent, if they are reordered
+        text_order: list[int] | None = None
+        if length_bucketing and not self.provider_type and len(texts) > batch_size:
+            # the model server pads each batch to its longest text, so group texts of
+            # similar lengths and send more texts per batch when they are short
+            token_counts = [
+                min(len(self.tokenizer.encode(text)), max_seq_length) for text in texts
+            ]
+            index_batches = batch_by_token_budget(
+                token_counts, token_budget=batch_size * max_seq_length
+            )
+            text_batches = [[texts[i] for i in batch] for batch in index_batches]
+            text_order = [i for batch in index_batches for i in batch]
+        else:
+            text_batches = batch_list(texts, batch_size)
 
         logger.debug(
             f"Encoding {len(texts)} texts in {len(text_batches)} batches for local model"
@@ -216,6 +297,7 @@ class EmbeddingModel:
                 manual_passage_prefix=self.passage_prefix,
                 api_url=self.api_url,
                 reduced_dimension=self.reduced_dimension,
+                inference_backend=self.inference_backend,
             )
 
             start_time = time.time()
@@ -281,6 +363,12 @@ class EmbeddingModel:
                 if self.callback:
                     self.callback.progress("_batch_encode_texts", 1)
 
+        if text_order is not None:
+            ordered_embeddings: list[Embedding] = [[] for _ in texts]
+            for embedding, text_idx in zip(embeddings, text_order):
+                ordered_embeddings[text_idx] = embedding
+            embeddings = ordered_embeddings
+
         return embeddings
 
     def encode(
@@ -350,6 +438,7 @@ class EmbeddingModel:
             api_version=search_settings.api_version,
             deployment_name=search_settings.deployment_name,
             reduced_dimension=search_settings.reduced_dimension,
+            inference_backend=search_settings.inference_backend,
         )
 
 
@@ -362,6 +451,7 @@ class RerankingModel:
         api_url: str | None,
         model_server_host: str = MODEL_SERVER_HOST,
         model_server_port: int = MODEL_SERVER_PORT,
+        inference_backend: InferenceBackend = InferenceBackend.TORCH,
     ) -> None:
         model_server_url = build_model_server_url(model_server_host, model_server_port)
         self.rerank_server_endpoint = model_server_url + "/encoder/cross-encoder-scores"
@@ -369,6 +459,7 @@ class RerankingModel:
         self.provider_type = provider_type
         self.api_key = api_key
         self.api_url = api_url
+        self.inference_backend = inference_backend
 
     def predict(self, query: str, passages: list[str]) -> list[float]:
         rerank_request = RerankRequest(
@@ -378,9 +469,10 @@ class RerankingModel:
             provider_type=self.provider_type,
             api_key=self.api_key,
             api_url=self.api_url,
+            inference_backend=self.inference_backend,
         )
 
-        response = requests.post(
+        response = get_model_server_session().post(
             self.rerank_server_endpoint, json=rerank_request.model_dump()
         )
         response.raise_for_status()
@@ -413,7 +505,7 @@ class QueryAnalysisModel:
             semantic_percent_threshold=self.semantic_percent_threshold,
         )
 
-        response = requests.post(
+        response = get_model_server_session().post(
             self.intent_server_endpoint, json=intent_request.model_dump()
         )
         response.raise_for_status()
@@ -438,7 +530,9 @@ class InformationContentClassificationModel:
         self,
         queries: list[str],
     ) -> list[ContentClassificationPrediction]:
-        response = requests.post(self.content_server_endpoint, json=queries)
+        response = get_model_server_session().post(
+            self.content_server_endpoint, json=queries
+        )
         response.raise_for_status()
 
         model_responses = InformationContentClassificationResponses(
@@ -468,7 +562,7 @@ class ConnectorClassificationModel:
             available_connectors=available_connectors,
             query=query,
         )
-        response = requests.post(
+        response = get_model_server_session().post(
             self.connector_classification_endpoint,
             json=connector_classification_request.dict(),
         )
@@ -542,6 +636,7 @@ def warm_up_bi_encoder(
 def warm_up_cross_encoder(
     rerank_model_name: str,
     non_blocking: bool = False,
+    inference_backend: InferenceBackend = InferenceBackend.TORCH,
 ) -> None:
     logger.debug(f"Warming up reranking model: {rerank_model_name}")
 
@@ -550,6 +645,7 @@ def warm_up_cross_encoder(
         provider_type=None,
         api_url=None,
         api_key=None,
+        inference_backend=inference_backend,
     )
 
     def _warm_up() -> None:
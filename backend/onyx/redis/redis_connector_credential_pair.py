@@ -1,6 +1,5 @@
 import time
 from typing import cast
-from uuid import uuid4
 
 import redis
 from celery import Celery
@@ -9,10 +8,9 @@ from redis.lock import Lock as RedisLock
 from sqlalchemy.orm import Session
 
 from onyx.configs.app_configs import DB_YIELD_PER_DEFAULT
+from onyx.configs.app_configs import VESPA_SYNC_BATCH_SIZE
 from onyx.configs.constants import CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import OnyxCeleryPriority
-from onyx.configs.constants import OnyxCeleryQueues
-from onyx.configs.constants import OnyxCeleryTask
 from onyx.configs.constants import OnyxRedisConstants
 from onyx.db.connector_credential_pair import get_connector_credential_pair_from_id
 from onyx.db.document import (
@@ -53,6 +51,24 @@ class RedisConnectorCredentialPair(RedisObjectHelper):
         # the list on the fly
         self.skip_docs = skip_docs
 
+    def _send_batch(
+        self,
+        document_ids: list[str],
+        celery_app: Celery,
+        redis_client: Redis,
+        tenant_id: str,
+    ) -> None:
+        # note that for the moment we are using a single taskset key, not differentiated by cc_pair id
+        # Priority on sync's triggered by new indexing should be medium
+        self.send_vespa_metadata_sync_batch(
+            document_ids,
+            celery_app,
+            redis_client,
+            tenant_id,
+            OnyxCeleryPriority.MEDIUM,
+            ignore_result=True,
+        )
+
     def generate_tasks(
         self,
         max_tasks: int,
@@ -62,8 +78,9 @@ class RedisConnectorCredentialPair(RedisObjectHelper):
         lock: RedisLock,
         tenant_id: str,
     ) -> tuple[int, int] | None:
-        """We can limit the number of tasks generated here, which is useful to prevent
-        one tenant from overwhelming the sync queue.
+        """We can limit the number of documents queued here, which is useful to prevent
+        one tenant from overwhelming the sync queue. Documents are sent to the sync
+        queue in batches of VESPA_SYNC_BATCH_SIZE.
 
         This works because the dirty state of a document is in the DB, so more docs
         get picked up after the limited set of tasks is complete.
@@ -71,7 +88,8 @@ class RedisConnectorCredentialPair(RedisObjectHelper):
 
         last_lock_time = time.monotonic()
 
-        num_tasks_sent = 0
+        num_docs_queued = 0
+        batch: list[str] = []
 
         cc_pair = get_connector_credential_pair_from_id(
             db_session=db_session,
@@ -101,35 +119,21 @@ class RedisConnectorCredentialPair(RedisObjectHelper):
             if doc_id in self.skip_docs:
                 continue
 
-            # celery's default task id format is "dd32ded3-00aa-4884-8b21-42f8332e7fac"
-            # the key for the result is "celery-task-meta-dd32ded3-00aa-4884-8b21-42f8332e7fac"
-            # we prefix the task id so it's easier to keep track of who created the task
-            # aka "documentset_1_6dd32ded3-00aa-4884-8b21-42f8332e7fac"
-            custom_task_id = f"{self.task_id_prefix}_{uuid4()}"
-
-            # add to the tracking taskset in redis BEFORE creating the celery task.
-            # note that for the moment we are using a single taskset key, not differentiated by cc_pair id
-            redis_client.sadd(
-                RedisConnectorCredentialPair.get_taskset_key(), custom_task_id
-            )
-
-            # Priority on sync's triggered by new indexing should be medium
-            celery_app.send_task(
-                OnyxCeleryTask.VESPA_METADATA_SYNC_TASK,
-                kwargs=dict(document_id=doc_id, tenant_id=tenant_id),
-                queue=OnyxCeleryQueues.VESPA_METADATA_SYNC,
-                task_id=custom_task_id,
-                priority=OnyxCeleryPriority.MEDIUM,
-                ignore_result=True,
-            )
-
-            num_tasks_sent += 1
+            batch.append(doc_id)
             self.skip_docs.add(doc_id)
+            num_docs_queued += 1
 
-            if num_tasks_sent >= max_tasks:
+            if len(batch) >= VESPA_SYNC_BATCH_SIZE:
+                self._send_batch(batch, celery_app, redis_client, tenant_id)
+                batch = []
+
+            if num_docs_queued >= max_tasks:
                 break
 
-        return num_tasks_sent, num_docs
+        if batch:
+            self._send_batch(batch, celery_app, redis_client, tenant_id)
+
+        return num_docs_queued, num_docs
 
 
 class RedisGlobalConnectorCredentialPair:
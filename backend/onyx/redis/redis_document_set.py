@@ -1,6 +1,5 @@
 import time
 from typing import cast
-from uuid import uuid4
 
 import redis
 from celery import Celery
@@ -9,10 +8,9 @@ from redis.lock import Lock as RedisLock
 from sqlalchemy.orm import Session
 
 from onyx.configs.app_configs import DB_YIELD_PER_DEFAULT
+from onyx.configs.app_configs import VESPA_SYNC_BATCH_SIZE
 from onyx.configs.constants import CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import OnyxCeleryPriority
-from onyx.configs.constants import OnyxCeleryQueues
-from onyx.configs.constants import OnyxCeleryTask
 from onyx.configs.constants import OnyxRedisConstants
 from onyx.db.document_set import construct_document_id_select_by_docset
 from onyx.redis.redis_object_helper import RedisObjectHelper
@@ -65,7 +63,8 @@ class RedisDocumentSet(RedisObjectHelper):
         """
         last_lock_time = time.monotonic()
 
-        num_tasks_sent = 0
+        num_docs_queued = 0
+        batch: list[str] = []
 
         stmt = construct_document_id_select_by_docset(int(self._id), current_only=False)
         for doc_id in db_session.scalars(stmt).yield_per(DB_YIELD_PER_DEFAULT):
@@ -77,26 +76,25 @@ class RedisDocumentSet(RedisObjectHelper):
                 lock.reacquire()
                 last_lock_time = current_time
 
-            # celery's default task id format is "dd32ded3-00aa-4884-8b21-42f8332e7fac"
-            # the key for the result is "celery-task-meta-dd32ded3-00aa-4884-8b21-42f8332e7fac"
-            # we prefix the task id so it's easier to keep track of who created the task
-            # aka "documentset_1_6dd32ded3-00aa-4884-8b21-42f8332e7fac"
-            custom_task_id = f"{self.task_id_prefix}_{uuid4()}"
-
-            # add to the set BEFORE creating the task.
-            redis_client.sadd(self.taskset_key, custom_task_id)
-
-            celery_app.send_task(
-                OnyxCeleryTask.VESPA_METADATA_SYNC_TASK,
-                kwargs=dict(document_id=doc_id, tenant_id=tenant_id),
-                queue=OnyxCeleryQueues.VESPA_METADATA_SYNC,
-                task_id=custom_task_id,
-                priority=OnyxCeleryPriority.LOW,
+            batch.append(doc_id)
+            if len(batch) >= VESPA_SYNC_BATCH_SIZE:
+                self.send_vespa_metadata_sync_batch(
+                    batch,
+                    celery_app,
+                    redis_client,
+                    tenant_id,
+                    OnyxCeleryPriority.LOW,
+                )
+                num_docs_queued += len(batch)
+                batch = []
+
+        if batch:
+            self.send_vespa_metadata_sync_batch(
+                batch, celery_app, redis_client, tenant_id, OnyxCeleryPriority.LOW
             )
+            num_docs_queued += len(batch)
 
-            num_tasks_sent += 1
-
-        return num_tasks_sent, num_tasks_sent
+        return num_docs_queued, num_docs_queued
 
     def reset(self) -> None:
         self.redis.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
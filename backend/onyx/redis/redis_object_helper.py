@@ -1,11 +1,15 @@
 from abc import ABC
 from abc import abstractmethod
+from uuid import uuid4
 
 from celery import Celery
 from redis import Redis
 from redis.lock import Lock as RedisLock
 from sqlalchemy.orm import Session
 
+from onyx.configs.constants import OnyxCeleryPriority
+from onyx.configs.constants import OnyxCeleryQueues
+from onyx.configs.constants import OnyxCeleryTask
 from onyx.redis.redis_pool import get_redis_client
 
 
@@ -79,6 +83,46 @@ class RedisObjectHelper(ABC):
         object_id = parts[1]
         return object_id
 
+    @staticmethod
+    def get_taskset_members(task_id: str, num_documents: int) -> list[str]:
+        """Batched sync tasks put one member per document in the taskset, so that the
+        fence payload and the remaining count of the taskset stay in documents.
+
+        Example:
+            documentset_1_cbfdc96a-80ca-4312-a242-0bb68da3c1dc:0
+        """
+        return [f"{task_id}:{i}" for i in range(num_documents)]
+
+    def send_vespa_metadata_sync_batch(
+        self,
+        document_ids: list[str],
+        celery_app: Celery,
+        redis_client: Redis,
+        tenant_id: str,
+        priority: OnyxCeleryPriority,
+        ignore_result: bool = False,
+    ) -> None:
+        # celery's default task id format is "dd32ded3-00aa-4884-8b21-42f8332e7fac"
+        # the key for the result is "celery-task-meta-dd32ded3-00aa-4884-8b21-42f8332e7fac"
+        # we prefix the task id so it's easier to keep track of who created the task
+        # aka "documentset_1_6dd32ded3-00aa-4884-8b21-42f8332e7fac"
+        custom_task_id = f"{self.task_id_prefix}_{uuid4()}"
+
+        # add to the set BEFORE creating the task.
+        redis_client.sadd(
+            self.taskset_key,
+            *self.get_taskset_members(custom_task_id, len(document_ids)),
+        )
+
+        celery_app.send_task(
+            OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK,
+            kwargs=dict(document_ids=document_ids, tenant_id=tenant_id),
+            queue=OnyxCeleryQueues.VESPA_METADATA_SYNC,
+            task_id=custom_task_id,
+            priority=priority,
+            ignore_result=ignore_result,
+        )
+
     @abstractmethod
     def generate_tasks(
         self,
@@ -89,8 +133,9 @@ class RedisObjectHelper(ABC):
         lock: RedisLock,
         tenant_id: str,
     ) -> tuple[int, int] | None:
-        """First element should be the number of actual tasks generated, second should
-        be the number of docs that were candidates to be synced for the cc pair.
+        """First element should be the number of documents queued for syncing (tasks
+        are batched, so this is not the number of celery tasks), second should be the
+        number of docs that were candidates to be synced for the cc pair.
 
         The need for this is when we are syncing stale docs referenced by multiple
         connectors. In a single pass across multiple cc pairs, we only want a task
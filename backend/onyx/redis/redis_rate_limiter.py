@@ -0,0 +1,182 @@
+"""
+Token bucket rate limiter shared through Redis by every worker (indexing, pruning,
+permission sync, ...) that talks to the same external tenant with the same credential.
+
+The bucket state (tokens, last refill, backoff deadline) lives in a single Redis hash
+and is only ever touched by Lua scripts, so acquiring a token is atomic across
+processes. The scripts use the Redis server clock, which avoids clock skew between
+workers. When the external service answers with a Retry-After, the deadline is stored
+in the same hash so that all workers back off instead of each discovering the limit
+on its own.
+"""
+
+import time
+from typing import cast
+
+from prometheus_client import Counter
+from prometheus_client import Histogram
+from redis import Redis
+
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
+
+CONNECTOR_RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "onyx_connector_rate_limit_wait_seconds",
+    "Time spent waiting on the shared connector rate limiter",
+    ["source"],
+    buckets=(0.01, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300),
+)
+CONNECTOR_RATE_LIMIT_BACKOFFS = Counter(
+    "onyx_connector_rate_limit_backoffs",
+    "Rate limit responses (e.g. 429 with Retry-After) shared with other workers",
+    ["source"],
+)
+
+# returns the number of milliseconds to wait before trying again, 0 if a token was taken
+_ACQUIRE_SCRIPT = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local ttl_ms = tonumber(ARGV[3])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local state = redis.call('HMGET', key, 'tokens', 'ts', 'blocked_until')
+local blocked_until = tonumber(state[3]) or 0
+if blocked_until > now then
+    return blocked_until - now
+end
+if rate <= 0 then
+    return 0
+end
+
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate / 1000)
+
+local wait_ms = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait_ms = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', key, ttl_ms)
+return wait_ms
+"""
+
+# returns the number of milliseconds until the (possibly extended) backoff ends
+_BACKOFF_SCRIPT = """
+local key = KEYS[1]
+local delay_ms = tonumber(ARGV[1])
+local cumulative = ARGV[2] == '1'
+local ttl_ms = tonumber(ARGV[3])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local blocked_until = tonumber(redis.call('HGET', key, 'blocked_until')) or 0
+local new_blocked_until
+if cumulative then
+    new_blocked_until = math.max(now, blocked_until) + delay_ms
+else
+    new_blocked_until = math.max(blocked_until, now + delay_ms)
+end
+redis.call('HSET', key, 'blocked_until', new_blocked_until)
+redis.call('PEXPIRE', key, new_blocked_until - now + ttl_ms)
+return new_blocked_until - now
+"""
+
+
+class RedisRateLimitTimeoutError(Exception):
+    pass
+
+
+class RedisRateLimiter:
+    """Shared token bucket for calls to an external service.
+
+    rate: tokens (requests) added per second. 0 disables the bucket, in which case
+    only the shared backoff set via backoff() is applied.
+    burst: maximum number of tokens the bucket holds, i.e. how many requests may be
+    made back to back after a quiet period.
+    tenant_id: defaults to the current tenant. The scripts bypass the key prefixing of
+    the tenant redis client, so the tenant has to be part of the bucket key itself,
+    otherwise credentials with the same id in different tenants share a bucket."""
+
+    PREFIX = "connector_rate_limit"
+
+    # idle buckets are dropped after this, they are full again by then anyway
+    TTL_MS = 10 * 60 * 1000
+
+    # sleep in short increments so that waiting workers notice a refill early
+    MAX_SLEEP = 5.0
+
+    def __init__(
+        self,
+        redis: Redis,
+        source: str,
+        key: str,
+        rate: float = 0.0,
+        burst: int = 1,
+        tenant_id: str | None = None,
+    ) -> None:
+        self.redis = redis
+        self.source = source
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tenant_id = tenant_id or get_current_tenant_id()
+        self.bucket_key = f"{self.PREFIX}:{self.tenant_id}:{source}:{key}"
+
+        self._acquire_script = redis.register_script(_ACQUIRE_SCRIPT)
+        self._backoff_script = redis.register_script(_BACKOFF_SCRIPT)
+
+    def _try_acquire(self) -> float:
+        wait_ms = self._acquire_script(
+            keys=[self.bucket_key], args=[self.rate, self.burst, self.TTL_MS]
+        )
+        return int(cast(int, wait_ms)) / 1000.0
+
+    def acquire(self, timeout: float | None = None) -> float:
+        """Blocks until a request may be made. Returns the number of seconds waited.
+
+        Raises RedisRateLimitTimeoutError if the wait would exceed timeout."""
+        start = time.monotonic()
+        while True:
+            wait = self._try_acquire()
+            if wait <= 0:
+                break
+
+            waited = time.monotonic() - start
+            if timeout is not None and waited + wait > timeout:
+                CONNECTOR_RATE_LIMIT_WAIT_SECONDS.labels(self.source).observe(waited)
+                raise RedisRateLimitTimeoutError(
+                    f"Rate limiter for {self.bucket_key} would need to wait "
+                    f"{waited + wait:.1f}s, longer than the timeout of {timeout}s"
+                )
+
+            time.sleep(min(wait, self.MAX_SLEEP))
+
+        waited = time.monotonic() - start
+        CONNECTOR_RATE_LIMIT_WAIT_SECONDS.labels(self.source).observe(waited)
+        if waited >= 1:
+            logger.debug(f"Waited {waited:.1f}s on rate limiter {self.bucket_key}")
+        return waited
+
+    def backoff(self, seconds: float, cumulative: bool = False) -> float:
+        """Makes every worker sharing this limiter wait for `seconds` before the next
+        request, e.g. to honour a Retry-After header.
+
+        If cumulative, the delay is added on top of any backoff already in progress,
+        which serializes workers that keep hitting the limit. Otherwise the backoff
+        ends at the later of the current deadline and now + seconds.
+
+        Returns the number of seconds until the shared backoff ends."""
+        CONNECTOR_RATE_LIMIT_BACKOFFS.labels(self.source).inc()
+        remaining_ms = self._backoff_script(
+            keys=[self.bucket_key],
+            args=[int(seconds * 1000), "1" if cumulative else "0", self.TTL_MS],
+        )
+        return int(cast(int, remaining_ms)) / 1000.0
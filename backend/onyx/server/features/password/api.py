@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi_users.exceptions import InvalidPasswordException
 from sqlalchemy.orm import Session
 
@@ -51,7 +52,10 @@ async def admin_reset_user_password(
     """
     Reset the password for a user (admin only).
     """
-    user = get_user_by_email(user_reset_request.user_email, db_session)
+    # blocking db calls are run in the threadpool, not on the event loop
+    user = await run_in_threadpool(
+        get_user_by_email, user_reset_request.user_email, db_session
+    )
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     new_password = await user_manager.reset_password_as_admin(user.id)
@@ -420,7 +420,7 @@ def deactivate_user(
 
 
 @router.delete("/manage/admin/delete-user")
-async def delete_user(
+def delete_user(
     user_email: UserByEmail,
     _: User | None = Depends(current_admin_user),
     db_session: Session = Depends(get_session),
@@ -0,0 +1,104 @@
+"""
+Detects blocking work on the event loop of the api server.
+
+Anything synchronous that runs in an `async def` handler (or async dependency /
+middleware) blocks every other request served by the process. A background task
+measures how late the loop wakes it up (the event loop lag), and when the lag is over
+EVENT_LOOP_BLOCKED_THRESHOLD, the async handlers that were in flight at the time are
+logged and counted as the likely culprits.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable
+from collections.abc import Callable
+
+from fastapi import FastAPI
+from fastapi import Request
+from fastapi import Response
+from prometheus_client import Counter
+from prometheus_client import Histogram
+from starlette.types import Scope
+
+from onyx.configs.app_configs import EVENT_LOOP_BLOCKED_THRESHOLD
+from onyx.configs.app_configs import EVENT_LOOP_LAG_MONITOR_INTERVAL
+
+_UNKNOWN_HANDLER = "unknown"
+_MAX_RECENTLY_FINISHED = 1000
+
+_event_loop_lag = Histogram(
+    "onyx_api_event_loop_lag_seconds",
+    "How late the api server event loop ran a scheduled wake up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+_event_loop_blocked = Counter(
+    "onyx_api_event_loop_blocked_total",
+    "Times the event loop lag went over the threshold, by async handler in flight",
+    ["handler"],
+)
+
+# scopes of the requests in flight (the route is added to them once the request is
+# routed), and of the ones that finished recently with their end time. A blocking
+# handler can finish before the monitor gets to run again
+_in_flight_scopes: dict[int, Scope] = {}
+_recently_finished_scopes: deque[tuple[float, Scope]] = deque(
+    maxlen=_MAX_RECENTLY_FINISHED
+)
+
+
+def _async_handlers_in_flight(since: float) -> list[str]:
+    """The async handlers that were in flight at some point since `since`."""
+    while _recently_finished_scopes and _recently_finished_scopes[0][0] < since:
+        _recently_finished_scopes.popleft()
+
+    scopes = list(_in_flight_scopes.values()) + [
+        scope for _, scope in _recently_finished_scopes
+    ]
+    handlers: set[str] = set()
+    for scope in scopes:
+        route = scope.get("route")
+        endpoint = getattr(route, "endpoint", None)
+        # sync handlers run in the threadpool, they can't block the loop
+        if endpoint is not None and asyncio.iscoroutinefunction(endpoint):
+            handlers.add(f"{scope.get('method')} {getattr(route, 'path', '')}")
+    return sorted(handlers)
+
+
+def add_event_loop_blocking_middleware(app: FastAPI) -> None:
+    @app.middleware("http")
+    async def track_in_flight_requests(
+        request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        key = id(request.scope)
+        _in_flight_scopes[key] = request.scope
+        try:
+            return await call_next(request)
+        finally:
+            _in_flight_scopes.pop(key, None)
+            _recently_finished_scopes.append((time.monotonic(), request.scope))
+
+
+def record_event_loop_lag(
+    lag: float, since: float, logger: logging.LoggerAdapter
+) -> None:
+    _event_loop_lag.observe(lag)
+    if lag <= EVENT_LOOP_BLOCKED_THRESHOLD:
+        return
+
+    handlers = _async_handlers_in_flight(since)
+    for handler in handlers or [_UNKNOWN_HANDLER]:
+        _event_loop_blocked.labels(handler=handler).inc()
+    logger.warning(
+        f"Event loop blocked for {lag:.3f}s - "
+        f"async handlers in flight: {', '.join(handlers) or _UNKNOWN_HANDLER}"
+    )
+
+
+async def monitor_event_loop_lag(logger: logging.LoggerAdapter) -> None:
+    while True:
+        start = time.monotonic()
+        await asyncio.sleep(EVENT_LOOP_LAG_MONITOR_INTERVAL)
+        lag = time.monotonic() - start - EVENT_LOOP_LAG_MONITOR_INTERVAL
+        record_event_loop_lag(max(lag, 0.0), start, logger)
@@ -1,5 +1,6 @@
 import asyncio
 import datetime
+import hashlib
 import io
 import json
 import os
@@ -17,6 +18,7 @@ from fastapi import Query
 from fastapi import Request
 from fastapi import Response
 from fastapi import UploadFile
+from fastapi.responses import FileResponse
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
@@ -59,11 +61,13 @@ from onyx.db.engine import get_session_with_tenant
 from onyx.db.enums import AccessType
 from onyx.db.feedback import create_chat_message_feedback
 from onyx.db.feedback import create_doc_retrieval_feedback
+from onyx.db.models import PGFileStore
 from onyx.db.models import User
 from onyx.db.persona import get_persona_by_id
 from onyx.db.user_documents import create_user_files
 from onyx.file_processing.extract_file_text import docx_to_txt_filename
 from onyx.file_processing.extract_file_text import extract_file_text
+from onyx.file_store.constants import STANDARD_CHUNK_SIZE
 from onyx.file_store.file_store import get_default_file_store
 from onyx.file_store.models import ChatFileType
 from onyx.file_store.models import FileDescriptor
@@ -96,6 +100,9 @@ from onyx.server.query_and_chat.models import SearchFeedbackRequest
 from onyx.server.query_and_chat.models import UpdateChatSessionTemperatureRequest
 from onyx.server.query_and_chat.models import UpdateChatSessionThreadRequest
 from onyx.server.query_and_chat.token_limit import check_token_rate_limits
+from onyx.server.utils import etag_matches
+from onyx.server.utils import parse_byte_range
+from onyx.server.utils import RangeNotSatisfiableError
 from onyx.utils.headers import get_custom_tool_additional_request_headers
 from onyx.utils.logger import setup_logger
 from onyx.utils.telemetry import create_milestone_and_report
@@ -829,12 +836,41 @@ def upload_files_for_chat(
     }
 
 
+def _get_file_etag(file_record: PGFileStore) -> str:
+    # a file saved again under the same name gets a new large object, objects in
+    # an object store are addressed by the hash of their content
+    key = f"{file_record.file_name}:{file_record.object_key or file_record.lobj_oid}"
+    return f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+
+def _stream_file_range(
+    tenant_id: str, file_id: str, start: int, length: int
+) -> Generator[bytes, None, None]:
+    # the session of the request is closed before the body is streamed, so the
+    # file is read with its own session (which the reader needs to stay open)
+    with get_session_with_tenant(tenant_id=tenant_id) as db_session:
+        file_store = get_default_file_store(db_session)
+        with file_store.open_file_reader(file_id) as reader:
+            reader.seek(start)
+            remaining = length
+            while remaining > 0:
+                chunk = reader.read(min(STANDARD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+
 @router.get("/file/{file_id:path}")
 def fetch_chat_file(
     file_id: str,
+    request: Request,
     db_session: Session = Depends(get_session),
     _: User | None = Depends(current_user),
 ) -> Response:
+    """Streams the file, supporting single `Range` requests (so that browsers can
+    resume downloads and fetch parts of large PDFs) and conditional requests through
+    the `ETag`, `If-None-Match` and `If-Range` headers."""
     file_store = get_default_file_store(db_session)
     file_record = file_store.read_file_record(file_id)
     if not file_record:
@@ -853,13 +889,58 @@ def fetch_chat_file(
             file_id = txt_file_id
 
     media_type = file_record.file_type
-    file_io = file_store.read_file(file_id, mode="b")
+    etag = _get_file_etag(file_record)
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        # cached by the browser, but checked with If-None-Match before reuse
+        "Cache-Control": "private, no-cache",
+    }
 
-    return StreamingResponse(file_io, media_type=media_type)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    file_path = file_store.get_file_path(file_id)
+    if file_path is not None:
+        # files on a local volume are served straight from disk (with sendfile when
+        # the server supports it), FileResponse handles Range and If-Range itself
+        return FileResponse(file_path, media_type=media_type, headers=headers)
+
+    with file_store.open_file_reader(file_id) as reader:
+        file_size = reader.seek(0, io.SEEK_END)
+
+    byte_range: tuple[int, int] | None = None
+    range_header = request.headers.get("Range")
+    if_range = request.headers.get("If-Range")
+    # If-Range: only send the range if the file didn't change, else the whole file
+    if range_header and (if_range is None or if_range == etag):
+        try:
+            byte_range = parse_byte_range(range_header, file_size)
+        except RangeNotSatisfiableError:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{file_size}"},
+            )
+
+    status_code = 200
+    start, end = 0, file_size - 1
+    if byte_range is not None:
+        status_code = 206
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+    length = end - start + 1
+    headers["Content-Length"] = str(length)
+
+    return StreamingResponse(
+        _stream_file_range(get_current_tenant_id(), file_id, start, length),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
 
 
 @router.get("/search")
-async def search_chats(
+def search_chats(
     query: str | None = Query(None),
     page: int = Query(1),
     page_size: int = Query(10),
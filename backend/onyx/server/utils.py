@@ -83,3 +83,55 @@ def make_short_id() -> str:
     to trace it through a flow. This is definitely not guaranteed to be unique and is
     targeted at the stated use case."""
     return base64.b32encode(os.urandom(5)).decode("utf-8")[:8]  # 5 bytes → 8 chars
+
+
+class RangeNotSatisfiableError(Exception):
+    pass
+
+
+def parse_byte_range(range_header: str, size: int) -> tuple[int, int] | None:
+    """Parses the `Range` header of a request for a resource of `size` bytes.
+
+    Returns the (inclusive) start and end of the requested range, or None if the
+    header should be ignored and the whole resource served: it isn't a byte range,
+    asks for multiple ranges or is malformed.
+    Raises RangeNotSatisfiableError if the range lies outside of the resource.
+    """
+    unit, _, range_spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in range_spec:
+        return None
+
+    start_str, sep, end_str = range_spec.strip().partition("-")
+    if not sep:
+        return None
+
+    try:
+        if not start_str:
+            # suffix range, the last `end_str` bytes
+            suffix_length = int(end_str)
+            if suffix_length <= 0 or size == 0:
+                raise RangeNotSatisfiableError(range_header)
+            return max(size - suffix_length, 0), size - 1
+
+        start = int(start_str)
+        end = int(end_str) if end_str else None
+    except ValueError:
+        return None
+
+    if start < 0 or (end is not None and end < start):
+        return None
+    if start >= size:
+        raise RangeNotSatisfiableError(range_header)
+
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an `If-None-Match` header against the ETag of a resource."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
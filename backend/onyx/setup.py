@@ -123,7 +123,10 @@ def setup_onyx(
         and not search_settings.provider_type
         and not search_settings.rerank_provider_type
     ):
-        warm_up_cross_encoder(search_settings.rerank_model_name)
+        warm_up_cross_encoder(
+            search_settings.rerank_model_name,
+            inference_backend=search_settings.rerank_inference_backend,
+        )
 
     logger.notice("Verifying query preprocessing (NLTK) data is downloaded")
     download_nltk_data()
@@ -1,9 +1,11 @@
 import collections.abc
 import contextvars
 import copy
+import queue
 import threading
 import uuid
 from collections.abc import Callable
+from collections.abc import Generator
 from collections.abc import Iterator
 from collections.abc import MutableMapping
 from collections.abc import Sequence
@@ -360,3 +362,79 @@ def parallel_yield(gens: list[Iterator[R]], max_workers: int = 10) -> Iterator[R
                     )
                     next_ind += 1
                 del future_to_index[future]
+
+
+class _BackgroundIteratorDone:
+    """Sentinel placed on the queue once the wrapped iterator is exhausted."""
+
+
+class _BackgroundIteratorError:
+    """Carries an exception raised by the wrapped iterator to the consumer."""
+
+    def __init__(self, exception: BaseException) -> None:
+        self.exception = exception
+
+
+def iterate_in_background(
+    gen: Iterator[R], max_buffered: int, poll_interval: float = 0.5
+) -> Generator[R, None, None]:
+    """
+    Drives `gen` from a background thread and yields its items in order. At most
+    `max_buffered` items are produced ahead of the consumer, so a slow consumer
+    applies backpressure to the producer.
+
+    Chaining several of these (each wrapping a generator that consumes the previous
+    one) gives a pipeline where every stage runs concurrently and is bounded by its
+    own queue. Exceptions raised by `gen` are re-raised in the consumer. If the
+    consumer stops early, the producer is told to stop and `gen` is closed.
+
+    If `max_buffered` is <= 0, `gen` is simply iterated inline in the caller's thread.
+    """
+    if max_buffered <= 0:
+        yield from gen
+        return
+
+    buffer: queue.Queue[Any] = queue.Queue(maxsize=max_buffered)
+    stop_event = threading.Event()
+
+    def _put(item: Any) -> bool:
+        while not stop_event.is_set():
+            try:
+                buffer.put(item, timeout=poll_interval)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce() -> None:
+        try:
+            for item in gen:
+                if not _put(item):
+                    return
+            _put(_BackgroundIteratorDone())
+        except BaseException as e:
+            _put(_BackgroundIteratorError(e))
+        finally:
+            close = getattr(gen, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception:
+                    logger.exception("Failed to close background iterator")
+
+    # propagate contextvars (e.g. tenant id) to the producer thread
+    context = contextvars.copy_context()
+    producer = threading.Thread(target=context.run, args=(_produce,), daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            item = buffer.get()
+            if isinstance(item, _BackgroundIteratorDone):
+                return
+            if isinstance(item, _BackgroundIteratorError):
+                raise item.exception
+            yield item
+    finally:
+        stop_event.set()
+        producer.join()
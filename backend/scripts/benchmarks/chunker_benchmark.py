@@ -0,0 +1,123 @@
+"""
+Micro-benchmark for the Chunker on chat-like documents (Slack threads, Jira comment
+chains), i.e. documents made of many small sections.
+
+Reports wall time per document and the "tokenizer amplification": the number of
+characters passed to the tokenizer divided by the number of characters in the
+document. With per-section token accounting this stays roughly constant as the
+number of sections grows; re-tokenizing the accumulated chunk for every new
+section makes it grow with the chunk size.
+
+No services are needed. Run from the backend directory:
+    python -m scripts.benchmarks.chunker_benchmark
+"""
+
+import argparse
+import random
+import time
+
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import Document
+from onyx.connectors.models import TextSection
+from onyx.indexing.chunker import Chunker
+from onyx.indexing.indexing_pipeline import process_image_sections
+from onyx.natural_language_processing.utils import BaseTokenizer
+from onyx.natural_language_processing.utils import get_tokenizer
+
+_WORDS = (
+    "deploy rollback incident ticket sprint review merge branch pipeline flaky test "
+    "customer escalation priority blocker update thanks looks good to me ship it "
+    "please take a look when you get a chance the dashboard is red again"
+).split()
+
+
+class CountingTokenizer(BaseTokenizer):
+    """Wraps a tokenizer and counts how many characters it was asked to process."""
+
+    def __init__(self, tokenizer: BaseTokenizer) -> None:
+        self.tokenizer = tokenizer
+        self.chars_processed = 0
+
+    def encode(self, string: str) -> list[int]:
+        self.chars_processed += len(string)
+        return self.tokenizer.encode(string)
+
+    def tokenize(self, string: str) -> list[str]:
+        self.chars_processed += len(string)
+        return self.tokenizer.tokenize(string)
+
+    def decode(self, tokens: list[int]) -> str:
+        return self.tokenizer.decode(tokens)
+
+
+def _random_message(rng: random.Random, min_words: int, max_words: int) -> str:
+    return " ".join(
+        rng.choice(_WORDS) for _ in range(rng.randint(min_words, max_words))
+    )
+
+
+def build_thread_document(
+    doc_id: str, num_sections: int, source: DocumentSource, rng: random.Random
+) -> Document:
+    return Document(
+        id=doc_id,
+        source=source,
+        semantic_identifier=f"{source.value} thread {doc_id}",
+        metadata={"channel": "benchmark"},
+        doc_updated_at=None,
+        sections=[
+            TextSection(
+                text=f"user_{rng.randint(0, 20)}: {_random_message(rng, 3, 40)}",
+                link=f"https://example.com/{doc_id}#{i}",
+            )
+            for i in range(num_sections)
+        ],
+    )
+
+
+def run_benchmark(section_counts: list[int], docs_per_size: int, seed: int) -> None:
+    tokenizer = CountingTokenizer(get_tokenizer(model_name=None, provider_type=None))
+    chunker = Chunker(tokenizer=tokenizer, enable_multipass=True)
+    rng = random.Random(seed)
+
+    print(
+        f"{'source':<8} {'sections':>9} {'chunks/doc':>11} {'ms/doc':>9} "
+        f"{'amplification':>14}"
+    )
+    for source in (DocumentSource.SLACK, DocumentSource.JIRA):
+        for num_sections in section_counts:
+            documents = process_image_sections(
+                [
+                    build_thread_document(f"{i}", num_sections, source, rng)
+                    for i in range(docs_per_size)
+                ]
+            )
+            doc_chars = sum(doc.get_total_char_length() for doc in documents)
+
+            tokenizer.chars_processed = 0
+            start = time.perf_counter()
+            chunks = chunker.chunk(documents)
+            elapsed = time.perf_counter() - start
+
+            print(
+                f"{source.value:<8} {num_sections:>9} "
+                f"{len(chunks) / docs_per_size:>11.1f} "
+                f"{elapsed * 1000 / docs_per_size:>9.2f} "
+                f"{tokenizer.chars_processed / doc_chars:>14.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sections",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000, 5000],
+        help="Number of sections per synthetic document",
+    )
+    parser.add_argument("--docs", type=int, default=5, help="Documents per size")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    run_benchmark(args.sections, args.docs, args.seed)
@@ -0,0 +1,152 @@
+"""
+Benchmark for the batching of the texts sent to a local embedding model during
+indexing, on the mix of texts an indexing batch produces with multipass indexing: each
+chunk (mostly full, 512 tokens, the last one of a document shorter) followed by its
+mini chunks (150 tokens).
+
+The model server pads every batch to its longest text. For each batching strategy,
+reports the number of batches and the padding waste: the share of the tokens run
+through the model that are padding.
+
+With --model-server, also embeds the texts with the model server (which must be
+running and serving --model) and reports the throughput of each strategy.
+
+Run from the backend directory:
+    python -m scripts.benchmarks.embedding_batching_benchmark
+    python -m scripts.benchmarks.embedding_batching_benchmark --model-server
+"""
+
+import argparse
+import random
+import time
+
+from onyx.configs.app_configs import MINI_CHUNK_SIZE
+from onyx.configs.model_configs import BATCH_SIZE_ENCODE_CHUNKS
+from onyx.configs.model_configs import DOC_EMBEDDING_CONTEXT_SIZE
+from shared_configs.configs import INDEXING_MODEL_SERVER_HOST
+from shared_configs.configs import INDEXING_MODEL_SERVER_PORT
+from shared_configs.enums import EmbedTextType
+from shared_configs.utils import batch_by_token_budget
+from shared_configs.utils import batch_list
+
+
+def build_text_lengths(num_docs: int, rng: random.Random) -> list[int]:
+    """Token lengths of the chunk texts of an indexing batch, in the order the embedder
+    sends them (titles are embedded in a separate call)."""
+    lengths: list[int] = []
+    for _ in range(num_docs):
+        num_chunks = rng.randint(1, 6)
+        for chunk_idx in range(num_chunks):
+            if chunk_idx < num_chunks - 1:
+                chunk_length = DOC_EMBEDDING_CONTEXT_SIZE
+            else:
+                chunk_length = rng.randint(30, DOC_EMBEDDING_CONTEXT_SIZE)
+            lengths.append(chunk_length)
+
+            num_mini_chunks = -(-chunk_length // MINI_CHUNK_SIZE)
+            for mini_chunk_idx in range(num_mini_chunks):
+                lengths.append(
+                    min(
+                        MINI_CHUNK_SIZE, chunk_length - mini_chunk_idx * MINI_CHUNK_SIZE
+                    )
+                )
+    return lengths
+
+
+def padding_waste(lengths: list[int], index_batches: list[list[int]]) -> float:
+    padded_tokens = sum(
+        max(lengths[i] for i in batch) * len(batch) for batch in index_batches
+    )
+    return 1 - sum(lengths) / padded_tokens
+
+
+def _fixed_batches(lengths: list[int], batch_size: int) -> list[list[int]]:
+    return batch_list(list(range(len(lengths))), batch_size)
+
+
+def _bucketed_batches(lengths: list[int], batch_size: int) -> list[list[int]]:
+    return batch_by_token_budget(
+        lengths, token_budget=batch_size * DOC_EMBEDDING_CONTEXT_SIZE
+    )
+
+
+def _build_text(num_tokens: int, rng: random.Random) -> str:
+    # short common words are a single token for the usual embedding tokenizers
+    return " ".join(
+        rng.choice(("data", "index", "team", "plan")) for _ in range(num_tokens)
+    )
+
+
+def run_benchmark(
+    num_docs: int, batch_size: int, seed: int, model_server: bool, model: str
+) -> None:
+    rng = random.Random(seed)
+    lengths = build_text_lengths(num_docs, rng)
+    print(f"{len(lengths)} texts, {sum(lengths)} tokens")
+
+    strategies = {
+        "fixed": _fixed_batches(lengths, batch_size),
+        "bucketed": _bucketed_batches(lengths, batch_size),
+    }
+
+    print(f"{'strategy':<9} {'batches':>8} {'padding waste':>14}")
+    for name, index_batches in strategies.items():
+        print(
+            f"{name:<9} {len(index_batches):>8} "
+            f"{padding_waste(lengths, index_batches):>14.1%}"
+        )
+
+    if not model_server:
+        return
+
+    from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
+
+    embedding_model = EmbeddingModel(
+        server_host=INDEXING_MODEL_SERVER_HOST,
+        server_port=INDEXING_MODEL_SERVER_PORT,
+        model_name=model,
+        normalize=True,
+        query_prefix=None,
+        passage_prefix=None,
+        api_key=None,
+        api_url=None,
+        provider_type=None,
+    )
+    texts = [_build_text(length, rng) for length in lengths]
+    # warm up the model server
+    embedding_model.encode(texts[:batch_size], text_type=EmbedTextType.PASSAGE)
+
+    print(f"{'strategy':<9} {'seconds':>8} {'texts/s':>8}")
+    for name, length_bucketing in (("fixed", False), ("bucketed", True)):
+        start = time.perf_counter()
+        embedding_model._batch_encode_texts(
+            texts=texts,
+            text_type=EmbedTextType.PASSAGE,
+            batch_size=batch_size,
+            max_seq_length=DOC_EMBEDDING_CONTEXT_SIZE,
+            length_bucketing=length_bucketing,
+        )
+        elapsed = time.perf_counter() - start
+        print(f"{name:<9} {elapsed:>8.2f} {len(texts) / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=16, help="Documents per batch")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE_ENCODE_CHUNKS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--model-server",
+        action="store_true",
+        help="Also measure the throughput against the indexing model server",
+    )
+    parser.add_argument("--model", default="nomic-ai/nomic-embed-text-v1")
+    args = parser.parse_args()
+
+    run_benchmark(
+        num_docs=args.docs,
+        batch_size=args.batch_size,
+        seed=args.seed,
+        model_server=args.model_server,
+        model=args.model,
+    )
@@ -0,0 +1,162 @@
+"""
+Benchmark for the inference backends of the local models: torch, ONNX Runtime and
+ONNX Runtime with int8 weights (InferenceBackend).
+
+For each backend, reports the latency of a single query (batch of 1, what the search
+flow sends) and the throughput on batches of passages (what indexing sends), as well as
+the minimum cosine similarity of the embeddings to the torch ones. With --rerank, also
+benchmarks the reranking model on one query and --rerank-docs passages.
+
+Runs the models in process on the CPU, no model server needed. Requires
+optimum[onnxruntime]. Run from the backend directory:
+    python -m scripts.benchmarks.onnx_inference_benchmark
+    python -m scripts.benchmarks.onnx_inference_benchmark --rerank
+"""
+
+import argparse
+import random
+import statistics
+import time
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+from sentence_transformers import CrossEncoder  # type: ignore
+from sentence_transformers import SentenceTransformer  # type: ignore
+
+from model_server.onnx_models import load_onnx_embedding_model
+from model_server.onnx_models import load_onnx_reranking_model
+from shared_configs.enums import InferenceBackend
+
+_WORDS = (
+    "deploy rollback incident ticket sprint review merge branch pipeline customer "
+    "escalation priority blocker connector credentials index search document answer "
+    "the a of to and for with on is was please update when"
+).split()
+
+
+def _random_text(rng: random.Random, min_words: int, max_words: int) -> str:
+    return " ".join(
+        rng.choice(_WORDS) for _ in range(rng.randint(min_words, max_words))
+    )
+
+
+def _time_calls(fn: Callable[[], Any], repeats: int) -> list[float]:
+    # warm up, the first call allocates the ONNX Runtime buffers
+    fn()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _load_embedding_model(
+    model_name: str, inference_backend: InferenceBackend
+) -> SentenceTransformer:
+    if inference_backend == InferenceBackend.TORCH:
+        return SentenceTransformer(model_name, trust_remote_code=True)
+    return load_onnx_embedding_model(model_name, inference_backend)
+
+
+def _load_reranking_model(model_name: str, inference_backend: InferenceBackend) -> Any:
+    if inference_backend == InferenceBackend.TORCH:
+        return CrossEncoder(model_name)
+    return load_onnx_reranking_model(model_name, inference_backend)
+
+
+def benchmark_embedding(
+    model_name: str, num_passages: int, batch_size: int, repeats: int, seed: int
+) -> None:
+    rng = random.Random(seed)
+    query = _random_text(rng, 5, 15)
+    passages = [_random_text(rng, 50, 350) for _ in range(num_passages)]
+
+    print(f"Embedding model {model_name}, {num_passages} passages")
+    print(
+        f"{'backend':<10} {'query p50 ms':>13} {'query p95 ms':>13} "
+        f"{'passages/s':>11} {'min cosine':>11}"
+    )
+    torch_embeddings: np.ndarray | None = None
+    for inference_backend in InferenceBackend:
+        model = _load_embedding_model(model_name, inference_backend)
+        query_timings = _time_calls(
+            lambda: model.encode([query], normalize_embeddings=True), repeats
+        )
+
+        start = time.perf_counter()
+        embeddings = model.encode(
+            passages, batch_size=batch_size, normalize_embeddings=True
+        )
+        passages_per_second = num_passages / (time.perf_counter() - start)
+
+        if torch_embeddings is None:
+            torch_embeddings = embeddings
+        min_cosine = float(np.sum(torch_embeddings * embeddings, axis=1).min())
+
+        print(
+            f"{inference_backend.value:<10} "
+            f"{statistics.median(query_timings) * 1000:>13.1f} "
+            f"{np.percentile(query_timings, 95) * 1000:>13.1f} "
+            f"{passages_per_second:>11.1f} {min_cosine:>11.4f}"
+        )
+
+
+def benchmark_reranking(
+    model_name: str, num_docs: int, repeats: int, seed: int
+) -> None:
+    rng = random.Random(seed)
+    pairs = [
+        (_random_text(rng, 5, 15), _random_text(rng, 50, 350)) for _ in range(num_docs)
+    ]
+
+    print(f"Reranking model {model_name}, {num_docs} passages per query")
+    print(f"{'backend':<10} {'p50 ms':>8} {'p95 ms':>8} {'max score diff':>15}")
+    torch_scores: np.ndarray | None = None
+    for inference_backend in InferenceBackend:
+        model = _load_reranking_model(model_name, inference_backend)
+        timings = _time_calls(lambda: model.predict(pairs), repeats)
+
+        scores = np.asarray(model.predict(pairs))
+        if torch_scores is None:
+            torch_scores = scores
+        max_diff = float(np.abs(torch_scores - scores).max())
+
+        print(
+            f"{inference_backend.value:<10} "
+            f"{statistics.median(timings) * 1000:>8.1f} "
+            f"{np.percentile(timings, 95) * 1000:>8.1f} {max_diff:>15.4f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="intfloat/e5-base-v2")
+    parser.add_argument("--passages", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--rerank", action="store_true", help="Also benchmark the reranking model"
+    )
+    parser.add_argument(
+        "--rerank-model", default="mixedbread-ai/mxbai-rerank-xsmall-v1"
+    )
+    parser.add_argument("--rerank-docs", type=int, default=50)
+    args = parser.parse_args()
+
+    benchmark_embedding(
+        model_name=args.model,
+        num_passages=args.passages,
+        batch_size=args.batch_size,
+        repeats=args.repeats,
+        seed=args.seed,
+    )
+    if args.rerank:
+        benchmark_reranking(
+            model_name=args.rerank_model,
+            num_docs=args.rerank_docs,
+            repeats=args.repeats,
+            seed=args.seed,
+        )
@@ -0,0 +1,180 @@
+"""
+Benchmark for AdvancedPDFReader on synthetic 10 / 100 / 500 page PDFs mixing pages
+with embedded text and scanned (image only) pages.
+
+Compares the current reader (OCR only for pages without usable embedded text, page
+ranges rasterized straight from the original file, in parallel) against the previous
+approach of re-serializing the whole PDF and OCR'ing every page, one at a time. The
+latter is quadratic in the number of pages, so it is skipped above --legacy-max-pages.
+
+Needs pdftoppm (poppler-utils) and tesseract to be installed. Run from the backend
+directory:
+    python -m scripts.benchmarks.pdf_reader_benchmark
+"""
+
+import argparse
+import io
+import random
+import time
+
+from pdf2image import convert_from_bytes  # type: ignore
+from PIL import Image
+from PIL import ImageDraw
+from pypdf import PdfReader
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject
+from pypdf.generic import DictionaryObject
+from pypdf.generic import NameObject
+
+from onyx.file_processing.pdf.advanced_pdf_reader import AdvancedPDFReader
+from onyx.file_processing.pdf.advanced_pdf_reader import needs_ocr
+
+_WORDS = (
+    "revenue quarter growth margin forecast customer contract renewal invoice "
+    "payment balance statement liability asset equity audit report summary"
+).split()
+
+_PAGE_WIDTH = 612
+_PAGE_HEIGHT = 792
+
+
+def _random_lines(rng: random.Random, num_lines: int) -> list[str]:
+    return [" ".join(rng.choices(_WORDS, k=10)) for _ in range(num_lines)]
+
+
+def _add_text_page(writer: PdfWriter, lines: list[str]) -> None:
+    page = writer.add_blank_page(width=_PAGE_WIDTH, height=_PAGE_HEIGHT)
+    font = writer._add_object(
+        DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject("/Helvetica"),
+            }
+        )
+    )
+    page[NameObject("/Resources")] = DictionaryObject(
+        {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+    )
+    content = DecodedStreamObject()
+    content.set_data(
+        (
+            "BT /F1 11 Tf 14 TL 50 740 Td "
+            + " ".join(f"({line}) '" for line in lines)
+            + " ET"
+        ).encode()
+    )
+    page[NameObject("/Contents")] = writer._add_object(content)
+
+
+def _add_scanned_page(writer: PdfWriter, lines: list[str]) -> None:
+    # 150 DPI letter page, like a typical scan
+    image = Image.new("L", (1275, 1650), color=255)
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(lines):
+        draw.text((100, 100 + i * 30), line, fill=0)
+    page_pdf = io.BytesIO()
+    image.save(page_pdf, format="PDF", resolution=150)
+    writer.append(PdfReader(page_pdf))
+
+
+def build_pdf(num_pages: int, scanned_ratio: float, rng: random.Random) -> bytes:
+    writer = PdfWriter()
+    for _ in range(num_pages):
+        lines = _random_lines(rng, 40)
+        if rng.random() < scanned_ratio:
+            _add_scanned_page(writer, lines)
+        else:
+            _add_text_page(writer, lines)
+    pdf = io.BytesIO()
+    writer.write(pdf)
+    return pdf.getvalue()
+
+
+def legacy_process_pdf(reader: AdvancedPDFReader) -> list[str]:
+    """The previous implementation: every page re-serializes the whole document and
+    is OCR'd, regardless of its embedded text."""
+    texts = []
+    for page_number in range(len(reader.reader.pages)):
+        native_text = reader.extract_native_text(page_number)
+        pdf_writer = PdfWriter()
+        for page in reader.reader.pages:
+            pdf_writer.add_page(page)
+        pdf_bytes = io.BytesIO()
+        pdf_writer.write(pdf_bytes)
+        images = convert_from_bytes(
+            pdf_bytes.getvalue(),
+            first_page=page_number + 1,
+            last_page=page_number + 1,
+            dpi=300,
+            grayscale=True,
+        )
+        ocr_text = "".join(reader.extract_text_from_image(image) for image in images)
+        texts.append(reader.merge_texts(native_text, ocr_text))
+    return texts
+
+
+def run_benchmark(
+    page_counts: list[int],
+    scanned_ratio: float,
+    max_workers: int,
+    legacy_max_pages: int,
+    seed: int,
+) -> None:
+    rng = random.Random(seed)
+    print(
+        f"{'pages':>6} {'ocr pages':>10} {'mode':>8} {'seconds':>9} "
+        f"{'pages/s':>8} {'first page s':>13}"
+    )
+    for num_pages in page_counts:
+        pdf_bytes = build_pdf(num_pages, scanned_ratio, rng)
+
+        reader = AdvancedPDFReader(io.BytesIO(pdf_bytes), max_workers=max_workers)
+        num_ocr_pages = sum(
+            needs_ocr(reader.extract_native_text(page_number))
+            for page_number in range(num_pages)
+        )
+
+        start = time.monotonic()
+        first_page_seconds = 0.0
+        for page in reader.iter_pages():
+            if page.page_number == 0:
+                first_page_seconds = time.monotonic() - start
+        elapsed = time.monotonic() - start
+        print(
+            f"{num_pages:>6} {num_ocr_pages:>10} {'current':>8} {elapsed:>9.2f} "
+            f"{num_pages / elapsed:>8.1f} {first_page_seconds:>13.2f}"
+        )
+
+        if num_pages > legacy_max_pages:
+            continue
+        start = time.monotonic()
+        legacy_process_pdf(reader)
+        elapsed = time.monotonic() - start
+        print(
+            f"{num_pages:>6} {num_pages:>10} {'legacy':>8} {elapsed:>9.2f} "
+            f"{num_pages / elapsed:>8.1f} {'-':>13}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--page-counts", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument(
+        "--scanned-ratio",
+        type=float,
+        default=0.3,
+        help="Share of the pages that are scanned images without embedded text",
+    )
+    parser.add_argument("--max-workers", type=int, default=4)
+    parser.add_argument("--legacy-max-pages", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run_benchmark(
+        page_counts=args.page_counts,
+        scanned_ratio=args.scanned_ratio,
+        max_workers=args.max_workers,
+        legacy_max_pages=args.legacy_max_pages,
+        seed=args.seed,
+    )
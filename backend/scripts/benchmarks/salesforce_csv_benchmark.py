@@ -0,0 +1,188 @@
+"""
+Benchmark for loading Salesforce bulk API CSV exports into the connector's sqlite db
+(OnyxSalesforceSQLite.update_from_csv).
+
+Generates a synthetic Contact export (by default 1M rows, each referencing an
+Account and an owning User) and loads it into a fresh db with:
+- legacy: one INSERT OR REPLACE and relationship update per row, committing every
+  1024 rows (the previous implementation, reproduced here for reference)
+- batched: update_from_csv parsing inline
+- background: update_from_csv parsing in a separate process
+
+No services are needed. Run from the backend directory:
+    python -m scripts.benchmarks.salesforce_csv_benchmark --rows 1000000
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import sqlite3
+import string
+import tempfile
+import time
+
+from onyx.connectors.salesforce.sqlite_functions import _parse_csv_row
+from onyx.connectors.salesforce.sqlite_functions import OnyxSalesforceSQLite
+from onyx.connectors.salesforce.utils import _LOOKUP
+
+_ID_CHARS = string.ascii_letters + string.digits
+
+
+def _salesforce_id(prefix: str, rng: random.Random) -> str:
+    """18 character id with a valid checksum (see validate_salesforce_id)."""
+    id_15 = prefix + "".join(rng.choice(_ID_CHARS) for _ in range(12))
+    checksum = ""
+    for chunk in (id_15[0:5], id_15[5:10], id_15[10:15]):
+        bits = "".join("1" if char.isupper() else "0" for char in reversed(chunk))
+        checksum += _LOOKUP[bits]
+    return id_15 + checksum
+
+
+def write_contacts_csv(path: str, num_rows: int, seed: int) -> None:
+    rng = random.Random(seed)
+    account_ids = [_salesforce_id("001", rng) for _ in range(max(num_rows // 100, 1))]
+    user_ids = [_salesforce_id("005", rng) for _ in range(100)]
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            ["Id", "AccountId", "OwnerId", "FirstName", "LastName", "Email", "Title"]
+        )
+        for i in range(num_rows):
+            writer.writerow(
+                [
+                    _salesforce_id("003", rng),
+                    rng.choice(account_ids),
+                    rng.choice(user_ids),
+                    f"First{i}",
+                    f"Last{i}",
+                    f"contact{i}@example.com",
+                    rng.choice(["", "CEO", "Engineer", "Sales Rep"]),
+                ]
+            )
+
+
+def _legacy_update_from_csv(
+    conn: sqlite3.Connection, object_type: str, csv_path: str
+) -> None:
+    cursor = conn.cursor()
+    with open(csv_path, "r", newline="", encoding="utf-8") as f:
+        uncommitted_rows = 0
+        for row in csv.DictReader(f):
+            id, data, parent_ids = _parse_csv_row(row)
+            cursor.execute(
+                "INSERT OR REPLACE INTO salesforce_objects (id, object_type, data) "
+                "VALUES (?, ?, ?)",
+                (id, object_type, data),
+            )
+
+            cursor.execute(
+                "SELECT parent_id FROM relationships WHERE child_id = ?", (id,)
+            )
+            old_parent_ids = {r[0] for r in cursor.fetchall()}
+            for parent_id in old_parent_ids - set(parent_ids):
+                cursor.execute(
+                    "DELETE FROM relationships WHERE child_id = ? AND parent_id = ?",
+                    (id, parent_id),
+                )
+                cursor.execute(
+                    "DELETE FROM relationship_types "
+                    "WHERE child_id = ? AND parent_id = ?",
+                    (id, parent_id),
+                )
+            for parent_id in set(parent_ids) - old_parent_ids:
+                cursor.execute(
+                    "INSERT INTO relationships (child_id, parent_id) VALUES (?, ?)",
+                    (id, parent_id),
+                )
+                cursor.execute(
+                    "SELECT object_type FROM salesforce_objects WHERE id = ?",
+                    (parent_id,),
+                )
+                result = cursor.fetchone()
+                if result:
+                    cursor.execute(
+                        "INSERT INTO relationship_types "
+                        "(child_id, parent_id, parent_type) VALUES (?, ?, ?)",
+                        (id, parent_id, result[0]),
+                    )
+
+            uncommitted_rows += 1
+            if uncommitted_rows >= 1024:
+                conn.commit()
+                uncommitted_rows = 0
+    conn.commit()
+
+
+def _fresh_db(directory: str, name: str) -> OnyxSalesforceSQLite:
+    sf_db = OnyxSalesforceSQLite(os.path.join(directory, f"{name}.sqlite"))
+    sf_db.connect()
+    sf_db.apply_schema()
+    return sf_db
+
+
+def _count_rows(sf_db: OnyxSalesforceSQLite) -> tuple[int, int]:
+    cursor = sf_db.cursor()
+    cursor.execute("SELECT COUNT(*) FROM salesforce_objects")
+    num_objects = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM relationships")
+    return num_objects, cursor.fetchone()[0]
+
+
+def run_benchmark(num_rows: int, seed: int, skip_legacy: bool) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "Contact.csv")
+        start = time.monotonic()
+        write_contacts_csv(csv_path, num_rows, seed)
+        print(
+            f"Generated {num_rows} rows "
+            f"({os.path.getsize(csv_path) / 1024 / 1024:.1f} MB) "
+            f"in {time.monotonic() - start:.1f}s"
+        )
+
+        modes = ["batched", "background"]
+        if not skip_legacy:
+            modes.insert(0, "legacy")
+
+        for mode in modes:
+            sf_db = _fresh_db(directory, mode)
+            start = time.monotonic()
+            if mode == "legacy":
+                conn = sf_db._conn
+                assert conn is not None
+                _legacy_update_from_csv(conn, "Contact", csv_path)
+            else:
+                sf_db.update_from_csv(
+                    "Contact", csv_path, parse_in_background=mode == "background"
+                )
+            elapsed = time.monotonic() - start
+
+            num_objects, num_relationships = _count_rows(sf_db)
+            print(
+                json.dumps(
+                    {
+                        "mode": mode,
+                        "seconds": round(elapsed, 2),
+                        "rows_per_second": round(num_rows / elapsed),
+                        "objects": num_objects,
+                        "relationships": num_relationships,
+                    }
+                )
+            )
+            sf_db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--skip-legacy",
+        action="store_true",
+        help="don't run the (slow) row at a time reference implementation",
+    )
+    args = parser.parse_args()
+
+    run_benchmark(args.rows, args.seed, args.skip_legacy)
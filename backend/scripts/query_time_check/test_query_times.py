@@ -12,7 +12,14 @@ from onyx.context.search.models import IndexFilters
 from onyx.db.engine import get_session_context_manager
 from onyx.db.search_settings import get_current_search_settings
 from onyx.document_index.document_index_utils import get_multipass_config
+from onyx.document_index.vespa.chunk_retrieval import query_vespa
 from onyx.document_index.vespa.index import VespaIndex
+from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
+    build_vespa_filters,
+)
+from onyx.document_index.vespa_constants import ACCESS_CONTROL_LIST
+from onyx.document_index.vespa_constants import VESPA_TIMEOUT
+from onyx.document_index.vespa_constants import YQL_BASE
 from scripts.query_time_check.seed_dummy_docs import TOTAL_ACL_ENTRIES_PER_CATEGORY
 from scripts.query_time_check.seed_dummy_docs import TOTAL_DOC_SETS
 from shared_configs.model_server_models import Embedding
@@ -128,5 +135,76 @@ def test_hybrid_retrieval_times(
     print(f"99th percentile: {get_slowest_99th_percentile(results):.4f} seconds")
 
 
+def _acl_of_size(acl_size: int) -> list[str]:
+    """A user email and `acl_size - 1` external groups, like a user in an EE deployment
+    with external group sync. Most of the groups don't match any seeded document."""
+    return [
+        f"user_email:user_{random.randint(0, TOTAL_ACL_ENTRIES_PER_CATEGORY - 1)}@example.com"
+    ] + [f"external_group:external_group_{i}" for i in range(acl_size - 1)]
+
+
+def _legacy_acl_filter(acl: list[str]) -> str:
+    """The ACL filter as it used to be built, one `contains` clause per entry."""
+    or_clause = " or ".join(f'{ACCESS_CONTROL_LIST} contains "{val}"' for val in acl)
+    return f"({or_clause}) and "
+
+
+def test_query_times_by_acl_size(
+    acl_sizes: list[int],
+    number_of_queries: int,
+) -> None:
+    """Compares the query latency for growing ACLs between the legacy `contains ... or`
+    clauses, the `in` operator with the values inlined in the YQL and the `in` operator
+    with the values passed as a query parameter (what retrieval uses)."""
+    with get_session_context_manager() as db_session:
+        index_name = get_current_search_settings(db_session).index_name
+
+    keyword_query = '({grammar: "weakAnd"}userInput(@query))'
+    print(
+        f"{'ACL size':>8} {'mode':>10} {'YQL chars':>10} {'avg (s)':>8} {'p99 (s)':>8}"
+    )
+    for acl_size in acl_sizes:
+        for mode in ("legacy_or", "inline_in", "param_in"):
+            results = []
+            yql_length = 0
+            for i in range(number_of_queries):
+                filters = IndexFilters(access_control_list=_acl_of_size(acl_size))
+                params: dict[str, str | int | float] = {}
+                if mode == "legacy_or":
+                    filters_str = _legacy_acl_filter(filters.access_control_list or [])
+                else:
+                    filters_str = build_vespa_filters(
+                        filters,
+                        include_hidden=True,
+                        params=params if mode == "param_in" else None,
+                    )
+                yql = (
+                    YQL_BASE.format(index_name=index_name) + filters_str + keyword_query
+                )
+                yql_length = len(yql)
+                params.update(
+                    {
+                        "yql": yql,
+                        "query": f"Random Query {i}",
+                        "hits": 10,
+                        "ranking.profile": "admin_search",
+                        "timeout": VESPA_TIMEOUT,
+                    }
+                )
+
+                start_time = time.time()
+                query_vespa(params)
+                results.append(time.time() - start_time)
+
+            print(
+                f"{acl_size:>8} {mode:>10} {yql_length:>10} "
+                f"{sum(results) / len(results):>8.4f} "
+                f"{get_slowest_99th_percentile(results):>8.4f}"
+            )
+
+
 if __name__ == "__main__":
     test_hybrid_retrieval_times(number_of_queries=1000)
+    test_query_times_by_acl_size(
+        acl_sizes=[1, 10, 100, 1_000, 5_000], number_of_queries=100
+    )
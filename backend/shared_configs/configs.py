@@ -52,6 +52,16 @@ DISABLE_RERANK_FOR_STREAMING = (
 # model. If torch finds more threads on its own, this value is not used.
 MIN_THREADS_ML_MODELS = int(os.environ.get("MIN_THREADS_ML_MODELS") or 1)
 
+# Concurrent requests for the same local model that arrive within this many milliseconds
+# of each other are run as a single forward pass of at most MODEL_SERVER_MAX_BATCH_SIZE
+# texts (see model_server/batching.py). 0 disables it.
+MODEL_SERVER_BATCH_WAIT_MS = float(os.environ.get("MODEL_SERVER_BATCH_WAIT_MS") or 5)
+MODEL_SERVER_MAX_BATCH_SIZE = int(os.environ.get("MODEL_SERVER_MAX_BATCH_SIZE") or 64)
+
+# Instruction set the weights of the models using the "onnx_int8" inference backend are
+# quantized for, one of "avx2", "avx512", "avx512_vnni" or "arm64"
+ONNX_QUANTIZATION_CONFIG = os.environ.get("ONNX_QUANTIZATION_CONFIG") or "avx2"
+
 # Model server that has indexing only set will throw exception if used for reranking
 # or intent classification
 INDEXING_ONLY = os.environ.get("INDEXING_ONLY", "").lower() == "true"
@@ -105,6 +115,8 @@ PRESERVED_SEARCH_FIELDS = [
     "normalize",
     "passage_prefix",
     "query_prefix",
+    # the embeddings of the int8 backend are not exactly the torch ones
+    "inference_backend",
 ]
 
 
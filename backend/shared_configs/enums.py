@@ -19,3 +19,14 @@ class RerankerProvider(str, Enum):
 class EmbedTextType(str, Enum):
     QUERY = "query"
     PASSAGE = "passage"
+
+
+class InferenceBackend(str, Enum):
+    """How the model server runs a local model"""
+
+    TORCH = "torch"
+    # ONNX Runtime, for faster inference on CPUs
+    ONNX = "onnx"
+    # ONNX Runtime with the weights dynamically quantized to int8, faster still but the
+    # outputs are slightly different from the torch ones
+    ONNX_INT8 = "onnx_int8"
@@ -2,6 +2,7 @@ from pydantic import BaseModel
 
 from shared_configs.enums import EmbeddingProvider
 from shared_configs.enums import EmbedTextType
+from shared_configs.enums import InferenceBackend
 from shared_configs.enums import RerankerProvider
 
 
@@ -37,6 +38,9 @@ class EmbedRequest(BaseModel):
     # will be ignored for other providers.
     reduced_dimension: int | None = None
 
+    # only used for local models
+    inference_backend: InferenceBackend = InferenceBackend.TORCH
+
     # This disables the "model_" protected namespace for pydantic
     model_config = {"protected_namespaces": ()}
 
@@ -52,6 +56,8 @@ class RerankRequest(BaseModel):
     provider_type: RerankerProvider | None = None
     api_key: str | None = None
     api_url: str | None = None
+    # only used for local models
+    inference_backend: InferenceBackend = InferenceBackend.TORCH
 
     # This disables the "model_" protected namespace for pydantic
     model_config = {"protected_namespaces": ()}
@@ -9,3 +9,23 @@ def batch_list(
     batch_size: int,
 ) -> list[list[T]]:
     return [lst[i : i + batch_size] for i in range(0, len(lst), batch_size)]
+
+
+def batch_by_token_budget(lengths: list[int], token_budget: int) -> list[list[int]]:
+    """Groups the indices of items with the given token `lengths` into batches that
+    hold at most `token_budget` tokens once padded to their longest item (an item
+    longer than the budget gets a batch of its own). Items are sorted by length, so
+    the items of a batch have similar lengths and short items end up in large
+    batches."""
+    batches: list[list[int]] = []
+    current_batch: list[int] = []
+    for idx in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # sorted, so the new item would be the longest of the batch
+        if current_batch and lengths[idx] * (len(current_batch) + 1) > token_budget:
+            batches.append(current_batch)
+            current_batch = []
+        current_batch.append(idx)
+
+    if current_batch:
+        batches.append(current_batch)
+    return batches
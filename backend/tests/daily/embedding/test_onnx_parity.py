@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from sentence_transformers import CrossEncoder  # type: ignore
+from sentence_transformers import SentenceTransformer  # type: ignore
+
+from model_server.onnx_models import load_onnx_embedding_model
+from model_server.onnx_models import load_onnx_reranking_model
+from shared_configs.enums import InferenceBackend
+
+pytest.importorskip("optimum.onnxruntime")
+
+EMBEDDING_MODEL = "intfloat/e5-base-v2"
+RERANKING_MODEL = "mixedbread-ai/mxbai-rerank-xsmall-v1"
+
+QUERY = "How do I rotate the API keys of a connector?"
+PASSAGES = [
+    "API keys of a connector can be rotated from the connector settings page.",
+    "The indexing attempt failed because the credentials had expired.",
+    "Our quarterly planning meeting is moved to Thursday.",
+    "hi",
+    "Rotating keys " * 200,
+]
+
+# the minimum cosine similarity to the torch embeddings
+_MIN_COSINE = {InferenceBackend.ONNX: 0.999, InferenceBackend.ONNX_INT8: 0.98}
+# the maximum difference to the torch reranking scores
+_MAX_SCORE_DIFF = {InferenceBackend.ONNX: 1e-3, InferenceBackend.ONNX_INT8: 0.05}
+
+
+@pytest.mark.parametrize(
+    "inference_backend", [InferenceBackend.ONNX, InferenceBackend.ONNX_INT8]
+)
+def test_onnx_embedding_parity(inference_backend: InferenceBackend) -> None:
+    torch_model = SentenceTransformer(EMBEDDING_MODEL)
+    onnx_model = load_onnx_embedding_model(EMBEDDING_MODEL, inference_backend)
+
+    texts = [f"passage: {passage}" for passage in PASSAGES] + [f"query: {QUERY}"]
+    torch_embeddings = torch_model.encode(texts, normalize_embeddings=True)
+    onnx_embeddings = onnx_model.encode(texts, normalize_embeddings=True)
+
+    cosines = np.sum(torch_embeddings * onnx_embeddings, axis=1)
+    assert cosines.min() >= _MIN_COSINE[inference_backend]
+
+
+@pytest.mark.parametrize(
+    "inference_backend", [InferenceBackend.ONNX, InferenceBackend.ONNX_INT8]
+)
+def test_onnx_reranking_parity(inference_backend: InferenceBackend) -> None:
+    torch_model = CrossEncoder(RERANKING_MODEL)
+    onnx_model = load_onnx_reranking_model(RERANKING_MODEL, inference_backend)
+
+    pairs = [(QUERY, passage) for passage in PASSAGES]
+    torch_scores = torch_model.predict(pairs)
+    onnx_scores = onnx_model.predict(pairs)
+
+    assert (
+        np.abs(torch_scores - onnx_scores).max() <= _MAX_SCORE_DIFF[inference_backend]
+    )
+    assert np.argmax(torch_scores) == np.argmax(onnx_scores)
@@ -0,0 +1,116 @@
+import io
+import threading
+import uuid
+from pathlib import Path
+
+from onyx.configs.constants import FileOrigin
+from onyx.db.engine import get_session_context_manager
+from onyx.file_store.file_store import ObjectBackedFileStore
+from onyx.file_store.object_store import FilesystemObjectStore
+
+
+def _save(
+    file_store: ObjectBackedFileStore,
+    file_name: str,
+    content: bytes,
+    commit: bool = True,
+) -> None:
+    file_store.save_file(
+        file_name=file_name,
+        content=io.BytesIO(content),
+        display_name=None,
+        file_origin=FileOrigin.PLAINTEXT_CACHE,
+        file_type="text/plain",
+        commit=commit,
+    )
+
+
+def test_overwrite_without_commit_releases_the_previous_object(
+    tmp_path: Path,
+) -> None:
+    object_store = FilesystemObjectStore(str(tmp_path))
+    file_name = f"plaintext_{uuid.uuid4()}"
+    old_content = f"old {file_name}".encode()
+    new_content = f"new {file_name}".encode()
+
+    with get_session_context_manager() as db_session:
+        file_store = ObjectBackedFileStore(db_session, object_store)
+        _save(file_store, file_name, old_content)
+        old_object_key = file_store.read_file_record(file_name).object_key
+        assert old_object_key is not None
+
+        _save(file_store, file_name, new_content, commit=False)
+        # still referenced by the committed record
+        assert object_store.exists(old_object_key)
+
+        db_session.commit()
+
+        assert not object_store.exists(old_object_key)
+        assert file_store.read_file(file_name).read() == new_content
+        file_store.delete_file(file_name)
+
+
+def test_overwrite_without_commit_keeps_the_previous_object_on_rollback(
+    tmp_path: Path,
+) -> None:
+    object_store = FilesystemObjectStore(str(tmp_path))
+    file_name = f"plaintext_{uuid.uuid4()}"
+    old_content = f"old {file_name}".encode()
+
+    with get_session_context_manager() as db_session:
+        file_store = ObjectBackedFileStore(db_session, object_store)
+        _save(file_store, file_name, old_content)
+        old_object_key = file_store.read_file_record(file_name).object_key
+        assert old_object_key is not None
+
+        _save(file_store, file_name, f"new {file_name}".encode(), commit=False)
+        db_session.rollback()
+        # the next commit of the session runs the release, which finds the
+        # object still referenced
+        db_session.commit()
+
+        assert object_store.exists(old_object_key)
+        assert file_store.read_file(file_name).read() == old_content
+        file_store.delete_file(file_name)
+
+
+def test_release_waits_for_a_concurrent_save_of_the_same_content(
+    tmp_path: Path,
+) -> None:
+    object_store = FilesystemObjectStore(str(tmp_path))
+    run_id = uuid.uuid4()
+    first_file_name = f"chat_upload_{run_id}_1"
+    second_file_name = f"chat_upload_{run_id}_2"
+    content = f"shared content {run_id}".encode()
+
+    with (
+        get_session_context_manager() as saving_session,
+        get_session_context_manager() as deleting_session,
+    ):
+        saving_store = ObjectBackedFileStore(saving_session, object_store)
+        deleting_store = ObjectBackedFileStore(deleting_session, object_store)
+
+        _save(saving_store, first_file_name, content)
+        object_key = saving_store.read_file_record(first_file_name).object_key
+        assert object_key is not None
+
+        # the object exists, so it isn't stored again, only referenced by a
+        # record that is not committed yet
+        _save(saving_store, second_file_name, content, commit=False)
+
+        # drops the last committed reference, the release has to wait for the save
+        delete_thread = threading.Thread(
+            target=deleting_store.delete_file, args=(first_file_name,)
+        )
+        delete_thread.start()
+        delete_thread.join(timeout=1)
+        assert delete_thread.is_alive()
+
+        saving_session.commit()
+        delete_thread.join(timeout=10)
+        assert not delete_thread.is_alive()
+
+        assert object_store.exists(object_key)
+        assert saving_store.read_file(second_file_name).read() == content
+        saving_store.delete_file(second_file_name)
+        assert not object_store.exists(object_key)
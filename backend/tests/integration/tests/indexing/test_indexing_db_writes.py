@@ -0,0 +1,263 @@
+"""
+Checks that the set based writes done at the end of indexing leave the same rows as
+the per row writes they replaced, which are kept below as the reference.
+"""
+
+import uuid
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from onyx.db.chunk import update_chunk_boost_components__no_commit
+from onyx.db.document import update_docs_after_indexing__no_commit
+from onyx.db.engine import get_session_context_manager
+from onyx.db.models import ChunkStats
+from onyx.db.models import Document as DbDocument
+from onyx.indexing.models import UpdatableChunkData
+
+_DOC_NAMES = ["doc_a", "doc_b", "doc_c"]
+_SEED_UPDATED_AT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+_SEED_LAST_MODIFIED = datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+
+def _update_chunk_boost_components_per_row(
+    chunk_data: list[UpdatableChunkData], db_session: Session
+) -> None:
+    for data in chunk_data:
+        chunk_in_doc_id = int(data.chunk_id)
+        if chunk_in_doc_id < 0:
+            raise ValueError(f"Chunk ID is empty for chunk {data}")
+
+        chunk_stats = (
+            db_session.query(ChunkStats)
+            .filter(ChunkStats.id == f"{data.document_id}__{chunk_in_doc_id}")
+            .first()
+        )
+        if chunk_stats:
+            chunk_stats.information_content_boost = data.boost_score
+            chunk_stats.last_modified = datetime.now(timezone.utc)
+            db_session.add(chunk_stats)
+        elif data.boost_score != 1.0:
+            db_session.add(
+                ChunkStats(
+                    document_id=data.document_id,
+                    chunk_in_doc_id=chunk_in_doc_id,
+                    information_content_boost=data.boost_score,
+                )
+            )
+
+
+def _update_docs_after_indexing_per_row(
+    document_ids: list[str],
+    ids_to_new_updated_at: dict[str, datetime],
+    doc_id_to_chunk_count: dict[str, int],
+    db_session: Session,
+) -> None:
+    for doc in db_session.query(DbDocument).filter(
+        DbDocument.id.in_(list(ids_to_new_updated_at))
+    ):
+        doc.doc_updated_at = ids_to_new_updated_at[doc.id]
+
+    now = datetime.now(timezone.utc)
+    for doc in db_session.query(DbDocument).filter(DbDocument.id.in_(document_ids)):
+        doc.last_modified = now
+
+    for doc in db_session.query(DbDocument).filter(DbDocument.id.in_(document_ids)):
+        doc.chunk_count = doc_id_to_chunk_count[doc.id]
+
+
+def _seed(db_session: Session, prefix: str, chunk_boosts: dict[str, float]) -> None:
+    for doc_name in _DOC_NAMES:
+        db_session.add(
+            DbDocument(
+                id=f"{prefix}{doc_name}",
+                semantic_id=doc_name,
+                doc_updated_at=_SEED_UPDATED_AT,
+                chunk_count=1,
+                last_modified=_SEED_LAST_MODIFIED,
+            )
+        )
+    db_session.flush()
+    for chunk_name, boost in chunk_boosts.items():
+        doc_name, chunk_in_doc_id = chunk_name.split("__")
+        db_session.add(
+            ChunkStats(
+                document_id=f"{prefix}{doc_name}",
+                chunk_in_doc_id=int(chunk_in_doc_id),
+                information_content_boost=boost,
+                last_modified=_SEED_LAST_MODIFIED,
+            )
+        )
+    db_session.commit()
+
+
+def _chunk_rows(db_session: Session, prefix: str) -> dict[str, tuple[Any, ...]]:
+    chunk_stats_list = db_session.scalars(
+        select(ChunkStats).where(ChunkStats.document_id.startswith(prefix))
+    ).all()
+    return {
+        chunk_stats.id.removeprefix(prefix): (
+            chunk_stats.document_id.removeprefix(prefix),
+            chunk_stats.chunk_in_doc_id,
+            chunk_stats.information_content_boost,
+            chunk_stats.last_modified != _SEED_LAST_MODIFIED,
+        )
+        for chunk_stats in chunk_stats_list
+    }
+
+
+def _document_rows(db_session: Session, prefix: str) -> dict[str, tuple[Any, ...]]:
+    documents = db_session.scalars(
+        select(DbDocument).where(DbDocument.id.startswith(prefix))
+    ).all()
+    return {
+        document.id.removeprefix(prefix): (
+            document.doc_updated_at,
+            document.chunk_count,
+            document.last_modified != _SEED_LAST_MODIFIED,
+        )
+        for document in documents
+    }
+
+
+def _chunk_data(
+    prefix: str, updates: list[tuple[str, float]]
+) -> list[UpdatableChunkData]:
+    chunk_data = []
+    for chunk_name, boost in updates:
+        doc_name, chunk_in_doc_id = chunk_name.split("__")
+        chunk_data.append(
+            UpdatableChunkData(
+                chunk_id=int(chunk_in_doc_id),
+                document_id=f"{prefix}{doc_name}",
+                boost_score=boost,
+            )
+        )
+    return chunk_data
+
+
+def _new_prefixes() -> tuple[str, str]:
+    run_id = uuid.uuid4().hex[:8]
+    return f"set_based_{run_id}_", f"per_row_{run_id}_"
+
+
+def test_chunk_boost_upsert_matches_per_row_path() -> None:
+    existing_boosts = {"doc_a__0": 0.5, "doc_a__1": 0.8, "doc_b__0": 1.0}
+    updates = [
+        # existing chunks, to a new score and back to neutral
+        ("doc_a__0", 0.7),
+        ("doc_a__1", 1.0),
+        ("doc_b__0", 0.6),
+        # new chunks, neutral ones are not saved
+        ("doc_b__1", 0.9),
+        ("doc_b__2", 1.0),
+        # duplicate ids, the last score wins
+        ("doc_c__0", 0.4),
+        ("doc_c__0", 0.3),
+        ("doc_c__1", 1.0),
+        ("doc_c__1", 0.2),
+        ("doc_c__2", 0.5),
+        ("doc_c__2", 1.0),
+        ("doc_a__0", 0.1),
+    ]
+
+    set_based_prefix, per_row_prefix = _new_prefixes()
+    with get_session_context_manager() as db_session:
+        _seed(db_session, set_based_prefix, existing_boosts)
+        _seed(db_session, per_row_prefix, existing_boosts)
+
+        update_chunk_boost_components__no_commit(
+            _chunk_data(set_based_prefix, updates), db_session
+        )
+        _update_chunk_boost_components_per_row(
+            _chunk_data(per_row_prefix, updates), db_session
+        )
+        db_session.commit()
+
+        set_based_rows = _chunk_rows(db_session, set_based_prefix)
+        assert set_based_rows == _chunk_rows(db_session, per_row_prefix)
+        assert set(set_based_rows) == {
+            "doc_a__0",
+            "doc_a__1",
+            "doc_b__0",
+            "doc_b__1",
+            "doc_c__0",
+            "doc_c__1",
+            "doc_c__2",
+        }
+        assert set_based_rows["doc_a__0"][2] == 0.1
+        assert set_based_rows["doc_c__2"][2] == 1.0
+
+
+def test_chunk_boost_upsert_empty_input() -> None:
+    set_based_prefix, _ = _new_prefixes()
+    with get_session_context_manager() as db_session:
+        _seed(db_session, set_based_prefix, {"doc_a__0": 0.5})
+
+        update_chunk_boost_components__no_commit([], db_session)
+        db_session.commit()
+
+        assert _chunk_rows(db_session, set_based_prefix) == {
+            "doc_a__0": ("doc_a", 0, 0.5, False)
+        }
+
+
+def test_docs_after_indexing_update_matches_per_row_path() -> None:
+    new_updated_at = _SEED_UPDATED_AT + timedelta(days=30)
+
+    set_based_prefix, per_row_prefix = _new_prefixes()
+    with get_session_context_manager() as db_session:
+        _seed(db_session, set_based_prefix, {})
+        _seed(db_session, per_row_prefix, {})
+
+        for prefix in (set_based_prefix, per_row_prefix):
+            # doc_b has no doc_updated_at from the source, doc_c is not indexed
+            # and doc_a shows up twice
+            document_ids = [f"{prefix}doc_a", f"{prefix}doc_b", f"{prefix}doc_a"]
+            ids_to_new_updated_at = {f"{prefix}doc_a": new_updated_at}
+            doc_id_to_chunk_count = {f"{prefix}doc_a": 5, f"{prefix}doc_b": 0}
+            if prefix == set_based_prefix:
+                update_docs_after_indexing__no_commit(
+                    document_ids=document_ids,
+                    ids_to_new_updated_at=ids_to_new_updated_at,
+                    doc_id_to_chunk_count=doc_id_to_chunk_count,
+                    db_session=db_session,
+                )
+            else:
+                _update_docs_after_indexing_per_row(
+                    document_ids=document_ids,
+                    ids_to_new_updated_at=ids_to_new_updated_at,
+                    doc_id_to_chunk_count=doc_id_to_chunk_count,
+                    db_session=db_session,
+                )
+        db_session.commit()
+
+        set_based_rows = _document_rows(db_session, set_based_prefix)
+        assert set_based_rows == _document_rows(db_session, per_row_prefix)
+        assert set_based_rows == {
+            "doc_a": (new_updated_at, 5, True),
+            "doc_b": (_SEED_UPDATED_AT, 0, True),
+            "doc_c": (_SEED_UPDATED_AT, 1, False),
+        }
+
+
+def test_docs_after_indexing_update_empty_input() -> None:
+    set_based_prefix, _ = _new_prefixes()
+    with get_session_context_manager() as db_session:
+        _seed(db_session, set_based_prefix, {})
+
+        update_docs_after_indexing__no_commit(
+            document_ids=[],
+            ids_to_new_updated_at={},
+            doc_id_to_chunk_count={},
+            db_session=db_session,
+        )
+        db_session.commit()
+
+        assert _document_rows(db_session, set_based_prefix) == {
+            doc_name: (_SEED_UPDATED_AT, 1, False) for doc_name in _DOC_NAMES
+        }
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+
+import pytest
+
+from model_server.batching import MicroBatcher
+
+
+class _RecordingModel:
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+        self._lock = threading.Lock()
+
+    def encode(self, texts: list[str]) -> list[str]:
+        with self._lock:
+            self.batches.append(texts)
+        return [text.upper() for text in texts]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_merged() -> None:
+    batcher: MicroBatcher[str, str] = MicroBatcher(
+        "test", max_batch_size=8, max_wait_seconds=0.05
+    )
+    model = _RecordingModel()
+
+    results = await asyncio.gather(
+        batcher.run("model", ["a"], model.encode),
+        batcher.run("model", ["b", "c"], model.encode),
+        batcher.run("model", ["d"], model.encode),
+    )
+
+    assert [list(result) for result in results] == [["A"], ["B", "C"], ["D"]]
+    assert model.batches == [["a", "b", "c", "d"]]
+
+
+@pytest.mark.asyncio
+async def test_batches_are_split_by_key_and_size() -> None:
+    batcher: MicroBatcher[str, str] = MicroBatcher(
+        "test", max_batch_size=3, max_wait_seconds=0.05
+    )
+    model = _RecordingModel()
+
+    results = await asyncio.gather(
+        batcher.run("model", ["a", "b"], model.encode),
+        batcher.run("other-model", ["c"], model.encode),
+        batcher.run("model", ["d", "e"], model.encode),
+        # as large as a batch, runs on its own right away
+        batcher.run("model", ["f", "g", "h"], model.encode),
+    )
+
+    assert [list(result) for result in results] == [
+        ["A", "B"],
+        ["C"],
+        ["D", "E"],
+        ["F", "G", "H"],
+    ]
+    assert sorted(model.batches) == [["a", "b"], ["c"], ["d", "e"], ["f", "g", "h"]]
+
+
+@pytest.mark.asyncio
+async def test_errors_are_raised_to_every_request_of_the_batch() -> None:
+    batcher: MicroBatcher[str, str] = MicroBatcher(
+        "test", max_batch_size=8, max_wait_seconds=0.05
+    )
+
+    def _fail(texts: list[str]) -> list[str]:
+        raise ValueError("model crashed")
+
+    results = await asyncio.gather(
+        batcher.run("model", ["a"], _fail),
+        batcher.run("model", ["b"], _fail),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+    # the batcher keeps working afterwards
+    model = _RecordingModel()
+    assert list(await batcher.run("model", ["c"], model.encode)) == ["C"]
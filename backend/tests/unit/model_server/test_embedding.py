@@ -7,6 +7,7 @@ from unittest.mock import AsyncMock
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
+import numpy as np
 import pytest
 from httpx import AsyncClient
 from litellm.exceptions import RateLimitError
@@ -118,7 +119,9 @@ async def test_embed_text_local_model() -> None:
             reduced_dimension=None,
         )
 
-        assert result == [[0.1, 0.2], [0.3, 0.4]]
+        # local embeddings stay a matrix until they are serialized
+        assert isinstance(result, np.ndarray)
+        assert result.tolist() == [[0.1, 0.2], [0.3, 0.4]]
         mock_model.encode.assert_called_once()
 
 
@@ -165,9 +168,10 @@ async def test_rate_limit_handling() -> None:
 
 @pytest.mark.asyncio
 async def test_concurrent_embeddings() -> None:
-    def mock_encode(*args: Any, **kwargs: Any) -> List[List[float]]:
+    def mock_encode(texts: List[str], **kwargs: Any) -> List[List[float]]:
         time.sleep(5)
-        return [[0.1, 0.2, 0.3]]
+        # concurrent requests may be merged into a single batch
+        return [[0.1, 0.2, 0.3]] * len(texts)
 
     test_req = EmbedRequest(
         texts=["test"],
@@ -0,0 +1,126 @@
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from model_server.encoders import router
+from shared_configs.embedding_transport import decode_embeddings
+from shared_configs.embedding_transport import EMBEDDING_COUNT_HEADER
+from shared_configs.embedding_transport import EMBEDDING_DIM_HEADER
+from shared_configs.embedding_transport import EMBEDDINGS_FLOAT16_MEDIA_TYPE
+from shared_configs.embedding_transport import EMBEDDINGS_FLOAT32_MEDIA_TYPE
+from shared_configs.embedding_transport import encode_embeddings
+from shared_configs.embedding_transport import select_embeddings_media_type
+from shared_configs.enums import EmbedTextType
+from shared_configs.model_server_models import EmbedRequest
+
+
+@pytest.mark.parametrize(
+    "accept,expected",
+    [
+        (None, None),
+        ("application/json", None),
+        ("*/*", None),
+        (
+            f"{EMBEDDINGS_FLOAT32_MEDIA_TYPE}, application/json;q=0.5",
+            EMBEDDINGS_FLOAT32_MEDIA_TYPE,
+        ),
+        (
+            f"application/json, {EMBEDDINGS_FLOAT16_MEDIA_TYPE}",
+            EMBEDDINGS_FLOAT16_MEDIA_TYPE,
+        ),
+    ],
+)
+def test_select_embeddings_media_type(accept: str | None, expected: str | None) -> None:
+    assert select_embeddings_media_type(accept) == expected
+
+
+def test_float32_round_trip_is_exact_for_float32_vectors() -> None:
+    embeddings = np.random.default_rng(0).random((16, 1024), dtype=np.float32)
+
+    content, headers = encode_embeddings(
+        embeddings.tolist(), EMBEDDINGS_FLOAT32_MEDIA_TYPE
+    )
+
+    assert len(content) == 16 * 1024 * 4
+    decoded = decode_embeddings(
+        content,
+        EMBEDDINGS_FLOAT32_MEDIA_TYPE,
+        num_embeddings=int(headers[EMBEDDING_COUNT_HEADER]),
+        dim=int(headers[EMBEDDING_DIM_HEADER]),
+    )
+    assert decoded == embeddings.tolist()
+
+    # the matrix of a local model is sent as is
+    assert encode_embeddings(embeddings, EMBEDDINGS_FLOAT32_MEDIA_TYPE) == (
+        content,
+        headers,
+    )
+
+
+def test_float16_round_trip() -> None:
+    embeddings = np.random.default_rng(0).random((4, 8)).tolist()
+
+    content, headers = encode_embeddings(embeddings, EMBEDDINGS_FLOAT16_MEDIA_TYPE)
+
+    assert len(content) == 4 * 8 * 2
+    decoded = decode_embeddings(
+        content, EMBEDDINGS_FLOAT16_MEDIA_TYPE, num_embeddings=4, dim=8
+    )
+    assert np.allclose(decoded, embeddings, atol=1e-3)
+
+
+def test_decode_rejects_truncated_payload() -> None:
+    content, _ = encode_embeddings([[0.1, 0.2, 0.3]], EMBEDDINGS_FLOAT32_MEDIA_TYPE)
+
+    with pytest.raises(ValueError):
+        decode_embeddings(
+            content[:-4], EMBEDDINGS_FLOAT32_MEDIA_TYPE, num_embeddings=1, dim=3
+        )
+
+
+def test_bi_encoder_embed_negotiates_format() -> None:
+    app = FastAPI()
+    app.include_router(router)
+    app.state.gpu_type = "NONE"
+    client = TestClient(app)
+
+    embed_request = EmbedRequest(
+        texts=["hello", "world"],
+        model_name="test-model",
+        max_context_length=512,
+        normalize_embeddings=True,
+        text_type=EmbedTextType.PASSAGE,
+    )
+    embeddings = [[0.5, 0.25, 0.125], [1.0, 2.0, 4.0]]
+
+    # what a local model returns
+    with patch(
+        "model_server.encoders.embed_request_vectors",
+        AsyncMock(return_value=np.array(embeddings, dtype=np.float32)),
+    ):
+        json_response = client.post(
+            "/encoder/bi-encoder-embed", json=embed_request.model_dump()
+        )
+        binary_response = client.post(
+            "/encoder/bi-encoder-embed",
+            json=embed_request.model_dump(),
+            headers={"Accept": EMBEDDINGS_FLOAT32_MEDIA_TYPE},
+        )
+
+    assert json_response.headers["Content-Type"] == "application/json"
+    assert json_response.json() == {"embeddings": embeddings}
+
+    assert binary_response.headers["Content-Type"] == EMBEDDINGS_FLOAT32_MEDIA_TYPE
+    assert (
+        decode_embeddings(
+            binary_response.content,
+            EMBEDDINGS_FLOAT32_MEDIA_TYPE,
+            num_embeddings=int(binary_response.headers[EMBEDDING_COUNT_HEADER]),
+            dim=int(binary_response.headers[EMBEDDING_DIM_HEADER]),
+        )
+        == embeddings
+    )
@@ -0,0 +1,136 @@
+import threading
+from collections.abc import Callable
+from collections.abc import Generator
+
+import pytest
+
+from onyx.background.indexing.run_indexing import _FetchedBatch
+from onyx.background.indexing.run_indexing import _pipeline_fetched_batches
+from onyx.connectors.models import ConnectorCheckpoint
+from onyx.connectors.models import Document
+from onyx.connectors.models import DocumentSource
+
+
+def _batch(doc_id: str) -> _FetchedBatch:
+    return _FetchedBatch(
+        document_batch=[
+            Document(
+                id=doc_id,
+                semantic_identifier=doc_id,
+                sections=[],
+                source=DocumentSource.FILE,
+                metadata={},
+            )
+        ]
+    )
+
+
+def _checkpoint() -> _FetchedBatch:
+    return _FetchedBatch(checkpoint_to_save=ConnectorCheckpoint(has_more=False))
+
+
+class _FakeStages:
+    """Records the order in which batches are embedded, written and checkpointed."""
+
+    def __init__(self, fetched_batches: list[_FetchedBatch]) -> None:
+        self.fetched_batches = fetched_batches
+        self.events: list[str] = []
+        self.fetch_closed = threading.Event()
+        self._lock = threading.Lock()
+
+    def record(self, event: str) -> None:
+        with self._lock:
+            self.events.append(event)
+
+    def fetch(self) -> Generator[_FetchedBatch, None, None]:
+        try:
+            for checkpoint_num, fetched_batch in enumerate(self.fetched_batches):
+                if fetched_batch.checkpoint_to_save is not None:
+                    self.record(f"fetch:checkpoint{checkpoint_num}")
+                yield fetched_batch
+        finally:
+            self.fetch_closed.set()
+
+    def run(
+        self,
+        embed_batch: Callable[[_FetchedBatch], None],
+        write_batch: Callable[[_FetchedBatch], None],
+        max_buffered: int = 2,
+    ) -> None:
+        """The write stage, as `_run_indexing` drives it."""
+        pipelined_batches = _pipeline_fetched_batches(
+            self.fetch(), embed_batch, max_buffered
+        )
+        try:
+            for checkpoint_num, pipelined_batch in enumerate(pipelined_batches):
+                if pipelined_batch.checkpoint_to_save is not None:
+                    self.record(f"save:checkpoint{checkpoint_num}")
+                    continue
+                write_batch(pipelined_batch)
+        finally:
+            pipelined_batches.close()
+
+
+def _doc_id(fetched_batch: _FetchedBatch) -> str:
+    assert fetched_batch.document_batch
+    return fetched_batch.document_batch[0].id
+
+
+def test_checkpoints_are_saved_after_the_writes_before_them() -> None:
+    stages = _FakeStages(
+        [_batch("a"), _batch("b"), _checkpoint(), _batch("c"), _checkpoint()]
+    )
+    second_embed_started = threading.Event()
+
+    def _embed(fetched_batch: _FetchedBatch) -> None:
+        if fetched_batch.document_batch is None:
+            return
+        if _doc_id(fetched_batch) == "b":
+            second_embed_started.set()
+        stages.record(f"embed:{_doc_id(fetched_batch)}")
+
+    def _write(fetched_batch: _FetchedBatch) -> None:
+        if _doc_id(fetched_batch) == "a":
+            # the next batch is embedded while this one is being written
+            assert second_embed_started.wait(timeout=5)
+        stages.record(f"write:{_doc_id(fetched_batch)}")
+
+    stages.run(_embed, _write)
+
+    writes_and_saves = [
+        event for event in stages.events if event.startswith(("write", "save"))
+    ]
+    assert writes_and_saves == [
+        "write:a",
+        "write:b",
+        "save:checkpoint2",
+        "write:c",
+        "save:checkpoint4",
+    ]
+
+
+def test_failed_write_saves_no_later_checkpoint() -> None:
+    stages = _FakeStages([_batch("a"), _batch("b"), _checkpoint(), _batch("c")])
+    next_embed_in_flight = threading.Event()
+    write_failed = threading.Event()
+
+    def _embed(fetched_batch: _FetchedBatch) -> None:
+        if fetched_batch.document_batch is None:
+            return
+        if _doc_id(fetched_batch) == "b":
+            next_embed_in_flight.set()
+            # still embedding when the write of "a" fails
+            assert write_failed.wait(timeout=5)
+        stages.record(f"embed:{_doc_id(fetched_batch)}")
+
+    def _write(fetched_batch: _FetchedBatch) -> None:
+        assert next_embed_in_flight.wait(timeout=5)
+        write_failed.set()
+        raise RuntimeError("Vespa write failed")
+
+    with pytest.raises(RuntimeError, match="Vespa write failed"):
+        stages.run(_embed, _write)
+
+    assert not any(event.startswith(("write", "save")) for event in stages.events)
+    # the connector is stopped instead of running on in the background
+    assert stages.fetch_closed.wait(timeout=5)
@@ -1,10 +1,16 @@
+from unittest.mock import MagicMock
+
 import pytest
 
+from onyx.chat import prune_and_merge
+from onyx.chat.prune_and_merge import _apply_pruning
 from onyx.chat.prune_and_merge import _merge_sections
+from onyx.chat.prune_and_merge import _section_content_token_count
 from onyx.configs.constants import DocumentSource
 from onyx.context.search.models import InferenceChunk
 from onyx.context.search.models import InferenceSection
 from onyx.context.search.utils import inference_section_from_chunks
+from onyx.natural_language_processing.utils import BaseTokenizer
 
 
 # This large test accounts for all of the following:
@@ -224,3 +230,95 @@ def test_merge_minimal_sections(
     merged_sections = _merge_sections(sections)
     assert merged_sections[0].combined_content == expected_content
     assert merged_sections[0].center_chunk == expected_center_chunk
+
+
+class _WhitespaceTokenizer:
+    def __init__(self) -> None:
+        self.encoded: list[str] = []
+
+    def encode(self, string: str) -> list[str]:
+        self.encoded.append(string)
+        return string.split()
+
+    def tokenize(self, string: str) -> list[str]:
+        return string.split()
+
+    def decode(self, tokens: list[str]) -> str:
+        return " ".join(tokens)
+
+
+def test_apply_pruning_truncates_copy_and_caches_chunk_counts(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    tokenizer = _WhitespaceTokenizer()
+    monkeypatch.setattr(prune_and_merge, "get_tokenizer", lambda **_: tokenizer)
+
+    words = " ".join(f"word{i}" for i in range(100))
+    sections = [
+        inference_section_from_chunks(
+            center_chunk=create_inference_chunk(f"pruning_doc{i}", 0, words, 1.0),
+            chunks=[
+                create_inference_chunk(f"pruning_doc{i}", 0, words, 1.0),
+                create_inference_chunk(f"pruning_doc{i}", 1, words, 1.0),
+            ],
+        )
+        for i in range(5)
+    ]
+    original_contents = [section.combined_content for section in sections if section]
+
+    def _prune() -> list[InferenceSection]:
+        return _apply_pruning(
+            sections=[section for section in sections if section],
+            section_relevance_list=None,
+            token_limit=700,
+            is_manually_selected_docs=False,
+            use_sections=True,
+            using_tool_message=False,
+            llm_config=MagicMock(),
+        )
+
+    pruned_sections = _prune()
+    assert len(pruned_sections) == 4
+    assert len(pruned_sections[3].combined_content.split()) < 200
+    # the sections passed in are left untouched
+    assert [
+        section.combined_content for section in sections if section
+    ] == original_contents
+
+    # chunk contents are only encoded the first time
+    tokenizer.encoded.clear()
+    assert [s.combined_content for s in _prune()] == [
+        s.combined_content for s in pruned_sections
+    ]
+    assert words not in tokenizer.encoded
+
+
+class _CharacterTokenizer(BaseTokenizer):
+    def encode(self, string: str) -> list[int]:
+        return [ord(character) for character in string]
+
+    def tokenize(self, string: str) -> list[str]:
+        return list(string)
+
+    def decode(self, tokens: list[int]) -> str:
+        return "".join(chr(token) for token in tokens)
+
+
+def test_tool_message_token_count_includes_json_escapes() -> None:
+    tokenizer = _CharacterTokenizer()
+    # escaped to \u00e9t\u00e9 and \u6587\u5b57 in the tool message
+    chunks = [
+        create_inference_chunk("non_ascii_doc", 0, "été", 1.0),
+        create_inference_chunk("non_ascii_doc", 1, "文字", 1.0),
+    ]
+    section = inference_section_from_chunks(center_chunk=chunks[0], chunks=chunks)
+    assert section is not None
+
+    assert _section_content_token_count(tokenizer, section, False) == 6
+    # a token per separator
+    assert _section_content_token_count(tokenizer, section, True) == 26
+
+    # sections that aren't their joined chunks are encoded as a whole
+    truncated_section = section.model_copy(update={"combined_content": "été"})
+    assert _section_content_token_count(tokenizer, truncated_section, False) == 3
+    assert _section_content_token_count(tokenizer, truncated_section, True) == 13
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+
+from onyx.chat.process_message import _start_fetching_selected_sections
+from onyx.utils.threadpool_concurrency import wait_on_background
+
+USER_ID = uuid4()
+CHAT_SESSION = SimpleNamespace(id=uuid4(), user_id=USER_ID)
+
+
+def _search_doc(doc_id: int) -> Any:
+    return SimpleNamespace(
+        id=doc_id,
+        document_id=f"doc_{doc_id}",
+        chunk_ind=doc_id * 10,
+        chat_messages=[SimpleNamespace(chat_session_id=CHAT_SESSION.id)],
+    )
+
+
+def test_selected_sections_are_fetched_in_the_selected_order() -> None:
+    db_session = MagicMock()
+    # 4 was deleted, the others come back from the database in any order
+    db_session.query.return_value.options.return_value.filter.return_value.all.return_value = [
+        _search_doc(1),
+        _search_doc(2),
+        _search_doc(3),
+    ]
+    sections = [MagicMock(), MagicMock(), MagicMock()]
+
+    with patch(
+        "onyx.chat.process_message.inference_sections_from_ids",
+        return_value=sections,
+    ) as mock_fetch:
+        selected_db_search_docs, selected_sections_task = (
+            _start_fetching_selected_sections(
+                reference_doc_ids=[2, 4, 3, 1],
+                chat_session=CHAT_SESSION,  # type: ignore[arg-type]
+                user_id=USER_ID,
+                document_index=MagicMock(),
+                db_session=db_session,
+                enforce_chat_session_id_for_search_docs=True,
+            )
+        )
+        assert wait_on_background(selected_sections_task) == sections
+
+    assert [db_sd.id for db_sd in selected_db_search_docs] == [2, 3, 1]
+    assert mock_fetch.call_args.kwargs["doc_identifiers"] == [
+        ("doc_2", 20),
+        ("doc_3", 30),
+        ("doc_1", 10),
+    ]
+
+
+def test_nothing_is_fetched_for_search_docs_of_another_user() -> None:
+    with (
+        patch("onyx.db.chat.get_db_search_docs_by_ids", return_value=[_search_doc(1)]),
+        patch("onyx.chat.process_message.inference_sections_from_ids") as mock_fetch,
+        pytest.raises(ValueError),
+    ):
+        _start_fetching_selected_sections(
+            reference_doc_ids=[1],
+            chat_session=CHAT_SESSION,  # type: ignore[arg-type]
+            user_id=uuid4(),
+            document_index=MagicMock(),
+            db_session=MagicMock(),
+            enforce_chat_session_id_for_search_docs=True,
+        )
+
+    mock_fetch.assert_not_called()
@@ -0,0 +1,30 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.connectors.confluence.onyx_confluence import OnyxConfluence
+from onyx.connectors.credentials_provider import OnyxStaticCredentialsProvider
+
+
+def test_rate_limiter_redis_client_is_created_on_first_use() -> None:
+    credentials_provider = OnyxStaticCredentialsProvider(
+        tenant_id="tenant",
+        connector_name="confluence",
+        credential_json={"confluence_access_token": "token"},
+    )
+
+    with patch(
+        "onyx.connectors.confluence.onyx_confluence.get_redis_client",
+        return_value=MagicMock(),
+    ) as mock_get_redis_client:
+        confluence_client = OnyxConfluence(
+            is_cloud=True,
+            url="https://example.atlassian.net/wiki",
+            credentials_provider=credentials_provider,
+        )
+        # static credentials need no redis client until a call is made
+        mock_get_redis_client.assert_not_called()
+
+        rate_limiter = confluence_client._get_rate_limiter()
+        assert confluence_client._get_rate_limiter() is rate_limiter
+
+    mock_get_redis_client.assert_called_once_with(tenant_id="tenant")
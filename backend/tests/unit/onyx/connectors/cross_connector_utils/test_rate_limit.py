@@ -1,3 +1,4 @@
+import threading
 import time
 
 from onyx.connectors.cross_connector_utils.rate_limit_wrapper import (
@@ -27,3 +28,23 @@ def test_rate_limit_basic() -> None:
     assert call_cnt == 3
     assert time_to_finish_non_ratelimited < 1
     assert time_to_finish_ratelimited > 5
+
+
+def test_rate_limit_is_shared_between_threads() -> None:
+    call_times: list[float] = []
+
+    @rate_limit_builder(max_calls=3, period=1)
+    def func() -> None:
+        call_times.append(time.monotonic())
+
+    threads = [threading.Thread(target=func) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(call_times) == 6
+    call_times.sort()
+    # no more than 3 calls in any 1 second window
+    assert call_times[3] - call_times[0] >= 1
+    assert call_times[5] - call_times[2] >= 1
@@ -1,8 +1,15 @@
 import csv
 import os
+import queue
 import shutil
 import tempfile
+import threading
+from unittest.mock import MagicMock
+from unittest.mock import patch
 
+import pytest
+
+from onyx.connectors.salesforce.sqlite_functions import _get_from_background_parser
 from onyx.connectors.salesforce.sqlite_functions import OnyxSalesforceSQLite
 
 _VALID_SALESFORCE_IDS = [
@@ -757,3 +764,87 @@ def test_salesforce_sqlite() -> None:
         sf_db.close()
 
         _clear_sf_db(directory)
+
+
+@pytest.mark.parametrize("parse_in_background", [False, True])
+def test_salesforce_sqlite_batched_csv_update(parse_in_background: bool) -> None:
+    """
+    Tests the batched CSV update across batch boundaries:
+    1. Relationships are replaced, with the last row winning for duplicate ids
+    2. Parent types are filled in once the parent itself is loaded
+    """
+    account_id = _VALID_SALESFORCE_IDS[0]
+    other_account_id = _VALID_SALESFORCE_IDS[1]
+    contact_ids = _VALID_SALESFORCE_IDS[40:45]
+
+    with tempfile.TemporaryDirectory() as directory:
+        sf_db = OnyxSalesforceSQLite(os.path.join(directory, "salesforce_db.sqlite"))
+        sf_db.connect()
+        sf_db.apply_schema()
+
+        def update(object_type: str, records: list[dict[str, str]]) -> list[str]:
+            csv_path = os.path.join(directory, f"{object_type}.csv")
+            with open(csv_path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=list(records[0].keys()))
+                writer.writeheader()
+                writer.writerows(records)
+            return sf_db.update_from_csv(
+                object_type, csv_path, parse_in_background=parse_in_background
+            )
+
+        contacts = [
+            {"Id": contact_id, "AccountId": account_id, "LastName": f"Contact {i}"}
+            for i, contact_id in enumerate(contact_ids)
+        ]
+        # moved to another account further down the same file
+        contacts.append(
+            {"Id": contact_ids[0], "AccountId": other_account_id, "LastName": "Moved"}
+        )
+
+        with patch.object(OnyxSalesforceSQLite, "CSV_BATCH_SIZE", 2):
+            updated_ids = update("Contact", contacts)
+            assert updated_ids == [contact["Id"] for contact in contacts]
+            assert sf_db.get_child_ids(account_id) == set(contact_ids[1:])
+            assert sf_db.get_child_ids(other_account_id) == {contact_ids[0]}
+
+            moved = sf_db.get_record(contact_ids[0])
+            assert moved is not None
+            assert moved.data["LastName"] == "Moved"
+
+            # the accounts weren't loaded yet, so no parent types are known
+            assert not list(
+                sf_db.get_affected_parent_ids_by_type(contact_ids, ["Account"])
+            )
+
+            update(
+                "Account",
+                [
+                    {"Id": account_id, "Name": "Acme"},
+                    {"Id": other_account_id, "Name": "Globex"},
+                ],
+            )
+            update("Contact", contacts)
+
+        affected = dict(sf_db.get_affected_parent_ids_by_type(contact_ids, ["Account"]))
+        assert affected == {"Account": {account_id, other_account_id}}
+
+        sf_db.close()
+
+
+def test_background_parser_that_died_raises() -> None:
+    q: queue.Queue = queue.Queue()
+    finished_thread = threading.Thread(target=lambda: None)
+    finished_thread.start()
+    finished_thread.join()
+    killed_process = MagicMock(exitcode=-9)
+    killed_process.is_alive.return_value = False
+
+    with patch.object(OnyxSalesforceSQLite, "BACKGROUND_PARSE_POLL_SECONDS", 0.01):
+        # what the worker put right before exiting is still delivered
+        q.put(None)
+        assert _get_from_background_parser(q, finished_thread, "Account.csv") is None
+
+        with pytest.raises(RuntimeError, match="without finishing"):
+            _get_from_background_parser(q, finished_thread, "Account.csv")
+        with pytest.raises(RuntimeError, match="exitcode=-9"):
+            _get_from_background_parser(q, killed_process, "Account.csv")
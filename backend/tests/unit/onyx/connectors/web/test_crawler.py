@@ -0,0 +1,198 @@
+from collections.abc import Callable
+from collections.abc import Iterator
+from datetime import datetime
+from datetime import timezone
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import ConnectorFailure
+from onyx.connectors.models import Document
+from onyx.connectors.web.connector import WebConnectorCheckpoint
+from onyx.connectors.web.crawler import HostPoliteness
+from onyx.connectors.web.crawler import PageResult
+from onyx.connectors.web.crawler import WebCrawler
+
+BASE_URL = "https://intranet.example.com/"
+
+
+def _page(title: str, links: list[str]) -> str:
+    anchors = "".join(f'<a href="{link}">{link}</a>' for link in links)
+    text = f"This is the content of the {title} page. " * 10
+    return (
+        f"<html><head><title>{title}</title></head>"
+        f"<body><p>{text}</p>{anchors}</body></html>"
+    )
+
+
+SITE = {
+    BASE_URL: _page("home", ["/a", "/b"]),
+    f"{BASE_URL}a": _page("a", ["/b", "/c"]),
+    f"{BASE_URL}b": _page("b", ["/"]),
+    f"{BASE_URL}c": _page("c", []),
+}
+
+
+@pytest.fixture
+def known_urls() -> Iterator[MagicMock]:
+    with (
+        patch("onyx.connectors.web.crawler.KnownUrls.get", return_value=set()) as get,
+        patch("onyx.connectors.web.crawler.KnownUrls.update"),
+    ):
+        yield get
+
+
+def _make_crawler(
+    handler: Callable[[httpx.Request], httpx.Response],
+) -> WebCrawler:
+    crawler = WebCrawler(
+        base_url=BASE_URL,
+        start_urls=[BASE_URL],
+        recursive=True,
+        mintlify_cleanup=True,
+        scroll_before_scraping=False,
+        concurrency=4,
+        politeness=HostPoliteness(max_requests_per_host=2, min_request_interval=0),
+    )
+    crawler._build_http_client = lambda: httpx.Client(  # type: ignore[method-assign]
+        transport=httpx.MockTransport(handler), follow_redirects=True
+    )
+    return crawler
+
+
+def _site_handler(request: httpx.Request) -> httpx.Response:
+    html = SITE.get(str(request.url))
+    if html is None:
+        return httpx.Response(404)
+    return httpx.Response(
+        200,
+        text=html,
+        headers={
+            "content-type": "text/html",
+            "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT",
+        },
+    )
+
+
+def _run(
+    crawler: WebCrawler,
+    checkpoint: WebConnectorCheckpoint,
+    **kwargs: object,
+) -> tuple[list[Document | ConnectorFailure], WebConnectorCheckpoint]:
+    outputs: list[Document | ConnectorFailure] = []
+    generator = crawler.crawl(checkpoint, **kwargs)  # type: ignore[arg-type]
+    while True:
+        try:
+            outputs.append(next(generator))
+        except StopIteration as e:
+            return outputs, e.value
+
+
+def test_recursive_crawl(known_urls: MagicMock) -> None:
+    crawler = _make_crawler(_site_handler)
+    outputs, checkpoint = _run(crawler, WebConnectorCheckpoint(has_more=True))
+
+    assert sorted(doc.id for doc in outputs if isinstance(doc, Document)) == sorted(
+        SITE
+    )
+    assert not checkpoint.has_more
+    assert checkpoint.num_pages_crawled == len(SITE)
+
+
+def test_crawl_resumes_from_checkpoint(known_urls: MagicMock) -> None:
+    requested_urls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested_urls.append(str(request.url))
+        return _site_handler(request)
+
+    crawler = _make_crawler(handler)
+    checkpoint = WebConnectorCheckpoint(has_more=True)
+    doc_ids: list[str] = []
+    while checkpoint.has_more:
+        outputs, checkpoint = _run(crawler, checkpoint, max_pages=1)
+        # the checkpoint survives a round trip through the db
+        checkpoint = WebConnectorCheckpoint.model_validate_json(
+            checkpoint.model_dump_json()
+        )
+        doc_ids.extend(doc.id for doc in outputs if isinstance(doc, Document))
+
+    assert sorted(doc_ids) == sorted(SITE)
+    # no page was fetched twice
+    assert sorted(requested_urls) == sorted(SITE)
+
+
+def test_unchanged_pages_are_skipped(known_urls: MagicMock) -> None:
+    modified_since = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    known_urls.return_value = set(SITE)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["If-Modified-Since"] == "Sun, 01 Jun 2025 00:00:00 GMT"
+        if str(request.url) == f"{BASE_URL}c":
+            return _site_handler(request)
+        return httpx.Response(304)
+
+    crawler = _make_crawler(handler)
+    outputs, checkpoint = _run(
+        crawler, WebConnectorCheckpoint(has_more=True), modified_since=modified_since
+    )
+
+    # "c" is only linked from "a", which is unchanged: it's found from the known URLs
+    assert [doc.id for doc in outputs if isinstance(doc, Document)] == [f"{BASE_URL}c"]
+    assert checkpoint.num_pages_crawled == len(SITE)
+
+
+def test_pages_rendered_client_side_use_the_browser(known_urls: MagicMock) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            text=(
+                '<html><body><div id="root"></div>'
+                '<script src="/app.js"></script></body></html>'
+            ),
+            headers={"content-type": "text/html"},
+        )
+
+    crawler = _make_crawler(handler)
+    browser_document = Document(
+        id=BASE_URL,
+        sections=[],
+        source=DocumentSource.WEB,
+        semantic_identifier="home",
+        metadata={},
+    )
+    with patch.object(
+        crawler,
+        "fetch_with_browser",
+        return_value=PageResult(
+            url=BASE_URL, final_url=BASE_URL, document=browser_document
+        ),
+    ) as fetch_with_browser:
+        outputs, _ = _run(crawler, WebConnectorCheckpoint(has_more=True))
+
+    fetch_with_browser.assert_called_once_with(BASE_URL)
+    assert outputs == [browser_document]
+
+
+def test_failed_pages_are_reported(known_urls: MagicMock) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if str(request.url) == f"{BASE_URL}a":
+            raise httpx.ConnectError("connection refused")
+        return _site_handler(request)
+
+    crawler = _make_crawler(handler)
+    with patch("onyx.connectors.web.crawler.time.sleep"):
+        outputs, checkpoint = _run(crawler, WebConnectorCheckpoint(has_more=True))
+
+    failures = [output for output in outputs if isinstance(output, ConnectorFailure)]
+    assert len(failures) == 1
+    assert failures[0].failed_document is not None
+    assert failures[0].failed_document.document_id == f"{BASE_URL}a"
+    # "c" is only linked from "a"
+    assert sorted(doc.id for doc in outputs if isinstance(doc, Document)) == [
+        BASE_URL,
+        f"{BASE_URL}b",
+    ]
@@ -0,0 +1,62 @@
+from collections.abc import Iterator
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+
+from onyx.context.search.preprocessing import access_filters
+from onyx.context.search.preprocessing.access_filters import _UserACLCache
+from onyx.context.search.preprocessing.access_filters import (
+    build_access_filters_for_user,
+)
+
+
+@pytest.fixture
+def get_acl_for_user() -> Iterator[MagicMock]:
+    with (
+        patch.object(access_filters, "_user_acl_cache", _UserACLCache(ttl_seconds=60)),
+        patch.object(
+            access_filters,
+            "get_acl_for_user",
+            side_effect=lambda user, _: {f"user_email:{user.id}", "group:b", "group:a"},
+        ) as mock_get_acl_for_user,
+    ):
+        yield mock_get_acl_for_user
+
+
+def test_user_acl_is_cached(get_acl_for_user: MagicMock) -> None:
+    user = MagicMock(id=uuid4())
+    db_session = MagicMock()
+
+    acl = build_access_filters_for_user(user, db_session)
+    assert acl == ["group:a", "group:b", f"user_email:{user.id}"]
+
+    # callers modifying the filters don't change the cached ACL
+    acl.append("group:c")
+    assert build_access_filters_for_user(user, db_session) == [
+        "group:a",
+        "group:b",
+        f"user_email:{user.id}",
+    ]
+    assert get_acl_for_user.call_count == 1
+
+    other_user = MagicMock(id=uuid4())
+    build_access_filters_for_user(other_user, db_session)
+    assert get_acl_for_user.call_count == 2
+
+
+def test_user_acl_cache_expires_and_evicts() -> None:
+    cache = _UserACLCache(ttl_seconds=60, max_users=2)
+    cache.set(("tenant", "1"), ["a"])
+    cache.set(("tenant", "2"), ["b"])
+    assert cache.get(("tenant", "1")) == ["a"]
+
+    # "2" is the least recently used
+    cache.set(("tenant", "3"), ["c"])
+    assert cache.get(("tenant", "2")) is None
+    assert cache.get(("tenant", "1")) == ["a"]
+
+    cache.ttl_seconds = -1
+    cache.set(("tenant", "1"), ["a"])
+    assert cache.get(("tenant", "1")) is None
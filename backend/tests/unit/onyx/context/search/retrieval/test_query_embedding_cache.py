@@ -0,0 +1,127 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import numpy as np
+
+from onyx.context.search.retrieval import search_runner
+from onyx.context.search.retrieval.query_embedding_cache import QueryEmbeddingCache
+from shared_configs.contextvars import CURRENT_TENANT_ID_CONTEXTVAR
+
+_MODEL_KEY = "nomic-ai/nomic-embed-text-v1:search_query: "
+_EMBEDDING_SIZE = 3 * 4
+
+
+def test_key_ignores_whitespace_but_not_model_or_tenant() -> None:
+    key = QueryEmbeddingCache.get_key(_MODEL_KEY, "how do I  reset my\tpassword ")
+
+    assert key == QueryEmbeddingCache.get_key(_MODEL_KEY, "how do I reset my password")
+    assert key != QueryEmbeddingCache.get_key(
+        "other-model", "how do I reset my password"
+    )
+
+    token = CURRENT_TENANT_ID_CONTEXTVAR.set("other_tenant")
+    try:
+        assert key != QueryEmbeddingCache.get_key(
+            _MODEL_KEY, "how do I reset my password"
+        )
+    finally:
+        CURRENT_TENANT_ID_CONTEXTVAR.reset(token)
+
+
+def test_evicts_least_recently_used_when_full() -> None:
+    keys = [QueryEmbeddingCache.get_key(_MODEL_KEY, f"query {i}") for i in range(3)]
+    cache = QueryEmbeddingCache(
+        max_bytes=2 * (len(keys[0]) + _EMBEDDING_SIZE), ttl_seconds=60, use_redis=False
+    )
+
+    cache.set_many({keys[0]: [0.0, 0.0, 0.0], keys[1]: [1.0, 1.0, 1.0]})
+    # touch the first one so the second one is the least recently used
+    assert cache.get_many([keys[0]]) == [[0.0, 0.0, 0.0]]
+    cache.set_many({keys[2]: [2.0, 2.0, 2.0]})
+
+    assert cache.get_many(keys) == [[0.0, 0.0, 0.0], None, [2.0, 2.0, 2.0]]
+
+
+def test_expired_entries_are_not_returned() -> None:
+    key = QueryEmbeddingCache.get_key(_MODEL_KEY, "query")
+    cache = QueryEmbeddingCache(max_bytes=1024, ttl_seconds=60, use_redis=False)
+
+    with patch(
+        "onyx.context.search.retrieval.query_embedding_cache.time.monotonic",
+        return_value=1000.0,
+    ):
+        cache.set_many({key: [0.5, 0.25, 0.125]})
+        assert cache.get_many([key]) == [[0.5, 0.25, 0.125]]
+
+    with patch(
+        "onyx.context.search.retrieval.query_embedding_cache.time.monotonic",
+        return_value=1061.0,
+    ):
+        assert cache.get_many([key]) == [None]
+
+
+def test_redis_hits_are_kept_in_memory() -> None:
+    key = QueryEmbeddingCache.get_key(_MODEL_KEY, "query")
+    cache = QueryEmbeddingCache(max_bytes=1024, ttl_seconds=60, use_redis=True)
+    redis_client = MagicMock()
+    redis_client.mget.return_value = [
+        np.asarray([0.5, 0.25, 0.125], dtype="<f4").tobytes()
+    ]
+
+    with patch(
+        "onyx.context.search.retrieval.query_embedding_cache.get_redis_client",
+        return_value=redis_client,
+    ):
+        assert cache.get_many([key]) == [[0.5, 0.25, 0.125]]
+        assert cache.get_many([key]) == [[0.5, 0.25, 0.125]]
+
+    redis_client.mget.assert_called_once_with([key])
+
+
+def test_get_query_embeddings_only_embeds_cache_misses() -> None:
+    search_settings = MagicMock(
+        model_name="test-model",
+        normalize=True,
+        query_prefix="search_query: ",
+        passage_prefix="search_document: ",
+        api_key=None,
+        provider_type=None,
+        api_url=None,
+        api_version=None,
+        deployment_name=None,
+        reduced_dimension=None,
+    )
+    model = MagicMock()
+    model.encode.side_effect = lambda texts, text_type: [
+        [float(len(text)), 0.0, 1.0] for text in texts
+    ]
+
+    with (
+        patch.object(
+            search_runner,
+            "get_current_search_settings",
+            return_value=search_settings,
+        ),
+        patch.object(search_runner, "_get_query_embedding_model", return_value=model),
+        patch.object(
+            search_runner,
+            "_query_embedding_cache",
+            QueryEmbeddingCache(max_bytes=1024 * 1024, ttl_seconds=60, use_redis=False),
+        ),
+    ):
+        first = search_runner.get_query_embeddings(
+            ["reset password", "reset  password", "vpn setup"], MagicMock()
+        )
+        second = search_runner.get_query_embeddings(
+            ["vpn setup", "expense policy"], MagicMock()
+        )
+        single = search_runner.get_query_embedding("reset password", MagicMock())
+
+    assert first == [[14.0, 0.0, 1.0], [14.0, 0.0, 1.0], [9.0, 0.0, 1.0]]
+    assert second == [[9.0, 0.0, 1.0], [14.0, 0.0, 1.0]]
+    assert single == [14.0, 0.0, 1.0]
+    # whitespace variants are embedded once, cached queries not at all
+    assert [call.args[0] for call in model.encode.call_args_list] == [
+        ["reset password", "vpn setup"],
+        ["expense policy"],
+    ]
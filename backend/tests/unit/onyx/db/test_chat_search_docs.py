@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+
+from onyx.db.chat import get_db_search_docs_by_ids
+from onyx.db.chat import get_validated_search_docs
+
+USER_ID = uuid4()
+CHAT_SESSION = SimpleNamespace(id=uuid4(), user_id=USER_ID)
+
+
+def _search_doc(doc_id: int, chat_session_id: Any = CHAT_SESSION.id) -> Any:
+    chat_messages = (
+        []
+        if chat_session_id is None
+        else [SimpleNamespace(chat_session_id=chat_session_id)]
+    )
+    return SimpleNamespace(
+        id=doc_id,
+        document_id=f"doc_{doc_id}",
+        chunk_ind=0,
+        chat_messages=chat_messages,
+    )
+
+
+def test_search_docs_are_returned_in_the_order_of_the_ids() -> None:
+    db_session = MagicMock()
+    # the database returns them in any order, 4 doesn't exist
+    db_session.query.return_value.options.return_value.filter.return_value.all.return_value = [
+        _search_doc(1),
+        _search_doc(2),
+        _search_doc(3),
+    ]
+
+    search_docs = get_db_search_docs_by_ids([3, 4, 1, 3, 2], db_session)
+
+    assert [search_doc.id for search_doc in search_docs] == [3, 1, 2]
+    db_session.query.assert_called_once()
+
+
+def test_no_search_doc_ids_runs_no_query() -> None:
+    db_session = MagicMock()
+
+    assert get_db_search_docs_by_ids([], db_session) == []
+    db_session.query.assert_not_called()
+
+
+def _get_validated(
+    search_docs: list[Any],
+    user_id: Any = USER_ID,
+    enforce_chat_session_id_for_search_docs: bool = True,
+) -> list[Any]:
+    with patch(
+        "onyx.db.chat.get_db_search_docs_by_ids", return_value=search_docs
+    ) as mock_get_docs:
+        validated = get_validated_search_docs(
+            search_doc_ids=[search_doc.id for search_doc in search_docs],
+            chat_session=CHAT_SESSION,  # type: ignore[arg-type]
+            user_id=user_id,
+            db_session=MagicMock(),
+            enforce_chat_session_id_for_search_docs=enforce_chat_session_id_for_search_docs,
+        )
+    mock_get_docs.assert_called_once()
+    return validated
+
+
+def test_validated_search_docs_keep_their_order() -> None:
+    search_docs = [_search_doc(2), _search_doc(1)]
+
+    assert _get_validated(search_docs) == search_docs
+
+
+def test_search_docs_of_another_user_are_rejected() -> None:
+    with pytest.raises(ValueError, match="do not belong to user"):
+        _get_validated([_search_doc(1)], user_id=uuid4())
+
+
+def test_search_docs_of_another_chat_session_are_rejected() -> None:
+    search_docs = [_search_doc(1), _search_doc(2, chat_session_id=uuid4())]
+
+    with pytest.raises(ValueError, match="not from this chat session"):
+        _get_validated(search_docs)
+
+    # only enforced when asked to
+    assert (
+        _get_validated(search_docs, enforce_chat_session_id_for_search_docs=False)
+        == search_docs
+    )
+
+
+def test_search_docs_without_chat_message_fail_the_session() -> None:
+    with pytest.raises(RuntimeError, match="start a new session"):
+        _get_validated([_search_doc(1, chat_session_id=None)])
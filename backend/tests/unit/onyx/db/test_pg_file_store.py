@@ -0,0 +1,58 @@
+import io
+from unittest.mock import MagicMock
+
+from onyx.db.pg_file_store import open_lobj_reader
+from onyx.file_store.constants import STANDARD_CHUNK_SIZE
+
+
+class _FakeLargeObject:
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.position = 0
+        self.read_sizes: list[int] = []
+        self.closed = False
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self.data) if size < 0 else self.position + size
+        self.read_sizes.append(size)
+        chunk = self.data[self.position : end]
+        self.position += len(chunk)
+        return chunk
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {
+            io.SEEK_SET: 0,
+            io.SEEK_CUR: self.position,
+            io.SEEK_END: len(self.data),
+        }
+        self.position = base[whence] + offset
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_lobj_reader_reads_lazily() -> None:
+    data = bytes(range(256)) * 100_000
+    large_object = _FakeLargeObject(data)
+    db_session = MagicMock()
+    pg_conn = db_session.connection.return_value.connection.connection
+    pg_conn.lobject.return_value = large_object
+
+    with open_lobj_reader(123, db_session) as reader:
+        pg_conn.lobject.assert_called_once_with(123, mode="rb")
+        assert large_object.read_sizes == []
+
+        assert reader.seek(0, io.SEEK_END) == len(data)
+        reader.seek(1000)
+        assert reader.read(10) == data[1000:1010]
+        # only a buffer's worth was fetched, not the whole object
+        assert large_object.read_sizes == [STANDARD_CHUNK_SIZE]
+
+        reader.seek(-5, io.SEEK_END)
+        assert reader.read() == data[-5:]
+
+    assert large_object.closed
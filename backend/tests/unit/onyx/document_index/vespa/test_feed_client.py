@@ -0,0 +1,212 @@
+import asyncio
+from collections.abc import Callable
+from collections.abc import Iterator
+from typing import cast
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from onyx.document_index.vespa.feed_client import AdaptiveConcurrencyLimiter
+from onyx.document_index.vespa.feed_client import INTERNAL_SERVER_ERROR_MAX_RETRIES
+from onyx.document_index.vespa.feed_client import VespaFeedClient
+from onyx.indexing.models import DocMetadataAwareIndexChunk
+
+
+@pytest.fixture(autouse=True)
+def fake_chunk_payloads() -> Iterator[None]:
+    # building the real feed payloads needs fully populated chunks, which is not what
+    # is under test here
+    with (
+        patch(
+            "onyx.document_index.vespa.feed_client.get_vespa_chunk_url",
+            side_effect=lambda chunk, index_name: f"http://vespa/{index_name}/{chunk.chunk_id}",
+        ),
+        patch(
+            "onyx.document_index.vespa.feed_client.build_vespa_chunk_fields",
+            side_effect=lambda chunk, multitenant: {"chunk_id": chunk.chunk_id},
+        ),
+        patch(
+            "onyx.document_index.vespa.feed_client.get_backoff_seconds", return_value=0
+        ),
+    ):
+        yield
+
+
+def _make_chunks(num_chunks: int) -> list[DocMetadataAwareIndexChunk]:
+    chunks = []
+    for chunk_id in range(num_chunks):
+        chunk = MagicMock()
+        chunk.chunk_id = chunk_id
+        chunk.source_document.id = f"doc_{chunk_id}"
+        chunks.append(cast(DocMetadataAwareIndexChunk, chunk))
+    return chunks
+
+
+def _make_feed_client(
+    handler: Callable[[httpx.Request], httpx.Response],
+    initial_concurrency: int = 4,
+    max_concurrency: int = 16,
+    max_retries: int = 3,
+) -> VespaFeedClient:
+    return VespaFeedClient(
+        initial_concurrency=initial_concurrency,
+        min_concurrency=1,
+        max_concurrency=max_concurrency,
+        max_retries=max_retries,
+        client_factory=lambda: httpx.AsyncClient(
+            transport=httpx.MockTransport(handler)
+        ),
+    )
+
+
+def test_feed_indexes_every_chunk() -> None:
+    fed_urls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        fed_urls.append(str(request.url))
+        return httpx.Response(200, json={})
+
+    metrics = _make_feed_client(handler).feed(
+        chunks=_make_chunks(100), index_name="test_index", multitenant=False
+    )
+
+    assert sorted(fed_urls) == sorted(
+        f"http://vespa/test_index/{chunk_id}" for chunk_id in range(100)
+    )
+    assert metrics.num_chunks == 100
+    assert metrics.num_retries == 0
+    assert metrics.chunks_per_second > 0
+
+
+def test_feed_retries_throttled_requests_and_backs_off() -> None:
+    attempts: dict[str, int] = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        attempts[url] = attempts.get(url, 0) + 1
+        if attempts[url] == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={})
+
+    feed_client = _make_feed_client(handler, initial_concurrency=8)
+    metrics = feed_client.feed(
+        chunks=_make_chunks(20), index_name="test_index", multitenant=False
+    )
+
+    assert all(num_attempts == 2 for num_attempts in attempts.values())
+    assert metrics.num_throttled == 20
+    assert metrics.num_retries == 20
+    # throttling lowered the concurrency, and the lowered limit carries over
+    assert feed_client.concurrency < 8
+
+
+def test_feed_gives_up_after_max_retries() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _make_feed_client(handler, max_retries=2).feed(
+            chunks=_make_chunks(3), index_name="test_index", multitenant=False
+        )
+
+
+def test_feed_retries_transient_server_errors() -> None:
+    attempts: dict[str, int] = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        attempts[url] = attempts.get(url, 0) + 1
+        if attempts[url] == 1:
+            return httpx.Response(500, json={"message": "transient"})
+        return httpx.Response(200, json={})
+
+    metrics = _make_feed_client(handler).feed(
+        chunks=_make_chunks(3), index_name="test_index", multitenant=False
+    )
+
+    assert metrics.num_retries == 3
+    assert metrics.num_throttled == 0
+
+
+def test_feed_retries_server_errors_only_a_few_times() -> None:
+    num_requests = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal num_requests
+        num_requests += 1
+        return httpx.Response(500, json={"message": "broken"})
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _make_feed_client(
+            handler, initial_concurrency=1, max_concurrency=1, max_retries=10
+        ).feed(chunks=_make_chunks(1), index_name="test_index", multitenant=False)
+    assert num_requests == INTERNAL_SERVER_ERROR_MAX_RETRIES + 1
+
+
+def test_feed_does_not_retry_client_errors() -> None:
+    num_requests = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal num_requests
+        num_requests += 1
+        return httpx.Response(400, json={"message": "bad document"})
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _make_feed_client(handler, initial_concurrency=1, max_concurrency=1).feed(
+            chunks=_make_chunks(1), index_name="test_index", multitenant=False
+        )
+    assert num_requests == 1
+
+
+def test_limiter_additive_increase_multiplicative_decrease() -> None:
+    async def _run() -> None:
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, min_limit=2, max_limit=9)
+
+        # a full limit's worth of successes raises the limit by one
+        for _ in range(8):
+            acquired_at = await limiter.acquire()
+            await limiter.release(acquired_at, throttled=False)
+        assert limiter.limit == 9
+
+        # capped at the max
+        for _ in range(9):
+            acquired_at = await limiter.acquire()
+            await limiter.release(acquired_at, throttled=False)
+        assert limiter.limit == 9
+
+        # several requests in flight during an overload only halve the limit once
+        acquired_ats = [await limiter.acquire() for _ in range(3)]
+        for acquired_at in acquired_ats:
+            await limiter.release(acquired_at, throttled=True)
+        assert limiter.limit == 4
+
+        # never below the min
+        for _ in range(3):
+            acquired_at = await limiter.acquire()
+            await limiter.release(acquired_at, throttled=True)
+        assert limiter.limit == 2
+
+    asyncio.run(_run())
+
+
+def test_limiter_bounds_in_flight_requests() -> None:
+    async def _run() -> int:
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=3, min_limit=1, max_limit=3)
+        in_flight = 0
+        max_in_flight = 0
+
+        async def _request() -> None:
+            nonlocal in_flight, max_in_flight
+            acquired_at = await limiter.acquire()
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+            await limiter.release(acquired_at, throttled=False)
+
+        await asyncio.gather(*(_request() for _ in range(20)))
+        return max_in_flight
+
+    assert asyncio.run(_run()) == 3
@@ -0,0 +1,160 @@
+import json
+import threading
+import time
+from collections.abc import Callable
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from onyx.document_index.interfaces import MinimalDocumentIndexingInfo
+from onyx.document_index.vespa.indexing_utils import check_for_final_chunk_existence
+from onyx.document_index.vespa.partial_update import apply_partial_updates
+from onyx.document_index.vespa.partial_update import VespaPartialUpdate
+
+
+@pytest.fixture(autouse=True)
+def no_backoff() -> Iterator[None]:
+    with patch(
+        "onyx.document_index.vespa.partial_update.get_backoff_seconds", return_value=0
+    ):
+        yield
+
+
+def _make_client(handler: Callable[[httpx.Request], httpx.Response]) -> httpx.Client:
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+def _make_updates(num_updates: int) -> list[VespaPartialUpdate]:
+    return [
+        VespaPartialUpdate(
+            document_id="doc",
+            url=f"http://vespa/document/v1/default/danswer_chunk/docid/{i}",
+            fields={"boost": {"assign": 2.0}},
+        )
+        for i in range(num_updates)
+    ]
+
+
+def test_updates_are_pipelined_with_bounded_concurrency() -> None:
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    updated_urls: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+            updated_urls.append(str(request.url))
+        assert json.loads(request.content) == {"fields": {"boost": {"assign": 2.0}}}
+        return httpx.Response(200, json={})
+
+    updates = _make_updates(100)
+    apply_partial_updates(updates, _make_client(handler), max_in_flight=8)
+
+    assert sorted(updated_urls) == sorted(update.url for update in updates)
+    assert 1 < max_in_flight <= 8
+
+
+def test_concurrent_callers_share_the_in_flight_bound() -> None:
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return httpx.Response(200, json={})
+
+    http_client = _make_client(handler)
+    with patch(
+        "onyx.document_index.vespa.partial_update._update_executor",
+        ThreadPoolExecutor(max_workers=4),
+    ):
+        callers = [
+            threading.Thread(
+                target=apply_partial_updates,
+                args=(_make_updates(50), http_client),
+                kwargs={"max_in_flight": 4},
+            )
+            for _ in range(3)
+        ]
+        for caller in callers:
+            caller.start()
+        for caller in callers:
+            caller.join()
+
+    assert max_in_flight <= 4
+
+
+def test_throttled_updates_are_retried() -> None:
+    attempts: dict[str, int] = {}
+    lock = threading.Lock()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        with lock:
+            attempts[str(request.url)] = attempts.get(str(request.url), 0) + 1
+            attempt = attempts[str(request.url)]
+        if attempt == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={})
+
+    apply_partial_updates(_make_updates(10), _make_client(handler), max_in_flight=4)
+
+    assert list(attempts.values()) == [2] * 10
+
+
+def test_failed_update_raises_and_stops_sending() -> None:
+    num_requests = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal num_requests
+        num_requests += 1
+        return httpx.Response(400, json={"message": "bad field"})
+
+    with pytest.raises(httpx.HTTPStatusError):
+        apply_partial_updates(
+            _make_updates(100), _make_client(handler), max_in_flight=2
+        )
+
+    # the bad request is not retried and the rest of the updates are dropped
+    assert num_requests <= 2
+
+
+def test_final_chunk_is_found_with_a_visit() -> None:
+    requests: list[httpx.Request] = []
+    pages = [
+        {
+            "documents": [{"fields": {"chunk_id": i}} for i in (0, 2, 1)],
+            "continuation": "next",
+        },
+        {"documents": [{"fields": {"chunk_id": i}} for i in (3, 5)]},
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=pages[len(requests) - 1])
+
+    final_chunk = check_for_final_chunk_existence(
+        minimal_doc_info=MinimalDocumentIndexingInfo(doc_id="doc", chunk_start_index=0),
+        start_index=0,
+        index_name="danswer_chunk",
+        http_client=_make_client(handler),
+    )
+
+    assert final_chunk == 4
+    assert len(requests) == 2
+    assert "danswer_chunk.document_id=='doc'" in requests[0].url.params["selection"]
+    assert requests[1].url.params["continuation"] == "next"
@@ -0,0 +1,136 @@
+import io
+import threading
+from unittest.mock import patch
+
+import pytest
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject
+from pypdf.generic import DictionaryObject
+from pypdf.generic import NameObject
+
+from onyx.file_processing.pdf.advanced_pdf_reader import AdvancedPDFReader
+from onyx.file_processing.pdf.advanced_pdf_reader import needs_ocr
+
+_NATIVE_TEXT = "The quarterly revenue grew by twelve percent year over year. " * 4
+
+
+def _build_pdf(page_texts: list[str | None]) -> io.BytesIO:
+    """Builds a PDF with one page per entry, None being a page without any text
+    (like a scanned page)."""
+    writer = PdfWriter()
+    font = writer._add_object(
+        DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject("/Helvetica"),
+            }
+        )
+    )
+    for text in page_texts:
+        page = writer.add_blank_page(width=612, height=792)
+        if text is None:
+            continue
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+        )
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 10 Tf 20 700 Td ({text}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+
+    pdf_file = io.BytesIO()
+    writer.write(pdf_file)
+    pdf_file.seek(0)
+    return pdf_file
+
+
+class _FakeOCR:
+    def __init__(self, fail_on_page: int | None = None) -> None:
+        self.fail_on_page = fail_on_page
+        self.calls: list[tuple[int, int]] = []
+        self.pdf_paths: set[str] = set()
+        self.lock = threading.Lock()
+
+    def __call__(
+        self, pdf_path: str, first_page_number: int, last_page_number: int
+    ) -> list[str]:
+        with self.lock:
+            self.calls.append((first_page_number, last_page_number))
+            self.pdf_paths.add(pdf_path)
+        if self.fail_on_page is not None and (
+            first_page_number <= self.fail_on_page <= last_page_number
+        ):
+            raise RuntimeError("pdftoppm failed")
+        return [
+            f"ocr page {page_number}"
+            for page_number in range(first_page_number, last_page_number + 1)
+        ]
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("", True),
+        ("Page 3", True),
+        (_NATIVE_TEXT, False),
+        ("\x00\x01 ##%% " * 100 + "abc", True),
+    ],
+)
+def test_needs_ocr(text: str, expected: bool) -> None:
+    assert needs_ocr(text, min_chars=100) == expected
+
+
+@pytest.mark.parametrize("text", ["", " \n\t "])
+def test_blank_page_needs_ocr_without_a_minimum(text: str) -> None:
+    assert needs_ocr(text, min_chars=0)
+
+
+def test_only_pages_without_native_text_are_ocrd() -> None:
+    page_texts = [_NATIVE_TEXT, None, None, None, _NATIVE_TEXT, None, _NATIVE_TEXT]
+    reader = AdvancedPDFReader(_build_pdf(page_texts), max_workers=2, pages_per_task=2)
+    fake_ocr = _FakeOCR()
+
+    with patch.object(reader, "_ocr_page_range", fake_ocr):
+        pages = list(reader.iter_pages())
+
+    # consecutive pages are rasterized together, at most pages_per_task at a time
+    assert sorted(fake_ocr.calls) == [(1, 2), (3, 3), (5, 5)]
+    # the document is only written out once for all of them
+    assert len(fake_ocr.pdf_paths) == 1
+
+    assert [page.page_number for page in pages] == list(range(len(page_texts)))
+    for page, text in zip(pages, page_texts):
+        if text is None:
+            assert page.native_text == ""
+            assert page.merged_text == f"ocr page {page.page_number}"
+        else:
+            assert page.ocr_text == ""
+            assert page.merged_text == page.native_text == text.strip()
+
+
+def test_failed_ocr_keeps_the_other_pages() -> None:
+    reader = AdvancedPDFReader(_build_pdf([None] * 5), pages_per_task=1)
+
+    with patch.object(reader, "_ocr_page_range", _FakeOCR(fail_on_page=2)):
+        pages = reader.process_pdf()
+
+    assert [page.merged_text for page in pages] == [
+        "ocr page 0",
+        "ocr page 1",
+        "",
+        "ocr page 3",
+        "ocr page 4",
+    ]
+
+
+def test_process_page_skips_ocr_for_native_text() -> None:
+    reader = AdvancedPDFReader(_build_pdf([_NATIVE_TEXT, None]))
+    fake_ocr = _FakeOCR()
+
+    with patch.object(reader, "_ocr_page_range", fake_ocr):
+        native_page = reader.process_page(0)
+        scanned_page = reader.process_page(1)
+
+    assert fake_ocr.calls == [(1, 1)]
+    assert native_page.merged_text == _NATIVE_TEXT.strip()
+    assert scanned_page.merged_text == "ocr page 1"
@@ -0,0 +1,149 @@
+import io
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from onyx.configs.constants import FileOrigin
+from onyx.db.models import PGFileStore
+from onyx.file_store import file_store as file_store_module
+from onyx.file_store.file_store import ObjectBackedFileStore
+from onyx.file_store.object_store import FilesystemObjectStore
+from onyx.file_store.object_store import S3ObjectStore
+
+
+class _FakeS3Client:
+    """The subset of the boto3 s3 client used by S3ObjectStore, in memory (standing
+    in for MinIO)."""
+
+    def __init__(self) -> None:
+        self.objects: dict[tuple[str, str], bytes] = {}
+        self.ranges: list[str] = []
+
+    def upload_fileobj(
+        self, fileobj: io.IOBase, bucket: str, key: str, Config: Any = None
+    ) -> None:
+        self.objects[(bucket, key)] = fileobj.read()
+
+    def head_object(self, Bucket: str, Key: str) -> dict[str, Any]:
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {"ContentLength": len(self.objects[(Bucket, Key)])}
+
+    def get_object(self, Bucket: str, Key: str, Range: str) -> dict[str, Any]:
+        self.ranges.append(Range)
+        start, end = Range.removeprefix("bytes=").split("-")
+        data = self.objects[(Bucket, Key)][int(start) : int(end) + 1]
+        return {"Body": io.BytesIO(data)}
+
+    def delete_object(self, Bucket: str, Key: str) -> None:
+        self.objects.pop((Bucket, Key), None)
+
+
+def test_filesystem_object_store(tmp_path: Any) -> None:
+    store = FilesystemObjectStore(str(tmp_path))
+    assert not store.exists("tenant/sha256/ab/abc")
+
+    store.put("tenant/sha256/ab/abc", io.BytesIO(b"hello world"))
+    assert store.exists("tenant/sha256/ab/abc")
+    with store.open("tenant/sha256/ab/abc") as reader:
+        reader.seek(6)
+        assert reader.read() == b"world"
+    assert store.get_local_path("tenant/sha256/ab/abc") == str(
+        tmp_path / "tenant" / "sha256" / "ab" / "abc"
+    )
+    # no temporary file is left next to the object
+    assert [p.name for p in (tmp_path / "tenant" / "sha256" / "ab").iterdir()] == [
+        "abc"
+    ]
+
+    store.delete("tenant/sha256/ab/abc")
+    store.delete("tenant/sha256/ab/abc")
+    assert not store.exists("tenant/sha256/ab/abc")
+
+    with pytest.raises(ValueError):
+        store.put("../outside", io.BytesIO(b""))
+
+
+def test_s3_object_store_reads_ranges() -> None:
+    client = _FakeS3Client()
+    store = S3ObjectStore("bucket", prefix="files/", client=client)
+    data = bytes(range(256)) * 1000
+
+    assert not store.exists("key")
+    store.put("key", io.BytesIO(data))
+    assert client.objects[("bucket", "files/key")] == data
+    assert store.exists("key")
+
+    with store.open("key") as reader:
+        # nothing is fetched until read
+        assert client.ranges == []
+        reader.seek(1000)
+        assert reader.read(10) == data[1000:1010]
+        assert reader.read() == data[1010:]
+    assert client.ranges[0].startswith("bytes=1000-")
+
+    store.delete("key")
+    assert not store.exists("key")
+    with pytest.raises(FileNotFoundError):
+        store.open("key")
+
+
+def test_object_backed_file_store_deduplicates(
+    tmp_path: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    records: dict[str, PGFileStore] = {}
+
+    def _upsert(file_name: str, **kwargs: Any) -> PGFileStore:
+        record = PGFileStore(
+            file_name=file_name,
+            lobj_oid=kwargs["lobj_oid"],
+            object_key=kwargs["object_key"],
+        )
+        records[file_name] = record
+        return record
+
+    def _delete(file_name: str, db_session: Any) -> None:
+        del records[file_name]
+
+    monkeypatch.setattr(file_store_module, "upsert_pgfilestore", _upsert)
+    monkeypatch.setattr(
+        file_store_module,
+        "get_pgfilestore_by_file_name",
+        lambda file_name, db_session: records[file_name],
+    )
+    monkeypatch.setattr(file_store_module, "delete_pgfilestore_by_file_name", _delete)
+    monkeypatch.setattr(
+        file_store_module,
+        "count_pgfilestores_by_object_key",
+        lambda object_key, db_session: sum(
+            record.object_key == object_key for record in records.values()
+        ),
+    )
+
+    db_session = MagicMock()
+    db_session.query.return_value.filter_by.return_value.first.return_value = None
+    object_store = FilesystemObjectStore(str(tmp_path))
+    file_store = ObjectBackedFileStore(db_session, object_store)
+
+    for file_name in ("a", "b"):
+        file_store.save_file(
+            file_name=file_name,
+            content=io.BytesIO(b"same content"),
+            display_name=None,
+            file_origin=FileOrigin.CHAT_UPLOAD,
+            file_type="text/plain",
+        )
+
+    object_key = records["a"].object_key
+    assert object_key is not None
+    assert records["b"].object_key == object_key
+    assert file_store.read_file("b").read() == b"same content"
+    assert file_store.get_file_path("a") == object_store.get_local_path(object_key)
+
+    # the object is only deleted with its last file
+    file_store.delete_file("a")
+    assert object_store.exists(object_key)
+    file_store.delete_file("b")
+    assert not object_store.exists(object_key)
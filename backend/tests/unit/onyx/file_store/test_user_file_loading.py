@@ -0,0 +1,71 @@
+import io
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.file_store import utils as file_store_utils
+from onyx.file_store.utils import load_all_user_file_files
+from onyx.file_store.utils import load_user_files_content
+from onyx.file_store.utils import user_file_id_to_plaintext_file_name
+
+
+def _user_file(user_file_id: int) -> Any:
+    return SimpleNamespace(
+        id=user_file_id, file_id=f"file_{user_file_id}", name=f"{user_file_id}.txt"
+    )
+
+
+def test_user_files_are_read_with_a_session_per_thread() -> None:
+    sessions: list[MagicMock] = []
+    session_threads: dict[int, int] = {}
+    lock = threading.Lock()
+
+    @contextmanager
+    def _new_session() -> Iterator[MagicMock]:
+        db_session = MagicMock()
+        with lock:
+            sessions.append(db_session)
+            session_threads[id(db_session)] = threading.get_ident()
+        yield db_session
+
+    def _get_file_store(db_session: MagicMock) -> MagicMock:
+        # the session is only used from the thread that opened it
+        assert session_threads[id(db_session)] == threading.get_ident()
+        file_store = MagicMock()
+        file_store.read_file.side_effect = lambda file_name, mode: io.BytesIO(
+            file_name.encode()
+        )
+        return file_store
+
+    with (
+        patch.object(file_store_utils, "get_session_with_current_tenant", _new_session),
+        patch.object(file_store_utils, "get_default_file_store", _get_file_store),
+    ):
+        chat_files = load_user_files_content([_user_file(1), _user_file(2)])
+
+    assert len(sessions) == 2
+    assert [chat_file.file_id for chat_file in chat_files] == ["file_1", "file_2"]
+    assert [chat_file.filename for chat_file in chat_files] == ["1.txt", "2.txt"]
+    assert chat_files[0].content == user_file_id_to_plaintext_file_name(1).encode()
+
+
+def test_missing_user_file_ids_raise() -> None:
+    db_session = MagicMock()
+    db_session.query.return_value.filter.return_value.order_by.return_value.all.return_value = [
+        _user_file(1),
+        # selected through its folder
+        _user_file(5),
+    ]
+
+    assert load_all_user_file_files([1], [7], db_session) == [
+        _user_file(1),
+        _user_file(5),
+    ]
+    with pytest.raises(ValueError, match=r"\[2\]"):
+        load_all_user_file_files([1, 2], [7], db_session)
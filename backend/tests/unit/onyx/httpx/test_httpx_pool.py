@@ -0,0 +1,78 @@
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+from prometheus_client import CollectorRegistry
+
+from onyx.httpx.httpx_pool import HttpxPool
+from onyx.httpx.httpx_pool import HttpxPoolCollector
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def server_url() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def reset_pool() -> Iterator[None]:
+    HttpxPool.close_all()
+    yield
+    HttpxPool.close_all()
+
+
+def test_pooled_client_reuses_connections(server_url: str) -> None:
+    HttpxPool.init_client(name="test", http2=False)
+    for _ in range(5):
+        response = HttpxPool.get("test").get(server_url)
+        assert response.status_code == 200
+
+    (stats,) = HttpxPool.get_stats()
+    assert stats.name == "test"
+    # every request went over the same kept-alive connection
+    assert stats.num_connections == 1
+    assert stats.num_idle_connections == 1
+    assert stats.num_waiters == 0
+
+
+def test_collector_reports_pool_stats(server_url: str) -> None:
+    HttpxPool.init_client(name="test", http2=False)
+    HttpxPool.get("test").get(server_url)
+
+    registry = CollectorRegistry()
+    registry.register(HttpxPoolCollector())
+
+    assert (
+        registry.get_sample_value(
+            "onyx_httpx_pool_connections", {"client": "test", "state": "idle"}
+        )
+        == 1
+    )
+    assert (
+        registry.get_sample_value(
+            "onyx_httpx_pool_connections", {"client": "test", "state": "active"}
+        )
+        == 0
+    )
+    assert registry.get_sample_value("onyx_httpx_pool_waiters", {"client": "test"}) == 0
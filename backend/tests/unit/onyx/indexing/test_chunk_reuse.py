@@ -0,0 +1,280 @@
+from contextlib import nullcontext
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.access.models import DocumentAccess
+from onyx.connectors.models import Document
+from onyx.connectors.models import DocumentSource
+from onyx.connectors.models import IndexAttemptMetadata
+from onyx.document_index.interfaces import DocumentInsertionRecord
+from onyx.document_index.vespa.indexing_utils import (
+    build_vespa_chunk_document_level_update,
+)
+from onyx.document_index.vespa_constants import USER_FILE
+from onyx.document_index.vespa_constants import USER_FOLDER
+from onyx.indexing.chunk_reuse import get_chunk_hash
+from onyx.indexing.chunk_reuse import merge_unchanged_chunks
+from onyx.indexing.chunk_reuse import split_unchanged_chunks
+from onyx.indexing.indexing_pipeline import DocumentBatchPrepareContext
+from onyx.indexing.indexing_pipeline import EmbeddedDocumentBatch
+from onyx.indexing.indexing_pipeline import index_doc_batch_write
+from onyx.indexing.models import ChunkEmbedding
+from onyx.indexing.models import DocAwareChunk
+from onyx.indexing.models import DocMetadataAwareIndexChunk
+from onyx.indexing.models import IndexChunk
+
+INDEX_NAME = "danswer_chunk_test"
+
+
+def create_test_chunk(
+    content: str,
+    chunk_id: int = 0,
+    doc_id: str = "test_doc",
+    doc_updated_at: datetime | None = None,
+) -> DocAwareChunk:
+    doc = Document(
+        id=doc_id,
+        semantic_identifier="test doc",
+        sections=[],
+        source=DocumentSource.FILE,
+        metadata={"tag": ["a", "b"]},
+        doc_updated_at=doc_updated_at,
+    )
+    return DocAwareChunk(
+        chunk_id=chunk_id,
+        content=content,
+        source_document=doc,
+        blurb=content[:50],
+        source_links={0: "test_link"},
+        section_continuation=False,
+        title_prefix="",
+        metadata_suffix_semantic="",
+        metadata_suffix_keyword="",
+        mini_chunk_texts=None,
+        large_chunk_id=None,
+        large_chunk_reference_ids=[],
+        image_file_name=None,
+        chunk_context="",
+        doc_summary="",
+        contextual_rag_reserved_tokens=0,
+    )
+
+
+def _embed(chunk: DocAwareChunk) -> IndexChunk:
+    return IndexChunk(
+        **chunk.model_dump(),
+        embeddings=ChunkEmbedding(full_embedding=[1.0], mini_chunk_embeddings=[]),
+        title_embedding=None,
+    )
+
+
+def test_chunk_hash_ignores_document_level_updates() -> None:
+    old_chunk = create_test_chunk(
+        "hello", doc_updated_at=datetime(2024, 1, 1, tzinfo=timezone.utc)
+    )
+    new_chunk = create_test_chunk(
+        "hello", doc_updated_at=datetime(2025, 1, 1, tzinfo=timezone.utc)
+    )
+    assert get_chunk_hash(old_chunk, INDEX_NAME) == get_chunk_hash(
+        new_chunk, INDEX_NAME
+    )
+
+    # anything that is embedded or written for the chunk changes the hash
+    old_hash = get_chunk_hash(old_chunk, INDEX_NAME)
+    assert get_chunk_hash(create_test_chunk("hello!"), INDEX_NAME) != old_hash
+    assert get_chunk_hash(create_test_chunk("hello", chunk_id=1), INDEX_NAME) != (
+        old_hash
+    )
+    assert get_chunk_hash(old_chunk, "danswer_chunk_other") != old_hash
+    # doc_updated_at can't be cleared in place
+    assert get_chunk_hash(create_test_chunk("hello"), INDEX_NAME) != old_hash
+    assert (
+        get_chunk_hash(
+            old_chunk.model_copy(update={"title_prefix": "Title\n"}), INDEX_NAME
+        )
+        != old_hash
+    )
+
+
+def test_split_and_merge_unchanged_chunks() -> None:
+    chunks = [
+        create_test_chunk("first", chunk_id=0),
+        create_test_chunk("second, edited", chunk_id=1),
+        create_test_chunk("third", chunk_id=2),
+        create_test_chunk("other doc", chunk_id=0, doc_id="other_doc"),
+        create_test_chunk("failing doc", chunk_id=0, doc_id="failing_doc"),
+    ]
+    previous_hashes = [
+        get_chunk_hash(chunks[0], INDEX_NAME),
+        get_chunk_hash(create_test_chunk("second", chunk_id=1), INDEX_NAME),
+        get_chunk_hash(chunks[2], INDEX_NAME),
+    ]
+
+    chunks_to_embed, unchanged_chunks = split_unchanged_chunks(
+        chunks=chunks,
+        doc_id_to_chunk_hashes={
+            "test_doc": previous_hashes,
+            "other_doc": None,
+            "failing_doc": [get_chunk_hash(chunks[4], INDEX_NAME)],
+        },
+        index_name=INDEX_NAME,
+    )
+    assert [chunk.content for chunk in chunks_to_embed] == [
+        "second, edited",
+        "other doc",
+    ]
+    assert [chunk.content for chunk in unchanged_chunks] == [
+        "first",
+        "third",
+        "failing doc",
+    ]
+    assert all(chunk.content_unchanged for chunk in unchanged_chunks)
+    assert all(not chunk.embeddings.full_embedding for chunk in unchanged_chunks)
+
+    merged_chunks = merge_unchanged_chunks(
+        chunks=chunks,
+        embedded_chunks=[_embed(chunk) for chunk in chunks_to_embed],
+        unchanged_chunks=unchanged_chunks,
+        failed_document_ids={"failing_doc"},
+    )
+    assert [
+        (chunk.source_document.id, chunk.content, chunk.content_unchanged)
+        for chunk in merged_chunks
+    ] == [
+        ("test_doc", "first", True),
+        ("test_doc", "second, edited", False),
+        ("test_doc", "third", True),
+        ("other_doc", "other doc", False),
+    ]
+
+
+def test_document_written_since_the_embedding_is_reported_as_failed() -> None:
+    chunks = [
+        _embed(create_test_chunk("first", chunk_id=0)),
+        _embed(create_test_chunk("second", chunk_id=1)).model_copy(
+            update={"content_unchanged": True}
+        ),
+        _embed(create_test_chunk("stale", chunk_id=0, doc_id="stale_doc")).model_copy(
+            update={"content_unchanged": True}
+        ),
+    ]
+    documents = [chunks[0].source_document, chunks[2].source_document]
+    document_index = MagicMock(index_name=INDEX_NAME)
+    written_chunks: list[DocMetadataAwareIndexChunk] = []
+
+    def _write_chunks(
+        chunks: list[DocMetadataAwareIndexChunk], **kwargs: Any
+    ) -> tuple[list[DocumentInsertionRecord], list]:
+        written_chunks.extend(chunks)
+        document_ids = {chunk.source_document.id for chunk in chunks}
+        return [
+            DocumentInsertionRecord(document_id=document_id, already_existed=True)
+            for document_id in document_ids
+        ], []
+
+    pipeline = "onyx.indexing.indexing_pipeline"
+    with (
+        patch(f"{pipeline}.prepare_to_modify_documents", return_value=nullcontext()),
+        patch(
+            f"{pipeline}.get_access_for_documents",
+            return_value={
+                document.id: DocumentAccess.build([], [], [], [], True)
+                for document in documents
+            },
+        ),
+        patch(f"{pipeline}.fetch_document_sets_for_documents", return_value=[]),
+        patch(f"{pipeline}.fetch_user_files_for_documents", return_value={}),
+        patch(f"{pipeline}.fetch_user_folders_for_documents", return_value={}),
+        patch(
+            f"{pipeline}.fetch_chunk_counts_for_documents",
+            return_value=[("test_doc", 2), ("stale_doc", 1)],
+        ),
+        # stale_doc was re-written by another connector after its chunks were
+        # matched, its stored hashes don't match anymore
+        patch(
+            f"{pipeline}.fetch_chunk_hashes_for_documents",
+            return_value={
+                "test_doc": [get_chunk_hash(chunk, INDEX_NAME) for chunk in chunks[:2]],
+                "stale_doc": [
+                    get_chunk_hash(
+                        create_test_chunk("edited", doc_id="stale_doc"), INDEX_NAME
+                    )
+                ],
+            },
+        ),
+        patch(f"{pipeline}.get_default_llms", side_effect=Exception),
+        patch(
+            f"{pipeline}.write_chunks_to_vector_db_with_backoff",
+            side_effect=_write_chunks,
+        ) as mock_write,
+        patch(f"{pipeline}.update_docs_after_indexing__no_commit") as mock_update_docs,
+        patch(f"{pipeline}.update_user_file_token_count__no_commit"),
+        patch(
+            f"{pipeline}.update_chunk_hashes_for_documents__no_commit"
+        ) as mock_update_hashes,
+        patch(f"{pipeline}.mark_document_as_indexed_for_cc_pair__no_commit"),
+        patch(f"{pipeline}.update_chunk_boost_components__no_commit"),
+    ):
+        result = index_doc_batch_write(
+            embedded_batch=EmbeddedDocumentBatch(
+                filtered_documents=documents,
+                prepare_context=DocumentBatchPrepareContext(
+                    updatable_docs=documents, id_to_db_doc_map={}
+                ),
+                chunks_with_embeddings=chunks,
+                chunk_content_scores=[1.0] * len(chunks),
+            ),
+            document_index=document_index,
+            index_attempt_metadata=IndexAttemptMetadata(
+                connector_id=1, credential_id=1
+            ),
+            db_session=MagicMock(),
+            tenant_id="public",
+        )
+
+    # the stale document is left as it is, nothing is written for it
+    assert [(c.source_document.id, c.content) for c in written_chunks] == [
+        ("test_doc", "first"),
+        ("test_doc", "second"),
+    ]
+    index_batch_params = mock_write.call_args.kwargs["index_batch_params"]
+    assert index_batch_params.doc_id_to_new_chunk_cnt == {"test_doc": 2}
+    assert mock_update_docs.call_args.kwargs["document_ids"] == ["test_doc"]
+    assert mock_update_hashes.call_args.kwargs["doc_id_to_chunk_hashes"] == {
+        "test_doc": [get_chunk_hash(chunk, INDEX_NAME) for chunk in chunks[:2]]
+    }
+
+    # and reported so that it is retried
+    assert [
+        failure.failed_document.document_id
+        for failure in result.failures
+        if failure.failed_document
+    ] == ["stale_doc"]
+    assert result.total_chunks == 2
+    assert result.reused_chunks == 1
+
+
+def test_document_level_update_clears_user_file_and_folder() -> None:
+    chunk = DocMetadataAwareIndexChunk.from_index_chunk(
+        index_chunk=_embed(create_test_chunk("hello")),
+        access=DocumentAccess.build([], [], [], [], True),
+        document_sets=set(),
+        user_file=None,
+        user_folder=None,
+        boost=0,
+        aggregated_chunk_boost_factor=1.0,
+        tenant_id="public",
+    )
+
+    update_fields = build_vespa_chunk_document_level_update(chunk)
+    assert update_fields[USER_FILE] == {"assign": None}
+    assert update_fields[USER_FOLDER] == {"assign": None}
+
+    update_fields = build_vespa_chunk_document_level_update(
+        chunk.model_copy(update={"user_file": 1, "user_folder": 2})
+    )
+    assert update_fields[USER_FILE] == {"assign": 1}
+    assert update_fields[USER_FOLDER] == {"assign": 2}
@@ -1,5 +1,6 @@
 from typing import Any
 from unittest.mock import Mock
+from unittest.mock import patch
 
 import pytest
 
@@ -12,6 +13,7 @@ from onyx.indexing.chunker import Chunker
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.indexing_pipeline import process_image_sections
 from onyx.llm.utils import MAX_CONTEXT_TOKENS
+from onyx.utils.text_processing import shared_precompare_cleanup
 from tests.unit.onyx.indexing.conftest import MockHeartbeat
 
 
@@ -105,3 +107,59 @@ def test_chunker_heartbeat(
 
     assert mock_heartbeat.call_count == 1
     assert len(chunks) > 0
+
+
+def test_chunker_many_small_sections(embedder: DefaultIndexingEmbedder) -> None:
+    """Chat-like documents (many tiny sections) should be tokenized roughly once,
+    not once per section for the whole accumulated chunk."""
+    section_texts = [
+        f"user_{i % 7}: message number {i}, just a quick reply in the thread"
+        for i in range(300)
+    ]
+    document = Document(
+        id="test_doc",
+        source=DocumentSource.SLACK,
+        semantic_identifier="Test Thread",
+        metadata={},
+        doc_updated_at=None,
+        sections=[
+            TextSection(text=text, link=f"link{i}")
+            for i, text in enumerate(section_texts)
+        ],
+    )
+    indexing_documents = process_image_sections([document])
+
+    tokenizer = embedder.embedding_model.tokenizer
+    encoded_chars = 0
+    original_encode = tokenizer.encode
+
+    def counting_encode(text: str) -> list[int]:
+        nonlocal encoded_chars
+        encoded_chars += len(text)
+        return original_encode(text)
+
+    with patch.object(tokenizer, "encode", side_effect=counting_encode):
+        chunker = Chunker(
+            tokenizer=tokenizer,
+            enable_multipass=False,
+            enable_contextual_rag=False,
+        )
+        chunks = chunker.chunk(indexing_documents)
+
+    # each section is tokenized once when it is added to a chunk, and each chunk is
+    # tokenized (at most) once more for its blurb
+    total_chars = sum(len(text) for text in section_texts)
+    assert encoded_chars < 3 * total_chars
+
+    # every section ends up in exactly one chunk, in order
+    assert "\n\n".join(chunk.content for chunk in chunks) == "\n\n".join(section_texts)
+
+    # link offsets still point at the start of their section in the cleaned chunk text
+    for chunk in chunks:
+        cleaned_content = shared_precompare_cleanup(chunk.content)
+        assert chunk.source_links
+        for offset, link in chunk.source_links.items():
+            section_text = section_texts[int(link.removeprefix("link"))]
+            assert cleaned_content[offset:].startswith(
+                shared_precompare_cleanup(section_text)
+            )
@@ -0,0 +1,109 @@
+from collections.abc import Generator
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.indexing import embedding_cache as embedding_cache_module
+from onyx.indexing.embedding_cache import build_embedding_model_key
+from onyx.indexing.embedding_cache import IndexingEmbeddingCache
+from shared_configs.model_server_models import Embedding
+
+
+@pytest.fixture
+def stored_embeddings() -> Generator[dict[str, bytes], None, None]:
+    """Stands in for the embedding_cache table."""
+    stored: dict[str, bytes] = {}
+
+    def _fetch(cache_keys: list[str], *args: object, **kwargs: object) -> dict:
+        return {key: stored[key] for key in cache_keys if key in stored}
+
+    def _insert(cache_key_to_embedding: dict[str, bytes], *args: object) -> None:
+        for key, value in cache_key_to_embedding.items():
+            stored.setdefault(key, value)
+
+    with (
+        patch.object(embedding_cache_module, "get_session_with_current_tenant"),
+        patch.object(
+            embedding_cache_module,
+            "fetch_embedding_cache_entries",
+            side_effect=_fetch,
+        ),
+        patch.object(
+            embedding_cache_module,
+            "insert_embedding_cache_entries__no_commit",
+            side_effect=_insert,
+        ),
+        patch.object(
+            embedding_cache_module,
+            "evict_embedding_cache_entries__no_commit",
+            return_value=0,
+        ),
+    ):
+        yield stored
+
+
+def _model_key(model_name: str = "intfloat/e5-base-v2") -> str:
+    return build_embedding_model_key(
+        model_name=model_name,
+        normalize=True,
+        passage_prefix="passage: ",
+        provider_type=None,
+        api_url=None,
+        deployment_name=None,
+        reduced_dimension=None,
+    )
+
+
+def _fake_embed(texts: list[str]) -> list[Embedding]:
+    return [[float(len(text)), 0.5, 0.25] for text in texts]
+
+
+def test_only_uncached_texts_are_embedded(stored_embeddings: dict[str, bytes]) -> None:
+    cache = IndexingEmbeddingCache(model_key=_model_key(), max_bytes=1024 * 1024)
+    embed_fn = MagicMock(side_effect=_fake_embed)
+
+    assert cache.embed(["a", "bb", "a"], embed_fn) == _fake_embed(["a", "bb", "a"])
+    # duplicates within a batch are only embedded once
+    embed_fn.assert_called_once_with(["a", "bb"])
+    assert len(stored_embeddings) == 2
+
+    embed_fn.reset_mock()
+    assert cache.embed(["bb", "ccc", "a"], embed_fn) == _fake_embed(["bb", "ccc", "a"])
+    embed_fn.assert_called_once_with(["ccc"])
+
+    assert (cache.hits, cache.misses) == (2, 4)
+    assert cache.hit_rate == pytest.approx(2 / 6)
+
+
+def test_key_depends_on_model_and_context() -> None:
+    cache = IndexingEmbeddingCache(model_key=_model_key(), max_bytes=1024)
+    other_model_cache = IndexingEmbeddingCache(
+        model_key=_model_key("nomic-ai/nomic-embed-text-v1"), max_bytes=1024
+    )
+
+    key = cache.get_key("some text")
+    assert key == IndexingEmbeddingCache(_model_key(), 1024).get_key("some text")
+    assert key != other_model_cache.get_key("some text")
+    assert key != cache.get_key("some text", context="large_chunks")
+
+
+def test_disabled_or_failing_cache_falls_back_to_embedding(
+    stored_embeddings: dict[str, bytes],
+) -> None:
+    embed_fn = MagicMock(side_effect=_fake_embed)
+
+    disabled_cache = IndexingEmbeddingCache(model_key=_model_key(), max_bytes=0)
+    assert disabled_cache.embed(["a", "a"], embed_fn) == _fake_embed(["a", "a"])
+    embed_fn.assert_called_once_with(["a", "a"])
+    assert not stored_embeddings
+
+    embed_fn.reset_mock()
+    cache = IndexingEmbeddingCache(model_key=_model_key(), max_bytes=1024)
+    with patch.object(
+        embedding_cache_module,
+        "fetch_embedding_cache_entries",
+        side_effect=RuntimeError("db is down"),
+    ):
+        assert cache.embed(["a", "bb"], embed_fn) == _fake_embed(["a", "bb"])
+    embed_fn.assert_called_once_with(["a", "bb"])
@@ -0,0 +1,177 @@
+import json
+import re
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from onyx.indexing.sentence_splitter import SentenceAwareSplitter
+from onyx.indexing.sentence_splitter import TokenCounter
+from onyx.natural_language_processing.utils import BaseTokenizer
+
+# Generated with the llama_index SentenceSplitter the Chunker used to depend on,
+# see `_generate_golden_corpus` below.
+GOLDEN_CORPUS_PATH = Path(__file__).parent / "sentence_splitter_golden_corpus.json"
+
+_TOKEN_PATTERN = re.compile(r"\w{1,6}|[^\w\s]|\s+")
+
+
+class RegexTokenizer(BaseTokenizer):
+    """Deterministic, offline stand-in for a real tokenizer. Words (in pieces of up to
+    6 characters), punctuation and runs of whitespace are each one token, so long words
+    span several tokens and whitespace-only text still has tokens."""
+
+    def __init__(self) -> None:
+        self.encode_calls = 0
+
+    def encode(self, string: str) -> list[int]:
+        self.encode_calls += 1
+        return [len(token) for token in _TOKEN_PATTERN.findall(string)]
+
+    def tokenize(self, string: str) -> list[str]:
+        return _TOKEN_PATTERN.findall(string)
+
+    def decode(self, tokens: list[int]) -> str:
+        raise NotImplementedError
+
+
+def _load_golden_corpus() -> list[dict[str, Any]]:
+    with open(GOLDEN_CORPUS_PATH) as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize(
+    "case", _load_golden_corpus(), ids=lambda case: str(case["case_id"])
+)
+def test_sentence_splitter_matches_golden_corpus(case: dict[str, Any]) -> None:
+    splitter = SentenceAwareSplitter(
+        token_counter=TokenCounter(RegexTokenizer()),
+        chunk_size=case["chunk_size"],
+        chunk_overlap=case["chunk_overlap"],
+    )
+
+    chunks = splitter.split_text(case["text"])
+
+    assert chunks == case["expected_chunks"]
+    assert splitter.first_chunk(case["text"]) == (chunks[0] if chunks else "")
+
+
+def test_first_chunk_is_lazy() -> None:
+    tokenizer = RegexTokenizer()
+    splitter = SentenceAwareSplitter(
+        token_counter=TokenCounter(tokenizer), chunk_size=20
+    )
+    text = "\n\n\n".join(f"Paragraph {i} has a few words in it." for i in range(500))
+
+    first_chunk = splitter.first_chunk(text)
+
+    # whole text + the first couple of paragraphs, not all 500 of them
+    assert tokenizer.encode_calls < 10
+    assert first_chunk == splitter.split_text(text)[0]
+
+
+def test_token_counts_are_shared_between_splitters() -> None:
+    tokenizer = RegexTokenizer()
+    token_counter = TokenCounter(tokenizer)
+    chunk_splitter = SentenceAwareSplitter(token_counter=token_counter, chunk_size=40)
+    mini_chunk_splitter = SentenceAwareSplitter(
+        token_counter=token_counter, chunk_size=40
+    )
+    text = " ".join(f"Sentence number {i} is here." for i in range(50))
+
+    chunk_splitter.split_text(text)
+    calls_after_first_split = tokenizer.encode_calls
+    mini_chunk_splitter.split_text(text)
+
+    assert tokenizer.encode_calls == calls_after_first_split
+
+    token_counter.reset()
+    mini_chunk_splitter.split_text(text)
+    assert tokenizer.encode_calls == 2 * calls_after_first_split
+
+
+def test_chunk_overlap_larger_than_chunk_size() -> None:
+    with pytest.raises(ValueError):
+        SentenceAwareSplitter(
+            token_counter=TokenCounter(RegexTokenizer()),
+            chunk_size=10,
+            chunk_overlap=11,
+        )
+
+
+def _generate_golden_corpus() -> None:
+    """Regenerates the golden corpus with llama_index (not a dependency anymore):
+    pip install llama-index-core==0.12.28
+    python -m tests.unit.onyx.indexing.test_sentence_splitter
+    """
+    import random
+
+    from llama_index.core.node_parser import SentenceSplitter  # type: ignore
+
+    rng = random.Random(1234)
+    words = (
+        "the quick brown fox jumps over a lazy dog while engineers deploy "
+        "services to production and customers file tickets about latency"
+    ).split()
+
+    def sentence(min_words: int = 3, max_words: int = 25) -> str:
+        sentence_words = [
+            rng.choice(words) for _ in range(rng.randint(min_words, max_words))
+        ]
+        return " ".join(sentence_words).capitalize() + rng.choice(".?!")
+
+    def paragraph(num_sentences: int) -> str:
+        return " ".join(sentence() for _ in range(num_sentences))
+
+    texts = [
+        "",
+        "   \n\t  ",
+        "Short text.",
+        paragraph(3),
+        paragraph(40),
+        "\n\n\n".join(paragraph(rng.randint(1, 8)) for _ in range(12)),
+        "\n\n".join(paragraph(rng.randint(1, 4)) for _ in range(10)),
+        "Dr. Smith met Mr. Jones at 3 p.m. on Jan. 5th, e.g. at the U.S. office. "
+        + paragraph(10),
+        # no sentence punctuation at all, forces the word level split
+        " ".join(rng.choice(words) for _ in range(400)),
+        # one giant "word", forces the character level split
+        "x" * 300 + " " + "y" * 120,
+        # sub-sentence regex: commas and semicolons, no periods
+        ", ".join(" ".join(rng.choice(words) for _ in range(6)) for _ in range(60)),
+        "；".join("这是一个测试句子，包含中文标点。" for _ in range(30)) + "？！",
+        "def foo(bar):\n    return bar + 1\n\n\n"
+        + "\n".join(
+            f"    x_{i} = foo({i})  # comment, with punctuation." for i in range(40)
+        ),
+        "\n".join(f"user_{rng.randint(0, 9)}: {sentence(1, 12)}" for _ in range(120)),
+        "- item one\n- item two, with a comma\n- item three.\n\n\n" + paragraph(20),
+        "Trailing whitespace sentence.   \n\n\n   " + paragraph(15) + "   \n\n\n",
+    ]
+    configs = [(16, 0), (64, 0), (128, 0), (64, 8), (200, 20)]
+
+    cases = []
+    for text_id, text in enumerate(texts):
+        for chunk_size, chunk_overlap in configs:
+            splitter = SentenceSplitter(
+                tokenizer=RegexTokenizer().tokenize,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+            )
+            cases.append(
+                {
+                    "case_id": f"{text_id}-{chunk_size}-{chunk_overlap}",
+                    "text": text,
+                    "chunk_size": chunk_size,
+                    "chunk_overlap": chunk_overlap,
+                    "expected_chunks": splitter.split_text(text),
+                }
+            )
+
+    with open(GOLDEN_CORPUS_PATH, "w") as f:
+        json.dump(cases, f, indent=1, ensure_ascii=False)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    _generate_golden_corpus()
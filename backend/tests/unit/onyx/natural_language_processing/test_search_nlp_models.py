@@ -0,0 +1,59 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
+from shared_configs.enums import EmbedTextType
+from shared_configs.model_server_models import EmbedRequest
+from shared_configs.model_server_models import EmbedResponse
+from shared_configs.utils import batch_by_token_budget
+
+
+def test_batch_by_token_budget() -> None:
+    lengths = [512, 20, 150, 512, 20, 150, 700]
+
+    batches = batch_by_token_budget(lengths, token_budget=1024)
+
+    # sorted by length, at most 1024 tokens once padded, too long items alone
+    assert batches == [[1, 4, 2, 5], [0, 3], [6]]
+    assert batch_by_token_budget([], token_budget=1024) == []
+
+
+def test_length_bucketed_embeddings_keep_the_text_order() -> None:
+    tokenizer = MagicMock()
+    tokenizer.encode.side_effect = lambda text: text.split()
+    with patch(
+        "onyx.natural_language_processing.search_nlp_models.get_tokenizer",
+        return_value=tokenizer,
+    ):
+        model = EmbeddingModel(
+            server_host="localhost",
+            server_port=9000,
+            model_name="intfloat/e5-base-v2",
+            normalize=True,
+            query_prefix=None,
+            passage_prefix=None,
+            api_key=None,
+            api_url=None,
+            provider_type=None,
+        )
+
+    sent_batches: list[list[str]] = []
+
+    def _fake_request(embed_request: EmbedRequest, **kwargs: object) -> EmbedResponse:
+        sent_batches.append(embed_request.texts)
+        return EmbedResponse(
+            embeddings=[[float(len(text.split()))] for text in embed_request.texts]
+        )
+
+    texts = ["a " * 8, "b", "c " * 8, "d", "e", "f " * 2]
+    with patch.object(model, "_make_model_server_request", side_effect=_fake_request):
+        embeddings = model._batch_encode_texts(
+            texts=texts,
+            text_type=EmbedTextType.PASSAGE,
+            batch_size=2,
+            max_seq_length=8,
+        )
+
+    assert embeddings == [[8.0], [1.0], [8.0], [1.0], [1.0], [2.0]]
+    # short texts are batched together, long ones by at most 2
+    assert sent_batches == [["b", "d", "e", "f " * 2], ["a " * 8, "c " * 8]]
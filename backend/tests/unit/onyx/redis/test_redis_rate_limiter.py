@@ -0,0 +1,92 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.redis import redis_rate_limiter
+from onyx.redis.redis_rate_limiter import RedisRateLimiter
+from onyx.redis.redis_rate_limiter import RedisRateLimitTimeoutError
+
+
+def _build_limiter(
+    acquire_results: list[int], backoff_result: int = 0, tenant_id: str = "tenant_a"
+) -> tuple[RedisRateLimiter, MagicMock, MagicMock]:
+    acquire_script = MagicMock(side_effect=acquire_results)
+    backoff_script = MagicMock(return_value=backoff_result)
+    r = MagicMock()
+    r.register_script.side_effect = [acquire_script, backoff_script]
+    limiter = RedisRateLimiter(
+        r, source="confluence", key="1", rate=2, burst=5, tenant_id=tenant_id
+    )
+    return limiter, acquire_script, backoff_script
+
+
+def test_acquire_waits_until_a_token_is_available() -> None:
+    limiter, acquire_script, _ = _build_limiter([1500, 200, 0])
+
+    with patch.object(redis_rate_limiter.time, "sleep") as mock_sleep:
+        limiter.acquire()
+
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [1.5, 0.2]
+    assert acquire_script.call_count == 3
+    assert acquire_script.call_args.kwargs == {
+        "keys": ["connector_rate_limit:tenant_a:confluence:1"],
+        "args": [2, 5, RedisRateLimiter.TTL_MS],
+    }
+
+
+def test_acquire_sleeps_in_short_increments() -> None:
+    limiter, _, _ = _build_limiter([60_000, 0])
+
+    with patch.object(redis_rate_limiter.time, "sleep") as mock_sleep:
+        limiter.acquire()
+
+    mock_sleep.assert_called_once_with(RedisRateLimiter.MAX_SLEEP)
+
+
+def test_acquire_timeout() -> None:
+    limiter, _, _ = _build_limiter([30_000])
+
+    with (
+        patch.object(redis_rate_limiter.time, "sleep") as mock_sleep,
+        pytest.raises(RedisRateLimitTimeoutError),
+    ):
+        limiter.acquire(timeout=10)
+
+    mock_sleep.assert_not_called()
+
+
+def test_backoff_is_shared_through_redis() -> None:
+    limiter, _, backoff_script = _build_limiter([], backoff_result=12_500)
+
+    assert limiter.backoff(10, cumulative=True) == 12.5
+    assert backoff_script.call_args.kwargs == {
+        "keys": ["connector_rate_limit:tenant_a:confluence:1"],
+        "args": [10_000, "1", RedisRateLimiter.TTL_MS],
+    }
+
+
+def test_tenants_with_the_same_credential_id_get_different_buckets() -> None:
+    limiter_a, acquire_script_a, backoff_script_a = _build_limiter([0])
+    limiter_b, acquire_script_b, _ = _build_limiter([0], tenant_id="tenant_b")
+
+    limiter_a.acquire()
+    limiter_a.backoff(30)
+    limiter_b.acquire()
+
+    assert limiter_a.bucket_key != limiter_b.bucket_key
+    assert acquire_script_a.call_args.kwargs["keys"] == [limiter_a.bucket_key]
+    assert backoff_script_a.call_args.kwargs["keys"] == [limiter_a.bucket_key]
+    assert acquire_script_b.call_args.kwargs["keys"] == [
+        "connector_rate_limit:tenant_b:confluence:1"
+    ]
+
+
+def test_bucket_defaults_to_the_current_tenant() -> None:
+    r = MagicMock()
+    with patch.object(
+        redis_rate_limiter, "get_current_tenant_id", return_value="tenant_c"
+    ):
+        limiter = RedisRateLimiter(r, source="slack", key="1")
+
+    assert limiter.bucket_key == "connector_rate_limit:tenant_c:slack:1"
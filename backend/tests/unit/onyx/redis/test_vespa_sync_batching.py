@@ -0,0 +1,159 @@
+from collections import defaultdict
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from celery import states
+
+from onyx.background.celery.apps import app_base
+from onyx.background.celery.tasks.vespa import tasks as vespa_tasks
+from onyx.configs.constants import OnyxCeleryTask
+from onyx.redis import redis_document_set
+from onyx.redis.redis_document_set import RedisDocumentSet
+
+_TENANT_ID = "public"
+
+
+class _SetOnlyRedis:
+    """Just enough of a redis client to track tasksets."""
+
+    def __init__(self) -> None:
+        self.sets: dict[str, set[str]] = defaultdict(set)
+
+    def sadd(self, key: str, *members: str) -> int:
+        self.sets[key].update(members)
+        return len(members)
+
+    def srem(self, key: str, *members: str) -> int:
+        self.sets[key].difference_update(members)
+        return len(members)
+
+    def scard(self, key: str) -> int:
+        return len(self.sets[key])
+
+
+def _generate_document_set_tasks(
+    r: _SetOnlyRedis, celery_app: MagicMock, doc_ids: list[str]
+) -> tuple[int, int] | None:
+    db_session = MagicMock()
+    db_session.scalars.return_value.yield_per.return_value = doc_ids
+    with (
+        patch(
+            "onyx.redis.redis_object_helper.get_redis_client",
+            return_value=r,
+        ),
+        patch.object(redis_document_set, "VESPA_SYNC_BATCH_SIZE", 2),
+        patch.object(redis_document_set, "construct_document_id_select_by_docset"),
+    ):
+        rds = RedisDocumentSet(_TENANT_ID, 1)
+        return rds.generate_tasks(
+            100, celery_app, db_session, r, MagicMock(), _TENANT_ID  # type: ignore
+        )
+
+
+def test_document_set_tasks_are_batched_but_counted_per_document() -> None:
+    r = _SetOnlyRedis()
+    celery_app = MagicMock()
+
+    result = _generate_document_set_tasks(
+        r, celery_app, ["doc_a", "doc_b", "doc_c", "doc_d", "doc_e"]
+    )
+
+    assert result == (5, 5)
+    sent_kwargs = [call.kwargs for call in celery_app.send_task.call_args_list]
+    assert [call.args[0] for call in celery_app.send_task.call_args_list] == [
+        OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK
+    ] * 3
+    assert [kwargs["kwargs"]["document_ids"] for kwargs in sent_kwargs] == [
+        ["doc_a", "doc_b"],
+        ["doc_c", "doc_d"],
+        ["doc_e"],
+    ]
+    # the taskset is what the monitor compares against the fence payload
+    assert r.scard("documentset_taskset_1") == 5
+
+
+def test_postrun_removes_all_documents_of_a_batch() -> None:
+    r = _SetOnlyRedis()
+    celery_app = MagicMock()
+    _generate_document_set_tasks(r, celery_app, ["doc_a", "doc_b", "doc_c"])
+    first_batch: dict[str, Any] = celery_app.send_task.call_args_list[0].kwargs
+
+    task = MagicMock()
+    task.name = OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK
+    with (
+        patch.object(app_base, "get_redis_client", return_value=r),
+        patch("onyx.redis.redis_object_helper.get_redis_client", return_value=r),
+    ):
+        app_base.on_task_postrun(
+            task_id=first_batch["task_id"],
+            task=task,
+            kwargs=first_batch["kwargs"],
+            state=states.SUCCESS,
+        )
+
+    assert r.scard("documentset_taskset_1") == 1
+
+
+def _needs_sync(doc: Any) -> bool:
+    # the condition the needs sync selects in onyx.db.document use
+    return doc.last_synced is None or doc.last_modified > doc.last_synced
+
+
+def test_documents_modified_during_a_batch_still_need_sync() -> None:
+    an_hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    docs = [
+        SimpleNamespace(
+            id=doc_id,
+            chunk_count=1,
+            boost=0,
+            hidden=False,
+            last_modified=an_hour_ago,
+            last_synced=None,
+        )
+        for doc_id in ["doc_a", "doc_b"]
+    ]
+
+    def _get_access_while_doc_b_is_hidden(
+        document_ids: list[str], db_session: Any
+    ) -> dict[str, Any]:
+        # e.g. hide feedback commits after the batch read doc_b's hidden flag
+        docs[1].last_modified = datetime.now(timezone.utc) + timedelta(microseconds=1)
+        return {doc_id: MagicMock() for doc_id in document_ids}
+
+    db_session = MagicMock()
+    session_cm = MagicMock()
+    session_cm.__enter__.return_value = db_session
+    with (
+        patch.object(
+            vespa_tasks, "get_session_with_current_tenant", return_value=session_cm
+        ),
+        patch.object(vespa_tasks, "get_active_search_settings"),
+        patch.object(vespa_tasks, "get_default_document_index"),
+        patch.object(vespa_tasks, "HttpxPool"),
+        patch.object(vespa_tasks, "RetryDocumentIndex") as mock_retry_index,
+        patch.object(vespa_tasks, "get_documents_by_ids", return_value=docs),
+        patch.object(vespa_tasks, "fetch_document_sets_for_documents", return_value=[]),
+        patch.object(
+            vespa_tasks,
+            "get_access_for_documents",
+            side_effect=_get_access_while_doc_b_is_hidden,
+        ),
+    ):
+        mock_retry_index.return_value.update_single.return_value = 1
+        assert vespa_tasks.vespa_metadata_sync_batch_task.run(
+            ["doc_a", "doc_b"], tenant_id=_TENANT_ID
+        )
+
+    # apply the UPDATE that mark_documents_as_synced issued
+    stmt = db_session.execute.call_args.args[0]
+    synced_at = stmt.compile().params["last_synced"]
+    for doc in docs:
+        doc.last_synced = synced_at
+
+    assert not _needs_sync(docs[0])
+    assert _needs_sync(docs[1])
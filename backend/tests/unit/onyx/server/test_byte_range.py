@@ -0,0 +1,43 @@
+import pytest
+
+from onyx.server.utils import etag_matches
+from onyx.server.utils import parse_byte_range
+from onyx.server.utils import RangeNotSatisfiableError
+
+
+@pytest.mark.parametrize(
+    "range_header,expected",
+    [
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=900-2000", (900, 999)),
+        ("bytes=-100", (900, 999)),
+        ("bytes=-5000", (0, 999)),
+        # ignored, the whole file is served
+        ("items=0-99", None),
+        ("bytes=0-99,200-299", None),
+        ("bytes=abc-", None),
+        ("bytes=99-0", None),
+        ("bytes=5", None),
+    ],
+)
+def test_parse_byte_range(range_header: str, expected: tuple[int, int] | None) -> None:
+    assert parse_byte_range(range_header, 1000) == expected
+
+
+@pytest.mark.parametrize(
+    "range_header,size",
+    [("bytes=1000-", 1000), ("bytes=-0", 1000), ("bytes=0-", 0), ("bytes=-10", 0)],
+)
+def test_parse_byte_range_not_satisfiable(range_header: str, size: int) -> None:
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_byte_range(range_header, size)
+
+
+def test_etag_matches() -> None:
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"xyz", "abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"xyz"', '"abc"')
+    assert not etag_matches(None, '"abc"')
@@ -0,0 +1,117 @@
+import ast
+import asyncio
+import logging
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from onyx.server.middleware import event_loop_monitoring
+from onyx.server.middleware.event_loop_monitoring import (
+    add_event_loop_blocking_middleware,
+)
+from onyx.server.middleware.event_loop_monitoring import record_event_loop_lag
+
+_BACKEND_DIR = Path(__file__).parents[4]
+_ROUTE_DECORATORS = (".get(", ".post(", ".put(", ".patch(", ".delete(")
+
+
+def test_async_endpoints_do_not_use_sync_db_sessions() -> None:
+    """Handlers that need a sync Session should be plain `def` (FastAPI runs them in
+    its threadpool) or offload the db work with run_in_threadpool."""
+    offenders: list[str] = []
+    for path in list((_BACKEND_DIR / "onyx").rglob("*.py")) + list(
+        (_BACKEND_DIR / "ee").rglob("*.py")
+    ):
+        tree = ast.parse(path.read_text())
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.AsyncFunctionDef):
+                continue
+            if not any(
+                route_decorator in ast.unparse(decorator)
+                for decorator in node.decorator_list
+                for route_decorator in _ROUTE_DECORATORS
+            ):
+                continue
+
+            uses_sync_session = any(
+                arg.annotation is not None and ast.unparse(arg.annotation) == "Session"
+                for arg in node.args.args + node.args.kwonlyargs
+            )
+            awaits = any(isinstance(n, ast.Await) for n in ast.walk(node))
+            if uses_sync_session and not awaits:
+                offenders.append(f"{path.relative_to(_BACKEND_DIR)}:{node.name}")
+
+    assert offenders == []
+
+
+def test_blocking_async_handler_is_reported(monkeypatch: pytest.MonkeyPatch) -> None:
+    app = FastAPI()
+    add_event_loop_blocking_middleware(app)
+
+    @app.get("/blocking")
+    async def blocking() -> None:
+        time.sleep(0.01)
+
+    @app.get("/threadpool")
+    def threadpool() -> None:
+        pass
+
+    blocked_handlers: list[str] = []
+    monkeypatch.setattr(event_loop_monitoring, "EVENT_LOOP_BLOCKED_THRESHOLD", 0.1)
+    monkeypatch.setattr(
+        event_loop_monitoring,
+        "_event_loop_blocked",
+        MagicMock(
+            labels=lambda handler: MagicMock(
+                inc=lambda: blocked_handlers.append(handler)
+            )
+        ),
+    )
+
+    since = time.monotonic()
+    with TestClient(app) as client:
+        client.get("/blocking")
+        client.get("/threadpool")
+
+    logger = MagicMock(spec=logging.LoggerAdapter)
+    # under the threshold, nothing is reported
+    record_event_loop_lag(0.05, since, logger)
+    assert blocked_handlers == []
+    logger.warning.assert_not_called()
+
+    # the handler finished before the lag was measured but is still reported, the
+    # sync one isn't
+    record_event_loop_lag(0.5, since, logger)
+    assert blocked_handlers == ["GET /blocking"]
+    logger.warning.assert_called_once()
+
+    # requests that finished before the blocked period are not
+    blocked_handlers.clear()
+    record_event_loop_lag(0.5, time.monotonic(), logger)
+    assert blocked_handlers == ["unknown"]
+
+
+def test_monitor_measures_lag(monkeypatch: pytest.MonkeyPatch) -> None:
+    recorded: list[float] = []
+    monkeypatch.setattr(event_loop_monitoring, "EVENT_LOOP_LAG_MONITOR_INTERVAL", 0.01)
+    monkeypatch.setattr(
+        event_loop_monitoring,
+        "record_event_loop_lag",
+        lambda lag, since, logger: recorded.append(lag),
+    )
+
+    async def _block_loop() -> None:
+        monitor = asyncio.create_task(
+            event_loop_monitoring.monitor_event_loop_lag(MagicMock())
+        )
+        await asyncio.sleep(0)
+        time.sleep(0.2)
+        await asyncio.sleep(0.05)
+        monitor.cancel()
+
+    asyncio.run(_block_loop())
+    assert recorded and max(recorded) >= 0.15
@@ -7,6 +7,7 @@ from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
+from onyx.utils.threadpool_concurrency import iterate_in_background
 from onyx.utils.threadpool_concurrency import parallel_yield
 from onyx.utils.threadpool_concurrency import run_in_background
 from onyx.utils.threadpool_concurrency import run_with_timeout
@@ -389,3 +390,118 @@ def test_parallel_yield_non_blocking() -> None:
     # Verify no values are missing
     assert len(results) == 300  # Should have all values from 0 to 299
     assert sorted(results) == list(range(300))
+
+
+def test_iterate_in_background_preserves_order() -> None:
+    """Test that iterate_in_background yields every item in the original order."""
+
+    def range_gen(count: int) -> Iterator[int]:
+        for i in range(count):
+            yield i
+
+    assert list(iterate_in_background(range_gen(100), max_buffered=3)) == list(
+        range(100)
+    )
+    # inline mode
+    assert list(iterate_in_background(range_gen(10), max_buffered=0)) == list(range(10))
+
+
+def test_iterate_in_background_overlaps_stages() -> None:
+    """Test that chained stages run concurrently instead of one after the other."""
+
+    def slow_gen(count: int, delay: float) -> Iterator[int]:
+        for i in range(count):
+            time.sleep(delay)
+            yield i
+
+    def slow_stage(source: Iterator[int], delay: float) -> Iterator[int]:
+        for item in source:
+            time.sleep(delay)
+            yield item
+
+    start = time.monotonic()
+    results = []
+    for item in iterate_in_background(
+        slow_stage(iterate_in_background(slow_gen(5, 0.1), max_buffered=2), 0.1),
+        max_buffered=2,
+    ):
+        time.sleep(0.1)
+        results.append(item)
+    elapsed = time.monotonic() - start
+
+    assert results == list(range(5))
+    # serially this would take 1.5s, pipelined it should be close to 0.7s
+    assert elapsed < 1.2
+
+
+def test_iterate_in_background_applies_backpressure() -> None:
+    """Test that the producer never gets more than max_buffered items ahead."""
+    produced: list[int] = []
+
+    def tracking_gen() -> Iterator[int]:
+        for i in range(20):
+            produced.append(i)
+            yield i
+
+    max_lead = 0
+    for consumed, item in enumerate(
+        iterate_in_background(tracking_gen(), max_buffered=2)
+    ):
+        time.sleep(0.01)
+        # +1 for the item the consumer holds, +1 for the one blocked on put
+        max_lead = max(max_lead, len(produced) - consumed)
+
+    assert max_lead <= 4
+
+
+def test_iterate_in_background_propagates_exceptions() -> None:
+    """Test that exceptions in the producer are re-raised in the consumer."""
+
+    def failing_gen() -> Iterator[int]:
+        yield 1
+        raise ValueError("Producer failure")
+
+    results = []
+    with pytest.raises(ValueError, match="Producer failure"):
+        for item in iterate_in_background(failing_gen(), max_buffered=2):
+            results.append(item)
+
+    assert results == [1]
+
+
+def test_iterate_in_background_early_exit_stops_producer() -> None:
+    """Test that closing the consumer side stops and closes the producer."""
+    closed = threading.Event()
+
+    def infinite_gen() -> Generator[int, None, None]:
+        i = 0
+        try:
+            while True:
+                yield i
+                i += 1
+        finally:
+            closed.set()
+
+    background = iterate_in_background(
+        infinite_gen(), max_buffered=2, poll_interval=0.05
+    )
+    for item in background:
+        if item == 5:
+            break
+    background.close()
+
+    assert closed.wait(timeout=2)
+
+
+def test_iterate_in_background_preserves_contextvars() -> None:
+    """Test that the producer thread sees the caller's contextvars."""
+    test_context_var.set("background_value")
+
+    def context_gen() -> Iterator[str]:
+        for _ in range(3):
+            yield test_context_var.get()
+
+    assert (
+        list(iterate_in_background(context_gen(), max_buffered=1))
+        == ["background_value"] * 3
+    )
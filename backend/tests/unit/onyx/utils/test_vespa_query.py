@@ -49,18 +49,33 @@ class TestBuildVespaFilters:
         # Single ACL
         filters = IndexFilters(access_control_list=["user1"])
         result = build_vespa_filters(filters)
-        assert (
-            result
-            == f'!({HIDDEN}=true) and (access_control_list contains "user1") and '
-        )
+        assert result == f'!({HIDDEN}=true) and (access_control_list in ("user1")) and '
 
         # Multiple ACL's
         filters = IndexFilters(access_control_list=["user2", "group2"])
         result = build_vespa_filters(filters)
         assert (
             result
-            == f'!({HIDDEN}=true) and (access_control_list contains "user2" or access_control_list contains "group2") and '
+            == f'!({HIDDEN}=true) and (access_control_list in ("group2","user2")) and '
+        )
+
+    def test_acl_as_query_param(self) -> None:
+        """Test with the acl values passed as a query parameter."""
+        filters = IndexFilters(
+            access_control_list=["user2", "group2", "user2", 'group "quoted"']
+        )
+        params: dict[str, str | int | float] = {}
+        result = build_vespa_filters(filters, params=params)
+        assert result == f"!({HIDDEN}=true) and (access_control_list in (@acl)) and "
+        assert params == {"acl": '"group \\"quoted\\"","group2","user2"'}
+
+        # The yql does not grow with the number of acl entries
+        filters = IndexFilters(
+            access_control_list=[f"external_group:group_{i}" for i in range(5_000)]
         )
+        params = {}
+        assert build_vespa_filters(filters, params=params) == result
+        assert len(str(params["acl"]).split(",")) == 5_000
 
     def test_tenant_filter(self) -> None:
         """Test tenant ID filtering."""
@@ -137,14 +152,13 @@ class TestBuildVespaFilters:
         # Single document set
         filters = IndexFilters(access_control_list=[], document_set=["set1"])
         result = build_vespa_filters(filters)
-        assert f'!({HIDDEN}=true) and ({DOCUMENT_SETS} contains "set1") and ' == result
+        assert f'!({HIDDEN}=true) and ({DOCUMENT_SETS} in ("set1")) and ' == result
 
         # Multiple document sets
         filters = IndexFilters(access_control_list=[], document_set=["set1", "set2"])
         result = build_vespa_filters(filters)
         assert (
-            f'!({HIDDEN}=true) and ({DOCUMENT_SETS} contains "set1" or {DOCUMENT_SETS} contains "set2") and '
-            == result
+            f'!({HIDDEN}=true) and ({DOCUMENT_SETS} in ("set1","set2")) and ' == result
         )
 
         # Empty document sets
@@ -157,15 +171,12 @@ class TestBuildVespaFilters:
         # Single user file ID
         filters = IndexFilters(access_control_list=[], user_file_ids=[123])
         result = build_vespa_filters(filters)
-        assert f"!({HIDDEN}=true) and ({USER_FILE} = 123) and " == result
+        assert f"!({HIDDEN}=true) and ({USER_FILE} in (123)) and " == result
 
         # Multiple user file IDs
         filters = IndexFilters(access_control_list=[], user_file_ids=[123, 456])
         result = build_vespa_filters(filters)
-        assert (
-            f"!({HIDDEN}=true) and ({USER_FILE} = 123 or {USER_FILE} = 456) and "
-            == result
-        )
+        assert f"!({HIDDEN}=true) and ({USER_FILE} in (123,456)) and " == result
 
         # Empty user file IDs
         filters = IndexFilters(access_control_list=[], user_file_ids=[])
@@ -177,15 +188,12 @@ class TestBuildVespaFilters:
         # Single user folder ID
         filters = IndexFilters(access_control_list=[], user_folder_ids=[789])
         result = build_vespa_filters(filters)
-        assert f"!({HIDDEN}=true) and ({USER_FOLDER} = 789) and " == result
+        assert f"!({HIDDEN}=true) and ({USER_FOLDER} in (789)) and " == result
 
         # Multiple user folder IDs
         filters = IndexFilters(access_control_list=[], user_folder_ids=[789, 101])
         result = build_vespa_filters(filters)
-        assert (
-            f"!({HIDDEN}=true) and ({USER_FOLDER} = 789 or {USER_FOLDER} = 101) and "
-            == result
-        )
+        assert f"!({HIDDEN}=true) and ({USER_FOLDER} in (101,789)) and " == result
 
         # Empty user folder IDs
         filters = IndexFilters(access_control_list=[], user_folder_ids=[])
@@ -234,15 +242,12 @@ class TestBuildVespaFilters:
 
         # Build expected result piece by piece for readability
         expected = f"!({HIDDEN}=true) and "
-        expected += (
-            '(access_control_list contains "user1" or '
-            'access_control_list contains "group1") and '
-        )
+        expected += '(access_control_list in ("group1","user1")) and '
         expected += f'({SOURCE_TYPE} contains "web") and '
         expected += f'({METADATA_LIST} contains "color{INDEX_SEPARATOR}red") and '
-        expected += f'({DOCUMENT_SETS} contains "set1") and '
-        expected += f"({USER_FILE} = 123) and "
-        expected += f"({USER_FOLDER} = 789) and "
+        expected += f'({DOCUMENT_SETS} in ("set1")) and '
+        expected += f"({USER_FILE} in (123)) and "
+        expected += f"({USER_FOLDER} in (789)) and "
         cutoff_secs = int(datetime(2023, 1, 1, tzinfo=timezone.utc).timestamp())
         expected += f"!({DOC_UPDATED_AT} < {cutoff_secs}) and "
 
@@ -260,8 +265,7 @@ class TestBuildVespaFilters:
         )
         result = build_vespa_filters(filters)
         assert (
-            f'!({HIDDEN}=true) and ({DOCUMENT_SETS} contains "set1" or {DOCUMENT_SETS} contains "set2") and '
-            == result
+            f'!({HIDDEN}=true) and ({DOCUMENT_SETS} in ("set1","set2")) and ' == result
         )
 
         # All empty strings in document set
@@ -164,6 +164,15 @@ export const connectorConfigs: Record<
         name: "scroll_before_scraping",
         optional: true,
       },
+      {
+        type: "checkbox",
+        query: "Fast HTTP crawl:",
+        label: "Fast HTTP crawl",
+        description:
+          "Fetch pages concurrently without a browser, only pages that need JavaScript are loaded in the browser. Unchanged pages are skipped when re-indexing",
+        name: "http_first",
+        optional: true,
+      },
     ],
     overrideDefaultFreq: 60 * 60 * 24,
   },
@@ -1408,6 +1417,7 @@ export interface ConnectorSnapshot {
 export interface WebConfig {
   base_url: string;
   web_connector_type?: "recursive" | "single" | "sitemap";
+  http_first?: boolean;
 }
 
 export interface GithubConfig {